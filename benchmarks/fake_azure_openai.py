@@ -0,0 +1,265 @@
+"""
+ローカルで動作するAzure OpenAI互換のフェイクサーバー（負荷試験用）
+chat completions のエンドポイントを、Azureと同じ形式のリクエスト・レスポンスで提供する
+
+- response_format の json_schema に従ったJSONを生成して返す
+- stream=true の場合はServer-Sent Eventsでチャンクを返す
+- RPMの上限を超えたリクエストには 429 と Retry-After を返す
+- レイテンシ（平均・ばらつき）とエラー（429 / 500）の発生率を指定できる
+
+使い方:
+    python -m benchmarks.fake_azure_openai --port 8001 --latency 0.8 --jitter 0.3 --rpm 600
+    # APIサーバー側: AZURE_OPENAI_ENDPOINT=http://localhost:8001 AZURE_OPENAI_API_KEY=fake
+"""
+
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from ta_interview_briefing.text_normalizer import estimate_tokens
+
+
+# json_schema がないリクエストに返す解析結果
+DEFAULT_CONTENT = {
+    "summary": "周囲と協力しながら着実に物事を進めるタイプです。新しい環境にも比較的早く適応します。",
+    "risk_points": ["意思決定に時間がかかる場合がある", "自己主張が控えめ", "変化の多い環境での負荷"],
+    "attract_points": ["協調性が高い", "計画的に業務を進められる", "新しい環境への適応が早い"],
+    "notes_for_interviewer": ["判断に迷った経験を聞く", "チームでの役割を確認する", "ストレス時の対処を聞く"],
+}
+
+# ストリーミング時に1チャンクに含める文字数
+STREAM_CHUNK_CHARS = 16
+
+
+@dataclass
+class FakeServerConfig:
+    """フェイクサーバーの動作設定"""
+
+    latency: float = 0.5
+    jitter: float = 0.0
+    rpm: int = 0
+    error_rate_429: float = 0.0
+    error_rate_500: float = 0.0
+    retry_after: int = 1
+    api_key: Optional[str] = None
+    stream_chunk_delay: float = 0.01
+    seed: Optional[int] = None
+
+
+class _RpmLimiter:
+    """直近60秒のリクエスト数でRPMを制限する"""
+
+    def __init__(self, rpm: int):
+        self.rpm = rpm
+        self._requests: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Optional[int]:
+        """リクエストを受け付ける場合はNone、上限を超えている場合は待つべき秒数を返す"""
+        if self.rpm <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            while self._requests and now - self._requests[0] >= 60:
+                self._requests.popleft()
+            if len(self._requests) >= self.rpm:
+                return max(1, math.ceil(60 - (now - self._requests[0])))
+            self._requests.append(now)
+            return None
+
+
+def generate_from_schema(schema: Dict[str, Any], defs: Optional[Dict[str, Any]] = None) -> Any:
+    """JSON Schemaに適合するダミーの値を生成する"""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return generate_from_schema(defs[schema["$ref"].split("/")[-1]], defs)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            return generate_from_schema(schema[key][0], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    schema_type = schema.get("type", "string")
+    if isinstance(schema_type, list):
+        schema_type = next((item for item in schema_type if item != "null"), "null")
+    if schema_type == "object":
+        return {
+            name: generate_from_schema(child, defs)
+            for name, child in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        count = max(schema.get("minItems", 3), 1)
+        return [generate_from_schema(schema.get("items", {}), defs) for _ in range(count)]
+    if schema_type in ("integer", "number"):
+        return schema.get("minimum", 0)
+    if schema_type == "boolean":
+        return True
+    if schema_type == "null":
+        return None
+    name = schema.get("description") or schema.get("title") or "テキスト"
+    return f"{name}（フェイク応答）"
+
+
+def _response_content(body: Dict[str, Any]) -> str:
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return json.dumps(generate_from_schema(response_format["json_schema"]["schema"]), ensure_ascii=False)
+    return json.dumps(DEFAULT_CONTENT, ensure_ascii=False)
+
+
+def _usage(body: Dict[str, Any], content: str) -> Dict[str, int]:
+    prompt_tokens = sum(estimate_tokens(str(message.get("content", ""))) for message in body.get("messages", []))
+    completion_tokens = estimate_tokens(content)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _error(status_code: int, code: str, message: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": {"code": code, "message": message}},
+        headers=headers,
+    )
+
+
+def create_app(config: Optional[FakeServerConfig] = None) -> FastAPI:
+    """
+    フェイクサーバーのFastAPIアプリケーションを作成する
+
+    Args:
+        config: 動作設定（省略時はデフォルト）
+    """
+    config = config or FakeServerConfig()
+    rng = random.Random(config.seed)
+    limiter = _RpmLimiter(config.rpm)
+    app = FastAPI(title="Fake Azure OpenAI")
+    app.state.config = config
+    app.state.stats = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+    async def chat_completions(deployment: str, request: Request):
+        stats = app.state.stats
+        stats["requests"] += 1
+        if config.api_key and request.headers.get("api-key") != config.api_key:
+            return _error(401, "401", "Access denied due to invalid subscription key.")
+        if "api-version" not in request.query_params:
+            return _error(404, "404", "Resource not found")
+
+        retry_after = limiter.acquire()
+        if retry_after is None and rng.random() < config.error_rate_429:
+            retry_after = config.retry_after
+        if retry_after is not None:
+            stats["rate_limited"] += 1
+            return _error(
+                429, "429",
+                f"Requests to the ChatCompletions_Create Operation have exceeded call rate limit. "
+                f"Please retry after {retry_after} seconds.",
+                headers={"Retry-After": str(retry_after), "x-ratelimit-remaining-requests": "0"},
+            )
+        if rng.random() < config.error_rate_500:
+            stats["errors"] += 1
+            return _error(500, "InternalServerError", "The server had an error while processing your request.")
+
+        body = await request.json()
+        latency = max(0.0, rng.gauss(config.latency, config.jitter)) if config.jitter else config.latency
+        await asyncio.sleep(latency)
+
+        content = _response_content(body)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        if body.get("stream"):
+            return StreamingResponse(
+                _stream_chunks(completion_id, created, deployment, content, config.stream_chunk_delay),
+                media_type="text/event-stream",
+            )
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": deployment,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": _usage(body, content),
+        })
+
+    # base_url 指定（/deployments/...）と azure_endpoint 指定（/openai/deployments/...）の両方に対応する
+    app.add_api_route("/openai/deployments/{deployment}/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/deployments/{deployment}/chat/completions", chat_completions, methods=["POST"])
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.stats
+
+    return app
+
+
+async def _stream_chunks(completion_id: str, created: int, model: str, content: str, delay: float):
+    """chat.completion.chunk 形式のServer-Sent Eventsを生成する"""
+    def event(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+
+    yield event({"role": "assistant", "content": ""})
+    for start in range(0, len(content), STREAM_CHUNK_CHARS):
+        if delay:
+            await asyncio.sleep(delay)
+        yield event({"content": content[start:start + STREAM_CHUNK_CHARS]})
+    yield event({}, "stop")
+    yield "data: [DONE]\n\n"
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.fake_azure_openai",
+        description="Azure OpenAI互換のフェイクサーバー（負荷試験用）"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5, help="応答までの平均レイテンシ（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="レイテンシの標準偏差（秒）")
+    parser.add_argument("--rpm", type=int, default=0, help="RPMの上限（0で無制限）。超えると429を返す")
+    parser.add_argument("--error-rate-429", type=float, default=0.0, help="ランダムに429を返す割合")
+    parser.add_argument("--error-rate-500", type=float, default=0.0, help="ランダムに500を返す割合")
+    parser.add_argument("--retry-after", type=int, default=1, help="ランダムな429のRetry-After（秒）")
+    parser.add_argument("--api-key", default=None, help="指定した場合、api-keyヘッダーを検証する")
+    parser.add_argument("--seed", type=int, default=None, help="乱数のシード")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    config = FakeServerConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        rpm=args.rpm,
+        error_rate_429=args.error_rate_429,
+        error_rate_500=args.error_rate_500,
+        retry_after=args.retry_after,
+        api_key=args.api_key,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+ベンチマーク用のTalent Analytics風PDFの生成
+ページ数の異なる日本語のTAレポート（ヘッダー・フッター、スコア行、所見）を生成する
+"""
+
+import os
+import random
+from pathlib import Path
+from typing import Dict, Optional
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+
+# サイズ名 -> ページ数
+PDF_SIZES: Dict[str, int] = {
+    "small": 2,
+    "medium": 10,
+    "large": 40,
+}
+
+# 埋め込み用のTrueTypeフォント（PyPDF2でテキストを抽出できるPDFにするため）の候補
+TTF_FONT_NAME = "BenchJapanese"
+TTF_FONT_CANDIDATES = [
+    "/usr/share/fonts/opentype/ipaexfont-gothic/ipaexg.ttf",
+    "/usr/share/fonts/truetype/ipaexfont-gothic/ipaexg.ttf",
+    "/usr/share/fonts/truetype/fonts-japanese-gothic.ttf",
+    "/usr/share/fonts/truetype/takao-gothic/TakaoGothic.ttf",
+    "/Library/Fonts/ipaexg.ttf",
+]
+# TrueTypeフォントがない場合のCIDフォント（PyPDF2ではテキストが正しく抽出されない）
+CID_FONT_NAME = "HeiseiKakuGo-W5"
+
+TRAITS = [
+    "協調性", "外向性", "慎重性", "計画性", "自律性", "柔軟性", "達成志向", "共感性",
+    "論理性", "創造性", "ストレス耐性", "リーダーシップ",
+]
+
+SECTIONS = ["総合所見", "対人関係の特徴", "仕事の進め方", "ストレスへの反応", "面接での確認ポイント"]
+
+FINDINGS = [
+    "周囲と協力しながら物事を進めることを好む傾向があります。",
+    "新しい環境にも比較的早く適応し、変化を前向きに捉えます。",
+    "慎重に情報を集めてから判断するため、意思決定に時間がかかる場合があります。",
+    "目標が明確な場面では高い集中力を発揮します。",
+    "他者の意見を尊重する一方で、自分の考えを主張する場面は少なめです。",
+    "計画を立てて着実に実行することを得意とします。",
+]
+
+
+def find_ttf_font() -> Optional[str]:
+    """埋め込み用の日本語TrueTypeフォントを探す（JAPANESE_FONT_PATH を優先）"""
+    candidates = [os.getenv("JAPANESE_FONT_PATH")] + TTF_FONT_CANDIDATES
+    for candidate in candidates:
+        if candidate and Path(candidate).exists():
+            return candidate
+    return None
+
+
+def _register_font() -> str:
+    """フィクスチャ用のフォントを登録し、フォント名を返す"""
+    registered = pdfmetrics.getRegisteredFontNames()
+    font_path = find_ttf_font()
+    if font_path:
+        if TTF_FONT_NAME not in registered:
+            pdfmetrics.registerFont(TTFont(TTF_FONT_NAME, font_path))
+        return TTF_FONT_NAME
+    if CID_FONT_NAME not in registered:
+        pdfmetrics.registerFont(UnicodeCIDFont(CID_FONT_NAME))
+    return CID_FONT_NAME
+
+
+def fixture_font_kind() -> str:
+    """フィクスチャに使うフォントの種類（ttf / cid）"""
+    return "ttf" if find_ttf_font() else "cid"
+
+
+def generate_ta_pdf(path: Path, pages: int, seed: int = 0) -> Path:
+    """
+    Talent Analytics風のPDFを生成する
+
+    各ページに共通のヘッダー・フッター（ページ番号）と、スコア行・見出し付きの所見を配置する
+
+    Args:
+        path: 出力先のパス
+        pages: ページ数
+        seed: 本文を決める乱数のシード（同じシードからは同じPDFが生成される）
+    """
+    font_name = _register_font()
+    rng = random.Random(seed)
+    pdf = canvas.Canvas(str(path), pagesize=A4, invariant=1)
+    width, height = A4
+
+    for page in range(pages):
+        pdf.setFont(font_name, 9)
+        pdf.drawString(20 * mm, height - 12 * mm, "Talent Analytics 受検結果レポート　　受検者ID: BENCH-0001")
+        pdf.drawRightString(width - 20 * mm, 10 * mm, f"- {page + 1} -")
+
+        y = height - 25 * mm
+        pdf.setFont(font_name, 11)
+        for trait in rng.sample(TRAITS, 6):
+            pdf.drawString(25 * mm, y, f"{trait}　{rng.randint(20, 95)}")
+            y -= 6 * mm
+
+        for section in rng.sample(SECTIONS, 3):
+            y -= 4 * mm
+            pdf.setFont(font_name, 12)
+            pdf.drawString(20 * mm, y, f"【{section}】")
+            y -= 7 * mm
+            pdf.setFont(font_name, 10)
+            for finding in rng.sample(FINDINGS, 4):
+                pdf.drawString(25 * mm, y, finding)
+                y -= 6 * mm
+        pdf.showPage()
+
+    pdf.save()
+    return path
+
+
+def ensure_fixtures(directory: Path) -> Dict[str, Path]:
+    """
+    サイズごとのベンチマーク用PDFを生成する（生成済みの場合は再利用する）
+
+    日本語のTrueTypeフォントが見つからない場合はCIDフォントで生成する。
+    その場合、PyPDF2で抽出されるテキストは文字化けするため、ベンチマーク結果の
+    メタデータ（fixture_font）が異なる結果同士は比較しないこと
+
+    Returns:
+        サイズ名 -> PDFのパス
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    fixtures = {}
+    for name, pages in PDF_SIZES.items():
+        path = directory / f"ta_report_{name}_{fixture_font_kind()}.pdf"
+        if not path.exists():
+            generate_ta_pdf(path, pages)
+        fixtures[name] = path
+    return fixtures
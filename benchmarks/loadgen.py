@@ -0,0 +1,187 @@
+"""
+APIサーバーの負荷試験用ロードジェネレーター
+/analyze と /generate_pdf に一定のRPSでリクエストを送り、スループットとレイテンシのパーセンタイルを出力する
+
+リクエストは応答を待たずに予定時刻どおり送信し（オープンループ）、レイテンシは予定時刻から計測する
+（サーバーが詰まって送信が遅れた分もレイテンシに含まれる）
+
+使い方:
+    python -m benchmarks.loadgen --url http://localhost:8000 --rps 5 --duration 60 [--endpoint analyze]
+
+一括処理の負荷（--priority bulk）と同時に対話的なリクエストを送り、interactive のp95が変わらないかを確認できる
+あるテナントの大量投入（--tenant）と同時に別のテナントで送り、テナント間の公平な配分を確認できる
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .run import percentile, DEFAULT_FIXTURES_DIR
+
+
+DEFAULT_RPS = 2.0
+DEFAULT_DURATION_SECONDS = 30.0
+DEFAULT_MAX_IN_FLIGHT = 64
+DEFAULT_TIMEOUT_SECONDS = 120.0
+ENDPOINTS = ("analyze", "generate_pdf")
+
+
+def run_load(
+    url: str,
+    pdf_bytes: bytes,
+    endpoints: List[str],
+    rps: float,
+    duration: float,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    client: Optional[Any] = None,
+    priority: Optional[str] = None,
+    tenant: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    一定のRPSでリクエストを送信して結果を集計する
+
+    Args:
+        url: APIサーバーのURL
+        pdf_bytes: アップロードするPDFの内容
+        endpoints: リクエストを送るエンドポイント（順番に割り当てる）
+        rps: 1秒あたりのリクエスト数
+        duration: 送信を続ける秒数
+        max_in_flight: 同時に処理中にできるリクエスト数の上限（超えた分は送信待ちになる）
+        timeout: リクエストのタイムアウト（秒）
+        client: HTTPクライアント（テスト用。省略時はhttpx.Clientを作成する）
+        priority: X-Priority ヘッダーで送る優先度クラス（interactive / bulk、省略時はサーバーのデフォルト）
+        tenant: X-Tenant-Id ヘッダーで送るテナントID（省略時はサーバーのデフォルト）
+
+    Returns:
+        エンドポイントごとと全体の集計結果
+    """
+    total_requests = max(1, int(rps * duration))
+    own_client = client is None
+    client = client or httpx.Client(base_url=url, timeout=timeout)
+    records: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+    headers = {}
+    if priority:
+        headers["X-Priority"] = priority
+    if tenant:
+        headers["X-Tenant-Id"] = tenant
+
+    def send(index: int, scheduled: float) -> None:
+        endpoint = endpoints[index % len(endpoints)]
+        status: Any
+        try:
+            response = client.post(
+                f"/{endpoint}",
+                files={"file": ("report.pdf", pdf_bytes, "application/pdf")},
+                data={"candidate_name": "負荷試験"} if endpoint == "generate_pdf" else None,
+                headers=headers or None,
+            )
+            status = response.status_code
+        except Exception as e:
+            status = type(e).__name__
+        latency = time.perf_counter() - scheduled
+        with lock:
+            records.append({"endpoint": endpoint, "status": status, "latency": latency})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="loadgen") as executor:
+        for index in range(total_requests):
+            scheduled = started + index / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, index, scheduled)
+    elapsed = time.perf_counter() - started
+    if own_client:
+        client.close()
+
+    summary = {"overall": _summarize(records, elapsed)}
+    for endpoint in endpoints:
+        summary[endpoint] = _summarize([item for item in records if item["endpoint"] == endpoint], elapsed)
+    summary["config"] = {
+        "url": url, "endpoints": endpoints, "target_rps": rps, "duration_seconds": duration,
+        "max_in_flight": max_in_flight, "priority": priority, "tenant": tenant,
+    }
+    return summary
+
+
+def _summarize(records: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    ok = [item["latency"] for item in records if item["status"] == 200]
+    statuses = Counter(str(item["status"]) for item in records)
+    return {
+        "requests": len(records),
+        "ok": len(ok),
+        "errors": len(records) - len(ok),
+        "status_counts": dict(sorted(statuses.items())),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(ok, 50) * 1000, 1),
+        "p95_ms": round(percentile(ok, 95) * 1000, 1),
+        "p99_ms": round(percentile(ok, 99) * 1000, 1),
+        "max_ms": round(max(ok) * 1000, 1) if ok else 0.0,
+    }
+
+
+def _load_pdf(path: Optional[str]) -> bytes:
+    if path:
+        return Path(path).read_bytes()
+    from .fixtures import ensure_fixtures
+    return ensure_fixtures(Path(DEFAULT_FIXTURES_DIR))["medium"].read_bytes()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.loadgen",
+        description="APIサーバーに一定のRPSでリクエストを送り、スループットとレイテンシを計測"
+    )
+    parser.add_argument("--url", default="http://localhost:8000", help="APIサーバーのURL")
+    parser.add_argument("--endpoint", choices=ENDPOINTS + ("both",), default="both",
+                        help="リクエストを送るエンドポイント（デフォルト: 両方に交互に送る）")
+    parser.add_argument("--rps", type=float, default=DEFAULT_RPS,
+                        help=f"1秒あたりのリクエスト数（デフォルト: {DEFAULT_RPS}）")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION_SECONDS,
+                        help=f"送信を続ける秒数（デフォルト: {DEFAULT_DURATION_SECONDS}）")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help=f"同時に処理中にできるリクエスト数（デフォルト: {DEFAULT_MAX_IN_FLIGHT}）")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS,
+                        help=f"リクエストのタイムアウト（秒、デフォルト: {DEFAULT_TIMEOUT_SECONDS}）")
+    parser.add_argument("--priority", choices=("interactive", "bulk"), default=None,
+                        help="X-Priority ヘッダーで送る優先度クラス（省略時はサーバーのデフォルト: interactive）")
+    parser.add_argument("--tenant", default=None,
+                        help="X-Tenant-Id ヘッダーで送るテナントID（省略時はサーバーのデフォルト: default）")
+    parser.add_argument("--pdf", default=None, help="アップロードするPDF（省略時はベンチマーク用のPDFを生成）")
+    parser.add_argument("-o", "--output", default=None, help="結果のJSONファイルのパス（指定しない場合は標準出力）")
+    args = parser.parse_args(argv)
+
+    endpoints = list(ENDPOINTS) if args.endpoint == "both" else [args.endpoint]
+    summary = run_load(
+        args.url, _load_pdf(args.pdf), endpoints, args.rps, args.duration,
+        max_in_flight=args.max_in_flight, timeout=args.timeout, priority=args.priority,
+        tenant=args.tenant
+    )
+    output = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    overall = summary["overall"]
+    print(
+        f"{overall['ok']}/{overall['requests']}件成功 / {overall['throughput_rps']} req/s / "
+        f"p50 {overall['p50_ms']}ms / p95 {overall['p95_ms']}ms / p99 {overall['p99_ms']}ms",
+        file=sys.stderr
+    )
+    return 0 if overall["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
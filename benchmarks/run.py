@@ -0,0 +1,373 @@
+"""
+パフォーマンスベンチマーク
+PDF抽出・ブリーフィングPDF生成・APIのエンドツーエンド（LLMはモック）を計測し、結果をJSONで出力する
+
+使い方:
+    python -m benchmarks.run [--iterations N] [--concurrency N] [--llm-latency 秒] [-o results.json]
+    python -m benchmarks.run --compare benchmarks/baseline.json [--threshold 0.2]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import contextlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+from unittest.mock import patch
+
+from .fixtures import ensure_fixtures, fixture_font_kind
+
+
+DEFAULT_ITERATIONS = 20
+DEFAULT_WARMUP = 2
+DEFAULT_CONCURRENCY = 4
+DEFAULT_LLM_LATENCY_SECONDS = 0.5
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_FIXTURES_DIR = ".cache/benchmarks"
+
+BENCHMARK_GROUPS = ("extract", "render", "api")
+
+# モックのLLMが返す解析結果
+FAKE_ANALYSIS = {
+    "summary": "周囲と協力しながら着実に物事を進めるタイプです。" * 5,
+    "risk_points": ["意思決定に時間がかかる場合がある", "自己主張が控えめ", "変化の多い環境での負荷"],
+    "attract_points": ["協調性が高い", "計画的に業務を進められる", "新しい環境への適応が早い"],
+    "notes_for_interviewer": ["判断に迷った経験を聞く", "チームでの役割を確認する", "ストレス時の対処を聞く"],
+}
+
+
+# ---------------------------------------------------------------------------
+# 計測
+# ---------------------------------------------------------------------------
+
+def percentile(samples: List[float], pct: float) -> float:
+    """最近順位法によるパーセンタイル"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(len(ordered) * pct / 100))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """プロセスの最大常駐メモリ（MB、取得できない環境ではNone）"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linuxはキロバイト、macOSはバイト単位
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def measure(func: Callable[[], Any], iterations: int, warmup: int = DEFAULT_WARMUP,
+            concurrency: int = 1) -> Dict[str, Any]:
+    """
+    関数を繰り返し実行してレイテンシとスループットを計測する
+
+    Args:
+        func: 計測する関数
+        iterations: 計測する実行回数
+        warmup: 計測前に実行する回数
+        concurrency: 同時に実行するスレッド数
+
+    Returns:
+        iterations, concurrency, ops_per_sec, mean_ms, p50_ms, p95_ms, p99_ms, peak_rss_mb
+    """
+    for _ in range(warmup):
+        func()
+
+    def timed(_):
+        started = time.perf_counter()
+        func()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(timed, range(iterations)))
+    else:
+        latencies = [timed(index) for index in range(iterations)]
+    wall_seconds = time.perf_counter() - started
+
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "ops_per_sec": round(iterations / wall_seconds, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        # プロセス全体の最大値（それまでのベンチマークの分も含む）
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# ベンチマーク
+# ---------------------------------------------------------------------------
+
+def _configure_environment() -> None:
+    """キャッシュとOCRを無効にし、毎回同じ処理が実行されるようにする"""
+    os.environ["TA_EXTRACTION_CACHE_ENABLED"] = "0"
+    os.environ["TA_LLM_CACHE_BACKEND"] = "none"
+    os.environ["TA_OCR_ENABLED"] = "0"
+    os.environ["TA_ANALYSIS_STORE_ENABLED"] = "0"
+    os.environ["TA_RENDER_CACHE_BACKEND"] = "none"
+    os.environ["AZURE_OPENAI_ENDPOINT"] = "https://benchmark.invalid"
+    os.environ["AZURE_OPENAI_API_KEY"] = "benchmark"
+    os.environ["AZURE_OPENAI_DEPLOYMENT"] = "benchmark"
+    os.environ.setdefault("AZURE_OPENAI_API_VERSION", "2024-08-01-preview")
+
+    from ta_interview_briefing.azure_client import reset_completion_cache
+    from ta_interview_briefing.extraction_cache import reset_extraction_cache
+    from ta_interview_briefing.store import reset_analysis_store
+    from ta_interview_briefing.render_cache import reset_render_cache
+    reset_completion_cache()
+    reset_extraction_cache()
+    reset_analysis_store()
+    reset_render_cache()
+
+
+class _FakeCompletions:
+    """一定のレイテンシの後に固定の解析結果を返すLLMのモック"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def create(self, **params):
+        time.sleep(self.latency)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(FAKE_ANALYSIS, ensure_ascii=False)))],
+            usage=SimpleNamespace(prompt_tokens=1000, completion_tokens=500, total_tokens=1500),
+        )
+
+
+def _fake_azure_client(latency: float) -> SimpleNamespace:
+    return SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions(latency)))
+
+
+def bench_extract(fixtures: Dict[str, Path], iterations: int, warmup: int) -> Dict[str, Dict[str, Any]]:
+    """extract_text_from_pdf（プロンプト予算あり）をPDFのサイズごとに計測する"""
+    from ta_interview_briefing.azure_client import extract_text_from_pdf, MAX_TEXT_LENGTH
+    from ta_interview_briefing.ta_parser import compact_text_length
+
+    results = {}
+    for size, path in fixtures.items():
+        results[f"extract_text_from_pdf[{size}]"] = measure(
+            lambda: extract_text_from_pdf(str(path), max_chars=MAX_TEXT_LENGTH, measure=compact_text_length),
+            iterations, warmup
+        )
+        results[f"extract_text_from_pdf_full[{size}]"] = measure(
+            lambda: extract_text_from_pdf(str(path)), iterations, warmup
+        )
+    return results
+
+
+def bench_render(output_dir: Path, iterations: int, warmup: int) -> Dict[str, Dict[str, Any]]:
+    """generate_interview_pdf_from_azure を計測する"""
+    from ta_interview_briefing.pdf_builder import generate_interview_pdf_from_azure
+
+    output_path = output_dir / "render_output.pdf"
+    return {
+        "generate_interview_pdf_from_azure": measure(
+            lambda: generate_interview_pdf_from_azure(str(output_path), "ベンチマーク 太郎", FAKE_ANALYSIS),
+            iterations, warmup
+        )
+    }
+
+
+def bench_api(fixtures: Dict[str, Path], iterations: int, warmup: int,
+              concurrency: int, llm_latency: float) -> Dict[str, Dict[str, Any]]:
+    """FastAPIの /analyze と /generate_pdf をLLMをモックして計測する（同時実行あり）"""
+    from fastapi.testclient import TestClient
+    from ta_interview_briefing.api import app
+
+    client = TestClient(app)
+    content = fixtures["medium"].read_bytes()
+    results = {}
+    with patch("ta_interview_briefing.azure_client.get_azure_client",
+               return_value=_fake_azure_client(llm_latency)):
+        for endpoint in ("analyze", "generate_pdf"):
+            def call():
+                response = client.post(
+                    f"/{endpoint}",
+                    files={"file": ("report.pdf", content, "application/pdf")},
+                    data={"candidate_name": "ベンチマーク 太郎"} if endpoint == "generate_pdf" else None,
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(f"/{endpoint} が {response.status_code} を返しました: {response.text}")
+
+            results[f"api_{endpoint}[medium]"] = measure(call, iterations, warmup, concurrency)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(groups: List[str], iterations: int, warmup: int, concurrency: int,
+                   llm_latency: float, fixtures_dir: Path) -> Dict[str, Any]:
+    """
+    ベンチマークを実行して結果を返す
+
+    Returns:
+        {"meta": 実行環境と設定, "results": ベンチマーク名 -> 計測結果}
+    """
+    _configure_environment()
+    fixtures = ensure_fixtures(fixtures_dir)
+    results: Dict[str, Dict[str, Any]] = {}
+    if "extract" in groups:
+        results.update(bench_extract(fixtures, iterations, warmup))
+    if "render" in groups:
+        results.update(bench_render(fixtures_dir, iterations, warmup))
+    if "api" in groups:
+        results.update(bench_api(fixtures, iterations, warmup, concurrency, llm_latency))
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "fixture_font": fixture_font_kind(),
+            "iterations": iterations,
+            "concurrency": concurrency,
+            "llm_latency_seconds": llm_latency,
+        },
+        "results": results,
+    }
+
+
+# ---------------------------------------------------------------------------
+# ベースラインとの比較
+# ---------------------------------------------------------------------------
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    ベースラインと比較し、しきい値を超えて悪化したベンチマークを返す
+
+    p50レイテンシの増加率、またはスループット（ops/s）の低下率が threshold を超えた場合に悪化とみなす
+
+    Returns:
+        悪化したベンチマークのリスト（name, metric, baseline, current, change）
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        if base["p50_ms"] > 0:
+            change = result["p50_ms"] / base["p50_ms"] - 1
+            if change > threshold:
+                regressions.append({
+                    "name": name, "metric": "p50_ms",
+                    "baseline": base["p50_ms"], "current": result["p50_ms"], "change": round(change, 3),
+                })
+        if base["ops_per_sec"] > 0:
+            change = result["ops_per_sec"] / base["ops_per_sec"] - 1
+            if change < -threshold:
+                regressions.append({
+                    "name": name, "metric": "ops_per_sec",
+                    "baseline": base["ops_per_sec"], "current": result["ops_per_sec"], "change": round(change, 3),
+                })
+    return regressions
+
+
+def format_results(report: Dict[str, Any]) -> str:
+    """計測結果を表形式のテキストに整形する"""
+    lines = [f"{'benchmark':<44}{'ops/s':>10}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'RSS MB':>9}"]
+    for name, result in report["results"].items():
+        lines.append(
+            f"{name:<44}{result['ops_per_sec']:>10.2f}{result['p50_ms']:>11.2f}"
+            f"{result['p95_ms']:>11.2f}{result['p99_ms']:>11.2f}{result['peak_rss_mb'] or 0:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="PDF抽出・PDF生成・API（LLMはモック）のベンチマークを実行し、結果をJSONで出力"
+    )
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS,
+                        help=f"ベンチマークごとの計測回数（デフォルト: {DEFAULT_ITERATIONS}）")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP,
+                        help=f"計測前のウォームアップ回数（デフォルト: {DEFAULT_WARMUP}）")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"APIベンチマークの同時リクエスト数（デフォルト: {DEFAULT_CONCURRENCY}）")
+    parser.add_argument("--llm-latency", type=float, default=DEFAULT_LLM_LATENCY_SECONDS,
+                        help=f"モックのLLMのレイテンシ（秒、デフォルト: {DEFAULT_LLM_LATENCY_SECONDS}）")
+    parser.add_argument("--only", type=str, default=",".join(BENCHMARK_GROUPS),
+                        help="実行するベンチマーク（extract,render,api のカンマ区切り）")
+    parser.add_argument("--fixtures-dir", type=str, default=DEFAULT_FIXTURES_DIR,
+                        help=f"生成したPDFの保存先（デフォルト: {DEFAULT_FIXTURES_DIR}）")
+    parser.add_argument("-o", "--output", type=str, default=None,
+                        help="結果のJSONファイルのパス（指定しない場合は標準出力）")
+    parser.add_argument("--input", type=str, default=None,
+                        help="ベンチマークを実行せず、保存済みの結果をベースラインと比較する")
+    parser.add_argument("--compare", type=str, default=None,
+                        help="比較するベースラインのJSONファイル（悪化があれば終了コード1）")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"悪化とみなす変化率（デフォルト: {DEFAULT_THRESHOLD}）")
+    parser.add_argument("--verbose", action="store_true",
+                        help="処理中のログを表示する（デフォルトでは抑制）")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        report = json.loads(Path(args.input).read_text(encoding="utf-8"))
+    else:
+        groups = [group.strip() for group in args.only.split(",") if group.strip()]
+        unknown = set(groups) - set(BENCHMARK_GROUPS)
+        if unknown:
+            parser.error(f"不明なベンチマーク: {', '.join(sorted(unknown))}")
+        # 処理中のログ（print）は計測結果と混ざらないように抑制する
+        with contextlib.ExitStack() as stack:
+            log_stream = sys.stderr if args.verbose else stack.enter_context(open(os.devnull, "w"))
+            stack.enter_context(contextlib.redirect_stdout(log_stream))
+            report = run_benchmarks(
+                groups, args.iterations, args.warmup, args.concurrency,
+                args.llm_latency, Path(args.fixtures_dir)
+            )
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.output:
+            Path(args.output).write_text(output + "\n", encoding="utf-8")
+        else:
+            print(output)
+    print(format_results(report), file=sys.stderr)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if baseline["meta"].get("fixture_font") != report["meta"].get("fixture_font"):
+            print("⚠️  ベースラインとフィクスチャのフォントが異なるため、抽出の結果は比較できません", file=sys.stderr)
+        regressions = compare_results(report, baseline, args.threshold)
+        for item in regressions:
+            print(
+                f"❌ {item['name']}: {item['metric']} {item['baseline']} → {item['current']}"
+                f"（{item['change']:+.1%}）",
+                file=sys.stderr
+            )
+        if regressions:
+            return 1
+        print(f"✅ ベースラインからの悪化はありません（しきい値 {args.threshold:.0%}）", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,23 @@
 """
 FastAPIサーバー起動スクリプト
+
+    python run_api.py           # 本番環境用（CPU数に応じたワーカー、ta_interview_briefing/server.py）
+    python run_api.py --reload  # 開発用（1プロセス、コードの変更を自動で反映）
 """
 
+import sys
+
 import uvicorn
 
-if __name__ == "__main__":
-    uvicorn.run(
-        "ta_interview_briefing.api:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True  # 開発時のみ。本番環境ではFalseに
-    )
+from ta_interview_briefing.server import main
 
+if __name__ == "__main__":
+    if "--reload" in sys.argv[1:]:
+        uvicorn.run(
+            "ta_interview_briefing.api:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True  # 開発時のみ
+        )
+    else:
+        main()
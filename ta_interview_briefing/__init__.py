@@ -2,9 +2,15 @@
 Talent Analytics Interview Briefing Package
 """
 
-from .models import AnalysisResult
-from .azure_client import analyze_ta_pdf_with_azure
-from .pdf_builder import generate_interview_pdf_from_azure
+from ._lazy import load_lazy_attribute
+
+# 公開APIは初めて参照されたときにインポートする（PEP 562）
+# パッケージや models だけをインポートした場合に openai・PyPDF2・reportlab を読み込まないようにするため
+_LAZY_ATTRIBUTES = {
+    "AnalysisResult": (".models", "AnalysisResult"),
+    "analyze_ta_pdf_with_azure": (".azure_client", "analyze_ta_pdf_with_azure"),
+    "generate_interview_pdf_from_azure": (".pdf_builder", "generate_interview_pdf_from_azure"),
+}
 
 __all__ = [
     "AnalysisResult",
@@ -12,3 +18,10 @@ __all__ = [
     "generate_interview_pdf_from_azure",
 ]
 
+
+def __getattr__(name):
+    return load_lazy_attribute(globals(), name, _LAZY_ATTRIBUTES)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
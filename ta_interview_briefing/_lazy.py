@@ -0,0 +1,36 @@
+"""
+重い依存パッケージの遅延インポート
+モジュールの __getattr__（PEP 562）から呼び出し、属性が初めて参照されたときにインポートする
+"""
+
+import importlib
+from typing import Any, Dict, Optional, Tuple
+
+# 属性名 -> (モジュール名, モジュール内の属性名（Noneの場合はモジュール自体）)
+LazyTable = Dict[str, Tuple[str, Optional[str]]]
+
+
+def load_lazy_attribute(namespace: Dict[str, Any], name: str, table: LazyTable) -> Any:
+    """
+    遅延インポート対象の属性を読み込み、呼び出し元モジュールのグローバル変数に保存して返す
+
+    2回目以降はグローバル変数から直接参照されるため、__getattr__ は呼ばれない。
+    テストで unittest.mock.patch により差し替えられた値もそのまま返す
+
+    Args:
+        namespace: 呼び出し元モジュールの globals()
+        name: 属性名
+        table: 遅延インポート対象の定義
+
+    Raises:
+        AttributeError: 遅延インポート対象でない属性の場合
+    """
+    if name in namespace:
+        return namespace[name]
+    if name not in table:
+        raise AttributeError(f"module {namespace['__name__']!r} has no attribute {name!r}")
+    module_name, attribute = table[name]
+    module = importlib.import_module(module_name, package=namespace.get("__package__"))
+    value = module if attribute is None else getattr(module, attribute)
+    namespace[name] = value
+    return value
@@ -5,15 +5,32 @@ PDFをアップロードするとブリーフィングPDFを返すAPI
 
 import os
 import tempfile
+from functools import partial
 from pathlib import Path
-from typing import Optional
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
-from fastapi.responses import FileResponse
+from urllib.parse import quote
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Header, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
-from .azure_client import analyze_ta_pdf_with_azure
-from .pdf_builder import generate_interview_pdf_from_azure
-from .models import AnalysisResult
+from .azure_client import analyze_ta_pdf_with_azure, get_deployment_name, PROMPT_VERSION
+from .pdf_builder import briefing_cache_key, generate_interview_pdf_from_azure, render_interview_pdf
+from .models import AnalysisRecord, AnalysisResult, EstimateReport
+from .booklet import render_booklet
+from .deadline import Deadline, DeadlineExceeded, RequestAborted, deadline_from_header, run_with_deadline
+from .estimator import estimate_pdfs
+from .export import iter_briefing_zip
+from .formats import FORMAT_MEDIA_TYPES, FORMATS_VERSION, TEXT_RENDERERS, negotiate_format
+from .render_cache import make_render_cache_key
+from .render_pool import get_render_pool
+from .azure_auth import get_token_provider
+from .scheduler import (
+    DEFAULT_TENANT, PRIORITY_INTERACTIVE, configured_tenants, get_scheduler, validate_priority, validate_tenant
+)
+from .store import AnalysisStore, get_analysis_store, DEFAULT_QUERY_LIMIT, MAX_QUERY_LIMIT
+from .uploads import SpooledUpload, UploadSizeLimitMiddleware, configure_spooling, max_upload_files, spool_upload
 
 app = FastAPI(
     title="Talent Analytics PDF Analyzer API",
@@ -30,6 +47,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# アップロードのサイズ制限（1ファイルあたり TA_MAX_UPLOAD_BYTES、/estimate はファイル数の上限 TA_MAX_UPLOAD_FILES を掛けた分）
+# 上限を超えるリクエストはボディを読み切る前に 413 を返す
+app.add_middleware(UploadSizeLimitMiddleware, multi_file_paths=("/estimate",))
+# multipart のパース時、TA_UPLOAD_SPOOL_MAX_MEMORY を超えたファイルはメモリではなくディスクに保持する
+configure_spooling()
+
+
+# クライアントが切断した場合のステータス（レスポンスは届かないが、アクセスログで区別できるようにする）
+CLIENT_CLOSED_REQUEST = 499
+
+
+@app.exception_handler(RequestAborted)
+async def request_aborted_handler(request: Request, exc: RequestAborted):
+    """期限切れは 504、クライアントの切断によるキャンセルは 499 を返す"""
+    if isinstance(exc, DeadlineExceeded):
+        return JSONResponse(status_code=504, content={"detail": str(exc)})
+    return JSONResponse(status_code=CLIENT_CLOSED_REQUEST, content={"detail": str(exc)})
+
+
+@app.on_event("startup")
+def start_render_pool():
+    """レンダリング用のスレッドプールを起動時に作成し、フォントなどの初期化を最初のリクエストの前に済ませる"""
+    get_render_pool()
+
+
+@app.on_event("startup")
+def start_token_refresh():
+    """Entra ID認証の場合は、最初のリクエストの前にアクセストークンの取得とバックグラウンドでの更新を始める"""
+    try:
+        get_token_provider()
+    except Exception as e:
+        # 設定の誤りは解析のリクエストでエラーとして返すため、起動は止めない
+        print(f"⚠️  Azure OpenAIの認証の設定を確認してください: {e}")
+
 
 @app.get("/")
 async def root():
@@ -40,7 +91,16 @@ async def root():
         "endpoints": {
             "POST /analyze": "PDFをアップロードして解析結果をJSONで取得",
             "POST /generate_pdf": "PDFをアップロードしてブリーフィングPDFを生成",
-            "GET /health": "ヘルスチェック"
+            "POST /estimate": "PDFをアップロードしてトークン数・コストを見積もり（Azure OpenAIは呼び出さない）",
+            "GET /analyses?candidate=...": "候補者ID・候補者名で保存済みの解析結果を検索",
+            "GET /analyses/{id}": "保存済みの解析結果を取得",
+            "GET /analyses/{id}/pdf": "保存済みの解析結果からブリーフィングPDFを生成",
+            "GET /analyses/{id}/briefing": "保存済みの解析結果からブリーフィングを生成（PDF / HTML / Markdown / JSON）",
+            "GET /requisitions/{id}/briefings.zip": "求人IDの保存済みの解析結果からブリーフィングをまとめてZIPでダウンロード",
+            "GET /requisitions/{id}/booklet.pdf": "求人IDの保存済みの解析結果から、目次付きの1つのブリーフィングPDF（ブックレット）を生成",
+            "GET /health": "ヘルスチェック",
+            "GET /metrics/render": "レンダリング用スレッドプールの状態（ワーカー数・待機数・処理件数）",
+            "GET /metrics/scheduler": "Azure OpenAIの呼び出しのスケジューラーの状態（優先度クラス・テナントごとの待機数・順番待ちの時間・使用量）"
         }
     }
 
@@ -51,15 +111,220 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics/render")
+async def render_metrics():
+    """レンダリング用スレッドプールの状態（ワーカー数、待機中・実行中の件数、完了・失敗の件数、平均の待ち時間・処理時間）"""
+    return get_render_pool().metrics()
+
+
+@app.get("/metrics/scheduler")
+async def scheduler_metrics():
+    """
+    Azure OpenAIの呼び出しのスケジューラーの状態
+    （優先度クラスごとの予約分・待機中・実行中の件数、順番待ちの時間と、テナントごとの上限・使用量・所要時間）
+    """
+    scheduler = get_scheduler()
+    if scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **scheduler.metrics()}
+
+
+def _analyze_upload(
+    upload: SpooledUpload,
+    candidate_id: Optional[str] = None,
+    candidate_name: Optional[str] = None,
+    requisition_id: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    priority: str = PRIORITY_INTERACTIVE,
+    tenant: str = DEFAULT_TENANT,
+) -> Tuple[Dict[str, Any], Optional[AnalysisRecord]]:
+    """
+    アップロードされたPDFを解析し、解析結果ストアに保存する
+    同じPDF・モデル・プロンプトのバージョンの解析結果が保存済みの場合は、それを返す
+    （deadline を指定した場合は、抽出とAzure OpenAIの呼び出しをリクエストの期限内に行う。
+    Azure OpenAIの呼び出しは priority の優先度クラス・tenant のテナントとしてスケジューラーの順番を待つ）
+
+    Returns:
+        (解析結果の辞書, 保存したレコード) のタプル（ストアが無効、または保存に失敗した場合のレコードはNone）
+    """
+    store = get_analysis_store()
+    model = get_deployment_name() or ""
+    if store is not None:
+        record = store.find_by_content(upload.sha256, model, PROMPT_VERSION)
+        if record is not None:
+            print(f"✅ 保存済みの解析結果を使用します（ID: {record.id}）")
+            if requisition_id:
+                # 保存済みの解析結果をこの求人にも紐づける（解析結果と他の求人との紐づけは変えない）
+                try:
+                    record = store.link_requisition(record.id, requisition_id) or record
+                except Exception as store_error:
+                    print(f"⚠️  解析結果の保存に失敗しました: {store_error}")
+            return record.result.model_dump(), record
+
+    usage: Dict[str, Any] = {}
+    analysis = analyze_ta_pdf_with_azure(
+        upload.path, usage=usage, content_hash=upload.sha256, deadline=deadline, priority=priority, tenant=tenant
+    )
+
+    record = None
+    if store is not None:
+        try:
+            record = store.save(
+                analysis, upload.sha256, model, PROMPT_VERSION,
+                candidate_id=candidate_id, candidate_name=candidate_name, usage=usage,
+                requisition_id=requisition_id
+            )
+        except Exception as store_error:
+            # ストアの障害で解析自体を失敗させない
+            print(f"⚠️  解析結果の保存に失敗しました: {store_error}")
+    return analysis, record
+
+
+def _briefing_etag(candidate_name: str, analysis: Dict[str, Any], output_format: str = "pdf") -> str:
+    """ブリーフィングの強いETag（出力はバイト単位で決定的に生成されるため、入力のハッシュから求める）"""
+    if output_format == "pdf":
+        return f'"{briefing_cache_key(candidate_name, analysis)}"'
+    key = make_render_cache_key(analysis, candidate_name, f"{output_format}-{FORMATS_VERSION}")
+    return f'"{key}"'
+
+
+def _negotiate_format(accept: Optional[str], requested: Optional[str]) -> str:
+    """format クエリパラメータと Accept ヘッダーから出力形式を決める（未対応の形式は400）"""
+    try:
+        return negotiate_format(accept, requested)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _text_briefing_response(candidate_name: str, analysis: Dict[str, Any],
+                            output_format: str, headers: Dict[str, str]) -> Response:
+    """HTML / Markdown / JSON のブリーフィングを返す"""
+    content = TEXT_RENDERERS[output_format](candidate_name, analysis)
+    return Response(content=content, media_type=FORMAT_MEDIA_TYPES[output_format], headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match ヘッダーがETagに一致するか"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match は弱い比較（W/ の有無を区別しない）
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def _briefing_headers(etag: str, record: Optional[AnalysisRecord]) -> Dict[str, str]:
+    """ブリーフィングのレスポンスヘッダー（再ダウンロード時は If-None-Match で再検証させる）"""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept"}
+    if record is not None:
+        headers["X-Analysis-Id"] = record.id
+    return headers
+
+
+def _request_deadline(x_request_timeout: Optional[str]) -> Deadline:
+    """X-Request-Timeout ヘッダーと TA_REQUEST_TIMEOUT_SECONDS からリクエストの期限を決める（不正な値は400）"""
+    try:
+        return deadline_from_header(x_request_timeout)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _request_priority(x_priority: Optional[str]) -> str:
+    """X-Priority ヘッダーから優先度クラスを決める（省略時は interactive、未対応の値は400）"""
+    try:
+        return validate_priority((x_priority or PRIORITY_INTERACTIVE).strip().lower())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _request_tenant(x_tenant_id: Optional[str]) -> str:
+    """
+    X-Tenant-Id ヘッダーからテナントを決める（省略時は default、形式が正しくない場合は400）
+    TA_TENANTS でテナントを登録している場合、登録されていないテナントは403
+    """
+    try:
+        tenant = validate_tenant((x_tenant_id or DEFAULT_TENANT).strip())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    tenants = configured_tenants()
+    if tenants is not None and tenant != DEFAULT_TENANT and tenant not in tenants:
+        raise HTTPException(status_code=403, detail=f"登録されていないテナントです: {tenant}")
+    return tenant
+
+
+async def _analyze_within_deadline(request: Request, deadline: Deadline, upload: SpooledUpload,
+                                   candidate_id: Optional[str], candidate_name: Optional[str],
+                                   requisition_id: Optional[str],
+                                   priority: str = PRIORITY_INTERACTIVE,
+                                   tenant: str = DEFAULT_TENANT) -> Tuple[Dict[str, Any], Optional[AnalysisRecord]]:
+    """
+    アップロードされたPDFの解析をスレッドで行い、完了・期限切れ・クライアントの切断まで待つ
+    切断・期限切れの時点で待つのをやめ、解析中のスレッドは次の区切りで打ち切られる
+    """
+    try:
+        return await run_with_deadline(
+            deadline,
+            partial(_analyze_upload, upload, candidate_id, candidate_name, requisition_id,
+                    deadline=deadline, priority=priority, tenant=tenant),
+            stage="PDF解析",
+            is_disconnected=request.is_disconnected,
+        )
+    except RequestAborted:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"PDF解析に失敗しました: {str(e)}"
+        )
+
+
+def _require_analysis_store() -> AnalysisStore:
+    store = get_analysis_store()
+    if store is None:
+        raise HTTPException(
+            status_code=503,
+            detail="解析結果ストアが無効です（TA_ANALYSIS_STORE_ENABLED）"
+        )
+    return store
+
+
+def _get_analysis_record(analysis_id: str) -> AnalysisRecord:
+    record = _require_analysis_store().get(analysis_id)
+    if record is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"解析結果が見つかりません: {analysis_id}"
+        )
+    return record
+
+
 @app.post("/analyze", response_model=AnalysisResult)
 async def analyze_pdf(
-    file: UploadFile = File(..., description="Talent Analytics PDFファイル")
+    request: Request,
+    response: Response,
+    file: UploadFile = File(..., description="Talent Analytics PDFファイル"),
+    candidate_id: Optional[str] = Form(default=None, description="候補者ID"),
+    candidate_name: Optional[str] = Form(default=None, description="候補者名"),
+    requisition_id: Optional[str] = Form(default=None, description="求人ID"),
+    x_request_timeout: Optional[str] = Header(default=None),
+    x_priority: Optional[str] = Header(default=None),
+    x_tenant_id: Optional[str] = Header(default=None)
 ):
     """
     PDFをアップロードして解析結果をJSONで返す
+    （解析結果は保存され、IDを X-Analysis-Id ヘッダーで返す）
+    
+    リクエストの期限（X-Request-Timeout ヘッダー、TA_REQUEST_TIMEOUT_SECONDS）を過ぎた場合は 504、
+    クライアントが切断した場合は解析を打ち切る
     
     Args:
+        request: リクエスト（クライアントの切断の確認に使う）
         file: アップロードされたPDFファイル
+        candidate_id: 候補者ID（オプション、保存する解析結果に記録）
+        candidate_name: 候補者名（オプション、保存する解析結果に記録）
+        requisition_id: 求人ID（オプション、保存する解析結果に記録。ZIPエクスポートの単位）
+        x_request_timeout: リクエストの期限（秒、設定より短くする場合のみ有効）
+        x_priority: Azure OpenAIの呼び出しの優先度クラス（interactive / bulk、デフォルト: interactive）
+        x_tenant_id: テナントID（テナントごとの上限と公平な順番に使う、デフォルト: default）
         
     Returns:
         AnalysisResult: 解析結果（summary, risk_points, attract_points, notes_for_interviewer）
@@ -73,29 +338,28 @@ async def analyze_pdf(
             status_code=400,
             detail="PDFファイルをアップロードしてください"
         )
+    deadline = _request_deadline(x_request_timeout)
+    priority = _request_priority(x_priority)
+    tenant = _request_tenant(x_tenant_id)
     
     tmp_input_path = None
     
     try:
-        # 入力PDFを一時ファイルに保存
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_input:
-            content = await file.read()
-            tmp_input.write(content)
-            tmp_input_path = tmp_input.name
+        # 入力PDFをチャンク単位で一時ファイルに保存（サイズの上限を超えた時点で 413）
+        upload = await spool_upload(file)
+        tmp_input_path = upload.path
         
-        # PDFを解析
-        try:
-            analysis = analyze_ta_pdf_with_azure(tmp_input_path)
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"PDF解析に失敗しました: {str(e)}"
-            )
+        # PDFを解析（期限切れ・クライアントの切断で打ち切る）
+        analysis, record = await _analyze_within_deadline(
+            request, deadline, upload, candidate_id, candidate_name, requisition_id, priority, tenant
+        )
+        if record is not None:
+            response.headers["X-Analysis-Id"] = record.id
         
         # Pydanticモデルに変換して返す
         return AnalysisResult(**analysis)
         
-    except HTTPException:
+    except (HTTPException, RequestAborted):
         raise
     except Exception as e:
         raise HTTPException(
@@ -111,20 +375,115 @@ async def analyze_pdf(
                 pass
 
 
+@app.post("/estimate", response_model=EstimateReport)
+async def estimate(
+    files: List[UploadFile] = File(..., description="Talent Analytics PDFファイル（複数可）")
+):
+    """
+    PDFをアップロードして、解析した場合のトークン数・コスト・所要時間を見積もる
+    （抽出とプロンプト構築は /analyze と同じ処理を行い、Azure OpenAIは呼び出さない）
+    
+    Args:
+        files: アップロードされたPDFファイル
+        
+    Returns:
+        EstimateReport: ファイルごとの見積もりと合計
+        
+    Raises:
+        HTTPException: エラーが発生した場合
+    """
+    if len(files) > max_upload_files():
+        raise HTTPException(
+            status_code=413,
+            detail=f"一度にアップロードできるファイルは{max_upload_files()}件までです"
+        )
+    for file in files:
+        if not file.filename or not file.filename.lower().endswith('.pdf'):
+            raise HTTPException(
+                status_code=400,
+                detail="PDFファイルをアップロードしてください"
+            )
+    
+    tmp_paths = []
+    try:
+        # 入力PDFを一時ファイルに保存
+        for file in files:
+            upload = await spool_upload(file)
+            tmp_paths.append(upload.path)
+        
+        # 抽出とトークン数の計算はCPU処理のため、スレッドで行いイベントループを塞がない
+        report = await run_in_threadpool(estimate_pdfs, tmp_paths)
+        settings = report["settings"]
+        return EstimateReport(
+            files=[
+                {**item, "filename": file.filename}
+                for item, file in zip(report["files"], files)
+            ],
+            totals={
+                **report["totals"],
+                "currency": settings["currency"],
+                "tpm": settings["tpm"],
+                "rpm": settings["rpm"],
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"予期しないエラーが発生しました: {str(e)}"
+        )
+    finally:
+        # 一時ファイルをクリーンアップ
+        for tmp_path in tmp_paths:
+            if os.path.exists(tmp_path):
+                try:
+                    os.unlink(tmp_path)
+                except Exception:
+                    pass
+
+
 @app.post("/generate_pdf")
 async def generate_pdf(
+    request: Request,
     file: UploadFile = File(..., description="Talent Analytics PDFファイル"),
-    candidate_name: Optional[str] = Form(default="候補者", description="候補者名")
+    candidate_name: Optional[str] = Form(default="候補者", description="候補者名"),
+    candidate_id: Optional[str] = Form(default=None, description="候補者ID"),
+    requisition_id: Optional[str] = Form(default=None, description="求人ID"),
+    output_format: Optional[str] = Query(
+        default=None, alias="format", description="出力形式（pdf / html / markdown / json）。省略時は Accept ヘッダーで決める"
+    ),
+    accept: Optional[str] = Header(default=None),
+    if_none_match: Optional[str] = Header(default=None),
+    x_request_timeout: Optional[str] = Header(default=None),
+    x_priority: Optional[str] = Header(default=None),
+    x_tenant_id: Optional[str] = Header(default=None)
 ):
     """
-    PDFをアップロードして面接官向けブリーフィングPDFを生成する
+    PDFをアップロードして面接官向けブリーフィングを生成する
+    （解析結果は保存され、IDを X-Analysis-Id ヘッダーで返す）
+    
+    出力形式は format クエリパラメータ、なければ Accept ヘッダーで決める（デフォルトはPDF）。
+    生成したブリーフィングには強いETagを付け、If-None-Match が一致する再ダウンロードには 304 を返す。
+    リクエストの期限（X-Request-Timeout ヘッダー、TA_REQUEST_TIMEOUT_SECONDS）は抽出・Azure OpenAIの呼び出し・
+    レンダリングに引き継ぎ、過ぎた場合は 504 を返す。クライアントが切断した場合は解析を打ち切り、レンダリングしない
     
     Args:
+        request: リクエスト（クライアントの切断の確認に使う）
         file: アップロードされたPDFファイル
         candidate_name: 候補者名（オプション、デフォルト: "候補者"）
+        candidate_id: 候補者ID（オプション、保存する解析結果に記録）
+        requisition_id: 求人ID（オプション、保存する解析結果に記録。ZIPエクスポートの単位）
+        output_format: 出力形式（format クエリパラメータ）
+        accept: Acceptヘッダー
+        if_none_match: 前回のレスポンスのETag（If-None-Match ヘッダー）
+        x_request_timeout: リクエストの期限（秒、設定より短くする場合のみ有効）
+        x_priority: Azure OpenAIの呼び出しの優先度クラス（interactive / bulk、デフォルト: interactive）
+        x_tenant_id: テナントID（テナントごとの上限と公平な順番に使う、デフォルト: default）
         
     Returns:
-        生成されたブリーフィングPDFファイル
+        生成されたブリーフィング（PDF / HTML / Markdown / JSON）
         
     Raises:
         HTTPException: エラーが発生した場合
@@ -135,40 +494,54 @@ async def generate_pdf(
             status_code=400,
             detail="PDFファイルをアップロードしてください"
         )
+    output_format = _negotiate_format(accept, output_format)
+    deadline = _request_deadline(x_request_timeout)
+    priority = _request_priority(x_priority)
+    tenant = _request_tenant(x_tenant_id)
     
     # 一時ファイルに保存
     tmp_input_path = None
     tmp_output_path = None
     
     try:
-        # 入力PDFを一時ファイルに保存
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_input:
-            content = await file.read()
-            tmp_input.write(content)
-            tmp_input_path = tmp_input.name
+        # 入力PDFをチャンク単位で一時ファイルに保存（サイズの上限を超えた時点で 413）
+        upload = await spool_upload(file)
+        tmp_input_path = upload.path
+        
+        # PDFを解析（期限切れ・クライアントの切断で打ち切る）
+        analysis, record = await _analyze_within_deadline(
+            request, deadline, upload, candidate_id, candidate_name, requisition_id, priority, tenant
+        )
+        
+        # クライアントが同じブリーフィングを持っている場合は生成せずに 304 を返す
+        etag = _briefing_etag(candidate_name, analysis, output_format)
+        headers = _briefing_headers(etag, record)
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        if output_format != "pdf":
+            return _text_briefing_response(candidate_name, analysis, output_format, headers)
         
         # 出力PDFの一時ファイルパス
         output_filename = f"{Path(file.filename).stem}_interview_briefing.pdf"
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_output:
             tmp_output_path = tmp_output.name
         
-        # PDFを解析
-        try:
-            analysis = analyze_ta_pdf_with_azure(tmp_input_path)
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"PDF解析に失敗しました: {str(e)}"
-            )
-        
-        # ブリーフィングPDFを生成
+        # ブリーフィングPDFを生成（レイアウトはレンダリング用のスレッドプールで行い、イベントループを塞がない）
+        # 解析中にクライアントが切断した・期限を過ぎた場合は生成しない
         try:
-            generate_interview_pdf_from_azure(
-                tmp_output_path,
-                candidate_name,
-                analysis
+            await run_with_deadline(
+                deadline,
+                partial(generate_interview_pdf_from_azure, tmp_output_path, candidate_name, analysis),
+                stage="ブリーフィングPDFの生成",
+                is_disconnected=request.is_disconnected,
+                submit=get_render_pool().submit,
+                on_abandon=partial(_unlink_quietly, tmp_output_path),
             )
+        except RequestAborted:
+            # 生成中のPDFは on_abandon で生成の完了後に削除する
+            raise
         except Exception as e:
+            _unlink_quietly(tmp_output_path)
             raise HTTPException(
                 status_code=500,
                 detail=f"PDF生成に失敗しました: {str(e)}"
@@ -179,11 +552,12 @@ async def generate_pdf(
             tmp_output_path,
             media_type="application/pdf",
             filename=output_filename,
-            background=None  # レスポンス送信後にファイルを削除
+            headers=headers,
+            background=BackgroundTask(_unlink_quietly, tmp_output_path),  # 送信後に一時ファイルを削除
         )
         
-    except HTTPException:
-        # HTTPExceptionはそのまま再発生
+    except (HTTPException, RequestAborted):
+        # HTTPException・期限切れ・キャンセルはそのまま再発生
         raise
     except Exception as e:
         # 予期しないエラー
@@ -198,5 +572,216 @@ async def generate_pdf(
                 os.unlink(tmp_input_path)
             except Exception:
                 pass
-        # 出力ファイルはFileResponseが削除するため、ここでは削除しない
+        # 出力ファイルはFileResponseの送信後（中断した場合は生成の完了後）に削除するため、ここでは削除しない
+
+
+
+@app.get("/analyses", response_model=List[AnalysisRecord])
+async def list_analyses(
+    candidate: str = Query(..., description="候補者IDまたは候補者名"),
+    limit: int = Query(default=DEFAULT_QUERY_LIMIT, ge=1, le=MAX_QUERY_LIMIT, description="取得する件数の上限")
+):
+    """
+    候補者IDまたは候補者名で保存済みの解析結果を検索する（新しい順）
+    
+    Args:
+        candidate: 候補者IDまたは候補者名
+        limit: 取得する件数の上限
+        
+    Returns:
+        List[AnalysisRecord]: 保存済みの解析結果
+    """
+    return _require_analysis_store().find_by_candidate(candidate, limit=limit)
+
+
+@app.get("/analyses/{analysis_id}", response_model=AnalysisRecord)
+async def get_analysis(analysis_id: str):
+    """
+    保存済みの解析結果を取得する
+    
+    Args:
+        analysis_id: 解析結果のID（/analyze・/generate_pdf の X-Analysis-Id ヘッダー）
+        
+    Returns:
+        AnalysisRecord: 保存済みの解析結果
+        
+    Raises:
+        HTTPException: 見つからない場合は404
+    """
+    return _get_analysis_record(analysis_id)
+
+
+async def _stored_briefing_response(analysis_id: str, candidate_name: Optional[str],
+                                    output_format: str, if_none_match: Optional[str]) -> Response:
+    """保存済みの解析結果からブリーフィングを生成して返す（ETagが一致する場合は 304）"""
+    record = _get_analysis_record(analysis_id)
+    name = candidate_name or record.candidate_name or "候補者"
+    analysis = record.result.model_dump()
+    
+    etag = _briefing_etag(name, analysis, output_format)
+    headers = _briefing_headers(etag, record)
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    if output_format != "pdf":
+        return _text_briefing_response(name, analysis, output_format, headers)
+    
+    try:
+        content = await get_render_pool().run(render_interview_pdf, name, analysis)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"PDF生成に失敗しました: {str(e)}"
+        )
+    
+    filename = f"{record.candidate_id or analysis_id}_interview_briefing.pdf"
+    headers["Content-Disposition"] = f"attachment; filename*=utf-8''{quote(filename)}"
+    return Response(content=content, media_type="application/pdf", headers=headers)
+
+
+@app.get("/analyses/{analysis_id}/briefing")
+async def get_analysis_briefing(
+    analysis_id: str,
+    candidate_name: Optional[str] = Query(default=None, description="候補者名（省略時は保存済みの候補者名）"),
+    output_format: Optional[str] = Query(
+        default=None, alias="format", description="出力形式（pdf / html / markdown / json）。省略時は Accept ヘッダーで決める"
+    ),
+    accept: Optional[str] = Header(default=None),
+    if_none_match: Optional[str] = Header(default=None)
+):
+    """
+    保存済みの解析結果からブリーフィングを生成する（Azure OpenAIは呼び出さない）
+    
+    出力形式は format クエリパラメータ、なければ Accept ヘッダーで決める（デフォルトはPDF）。
+    If-None-Match がETagに一致する場合は 304 を返す
+    
+    Args:
+        analysis_id: 解析結果のID
+        candidate_name: 候補者名（省略時は保存済みの候補者名、なければ "候補者"）
+        output_format: 出力形式（format クエリパラメータ）
+        accept: Acceptヘッダー
+        if_none_match: 前回のレスポンスのETag（If-None-Match ヘッダー）
+        
+    Returns:
+        生成されたブリーフィング（PDF / HTML / Markdown / JSON）
+    """
+    return await _stored_briefing_response(
+        analysis_id, candidate_name, _negotiate_format(accept, output_format), if_none_match
+    )
+
+
+@app.get("/analyses/{analysis_id}/pdf")
+async def get_analysis_pdf(
+    analysis_id: str,
+    candidate_name: Optional[str] = Query(default=None, description="候補者名（省略時は保存済みの候補者名）"),
+    if_none_match: Optional[str] = Header(default=None)
+):
+    """
+    保存済みの解析結果からブリーフィングPDFを生成する（Azure OpenAIは呼び出さない）
+    
+    生成済みPDFのキャッシュから返し、If-None-Match がETagに一致する場合は 304 を返す
+    
+    Args:
+        analysis_id: 解析結果のID
+        candidate_name: 候補者名（省略時は保存済みの候補者名、なければ "候補者"）
+        if_none_match: 前回のレスポンスのETag（If-None-Match ヘッダー）
+        
+    Returns:
+        生成されたブリーフィングPDF
+    """
+    return await _stored_briefing_response(analysis_id, candidate_name, "pdf", if_none_match)
+
+
+@app.get("/requisitions/{requisition_id}/briefings.zip")
+async def export_requisition_briefings(
+    requisition_id: str,
+    output_format: Optional[str] = Query(
+        default=None, alias="format", description="ZIPに含めるブリーフィングの形式（pdf / html / markdown / json、デフォルト: pdf）"
+    )
+):
+    """
+    求人IDの保存済みの解析結果から、ブリーフィングをまとめたZIPを生成する（Azure OpenAIは呼び出さない）
+    
+    解析結果を1件ずつ読み込んでブリーフィングを生成し、ZIPに書き込んだ分から順に送信する。
+    全件をメモリに載せないため、候補者数によらずメモリ使用量は一定
+    
+    Args:
+        requisition_id: 求人ID（/analyze・/generate_pdf の requisition_id）
+        output_format: ブリーフィングの形式（format クエリパラメータ）
+        
+    Returns:
+        ブリーフィングのZIP（チャンク転送）
+        
+    Raises:
+        HTTPException: 未対応の形式は400、解析結果がない場合は404
+    """
+    output_format = _negotiate_format(None, output_format)
+    store = _require_analysis_store()
+    if not store.has_requisition(requisition_id):
+        raise HTTPException(
+            status_code=404,
+            detail=f"求人IDの解析結果が見つかりません: {requisition_id}"
+        )
+    
+    # 同期ジェネレータはスレッドプールで1チャンクずつ進めるため、生成中もイベントループを塞がない
+    filename = f"{requisition_id}_interview_briefings.zip"
+    return StreamingResponse(
+        iter_briefing_zip(store.iter_by_requisition(requisition_id), output_format),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}"},
+    )
+
+
+def _unlink_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
 
+
+@app.get("/requisitions/{requisition_id}/booklet.pdf")
+async def export_requisition_booklet(requisition_id: str):
+    """
+    求人IDの保存済みの解析結果から、全候補者のブリーフィングをまとめた1つのPDFを生成する（Azure OpenAIは呼び出さない）
+    
+    候補者ごとに改ページとしおりを入れ、末尾に目次（候補者名とページ番号）を付ける。
+    解析結果は1件ずつ読み込んでレイアウトし、生成したPDFは一時ファイルから送信する
+    
+    Args:
+        requisition_id: 求人ID（/analyze・/generate_pdf の requisition_id）
+        
+    Returns:
+        ブリーフィングのブックレットPDF
+        
+    Raises:
+        HTTPException: 解析結果がない場合は404
+    """
+    store = _require_analysis_store()
+    if not store.has_requisition(requisition_id):
+        raise HTTPException(
+            status_code=404,
+            detail=f"求人IDの解析結果が見つかりません: {requisition_id}"
+        )
+    
+    candidates = (
+        (record.candidate_name or "候補者", record.result.model_dump())
+        for record in store.iter_by_requisition(requisition_id)
+    )
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_output:
+        tmp_output_path = tmp_output.name
+    try:
+        # レイアウトはCPUを使うため、イベントループを塞がないようレンダリング用のスレッドプールで行う
+        await get_render_pool().run(render_booklet, candidates, tmp_output_path)
+    except Exception as e:
+        _unlink_quietly(tmp_output_path)
+        raise HTTPException(
+            status_code=500,
+            detail=f"PDF生成に失敗しました: {str(e)}"
+        )
+    
+    filename = f"{requisition_id}_interview_booklet.pdf"
+    return FileResponse(
+        tmp_output_path,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}"},
+        background=BackgroundTask(_unlink_quietly, tmp_output_path),  # 送信後に一時ファイルを削除
+    )
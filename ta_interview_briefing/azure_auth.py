@@ -0,0 +1,200 @@
+"""
+Azure OpenAIのMicrosoft Entra ID（旧Azure AD）認証
+資格情報（マネージドIDなど）から取得したアクセストークンをプロセス全体でキャッシュし、
+有効期限の前にバックグラウンドで更新する（解析のたびにトークンを取得しない）
+"""
+
+import os
+import time
+import threading
+from typing import Any, NamedTuple, Optional
+
+
+AUTH_MODE_KEY = "key"
+AUTH_MODE_ENTRA = "entra"
+AUTH_MODE_LOCAL = "local"
+AUTH_MODES = (AUTH_MODE_KEY, AUTH_MODE_ENTRA, AUTH_MODE_LOCAL)
+
+# Azure OpenAI（Cognitive Services）のトークンのスコープ
+DEFAULT_TOKEN_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+# 有効期限のこの秒数前にバックグラウンドで更新する（環境変数 TA_AZURE_TOKEN_REFRESH_MARGIN_SECONDS で上書き可能）
+DEFAULT_TOKEN_REFRESH_MARGIN_SECONDS = 300.0
+
+# 更新に失敗した場合に再試行するまでの秒数
+TOKEN_RETRY_SECONDS = 30.0
+
+# 有効期限までの残りがこの秒数未満のトークンは使わず、呼び出し側で取得し直す
+_TOKEN_EXPIRY_SKEW_SECONDS = 30.0
+
+# 有効期間の短いトークンを更新し続けないための、更新の最短間隔（秒）
+_MIN_REFRESH_INTERVAL_SECONDS = 1.0
+
+
+class AccessToken(NamedTuple):
+    """アクセストークンと有効期限（UNIX時刻、azure.core.credentials.AccessToken と同じ形）"""
+
+    token: str
+    expires_on: int
+
+
+class LocalTokenCredential:
+    """
+    ローカル開発・テスト用の資格情報（Entra IDに接続せず、固定のトークンを発行する）
+
+    azure-identity の資格情報と同じ get_token を持つ。取得した回数を calls で確認できる
+    """
+
+    def __init__(self, token: str = "local-development-token", lifetime_seconds: float = 3600.0):
+        self.token = token
+        self.lifetime_seconds = lifetime_seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        return AccessToken(f"{self.token}-{calls}", int(time.time() + self.lifetime_seconds))
+
+
+class CachedTokenProvider:
+    """
+    資格情報から取得したトークンをキャッシュして返すトークンプロバイダー
+
+    AzureOpenAI の azure_ad_token_provider に渡す（呼び出しのたびにキャッシュ済みのトークンを返す）。
+    バックグラウンドのスレッドが有効期限の refresh_margin_seconds 前に更新するため、
+    呼び出し側がトークンの取得を待つのは、起動直後の最初の取得と、更新が失敗し続けて期限が切れた場合だけ
+    """
+
+    def __init__(self, credential: Any, scope: str = DEFAULT_TOKEN_SCOPE,
+                 refresh_margin_seconds: float = DEFAULT_TOKEN_REFRESH_MARGIN_SECONDS):
+        self.credential = credential
+        self.scope = scope
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.refreshes = 0
+        self.failures = 0
+        self._token: Optional[AccessToken] = None
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "CachedTokenProvider":
+        """バックグラウンドでの取得・更新を開始する（最初のトークンもバックグラウンドで取得する）"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ta-azure-token", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """バックグラウンドでの更新を停止する"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def _usable(self, token: Optional[AccessToken]) -> bool:
+        return token is not None and token.expires_on - time.time() > _TOKEN_EXPIRY_SKEW_SECONDS
+
+    def _refresh_locked(self) -> AccessToken:
+        token = self.credential.get_token(self.scope)
+        self._token = token
+        self.refreshes += 1
+        return token
+
+    def _next_refresh_in(self) -> float:
+        """次に更新するまでの秒数（有効期間が更新の余裕より短いトークンは、残りの半分が過ぎた時点で更新する）"""
+        token = self._token
+        if token is None:
+            return 0.0
+        remaining = token.expires_on - time.time()
+        return max(_MIN_REFRESH_INTERVAL_SECONDS, remaining - self.refresh_margin_seconds, remaining / 2)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            if self._stop_event.wait(self._next_refresh_in()):
+                return
+            try:
+                with self._refresh_lock:
+                    self._refresh_locked()
+            except Exception as e:
+                # 更新に失敗しても、期限内のトークンはそのまま使い続ける
+                self.failures += 1
+                print(f"⚠️  Azure OpenAIのアクセストークンの更新に失敗しました（{TOKEN_RETRY_SECONDS:g}秒後に再試行します）: {e}")
+                self._stop_event.wait(TOKEN_RETRY_SECONDS)
+
+    def __call__(self) -> str:
+        """有効なトークンを返す（キャッシュがない・期限切れの場合だけ、その場で取得する）"""
+        token = self._token
+        if self._usable(token):
+            return token.token
+        with self._refresh_lock:
+            # 待っている間に他のスレッドが取得した場合はそれを使う
+            token = self._token
+            if self._usable(token):
+                return token.token
+            return self._refresh_locked().token
+
+
+def azure_auth_mode() -> str:
+    """
+    環境変数 AZURE_OPENAI_AUTH の認証方式（key / entra / local、デフォルト: key）
+
+    Raises:
+        ValueError: 未対応の値の場合
+    """
+    mode = os.getenv("AZURE_OPENAI_AUTH", AUTH_MODE_KEY).strip().lower()
+    if mode not in AUTH_MODES:
+        raise ValueError(f"AZURE_OPENAI_AUTH には {' / '.join(AUTH_MODES)} のいずれかを指定してください: {mode}")
+    return mode
+
+
+def _create_credential(mode: str) -> Any:
+    if mode == AUTH_MODE_LOCAL:
+        return LocalTokenCredential()
+    try:
+        from azure.identity import DefaultAzureCredential
+    except ImportError as e:
+        raise ValueError("Entra ID認証には azure-identity パッケージが必要です（pip install azure-identity）") from e
+    # マネージドID・ワークロードID・環境変数のサービスプリンシパル・Azure CLIのログインを順に試す
+    # （ユーザー割り当てマネージドIDは AZURE_CLIENT_ID で指定する）
+    return DefaultAzureCredential(exclude_interactive_browser_credential=True)
+
+
+_token_provider: Optional[CachedTokenProvider] = None
+_token_provider_lock = threading.Lock()
+
+
+def get_token_provider() -> Optional[CachedTokenProvider]:
+    """
+    プロセス全体で共有するトークンプロバイダーを返す（初回にバックグラウンドでの取得を開始する）
+    AZURE_OPENAI_AUTH=key（デフォルト）の場合はNone（APIキーで認証する）
+    """
+    global _token_provider
+    mode = azure_auth_mode()
+    if mode == AUTH_MODE_KEY:
+        return None
+    with _token_provider_lock:
+        if _token_provider is None:
+            _token_provider = CachedTokenProvider(
+                _create_credential(mode),
+                scope=os.getenv("AZURE_OPENAI_TOKEN_SCOPE", DEFAULT_TOKEN_SCOPE),
+                refresh_margin_seconds=float(
+                    os.getenv("TA_AZURE_TOKEN_REFRESH_MARGIN_SECONDS", DEFAULT_TOKEN_REFRESH_MARGIN_SECONDS)
+                ),
+            ).start()
+        return _token_provider
+
+
+def set_token_provider(provider: Optional[CachedTokenProvider]) -> None:
+    """トークンプロバイダーを差し替える（テスト用。以前のプロバイダーは停止する）"""
+    global _token_provider
+    with _token_provider_lock:
+        previous, _token_provider = _token_provider, provider
+    if previous is not None and previous is not provider:
+        previous.stop()
+
+
+def reset_token_provider() -> None:
+    """トークンプロバイダーを停止して破棄し、次回利用時に環境変数から作り直す"""
+    set_token_provider(None)
@@ -5,23 +5,498 @@ PDFを解析して面接官向けの情報を抽出する
 
 import os
 import json
-from typing import Dict, Any
+import math
+import time
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from contextlib import nullcontext
+from itertools import chain
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional
 from pathlib import Path
-from openai import AzureOpenAI
-from PyPDF2 import PdfReader
-from dotenv import load_dotenv
 
+from ._lazy import load_lazy_attribute
 from .models import AnalysisResult
+from .ta_parser import compact_ta_report_text, compact_text_length
+from .text_normalizer import normalize_pages
+from . import ocr
+from .extraction_cache import file_sha256, get_extraction_cache
+from .deadline import Deadline, DeadlineExceeded, RequestAborted
+from .azure_auth import get_token_provider
+from .scheduler import DEFAULT_TENANT, PRIORITY_INTERACTIVE, estimate_request_tokens, get_scheduler
 
-load_dotenv()
+
+# 重い依存パッケージは初めて使うときにインポートする（PEP 562）
+# モジュール内からは _lazy() 経由で参照する（unittest.mock.patch で差し替えた値も参照される）
+_LAZY_ATTRIBUTES = {
+    "AzureOpenAI": ("openai", "AzureOpenAI"),
+    "PyPDF2": ("PyPDF2", None),
+    "PdfReader": ("PyPDF2", "PdfReader"),
+}
+
+
+def __getattr__(name):
+    return load_lazy_attribute(globals(), name, _LAZY_ATTRIBUTES)
+
+
+def _lazy(name: str) -> Any:
+    """遅延インポート対象の属性を返す"""
+    return load_lazy_attribute(globals(), name, _LAZY_ATTRIBUTES)
+
+
+_dotenv_loaded = False
+
+
+def _load_dotenv_once() -> None:
+    """.envファイルの環境変数を読み込む（インポート時ではなく、設定を初めて参照するときに1回だけ）"""
+    global _dotenv_loaded
+    if _dotenv_loaded:
+        return
+    from dotenv import load_dotenv
+    load_dotenv()
+    _dotenv_loaded = True
+
+
+# ---------------------------------------------------------------------------
+# LLMレスポンスキャッシュ
+# ---------------------------------------------------------------------------
+
+# キャッシュのデフォルト設定（環境変数で上書き可能）
+DEFAULT_LLM_CACHE_BACKEND = "memory"
+DEFAULT_LLM_CACHE_MAX_ENTRIES = 1000
+DEFAULT_LLM_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_LLM_CACHE_PATH = ".cache/llm_cache.sqlite3"
+DEFAULT_LLM_CACHE_REDIS_URL = "redis://localhost:6379/0"
+
+
+def _normalize_prompt_text(text: str) -> str:
+    """キャッシュキー用にプロンプトの表記揺れ（全角・半角、空白、改行）を吸収する"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def make_completion_cache_key(api_params: Dict[str, Any]) -> str:
+    """
+    Azure OpenAIへのリクエストパラメータからキャッシュキーを生成する
+
+    (デプロイメント名, 正規化したシステムプロンプト, 正規化したユーザーテキスト,
+    response_format, temperature) のハッシュをキーとするため、
+    メタデータだけが異なる同一内容のPDFは同じキーになる
+
+    Args:
+        api_params: chat.completions.create() に渡すパラメータ
+
+    Returns:
+        キャッシュキー（SHA-256の16進文字列）
+    """
+    messages = {message["role"]: message["content"] for message in api_params["messages"]}
+    fingerprint = {
+        "deployment": api_params["model"],
+        "system": _normalize_prompt_text(messages.get("system", "")),
+        "user": _normalize_prompt_text(messages.get("user", "")),
+        "response_format": api_params.get("response_format"),
+        "temperature": api_params.get("temperature"),
+    }
+    serialized = json.dumps(fingerprint, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """LLMレスポンスキャッシュの基底クラス（値は解析結果のJSON文字列）"""
+    
+    def get(self, key: str) -> Optional[str]:
+        """キーに対応する値を返す（存在しない・期限切れの場合はNone）"""
+        raise NotImplementedError
+    
+    def set(self, key: str, value: str) -> None:
+        """キーに値を保存する"""
+        raise NotImplementedError
+    
+    def clear(self) -> None:
+        """すべてのエントリを削除する"""
+        raise NotImplementedError
+
+
+class MemoryCompletionCache(CompletionCache):
+    """プロセス内メモリのLRUキャッシュ（件数上限とTTLで削除）"""
+    
+    def __init__(self, max_entries: int = DEFAULT_LLM_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_LLM_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCompletionCache(CompletionCache):
+    """SQLiteファイルに保存する永続キャッシュ（件数上限を超えると最終アクセスが古い順に削除）"""
+    
+    def __init__(self, path: str = DEFAULT_LLM_CACHE_PATH,
+                 max_entries: int = DEFAULT_LLM_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_LLM_CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS completion_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_completion_cache_last_access"
+                " ON completion_cache (last_access)"
+            )
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+    
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM completion_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                conn.execute("DELETE FROM completion_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE completion_cache SET last_access = ? WHERE key = ?", (now, key))
+            return value
+    
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO completion_cache (key, value, expires_at, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now)
+            )
+            conn.execute("DELETE FROM completion_cache WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM completion_cache WHERE key NOT IN ("
+                " SELECT key FROM completion_cache ORDER BY last_access DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+    
+    def clear(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM completion_cache")
+
+
+class RedisCompletionCache(CompletionCache):
+    """
+    Redis互換サーバーに保存するキャッシュ
+    TTLはRedisの有効期限で管理し、件数・容量による削除はサーバー側のmaxmemory-policyに任せる
+    """
+    
+    KEY_PREFIX = "ta_interview_briefing:llm:"
+    
+    def __init__(self, url: str = DEFAULT_LLM_CACHE_REDIS_URL,
+                 ttl_seconds: float = DEFAULT_LLM_CACHE_TTL_SECONDS):
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("Redisキャッシュを使用するには redis パッケージをインストールしてください")
+        self.ttl_seconds = ttl_seconds
+        self._client = redis.Redis.from_url(url)
+    
+    def get(self, key: str) -> Optional[str]:
+        value = self._client.get(self.KEY_PREFIX + key)
+        if value is None:
+            return None
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+    
+    def set(self, key: str, value: str) -> None:
+        self._client.set(self.KEY_PREFIX + key, value, ex=int(self.ttl_seconds))
+    
+    def clear(self) -> None:
+        for key in self._client.scan_iter(match=self.KEY_PREFIX + "*"):
+            self._client.delete(key)
+
+
+_completion_cache: Optional[CompletionCache] = None
+_completion_cache_initialized = False
+_completion_cache_lock = threading.Lock()
+
+
+def _create_completion_cache_from_env() -> Optional[CompletionCache]:
+    """環境変数 TA_LLM_CACHE_BACKEND の設定に従ってキャッシュを作成する"""
+    _load_dotenv_once()
+    backend = os.getenv("TA_LLM_CACHE_BACKEND", DEFAULT_LLM_CACHE_BACKEND).lower()
+    max_entries = int(os.getenv("TA_LLM_CACHE_MAX_ENTRIES", DEFAULT_LLM_CACHE_MAX_ENTRIES))
+    ttl_seconds = float(os.getenv("TA_LLM_CACHE_TTL_SECONDS", DEFAULT_LLM_CACHE_TTL_SECONDS))
+    
+    if backend in ("none", "off", "disabled", ""):
+        return None
+    if backend == "memory":
+        return MemoryCompletionCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        path = os.getenv("TA_LLM_CACHE_PATH", DEFAULT_LLM_CACHE_PATH)
+        return SQLiteCompletionCache(path=path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend == "redis":
+        url = os.getenv("TA_LLM_CACHE_REDIS_URL", DEFAULT_LLM_CACHE_REDIS_URL)
+        return RedisCompletionCache(url=url, ttl_seconds=ttl_seconds)
+    raise ValueError(f"未対応のキャッシュバックエンドです: {backend}（memory / sqlite / redis / none）")
+
+
+def get_completion_cache() -> Optional[CompletionCache]:
+    """
+    プロセス全体で共有するLLMレスポンスキャッシュを返す
+    初回呼び出し時に環境変数の設定から作成する（無効化されている場合はNone）
+    """
+    global _completion_cache, _completion_cache_initialized
+    with _completion_cache_lock:
+        if not _completion_cache_initialized:
+            _completion_cache = _create_completion_cache_from_env()
+            _completion_cache_initialized = True
+        return _completion_cache
+
+
+def set_completion_cache(cache: Optional[CompletionCache]) -> None:
+    """LLMレスポンスキャッシュを差し替える（Noneを指定するとキャッシュを無効化）"""
+    global _completion_cache, _completion_cache_initialized
+    with _completion_cache_lock:
+        _completion_cache = cache
+        _completion_cache_initialized = True
+
+
+def reset_completion_cache() -> None:
+    """LLMレスポンスキャッシュを破棄し、次回利用時に環境変数から作り直す"""
+    global _completion_cache, _completion_cache_initialized
+    with _completion_cache_lock:
+        _completion_cache = None
+        _completion_cache_initialized = False
+
+
+# ---------------------------------------------------------------------------
+# Azure OpenAIクライアント
+# ---------------------------------------------------------------------------
+
+_azure_clients: Dict[tuple, Any] = {}
+_azure_clients_lock = threading.Lock()
+
+
+def get_azure_client(endpoint: str, api_key: Optional[str], api_version: str,
+                     token_provider: Optional[Callable[[], str]] = None) -> Any:
+    """
+    Azure OpenAIクライアントを返す
+    
+    同じ設定のクライアントはプロセス内で共有し、HTTPコネクションプールを再利用する
+    （クライアントはスレッドセーフなため、バッチ処理のワーカー間でも共有できる）
+    
+    Args:
+        endpoint: エンドポイント（末尾スラッシュなし）
+        api_key: APIキー（token_provider を指定した場合はNone）
+        api_version: APIバージョン
+        token_provider: Entra IDのアクセストークンを返す関数（指定した場合はAPIキーの代わりに使う。
+            呼び出しのたびに実行されるため、キャッシュ済みのトークンを返すもの（CachedTokenProvider）を渡す）
+        
+    Returns:
+        AzureOpenAIクライアント
+    """
+    key = (endpoint, api_key, api_version, token_provider)
+    with _azure_clients_lock:
+        client = _azure_clients.get(key)
+        if client is None:
+            if token_provider is not None:
+                credentials = {"azure_ad_token_provider": token_provider}
+            else:
+                credentials = {"api_key": api_key}
+            # 以前のコードでは base_url を使用していたため、それに合わせる
+            client = _lazy("AzureOpenAI")(
+                **credentials,
+                base_url=endpoint,
+                api_version=api_version
+            )
+            _azure_clients[key] = client
+        return client
+
+
+def reset_azure_clients() -> None:
+    """共有しているAzure OpenAIクライアントを破棄する"""
+    with _azure_clients_lock:
+        _azure_clients.clear()
+
+
+# プロンプトに埋め込むPDFテキストの最大文字数
+# 目安として8000文字程度に制限（実際のトークン数は文字数より多い可能性あり）
+MAX_TEXT_LENGTH = 8000
+
+
+# 抽出処理のバージョン（抽出結果が変わる変更を加えた場合は上げて抽出キャッシュを無効化する）
+EXTRACTOR_VERSION = "1"
+
+
+def iter_pdf_page_texts(pdf_path: str, ocr_fallback: bool = True, start_page: int = 0) -> Iterator[str]:
+    """
+    PDFのページテキストを1ページずつ遅延して抽出するジェネレーター
+    
+    呼び出し側が読み進めた分のページだけが解析・抽出される。
+    テキストレイヤーのないページは、OCRが利用可能であればローカルOCRで補完する
+    （連続する画像ページはOCRのワーカー数単位でまとめて並列処理する）
+    
+    Args:
+        pdf_path: PDFファイルのパス
+        ocr_fallback: テキストのないページをOCRで補完するかどうか
+        start_page: 抽出を開始するページ番号（0始まり）
+        
+    Yields:
+        ページごとのテキスト（テキストがないページは空文字列）
+    """
+    reader = _lazy("PdfReader")(pdf_path)
+    use_ocr = ocr_fallback and ocr.is_ocr_available()
+    ocr_budget = ocr.ocr_max_pages() if use_ocr else 0
+    pending_indexes: List[int] = []
+    
+    def flush_pending():
+        nonlocal ocr_budget
+        targets = pending_indexes[:ocr_budget]
+        skipped = len(pending_indexes) - len(targets)
+        ocr_budget -= len(targets)
+        if skipped:
+            print(f"⚠️  OCRのページ数上限に達したため、{skipped}ページのOCRを省略します")
+        texts = ocr.ocr_pages(pdf_path, targets) + [""] * skipped
+        pending_indexes.clear()
+        return texts
+    
+    for page_index in range(start_page, len(reader.pages)):
+        page_text = reader.pages[page_index].extract_text() or ""
+        if page_text.strip() or not use_ocr:
+            if pending_indexes:
+                yield from flush_pending()
+            yield page_text
+            continue
+        pending_indexes.append(page_index)
+        if len(pending_indexes) >= ocr.ocr_workers():
+            yield from flush_pending()
+    
+    if pending_indexes:
+        yield from flush_pending()
+
+
+class _PageRecorder:
+    """ページテキストのイテレーターをラップし、読み込んだページと最後まで読んだかを記録する"""
+    
+    def __init__(self, page_texts: Iterable[str]):
+        self._page_texts = page_texts
+        self.pages: List[str] = []
+        self.exhausted = False
+    
+    def __iter__(self) -> Iterator[str]:
+        for page_text in self._page_texts:
+            self.pages.append(page_text)
+            yield page_text
+        self.exhausted = True
+
+
+def _extraction_cache_key() -> tuple:
+    """抽出キャッシュのキーに使う (バックエンド名, バージョン) を返す"""
+    backend = "pypdf2+ocr" if ocr.is_ocr_available() else "pypdf2"
+    return backend, f"{EXTRACTOR_VERSION}/PyPDF2-{_lazy('PyPDF2').__version__}"
+
+
+def _collect_pages_within_budget(
+    page_texts: Iterable[str],
+    max_chars: Optional[int],
+    measure: Callable[[str], int],
+    deadline: Optional[Deadline] = None
+) -> List[str]:
+    """
+    テキストのあるページを順に集め、正規化後の長さが予算に達した時点で読み込みを打ち切る
+    
+    正規化は集めた全ページに対して行うため、ページごとに測り直すとページ数の2乗の時間がかかる。
+    正規化前の文字数の累計が予算に近づくまでは測らず、測った後は正規化による縮み方から
+    予算に達するまでに必要な文字数を見積もって、次に測る時点を決める
+    （予算に達する前に打ち切ることはなく、その分だけ余分に読む場合がある）
+    
+    Args:
+        page_texts: ページごとのテキスト（遅延評価のイテラブル）
+        max_chars: 文字数の予算（Noneの場合は全ページを読む）
+        measure: 予算と比較する長さを求める関数（後段の整形処理後の長さを測る場合に指定）
+        deadline: リクエストの期限（指定した場合は1ページごとに期限切れ・キャンセルを確認する）
+        
+    Returns:
+        テキストのあるページのリスト
+    """
+    text_parts = []
+    pages_read = 0
+    raw_length = 0
+    next_check = max_chars
+    for page_text in page_texts:
+        if deadline is not None:
+            deadline.check("PDFのテキスト抽出")
+        pages_read += 1
+        if not page_text.strip():
+            continue
+        text_parts.append(page_text)
+        if max_chars is None:
+            continue
+        raw_length += len(page_text) + (2 if len(text_parts) > 1 else 0)
+        if raw_length < next_check:
+            continue
+        normalized_parts, _ = normalize_pages(text_parts)
+        measured = measure("\n\n".join(part for part in normalized_parts if part))
+        if measured >= max_chars:
+            print(f"プロンプトの予算（{max_chars}文字）に達したため、{pages_read}ページ目で抽出を終了します")
+            break
+        if measured > 0:
+            # これまでの縮み方が続くとして、予算に達する正規化前の文字数を見積もる
+            next_check = raw_length + math.ceil((max_chars - measured) * raw_length / measured)
+        else:
+            next_check = raw_length * 2
+    return text_parts
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+def extract_text_from_pdf(
+    pdf_path: str,
+    max_chars: Optional[int] = None,
+    measure: Callable[[str], int] = len,
+    content_hash: Optional[str] = None,
+    deadline: Optional[Deadline] = None
+) -> str:
     """
     PDFファイルからテキストを抽出する
     
+    ページは先頭から遅延して読み込み、max_charsを指定した場合は
+    予算を満たした時点で残りのページの抽出を省略する
+    
     Args:
         pdf_path: PDFファイルのパス
+        max_chars: 抽出するテキストの文字数の予算（Noneの場合は全ページを抽出）
+        measure: 予算と比較する長さを求める関数（デフォルトは正規化後の文字数）
+        content_hash: PDFの内容のSHA-256（計算済みの場合。省略時は抽出キャッシュの参照時に計算する）
+        deadline: リクエストの期限（期限切れ・キャンセルの場合は残りのページを読まずに打ち切る）
         
     Returns:
         抽出されたテキスト
@@ -29,92 +504,162 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     Raises:
         FileNotFoundError: ファイルが見つからない場合
         ValueError: PDFの読み込みに失敗した場合
+        RequestAborted: 抽出中に期限を過ぎた、またはキャンセルされた場合
     """
     pdf_file = Path(pdf_path)
     if not pdf_file.exists():
         raise FileNotFoundError(f"PDFファイルが見つかりません: {pdf_path}")
+    _load_dotenv_once()
     
     try:
-        reader = PdfReader(pdf_path)
-        text_parts = []
+        # 同じPDF（内容ハッシュ）の抽出結果があれば再利用し、足りない分のページだけを読む
+        # キャッシュの障害で抽出自体を失敗させない（警告を出してキャッシュなしで続ける）
+        cached_pages: List[str] = []
+        cached_complete = False
+        try:
+            extraction_cache = get_extraction_cache()
+            if extraction_cache is not None:
+                content_hash = content_hash or file_sha256(pdf_path)
+                backend, version = _extraction_cache_key()
+                cached = extraction_cache.get(content_hash, backend, version)
+                if cached is not None:
+                    cached_pages, cached_complete = cached
+                    print(f"✅ キャッシュ済みの抽出結果を使用します（{len(cached_pages)}ページ）")
+        except Exception as cache_error:
+            print(f"⚠️  抽出キャッシュの読み込みに失敗しました: {cache_error}")
+            extraction_cache = None
+            cached_pages, cached_complete = [], False
         
-        for page_num, page in enumerate(reader.pages, start=1):
-            page_text = page.extract_text()
-            if page_text.strip():
-                text_parts.append(page_text)
+        if cached_complete:
+            remaining_pages: Iterable[str] = []
+        else:
+            remaining_pages = iter_pdf_page_texts(pdf_path, start_page=len(cached_pages))
+        recorder = _PageRecorder(chain(cached_pages, remaining_pages))
+        try:
+            text_parts = _collect_pages_within_budget(recorder, max_chars, measure, deadline)
+        finally:
+            # 新たに読み込んだページがあればキャッシュを更新（打ち切った場合も、読み込み済みのページは再利用する）
+            if extraction_cache is not None and len(recorder.pages) > len(cached_pages):
+                try:
+                    extraction_cache.put(content_hash, backend, version, recorder.pages, recorder.exhausted)
+                except Exception as cache_error:
+                    print(f"⚠️  抽出キャッシュの書き込みに失敗しました: {cache_error}")
         
         if not text_parts:
-            raise ValueError("PDFからテキストを抽出できませんでした。画像のみのPDFの可能性があります。")
+            message = "PDFからテキストを抽出できませんでした。画像のみのPDFの可能性があります。"
+            if not ocr.is_ocr_available():
+                message += "（OCRを利用するには pytesseract・pdf2image と tesseract-ocr・poppler-utils をインストールしてください）"
+            raise ValueError(message)
         
-        return "\n\n".join(text_parts)
+        # 全ページに繰り返し現れるヘッダー・フッター行と余分な空白を除去
+        text_parts, stats = normalize_pages(text_parts)
+        print(
+            f"テキストを正規化しました: {stats['before_chars']}文字 → {stats['after_chars']}文字 "
+            f"（推定トークン数 {stats['before_tokens']} → {stats['after_tokens']}、"
+            f"繰り返し行 {stats['removed_lines']}行を除去）"
+        )
+        
+        return "\n\n".join(part for part in text_parts if part)
     
+    except RequestAborted:
+        raise
     except Exception as e:
         raise ValueError(f"PDFの読み込みに失敗しました: {e}")
 
 
-def analyze_ta_pdf_with_azure(pdf_path: str) -> Dict[str, Any]:
+def _record_usage(usage: Dict[str, Any], response: Any = None) -> None:
+    """APIレスポンスのトークン使用量を呼び出し元の辞書に書き込む（キャッシュヒット時はresponse=None）"""
+    response_usage = getattr(response, "usage", None)
+    usage["prompt_tokens"] = getattr(response_usage, "prompt_tokens", 0) or 0
+    usage["completion_tokens"] = getattr(response_usage, "completion_tokens", 0) or 0
+    usage["total_tokens"] = getattr(response_usage, "total_tokens", 0) or 0
+    usage["cached"] = response is None
+
+
+def prepare_report_text(pdf_path: str, content_hash: Optional[str] = None,
+                        deadline: Optional[Deadline] = None) -> str:
     """
-    Azure OpenAIを使用してTalent Analytics PDFを解析し、
-    面接官向けの情報を抽出する
+    PDFからプロンプトに埋め込むテキストを作成する
+    （テキスト抽出、TAレポートの圧縮、最大文字数での切り詰め）
     
     Args:
         pdf_path: Talent Analytics PDFファイルのパス
+        content_hash: PDFの内容のSHA-256（計算済みの場合）
+        deadline: リクエストの期限（抽出中に期限切れ・キャンセルを確認する）
         
     Returns:
-        解析結果の辞書:
-        {
-            "summary": str,
-            "risk_points": list[str],
-            "attract_points": list[str],
-            "notes_for_interviewer": list[str]
-        }
-        
-    Raises:
-        ValueError: 環境変数が設定されていない場合、またはPDF解析に失敗した場合
+        プロンプトに埋め込むテキスト
     """
-    # 環境変数から設定を取得
-    # AZURE_OPENAI_ENDPOINT または AZURE_OPENAI_API_ENDPOINT のどちらでも対応
-    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT") or os.getenv("AZURE_OPENAI_API_ENDPOINT")
-    api_key = os.getenv("AZURE_OPENAI_API_KEY")
-    # AZURE_OPENAI_DEPLOYMENT または AZURE_OPENAI_DEPLOYMENT_NAME のどちらでも対応
-    deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT") or os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-    api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
-    
-    if not endpoint:
-        raise ValueError("環境変数 AZURE_OPENAI_ENDPOINT または AZURE_OPENAI_API_ENDPOINT が設定されていません")
-    if not api_key:
-        raise ValueError("環境変数 AZURE_OPENAI_API_KEY が設定されていません")
-    if not deployment:
-        raise ValueError("環境変数 AZURE_OPENAI_DEPLOYMENT または AZURE_OPENAI_DEPLOYMENT_NAME が設定されていません")
-    
-    # エンドポイントの末尾スラッシュを削除
-    endpoint_clean = endpoint.rstrip('/')
-    
-    # Azure OpenAIクライアントを初期化
-    # 以前のコードでは base_url を使用していたため、それに合わせる
-    client = AzureOpenAI(
-        api_key=api_key,
-        base_url=endpoint_clean,
-        api_version=api_version
-    )
-    
     # PDFからテキストを抽出
     print(f"PDFを読み込み中: {pdf_path}")
-    pdf_text = extract_text_from_pdf(pdf_path)
+    # 予算はTAレポートを圧縮した後の文字数で判定し、予算を満たした時点で残りのページは読まない
+    pdf_text = extract_text_from_pdf(pdf_path, max_chars=MAX_TEXT_LENGTH, measure=compact_text_length,
+                                     content_hash=content_hash, deadline=deadline)
+    
+    # TAレポートのレイアウトを解析し、スコアと所見だけのコンパクトな形式に変換
+    # （ヘッダー・凡例などの定型文を除いてトークン数を削減する）
+    pdf_text = compact_ta_report_text(pdf_text)
     
     # テキストが長すぎる場合は切り詰め（トークン制限を考慮）
-    # 目安として8000文字程度に制限（実際のトークン数は文字数より多い可能性あり）
-    max_text_length = 8000
-    if len(pdf_text) > max_text_length:
-        print(f"警告: PDFテキストが長いため、最初の{max_text_length}文字のみを使用します")
-        pdf_text = pdf_text[:max_text_length]
+    if len(pdf_text) > MAX_TEXT_LENGTH:
+        print(f"警告: PDFテキストが長いため、最初の{MAX_TEXT_LENGTH}文字のみを使用します")
+        pdf_text = pdf_text[:MAX_TEXT_LENGTH]
+    
+    return pdf_text
+
+
+def _client_within_deadline(client: Any, deadline: Optional[Deadline]) -> Any:
+    """
+    期限（タイムアウト）がある場合は、残り時間を呼び出しのタイムアウトにしたクライアントを返す
+    openaiクライアントの自動リトライ（タイムアウト・429で最大2回）は期限を超えて呼び出しを続けるため無効にする
+    （期限切れ・切断後にトークンを消費しない。リトライはクライアントの再リクエストに任せる）
+
+    Raises:
+        RequestAborted: すでに期限切れ・キャンセル済みの場合
+    """
+    if deadline is None:
+        return client
+    deadline.check("Azure OpenAIの呼び出し")
+    remaining = deadline.remaining()
+    if remaining is None:
+        return client
+    return client.with_options(timeout=remaining, max_retries=0)
+
+
+# プロンプト（システムプロンプト・ユーザープロンプトの構成）のバージョン
+# プロンプトを変更した場合は更新する（保存済みの解析結果は別のバージョンとして扱われる）
+PROMPT_VERSION = "2"
+
+
+def get_deployment_name() -> Optional[str]:
+    """環境変数のデプロイメント名（AZURE_OPENAI_DEPLOYMENT または AZURE_OPENAI_DEPLOYMENT_NAME）"""
+    _load_dotenv_once()
+    return os.getenv("AZURE_OPENAI_DEPLOYMENT") or os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+
+
+def supports_json_schema(api_version: str) -> bool:
+    """APIバージョンがJSON Schemaによるレスポンス形式の指定に対応しているか（2024-08-01-preview以降）"""
+    api_version_date = api_version.replace("-preview", "").replace("-", "")
+    return api_version_date >= "20240801" or "2024-08" in api_version
+
+
+def build_completion_params(pdf_text: str, deployment: str, api_version: str) -> Dict[str, Any]:
+    """
+    Azure OpenAIに送信するリクエストのパラメータを構築する
     
+    Args:
+        pdf_text: プロンプトに埋め込むテキスト（prepare_report_text の結果）
+        deployment: デプロイメント名
+        api_version: APIバージョン（JSON Schema対応の場合は response_format を含める）
+        
+    Returns:
+        chat.completions.create に渡すパラメータ
+    """
     # PydanticモデルからJSON Schemaを自動生成
     json_schema = AnalysisResult.model_json_schema()
     
     # APIバージョンをチェックしてJSON Schemaが使えるか判定
-    api_version_date = api_version.replace("-preview", "").replace("-", "")
-    can_use_json_schema = api_version_date >= "20240801" or "2024-08" in api_version
+    can_use_json_schema = supports_json_schema(api_version)
     
     # プロンプトを構築
     if can_use_json_schema:
@@ -155,6 +700,96 @@ def analyze_ta_pdf_with_azure(pdf_path: str) -> Dict[str, Any]:
 {pdf_text}
 """
     
+    # API呼び出しのパラメータを準備
+    api_params = {
+        "model": deployment,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        "temperature": 0.3,  # 一貫性のある出力のため低めの温度設定
+        "max_tokens": 2000
+    }
+    
+    # JSON Schemaを使用してレスポンス形式を指定（APIバージョンが対応している場合）
+    if can_use_json_schema:
+        api_params["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "analysis_result",
+                "schema": json_schema,
+                "strict": True  # スキーマに厳密に従う
+            }
+        }
+    return api_params
+
+
+def analyze_ta_pdf_with_azure(
+    pdf_path: str,
+    usage: Optional[Dict[str, Any]] = None,
+    content_hash: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    priority: str = PRIORITY_INTERACTIVE,
+    tenant: str = DEFAULT_TENANT
+) -> Dict[str, Any]:
+    """
+    Azure OpenAIを使用してTalent Analytics PDFを解析し、
+    面接官向けの情報を抽出する
+    
+    Args:
+        pdf_path: Talent Analytics PDFファイルのパス
+        usage: 指定した場合、トークン使用量（prompt_tokens, completion_tokens, total_tokens）と
+            キャッシュを使用したかどうか（cached）が書き込まれる
+        content_hash: PDFの内容のSHA-256（アップロード時に計算済みの場合。抽出キャッシュのキーに使う）
+        deadline: リクエストの期限。抽出中と呼び出し前に期限切れ・キャンセルを確認し、
+            Azure OpenAIの呼び出しは残り時間をタイムアウトにして行う
+        priority: スケジューラーの優先度クラス（面接官のリクエストは interactive、一括処理は bulk）
+        tenant: スケジューラーのテナントID（テナントごとの上限と、テナント間の公平な順番に使う）
+        
+    Returns:
+        解析結果の辞書:
+        {
+            "summary": str,
+            "risk_points": list[str],
+            "attract_points": list[str],
+            "notes_for_interviewer": list[str]
+        }
+        
+    Raises:
+        ValueError: 環境変数が設定されていない場合、またはPDF解析に失敗した場合
+        RequestAborted: 期限を過ぎた、またはキャンセルされた場合
+    """
+    # 環境変数から設定を取得
+    _load_dotenv_once()
+    # AZURE_OPENAI_ENDPOINT または AZURE_OPENAI_API_ENDPOINT のどちらでも対応
+    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT") or os.getenv("AZURE_OPENAI_API_ENDPOINT")
+    api_key = os.getenv("AZURE_OPENAI_API_KEY")
+    # AZURE_OPENAI_DEPLOYMENT または AZURE_OPENAI_DEPLOYMENT_NAME のどちらでも対応
+    deployment = get_deployment_name()
+    api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
+    
+    if not endpoint:
+        raise ValueError("環境変数 AZURE_OPENAI_ENDPOINT または AZURE_OPENAI_API_ENDPOINT が設定されていません")
+    # AZURE_OPENAI_AUTH=entra / local の場合はAPIキーの代わりにキャッシュ済みのアクセストークンで認証する
+    token_provider = get_token_provider()
+    if token_provider is None and not api_key:
+        raise ValueError("環境変数 AZURE_OPENAI_API_KEY が設定されていません（Entra ID認証の場合は AZURE_OPENAI_AUTH=entra）")
+    if not deployment:
+        raise ValueError("環境変数 AZURE_OPENAI_DEPLOYMENT または AZURE_OPENAI_DEPLOYMENT_NAME が設定されていません")
+    
+    # エンドポイントの末尾スラッシュを削除
+    endpoint_clean = endpoint.rstrip('/')
+    
+    # Azure OpenAIクライアントを取得（同じ設定のクライアントはプロセス内で共有）
+    client = get_azure_client(
+        endpoint_clean, None if token_provider is not None else api_key, api_version, token_provider
+    )
+    
+    # PDFからテキストを抽出し、プロンプトを構築
+    pdf_text = prepare_report_text(pdf_path, content_hash=content_hash, deadline=deadline)
+    api_params = build_completion_params(pdf_text, deployment, api_version)
+    can_use_json_schema = "response_format" in api_params
+    
     print("Azure OpenAIにリクエストを送信中...")
     
     try:
@@ -163,52 +798,59 @@ def analyze_ta_pdf_with_azure(pdf_path: str) -> Dict[str, Any]:
         print(f"デプロイメント名: {deployment}")
         print(f"APIバージョン: {api_version}")
         
-        # API呼び出しのパラメータを準備
-        api_params = {
-            "model": deployment,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": 0.3,  # 一貫性のある出力のため低めの温度設定
-            "max_tokens": 2000
-        }
-        
-        # JSON Schemaを使用してレスポンス形式を指定（APIバージョンが対応している場合）
-        # 2024-08-01-preview以降でサポート
+        # JSON Schemaを使用してレスポンス形式を指定（2024-08-01-preview以降でサポート）
         if can_use_json_schema:
-            try:
-                api_params["response_format"] = {
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "analysis_result",
-                        "schema": json_schema,
-                        "strict": True  # スキーマに厳密に従う
-                    }
-                }
-                print("✅ JSON Schemaを使用してリクエストを送信します")
-            except Exception as e:
-                print(f"⚠️  JSON Schemaの設定に失敗しました（フォールバックモード）: {e}")
-                can_use_json_schema = False
+            print("✅ JSON Schemaを使用してリクエストを送信します")
         else:
             print(f"⚠️  APIバージョン {api_version} はJSON Schemaに対応していません（2024-08-01-preview以降が必要）")
             print("⚠️  従来のプロンプト方式でリクエストを送信します")
         
-        # Azure OpenAI APIを呼び出し
-        # JSON Schemaが使えない場合のフォールバック処理
-        try:
-            response = client.chat.completions.create(**api_params)
-        except Exception as api_error:
-            # JSON Schema使用時にエラーが発生した場合、JSON Schemaを外して再試行
-            if can_use_json_schema and "json_schema" in str(api_error).lower():
-                print(f"⚠️  JSON Schemaでエラーが発生しました: {api_error}")
-                print("⚠️  JSON Schemaを外して再試行します...")
-                # response_formatを削除
-                api_params.pop("response_format", None)
-                can_use_json_schema = False
+        # 同一内容のリクエストはキャッシュから返す（PDFのメタデータだけが異なる再出力も含む）
+        completion_cache = get_completion_cache()
+        cache_key = make_completion_cache_key(api_params)
+        cached_result = None
+        if completion_cache is not None:
+            try:
+                cached_result = completion_cache.get(cache_key)
+            except Exception as cache_error:
+                # キャッシュの障害で解析自体を失敗させない
+                print(f"⚠️  キャッシュの読み込みに失敗しました: {cache_error}")
+            if cached_result is not None:
+                print("✅ キャッシュ済みの解析結果を使用します（Azure OpenAIの呼び出しをスキップ）")
+                if usage is not None:
+                    _record_usage(usage)
+                return json.loads(cached_result)
+        
+        # 同時実行数・TPMの予算を優先度クラス・テナントごとに配分するスケジューラーで順番を待つ
+        # （キャッシュにヒットした場合は順番待ちしない）
+        scheduler = get_scheduler()
+        slot = (
+            scheduler.slot(priority, estimate_request_tokens(api_params), deadline, tenant)
+            if scheduler is not None else nullcontext()
+        )
+        with slot:
+            # 呼び出し後は期限を確認しない（期限後に届いた応答もキャッシュ・ストアに保存し、再リクエストで再利用する）
+            client = _client_within_deadline(client, deadline)
+            
+            # Azure OpenAI APIを呼び出し
+            # JSON Schemaが使えない場合のフォールバック処理
+            try:
                 response = client.chat.completions.create(**api_params)
-            else:
-                raise
+            except Exception as api_error:
+                # JSON Schema使用時にエラーが発生した場合、JSON Schemaを外して再試行
+                if can_use_json_schema and "json_schema" in str(api_error).lower():
+                    print(f"⚠️  JSON Schemaでエラーが発生しました: {api_error}")
+                    print("⚠️  JSON Schemaを外して再試行します...")
+                    # response_formatを削除
+                    api_params.pop("response_format", None)
+                    can_use_json_schema = False
+                    client = _client_within_deadline(client, deadline)
+                    response = client.chat.completions.create(**api_params)
+                else:
+                    raise
+        
+        if usage is not None:
+            _record_usage(usage, response)
         
         # レスポンスからJSON文字列を抽出
         content = response.choices[0].message.content.strip()
@@ -235,7 +877,7 @@ def analyze_ta_pdf_with_azure(pdf_path: str) -> Dict[str, Any]:
         try:
             validated_result = AnalysisResult(**analysis_result)
             print("✅ レスポンスがPydanticモデルで検証されました")
-            return validated_result.model_dump()
+            result = validated_result.model_dump()
         except Exception as e:
             print(f"⚠️  Pydanticバリデーションエラー: {e}")
             print("⚠️  生のJSONデータを返します")
@@ -246,8 +888,19 @@ def analyze_ta_pdf_with_azure(pdf_path: str) -> Dict[str, Any]:
                 raise ValueError(f"解析結果に必要なキーが含まれていません: {missing_keys}")
             return analysis_result
         
+        # 検証済みの結果のみキャッシュに保存
+        if completion_cache is not None:
+            try:
+                completion_cache.set(cache_key, json.dumps(result, ensure_ascii=False))
+            except Exception as cache_error:
+                print(f"⚠️  キャッシュへの保存に失敗しました: {cache_error}")
+        return result
+        
     except Exception as e:
-        if isinstance(e, (ValueError, FileNotFoundError)):
+        if isinstance(e, (ValueError, FileNotFoundError, RequestAborted)):
             raise
+        if deadline is not None and deadline.expired():
+            # 残り時間をタイムアウトにした呼び出しが期限内に終わらなかった
+            raise DeadlineExceeded(f"Azure OpenAIの呼び出し中にリクエストの期限を過ぎました: {e}") from e
         raise ValueError(f"Azure OpenAI APIの呼び出しに失敗しました: {e}")
 
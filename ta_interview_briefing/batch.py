@@ -0,0 +1,383 @@
+"""
+バッチ処理
+フォルダ内、またはマニフェスト（CSV / JSONL）に記載されたTalent Analytics PDFをまとめて解析し、
+ブリーフィングPDFを生成する
+"""
+
+import os
+import csv
+import json
+import time
+import tempfile
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from .azure_client import analyze_ta_pdf_with_azure
+from .scheduler import PRIORITY_BULK
+from .export import sanitize_filename
+from .pdf_builder import generate_interview_pdf_from_azure, warm_up_renderer
+
+
+# 出力ファイル名の接尾辞（入力ファイルとの区別にも使用）
+BRIEFING_SUFFIX = "_interview_briefing.pdf"
+
+# ディレクトリ内に作成する進捗マニフェストのファイル名
+DEFAULT_MANIFEST_NAME = ".ta_batch_manifest.json"
+
+# マニフェストに記録するステータス
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+
+
+def briefing_output_path(pdf_path: Path) -> Path:
+    """入力PDFに対応するブリーフィングPDFのパス（例: candidate_123.pdf -> candidate_123_interview_briefing.pdf）"""
+    return pdf_path.parent / f"{pdf_path.stem}{BRIEFING_SUFFIX}"
+
+
+def find_input_pdfs(input_dir: Path) -> List[Path]:
+    """
+    ディレクトリ内の入力PDFを列挙する（生成済みのブリーフィングPDFは除外）
+
+    Args:
+        input_dir: 入力ディレクトリ
+
+    Returns:
+        ファイル名順の入力PDFのリスト
+    """
+    return sorted(
+        path for path in input_dir.iterdir()
+        if path.is_file()
+        and path.suffix.lower() == ".pdf"
+        and not path.name.endswith(BRIEFING_SUFFIX)
+    )
+
+
+class BatchManifest:
+    """
+    ファイルごとの処理状況を記録するマニフェスト
+    1件処理するごとにアトミックに書き出すため、中断しても次回の実行で続きから再開できる
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("files", {})
+
+    def status(self, name: str) -> Optional[str]:
+        """ファイルの処理状況を返す（未処理の場合はNone）"""
+        entry = self.entries.get(name)
+        return entry.get("status") if entry else None
+
+    def record(self, name: str, status: str, **fields: Any) -> None:
+        """ファイルの処理状況を記録してマニフェストを書き出す"""
+        with self._lock:
+            self.entries[name] = {
+                "status": status,
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                **fields,
+            }
+            self._save()
+
+    def _save(self) -> None:
+        """一時ファイルに書き出してから置き換える（書き込み途中で中断してもマニフェストが壊れないように）"""
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.path.parent), prefix=".ta_batch_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"files": self.entries}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+def _process_file(pdf_path: Path) -> Path:
+    """1ファイルを解析してブリーフィングPDFを生成する（候補者名はファイル名から決定）"""
+    output_path = briefing_output_path(pdf_path)
+    analysis = analyze_ta_pdf_with_azure(str(pdf_path), priority=PRIORITY_BULK)
+    generate_interview_pdf_from_azure(str(output_path), pdf_path.stem, analysis)
+    return output_path
+
+
+def run_batch(
+    input_dir: str,
+    concurrency: int = 4,
+    manifest_path: Optional[str] = None,
+    force: bool = False
+) -> Dict[str, int]:
+    """
+    ディレクトリ内のPDFをまとめて処理する
+
+    - 生成済みのブリーフィングPDFがあるファイルはスキップする（force=Trueの場合は再生成）
+    - マニフェストで完了済みのファイルはスキップし、失敗したファイルは再試行する
+    - concurrency件のファイルを並行して処理する
+    - Azure OpenAIの呼び出しは bulk の優先度クラスで順番を待つ（同じプロセスの対話的なリクエストを優先する）
+
+    Args:
+        input_dir: 入力ディレクトリ
+        concurrency: 同時に処理するファイル数
+        manifest_path: マニフェストのパス（指定しない場合は入力ディレクトリ内に作成）
+        force: 既存の出力・マニフェストを無視してすべて処理し直すかどうか
+
+    Returns:
+        ステータスごとの件数（done / failed / skipped）
+
+    Raises:
+        FileNotFoundError: 入力ディレクトリが存在しない場合
+    """
+    directory = Path(input_dir)
+    if not directory.is_dir():
+        raise FileNotFoundError(f"ディレクトリが見つかりません: {input_dir}")
+
+    manifest = BatchManifest(Path(manifest_path) if manifest_path else directory / DEFAULT_MANIFEST_NAME)
+    pdf_paths = find_input_pdfs(directory)
+    counts = {STATUS_DONE: 0, STATUS_FAILED: 0, STATUS_SKIPPED: 0}
+    total = len(pdf_paths)
+    finished = 0
+    progress_lock = threading.Lock()
+
+    def report(pdf_path: Path, status: str, detail: str = "") -> None:
+        nonlocal finished
+        with progress_lock:
+            finished += 1
+            counts[status] += 1
+            mark = {STATUS_DONE: "✅", STATUS_FAILED: "❌", STATUS_SKIPPED: "⏭️ "}[status]
+            print(f"[{finished}/{total}] {mark} {pdf_path.name} {detail}".rstrip())
+
+    targets = []
+    for pdf_path in pdf_paths:
+        if not force and manifest.status(pdf_path.name) == STATUS_DONE:
+            report(pdf_path, STATUS_SKIPPED, "（処理済み）")
+        elif not force and briefing_output_path(pdf_path).exists():
+            manifest.record(pdf_path.name, STATUS_SKIPPED, output=str(briefing_output_path(pdf_path)))
+            report(pdf_path, STATUS_SKIPPED, "（ブリーフィングPDF生成済み）")
+        else:
+            targets.append(pdf_path)
+
+    if targets:
+        # ワーカーを起動する前に日本語フォントの登録とスタイルの作成を済ませておく
+        warm_up_renderer()
+
+    def process(pdf_path: Path) -> None:
+        started = time.monotonic()
+        try:
+            output_path = _process_file(pdf_path)
+        except Exception as e:
+            manifest.record(pdf_path.name, STATUS_FAILED, error=str(e))
+            report(pdf_path, STATUS_FAILED, f"エラー: {e}")
+            return
+        elapsed = time.monotonic() - started
+        manifest.record(pdf_path.name, STATUS_DONE, output=str(output_path), seconds=round(elapsed, 2))
+        report(pdf_path, STATUS_DONE, f"→ {output_path.name}（{elapsed:.1f}秒）")
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="ta-batch") as executor:
+        futures = [executor.submit(process, pdf_path) for pdf_path in targets]
+        for future in as_completed(futures):
+            future.result()
+
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# マニフェスト（CSV / JSONL）による一括処理
+# ---------------------------------------------------------------------------
+
+# 1ワーカーあたりの先読み行数（処理待ちの行数を一定に保ち、マニフェストの大きさによらずメモリを一定にする）
+BULK_PREFETCH_PER_WORKER = 2
+
+
+def iter_bulk_rows(manifest_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    マニフェストの行を1行ずつ読み込むジェネレーター
+
+    CSV（ヘッダー行あり）とJSONL（1行1オブジェクト）に対応する。
+    列は candidate_id, candidate_name（または name）, pdf_path。
+    pdf_pathが相対パスの場合はマニフェストのディレクトリを基準に解決する。
+    JSONLの解析できない行は、error に理由を入れた行として返す（その行だけをエラーとして記録し、処理は続ける）
+
+    Args:
+        manifest_path: マニフェストファイルのパス（拡張子 .csv / .jsonl / .json）
+
+    Yields:
+        candidate_id, candidate_name, pdf_path を持つ辞書（解析できない行は error も持つ）
+    """
+    path = Path(manifest_path)
+    base_dir = path.parent
+
+    def normalize(row: Dict[str, Any]) -> Dict[str, Any]:
+        pdf_path = str(row.get("pdf_path") or "").strip()
+        if pdf_path and not Path(pdf_path).is_absolute():
+            pdf_path = str(base_dir / pdf_path)
+        return {
+            "candidate_id": str(row.get("candidate_id") or "").strip(),
+            "candidate_name": str(row.get("candidate_name") or row.get("name") or "").strip(),
+            "pdf_path": pdf_path,
+        }
+
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            for row in csv.DictReader(f):
+                yield normalize(row)
+        else:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                    if not isinstance(row, dict):
+                        raise ValueError("JSONオブジェクトではありません")
+                except ValueError as e:
+                    yield {"candidate_id": "", "candidate_name": "", "pdf_path": "",
+                           "error": f"マニフェストの行を解析できません: {e}"}
+                    continue
+                yield normalize(row)
+
+
+def _bulk_output_path(candidate_id: str, pdf_path: Path, output_dir: Optional[str]) -> Path:
+    """
+    マニフェストの行のブリーフィングPDFの出力先
+    候補者ID（なければ入力ファイル名）からパス区切りなどを除き、出力先ディレクトリの外を指す場合はエラーにする
+    """
+    directory = Path(output_dir) if output_dir else pdf_path.parent
+    label = sanitize_filename(candidate_id) or sanitize_filename(pdf_path.stem)
+    if not label:
+        raise ValueError(f"出力ファイル名に使える候補者IDではありません: {candidate_id!r}")
+    output_path = directory / f"{label}{BRIEFING_SUFFIX}"
+    if output_path.resolve().parent != directory.resolve():
+        raise ValueError(f"出力先ディレクトリの外には書き出せません: {output_path}")
+    return output_path
+
+
+def _claim_output_path(row: Dict[str, Any], output_dir: Optional[str], claimed: Dict[str, int],
+                       row_number: int) -> Optional[str]:
+    """
+    行の出力先を予約し、前の行と出力先が重複する場合はエラーの理由を返す
+    （同じ候補者IDの行を並行して同じファイルに書き出さないよう、後の行はエラーにする）
+    """
+    if row.get("error") or not row["pdf_path"]:
+        return None
+    try:
+        output_path = _bulk_output_path(row["candidate_id"], Path(row["pdf_path"]), output_dir)
+    except ValueError:
+        # 出力先のエラーは行の処理で記録する
+        return None
+    key = str(output_path.resolve())
+    first_row = claimed.setdefault(key, row_number)
+    if first_row == row_number:
+        return None
+    return f"出力先が{first_row}行目と重複しています（候補者IDが重複しています）: {output_path.name}"
+
+
+def _process_bulk_row(row_number: int, row: Dict[str, Any], output_dir: Optional[str]) -> Dict[str, Any]:
+    """マニフェストの1行を解析・PDF生成し、結果の辞書を返す（例外は結果のerrorに格納する）"""
+    result: Dict[str, Any] = {
+        "row": row_number,
+        **row,
+        "status": "error",
+        "analysis": None,
+        "output_path": None,
+        "timings": {},
+        "usage": {},
+        "error": None,
+    }
+    started = time.monotonic()
+    try:
+        if row.get("error"):
+            raise ValueError(row["error"])
+        if not row["pdf_path"]:
+            raise ValueError("pdf_path が指定されていません")
+        pdf_path = Path(row["pdf_path"])
+        if not pdf_path.exists():
+            raise FileNotFoundError(f"ファイルが見つかりません: {pdf_path}")
+        output_path = _bulk_output_path(row["candidate_id"], pdf_path, output_dir)
+
+        usage: Dict[str, Any] = {}
+        analysis = analyze_ta_pdf_with_azure(str(pdf_path), usage=usage, priority=PRIORITY_BULK)
+        analyzed = time.monotonic()
+        result["analysis"] = analysis
+        result["usage"] = usage
+        result["timings"]["analyze_seconds"] = round(analyzed - started, 3)
+
+        generate_interview_pdf_from_azure(str(output_path), row["candidate_name"] or "候補者", analysis)
+        result["timings"]["render_seconds"] = round(time.monotonic() - analyzed, 3)
+        result["output_path"] = str(output_path)
+        result["status"] = "ok"
+    except Exception as e:
+        result["error"] = str(e)
+    result["timings"]["total_seconds"] = round(time.monotonic() - started, 3)
+    return result
+
+
+def run_bulk(
+    manifest_path: str,
+    output: TextIO,
+    concurrency: int = 4,
+    output_dir: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    マニフェストに記載されたPDFを並行して処理し、1行ごとの結果をJSONLで書き出す
+
+    結果は処理が終わった順に1行ずつ書き出してフラッシュする（マニフェストの読み込みが途中で失敗した場合も、
+    処理を開始した行の結果はすべて書き出してから例外を送出する）。
+    マニフェストは先読みする行数を制限して読み込むため、行数が多くてもメモリ使用量は一定（出力先の重複の確認に使うパスのみ行数に比例）。
+    候補者ID（出力先）が前の行と重複する行は処理せずにエラーとして記録する。
+    Azure OpenAIの呼び出しは bulk の優先度クラスで順番を待つ
+
+    Args:
+        manifest_path: マニフェストファイルのパス（CSV / JSONL）
+        output: 結果のJSONLを書き出すストリーム
+        concurrency: 同時に処理する行数
+        output_dir: ブリーフィングPDFの出力先（指定しない場合は入力PDFと同じディレクトリ）
+
+    Returns:
+        結果ごとの件数（ok / error）
+
+    Raises:
+        FileNotFoundError: マニフェストが存在しない場合
+    """
+    if not Path(manifest_path).exists():
+        raise FileNotFoundError(f"マニフェストが見つかりません: {manifest_path}")
+    if output_dir:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    workers = max(1, concurrency)
+    max_pending = workers * BULK_PREFETCH_PER_WORKER
+    counts = {"ok": 0, "error": 0}
+
+    def write_results(done) -> None:
+        for future in done:
+            result = future.result()
+            counts[result["status"]] += 1
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+
+    # ワーカーを起動する前に日本語フォントの登録とスタイルの作成を済ませておく
+    warm_up_renderer()
+
+    # 出力先（解決済みのパス） -> 最初にその出力先を使った行番号
+    claimed: Dict[str, int] = {}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ta-bulk") as executor:
+        pending = set()
+        try:
+            for row_number, row in enumerate(iter_bulk_rows(manifest_path), start=1):
+                duplicate = _claim_output_path(row, output_dir, claimed, row_number)
+                if duplicate:
+                    row = {**row, "error": duplicate}
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    write_results(done)
+                pending.add(executor.submit(_process_bulk_row, row_number, row, output_dir))
+        finally:
+            # 処理を開始した行の結果は、読み込みが途中で失敗した場合も書き出す
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write_results(done)
+
+    return counts
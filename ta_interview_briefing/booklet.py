@@ -0,0 +1,138 @@
+"""
+複数候補者のブリーフィングをまとめたブックレットPDF
+1つのReportLabドキュメントに候補者ごとの改ページとしおりを入れ、末尾に目次を付ける
+（フォントとスタイルは全候補者で共有し、個別のPDFを連結するより小さく速い）
+"""
+
+import html
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import Flowable, PageBreak, Paragraph, Spacer, Table, TableStyle
+
+from .pdf_builder import _briefing_doc, _briefing_flowables, _briefing_styles, _register_japanese_font
+
+
+BOOKLET_TITLE = "面接ブリーフィング集"
+TOC_TITLE = "目次"
+
+
+@dataclass
+class BookletEntry:
+    """ブックレットの目次の1行"""
+    candidate_name: str
+    page: int
+
+
+class _Bookmark(Flowable):
+    """
+    描画されたページにしおり（PDFのアウトライン）を設定し、目次用にページ番号を記録する
+    大きさを持たないため、レイアウトには影響しない
+    """
+
+    def __init__(self, key: str, title: str, entries: Optional[List[BookletEntry]] = None):
+        super().__init__()
+        self.key = key
+        self.title = title
+        self.entries = entries
+
+    def wrap(self, available_width, available_height):
+        return 0, 0
+
+    def draw(self):
+        self.canv.bookmarkPage(self.key)
+        self.canv.addOutlineEntry(self.title, self.key, level=0)
+        if self.entries is not None:
+            self.entries.append(BookletEntry(self.title, self.canv.getPageNumber()))
+
+
+class _FlowableFeed(list):
+    """
+    ReportLabの build に渡すリスト
+    build は先頭から1つずつ取り出して配置するため、空になった時点で次の候補者の内容を補充する。
+    保持するのは配置中の1人分だけなので、候補者数によらず内容（Paragraphなど）のメモリ使用量は一定
+    """
+
+    def __init__(self, chunks: Iterator[List[Flowable]]):
+        super().__init__()
+        self._chunks = chunks
+
+    def __len__(self):
+        if not list.__len__(self):
+            for chunk in self._chunks:
+                if chunk:
+                    self.extend(chunk)
+                    break
+        return list.__len__(self)
+
+
+def _draw_page_number(canvas, doc) -> None:
+    """ページ下部にページ番号を描画する（目次のページ番号と対応させる）"""
+    canvas.saveState()
+    canvas.setFont(doc.booklet_font, 9)
+    canvas.setFillColor(colors.HexColor('#666666'))
+    canvas.drawCentredString(doc.pagesize[0] / 2, 10*mm, f"- {canvas.getPageNumber()} -")
+    canvas.restoreState()
+
+
+def render_booklet(candidates: Iterable[Tuple[str, Dict[str, Any]]],
+                   output: Union[str, BinaryIO]) -> List[BookletEntry]:
+    """
+    複数候補者のブリーフィングを1つのPDFにまとめる
+
+    candidates を1人ずつ読み込んでレイアウトし、1回の build で出力する。
+    候補者ごとに改ページしてしおりを設定し、全員を配置した後の末尾に目次（候補者名とページ番号）を付ける
+
+    Args:
+        candidates: (候補者名, 解析結果の辞書) のイテレータ（AnalysisStore.iter_by_requisition などから生成）
+        output: 出力PDFファイルのパス、またはバイナリモードのファイルオブジェクト
+
+    Returns:
+        目次の各行（候補者名と開始ページ）
+    """
+    japanese_font = _register_japanese_font()
+    styles = _briefing_styles(japanese_font)
+    entries: List[BookletEntry] = []
+
+    doc = _briefing_doc(output)
+    doc.title = BOOKLET_TITLE
+    doc.booklet_font = japanese_font
+
+    def chunks() -> Iterator[List[Flowable]]:
+        for index, (candidate_name, analysis) in enumerate(candidates):
+            chunk: List[Flowable] = [PageBreak()] if index else []
+            chunk.append(_Bookmark(f"candidate-{index}", candidate_name, entries))
+            chunk.extend(_briefing_flowables(candidate_name, analysis, styles))
+            yield chunk
+        yield _table_of_contents(entries, styles, doc.width)
+
+    doc.build(_FlowableFeed(chunks()), onFirstPage=_draw_page_number, onLaterPages=_draw_page_number)
+    return entries
+
+
+def _table_of_contents(entries: List[BookletEntry], styles: Dict[str, Any], width: float) -> List[Flowable]:
+    """末尾の目次（候補者名はしおりへのリンク）。全員を配置した後に作るため、ページ番号が確定している"""
+    chunk: List[Flowable] = [PageBreak()] if entries else []
+    chunk.append(_Bookmark("toc", TOC_TITLE))
+    chunk.append(Paragraph(f"{BOOKLET_TITLE} {TOC_TITLE}（{len(entries)}名）", styles["title"]))
+    chunk.append(Spacer(1, 5*mm))
+    if not entries:
+        return chunk
+
+    page_style = ParagraphStyle("TocPage", parent=styles["body"], alignment=2)  # 右揃え
+    rows = [
+        [
+            Paragraph(f'<a href="#candidate-{index}">{html.escape(entry.candidate_name)}</a>', styles["body"]),
+            Paragraph(str(entry.page), page_style),
+        ]
+        for index, entry in enumerate(entries)
+    ]
+    table = Table(rows, colWidths=[width - 25*mm, 25*mm])
+    table.setStyle(TableStyle([
+        ("LINEBELOW", (0, 0), (-1, -1), 0.25, colors.HexColor('#cccccc')),
+    ]))
+    chunk.append(table)
+    return chunk
@@ -0,0 +1,204 @@
+"""
+リクエストの期限（デッドライン）とキャンセル
+APIのリクエストごとに期限を決め、PDFの抽出・Azure OpenAIの呼び出し・レンダリングに引き渡す。
+クライアントが切断した場合や期限を過ぎた場合は、次の段階に進まずに処理を打ち切る
+"""
+
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+
+# リクエストの期限のデフォルト（秒、環境変数 TA_REQUEST_TIMEOUT_SECONDS で上書き可能。0で無期限）
+DEFAULT_REQUEST_TIMEOUT_SECONDS = 120.0
+
+# クライアントの切断を確認する間隔（秒）
+DISCONNECT_POLL_INTERVAL_SECONDS = 0.5
+
+T = TypeVar("T")
+
+
+class RequestAborted(Exception):
+    """リクエストの処理を打ち切った（期限切れ・キャンセルの基底クラス）"""
+
+
+class DeadlineExceeded(RequestAborted):
+    """リクエストの期限を過ぎた"""
+
+
+class RequestCancelled(RequestAborted):
+    """クライアントの切断などでリクエストがキャンセルされた"""
+
+
+class Deadline:
+    """
+    リクエストの期限とキャンセルの状態
+
+    スレッドをまたいで共有し、処理の区切り（ページごと、Azure OpenAIの呼び出し前、レンダリング前）で
+    check を呼び出して、期限切れ・キャンセルであれば例外で打ち切る
+    """
+
+    def __init__(self, timeout_seconds: Optional[float] = None):
+        self.timeout_seconds = timeout_seconds
+        self.expires_at = time.monotonic() + timeout_seconds if timeout_seconds is not None else None
+        self.reason: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    def remaining(self) -> Optional[float]:
+        """残り時間（秒、期限がない場合はNone）"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self, reason: str = "クライアントが切断しました") -> None:
+        """キャンセルする（処理中のスレッドは次の check で打ち切られる）"""
+        if not self._cancelled.is_set():
+            self.reason = reason
+            self._cancelled.set()
+
+    def check(self, stage: str = "処理") -> None:
+        """
+        期限切れ・キャンセルであれば例外を送出する
+
+        Args:
+            stage: これから行う処理の名前（エラーメッセージに使う）
+
+        Raises:
+            RequestCancelled: キャンセルされた場合
+            DeadlineExceeded: 期限を過ぎた場合
+        """
+        if self.cancelled:
+            raise RequestCancelled(f"{stage}を中止しました: {self.reason}")
+        if self.expired():
+            raise DeadlineExceeded(f"リクエストの期限（{self.timeout_seconds:g}秒）を過ぎたため、{stage}を中止しました")
+
+
+def request_timeout_seconds() -> Optional[float]:
+    """設定されたリクエストの期限（秒、TA_REQUEST_TIMEOUT_SECONDS が0以下の場合はNone）"""
+    timeout = float(os.getenv("TA_REQUEST_TIMEOUT_SECONDS", DEFAULT_REQUEST_TIMEOUT_SECONDS))
+    return timeout if timeout > 0 else None
+
+
+def deadline_from_header(header_value: Optional[str]) -> Deadline:
+    """
+    リクエストヘッダー（X-Request-Timeout: 秒）と設定からリクエストの期限を作る
+    ヘッダーは設定の期限を短くする方向にだけ使う
+
+    Raises:
+        ValueError: ヘッダーの値が正の数でない場合
+    """
+    timeout = request_timeout_seconds()
+    if header_value:
+        try:
+            requested = float(header_value)
+        except ValueError:
+            requested = 0.0
+        if not requested > 0:
+            raise ValueError(f"X-Request-Timeout には正の秒数を指定してください: {header_value}")
+        timeout = requested if timeout is None else min(timeout, requested)
+    return Deadline(timeout)
+
+
+class _AbandonableCall:
+    """
+    スレッドで実行する処理を包み、待つのをやめた場合の後片付けを処理の完了後に一度だけ行う
+
+    処理の完了と待つのをやめたことのうち、後に起きた側で後片付けを呼ぶ
+    （ワーカースレッドで呼ぶため、イベントループが終了していても実行される）
+    """
+
+    def __init__(self, fn: Callable[[], T], on_abandon: Callable[[], None]):
+        self._fn = fn
+        self._on_abandon = on_abandon
+        self._lock = threading.Lock()
+        self._finished = False
+        self._abandoned = False
+
+    def __call__(self) -> T:
+        try:
+            return self._fn()
+        finally:
+            with self._lock:
+                self._finished = True
+                cleanup = self._abandoned
+            if cleanup:
+                self._on_abandon()
+
+    def abandon(self) -> None:
+        with self._lock:
+            self._abandoned = True
+            cleanup = self._finished
+        if cleanup:
+            self._on_abandon()
+
+
+def _discard_result(future: "asyncio.Future[Any]") -> None:
+    # 待つのをやめた処理の例外を「取得されなかった例外」として記録させない
+    if not future.cancelled():
+        future.exception()
+
+
+async def run_with_deadline(
+    deadline: Deadline,
+    fn: Callable[[], T],
+    stage: str = "処理",
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    submit: Optional[Callable[[Callable[[], T]], "Future[T]"]] = None,
+    poll_interval: float = DISCONNECT_POLL_INTERVAL_SECONDS,
+    on_abandon: Optional[Callable[[], None]] = None,
+) -> T:
+    """
+    同期処理をスレッドで実行し、完了・期限切れ・クライアントの切断のいずれかまで待つ
+
+    期限切れや切断の時点で待つのをやめて例外を送出し、deadline をキャンセルする。
+    実行中のスレッドは deadline.check を呼び出す次の区切りで打ち切られる
+
+    Args:
+        deadline: リクエストの期限
+        fn: 実行する処理（引数なし）
+        stage: 処理の名前（エラーメッセージに使う）
+        is_disconnected: クライアントが切断したかを返す関数（Starletteの request.is_disconnected）
+        submit: 処理をスレッドプールに投入する関数（省略時はイベントループのデフォルトのスレッドプール）
+        poll_interval: 切断を確認する間隔（秒）
+        on_abandon: 待つのをやめた処理が終わった後に呼ぶ後片付け（処理が書き込む一時ファイルの削除など）
+
+    Raises:
+        RequestCancelled: クライアントが切断した場合
+        DeadlineExceeded: 期限を過ぎた場合
+    """
+    deadline.check(stage)
+    call = None
+    if on_abandon is not None:
+        fn = call = _AbandonableCall(fn, on_abandon)
+    if submit is None:
+        future = asyncio.get_running_loop().run_in_executor(None, fn)
+    else:
+        future = asyncio.wrap_future(submit(fn))
+
+    while True:
+        remaining = deadline.remaining()
+        if is_disconnected is None:
+            timeout = remaining
+        else:
+            timeout = poll_interval if remaining is None else min(poll_interval, remaining)
+        done, _ = await asyncio.wait({future}, timeout=timeout)
+        if done:
+            return future.result()
+        if is_disconnected is not None and await is_disconnected():
+            deadline.cancel()
+        if deadline.cancelled or deadline.expired():
+            future.add_done_callback(_discard_result)
+            if call is not None:
+                # 実行中の処理と競合しないよう、処理が終わってから後片付けする
+                call.abandon()
+            deadline.check(stage)
@@ -0,0 +1,220 @@
+"""
+トークン数・コストの見積もり（ドライラン）
+analyze_ta_pdf_with_azure と同じ抽出・プロンプト構築を行い、Azure OpenAIを呼び出さずにトークン数・コスト・所要時間を見積もる
+"""
+
+import os
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .azure_client import (
+    _load_dotenv_once,
+    prepare_report_text,
+    build_completion_params,
+    get_completion_cache,
+    make_completion_cache_key,
+)
+from .text_normalizer import estimate_tokens
+
+
+# 見積もりのデフォルト設定（環境変数で上書き可能）
+# 価格は gpt-4o（Global Standard）の100万トークンあたりの米ドル
+DEFAULT_PROMPT_PRICE_PER_1M = 2.50
+DEFAULT_COMPLETION_PRICE_PER_1M = 10.00
+DEFAULT_PRICE_CURRENCY = "USD"
+# 出力トークン数の想定（summary 200-300文字と各項目3-5個の配列を含むJSON）
+DEFAULT_EXPECTED_COMPLETION_TOKENS = 800
+DEFAULT_TPM = 30000
+DEFAULT_TOKENIZER_ENCODING = "o200k_base"
+
+# チャット形式のメッセージごとに加算されるトークン数と、応答の開始に加算されるトークン数
+_TOKENS_PER_MESSAGE = 3
+_TOKENS_PER_REPLY = 3
+
+_tokenizer = None
+_tokenizer_loaded = False
+
+
+def _get_tokenizer():
+    """tiktokenのエンコーダーを返す（インストールされていない場合はNone）"""
+    global _tokenizer, _tokenizer_loaded
+    if not _tokenizer_loaded:
+        try:
+            import tiktoken
+            _tokenizer = tiktoken.get_encoding(os.getenv("TA_TOKENIZER_ENCODING", DEFAULT_TOKENIZER_ENCODING))
+        except Exception:
+            _tokenizer = None
+        _tokenizer_loaded = True
+    return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """
+    テキストのトークン数を数える
+    tiktokenがあれば正確に数え、なければ文字種から概算する
+    """
+    tokenizer = _get_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text))
+    return estimate_tokens(text)
+
+
+def count_prompt_tokens(api_params: Dict[str, Any]) -> int:
+    """
+    リクエストの入力トークン数を数える
+    （メッセージ本文に加え、response_format で指定したJSON Schemaも入力として数える）
+    """
+    tokens = _TOKENS_PER_REPLY
+    for message in api_params["messages"]:
+        tokens += _TOKENS_PER_MESSAGE + count_tokens(message["role"]) + count_tokens(message["content"])
+    if "response_format" in api_params:
+        tokens += count_tokens(json.dumps(api_params["response_format"], ensure_ascii=False))
+    return tokens
+
+
+def estimate_settings() -> Dict[str, Any]:
+    """環境変数から見積もりの設定（デプロイメント、価格、TPM / RPM）を読み込む"""
+    _load_dotenv_once()
+    tpm = int(os.getenv("TA_AZURE_TPM", DEFAULT_TPM))
+    return {
+        "deployment": os.getenv("AZURE_OPENAI_DEPLOYMENT") or os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME") or "",
+        "api_version": os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview"),
+        "prompt_price_per_1m": float(os.getenv("TA_PRICE_PROMPT_PER_1M", DEFAULT_PROMPT_PRICE_PER_1M)),
+        "completion_price_per_1m": float(os.getenv("TA_PRICE_COMPLETION_PER_1M", DEFAULT_COMPLETION_PRICE_PER_1M)),
+        "currency": os.getenv("TA_PRICE_CURRENCY", DEFAULT_PRICE_CURRENCY),
+        "expected_completion_tokens": int(
+            os.getenv("TA_EXPECTED_COMPLETION_TOKENS", DEFAULT_EXPECTED_COMPLETION_TOKENS)
+        ),
+        "tpm": tpm,
+        # Azure OpenAIのRPM上限は 1000TPM あたり6RPM
+        "rpm": int(os.getenv("TA_AZURE_RPM", max(1, tpm * 6 // 1000))),
+        "tokenizer": "tiktoken" if _get_tokenizer() is not None else "estimate",
+    }
+
+
+def _cost(prompt_tokens: int, completion_tokens: int, settings: Dict[str, Any]) -> float:
+    return (
+        prompt_tokens * settings["prompt_price_per_1m"]
+        + completion_tokens * settings["completion_price_per_1m"]
+    ) / 1_000_000
+
+
+def estimate_pdf(pdf_path: str, settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    1つのPDFを解析した場合のトークン数とコストを見積もる（Azure OpenAIは呼び出さない）
+
+    Args:
+        pdf_path: Talent Analytics PDFファイルのパス
+        settings: estimate_settings() の結果（省略時は環境変数から読み込む）
+
+    Returns:
+        見積もり結果の辞書:
+        pdf_path, prompt_tokens, completion_tokens（想定）, max_completion_tokens, total_tokens,
+        cost, cached（LLMキャッシュにヒットし、API呼び出しが発生しない場合はTrue）
+    """
+    settings = settings or estimate_settings()
+    pdf_text = prepare_report_text(pdf_path)
+    api_params = build_completion_params(pdf_text, settings["deployment"], settings["api_version"])
+
+    prompt_tokens = count_prompt_tokens(api_params)
+    max_completion_tokens = api_params["max_tokens"]
+    completion_tokens = min(settings["expected_completion_tokens"], max_completion_tokens)
+
+    cached = False
+    completion_cache = get_completion_cache()
+    if completion_cache is not None:
+        try:
+            cached = completion_cache.get(make_completion_cache_key(api_params)) is not None
+        except Exception as cache_error:
+            print(f"⚠️  キャッシュの読み込みに失敗しました: {cache_error}")
+
+    return {
+        "pdf_path": str(pdf_path),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "max_completion_tokens": max_completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "cost": 0.0 if cached else _cost(prompt_tokens, completion_tokens, settings),
+        "cached": cached,
+    }
+
+
+def estimate_pdfs(pdf_paths: Iterable[str]) -> Dict[str, Any]:
+    """
+    複数のPDFのトークン数・コストと、TPM / RPMの上限での所要時間を見積もる
+
+    Azure OpenAIのレート制限は「入力トークン数 + max_tokens」でリクエストを数えるため、
+    所要時間はその合計をTPMで割った時間と、リクエスト数をRPMで割った時間の長い方とする
+
+    Args:
+        pdf_paths: PDFファイルのパス
+
+    Returns:
+        {"files": ファイルごとの見積もり（失敗したファイルはerrorを含む）, "totals": 合計, "settings": 見積もりの設定}
+    """
+    settings = estimate_settings()
+    files: List[Dict[str, Any]] = []
+    for pdf_path in pdf_paths:
+        try:
+            files.append(estimate_pdf(str(pdf_path), settings))
+        except Exception as e:
+            files.append({"pdf_path": str(pdf_path), "error": str(e)})
+
+    billable = [item for item in files if "error" not in item and not item["cached"]]
+    prompt_tokens = sum(item["prompt_tokens"] for item in billable)
+    completion_tokens = sum(item["completion_tokens"] for item in billable)
+    rate_limit_tokens = sum(item["prompt_tokens"] + item["max_completion_tokens"] for item in billable)
+    minutes_by_tpm = rate_limit_tokens / settings["tpm"]
+    minutes_by_rpm = len(billable) / settings["rpm"]
+
+    totals = {
+        "files": len(files),
+        "requests": len(billable),
+        "cached": sum(1 for item in files if item.get("cached")),
+        "errors": sum(1 for item in files if "error" in item),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "cost": _cost(prompt_tokens, completion_tokens, settings),
+        "rate_limit_tokens": rate_limit_tokens,
+        "expected_wall_seconds": math.ceil(max(minutes_by_tpm, minutes_by_rpm) * 60),
+        "bottleneck": "tpm" if minutes_by_tpm >= minutes_by_rpm else "rpm",
+    }
+    return {"files": files, "totals": totals, "settings": settings}
+
+
+def format_estimate_report(report: Dict[str, Any]) -> str:
+    """見積もり結果を表示用のテキストに整形する"""
+    settings = report["settings"]
+    currency = settings["currency"]
+    lines = []
+    for item in report["files"]:
+        name = Path(item["pdf_path"]).name
+        if "error" in item:
+            lines.append(f"❌ {name}: エラー: {item['error']}")
+            continue
+        note = "（キャッシュ済み・API呼び出しなし）" if item["cached"] else ""
+        lines.append(
+            f"{name}: 入力 {item['prompt_tokens']:,} / 出力（想定） {item['completion_tokens']:,} トークン"
+            f" / {item['cost']:.4f} {currency}{note}"
+        )
+
+    totals = report["totals"]
+    lines.append("-" * 50)
+    lines.append(
+        f"合計: {totals['files']}件（API呼び出し {totals['requests']}件、キャッシュ済み {totals['cached']}件、"
+        f"エラー {totals['errors']}件）"
+    )
+    lines.append(
+        f"トークン数: 入力 {totals['prompt_tokens']:,} / 出力（想定） {totals['completion_tokens']:,}"
+        f" / 合計 {totals['total_tokens']:,}（トークン数の計算: {settings['tokenizer']}）"
+    )
+    lines.append(f"コスト: {totals['cost']:.4f} {currency}")
+    bottleneck = "TPM" if totals["bottleneck"] == "tpm" else "RPM"
+    lines.append(
+        f"所要時間の目安: {totals['expected_wall_seconds']:,}秒"
+        f"（{settings['tpm']:,} TPM / {settings['rpm']:,} RPM、律速: {bottleneck}）"
+    )
+    return "\n".join(lines)
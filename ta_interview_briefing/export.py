@@ -0,0 +1,144 @@
+"""
+ブリーフィングのZIPエクスポート
+保存済みの解析結果からブリーフィングを1件ずつ生成し、ZIPとして少しずつ書き出す
+（生成したファイルはZIPに書き込んだ時点で手放すため、件数によらずメモリ使用量は一定）
+"""
+
+import re
+import zipfile
+from typing import BinaryIO, Iterable, Iterator, List
+
+from .formats import DEFAULT_FORMAT, TEXT_RENDERERS
+from .models import AnalysisRecord
+from .pdf_builder import render_interview_pdf
+
+
+# 出力形式 -> ZIP内のファイルの拡張子
+FORMAT_EXTENSIONS = {
+    "pdf": "pdf",
+    "html": "html",
+    "markdown": "md",
+    "json": "json",
+}
+
+# ReportLabのPDFはページが圧縮済みのため、再圧縮せずに格納する
+_FORMAT_COMPRESSION = {
+    "pdf": zipfile.ZIP_STORED,
+}
+
+# ファイル名に使えない文字（パス区切り・制御文字など）
+_UNSAFE_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+class _ChunkWriter:
+    """
+    zipfile の書き込み先にする、書き込まれたバイト列を溜めておくだけのファイルオブジェクト
+    シークできないため、zipfile はデータディスクリプタ付きのストリーミング形式で書き出す
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        """溜まったバイト列を取り出して空にする"""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def sanitize_filename(value: str) -> str:
+    """ファイル名に使えない文字（パス区切り・制御文字など）を _ に置き換え、先頭・末尾の空白・ピリオドを除く"""
+    return _UNSAFE_FILENAME_CHARS.sub("_", value).strip(" ._")
+
+
+def briefing_filename(record: AnalysisRecord, output_format: str = DEFAULT_FORMAT) -> str:
+    """
+    ZIP内のブリーフィングのファイル名
+    候補者ID（なければ候補者名）と解析結果IDの先頭8文字から作るため、同じ候補者でも重複しない
+    """
+    label = sanitize_filename(record.candidate_id or record.candidate_name or "")
+    stem = f"{label}_{record.id[:8]}" if label else record.id[:8]
+    return f"{stem}_interview_briefing.{FORMAT_EXTENSIONS[output_format]}"
+
+
+def render_briefing(record: AnalysisRecord, output_format: str = DEFAULT_FORMAT) -> bytes:
+    """保存済みの解析結果からブリーフィングを生成する（PDFは生成済みPDFのキャッシュを使う）"""
+    name = record.candidate_name or "候補者"
+    analysis = record.result.model_dump()
+    if output_format == "pdf":
+        return render_interview_pdf(name, analysis)
+    return TEXT_RENDERERS[output_format](name, analysis).encode("utf-8")
+
+
+def iter_briefing_zip(records: Iterable[AnalysisRecord], output_format: str = DEFAULT_FORMAT) -> Iterator[bytes]:
+    """
+    ブリーフィングのZIPをチャンク単位で生成する
+
+    records を1件ずつ読み、ブリーフィングを生成してZIPに書き込むたびに、それまでのバイト列を返す。
+    保持するのは生成中の1件分だけなので、records がジェネレータであれば件数によらずメモリ使用量は一定
+
+    Args:
+        records: 解析結果（AnalysisStore.iter_by_requisition などのイテレータ）
+        output_format: 出力形式（pdf / html / markdown / json）
+
+    Yields:
+        ZIPのバイト列の断片（すべて連結すると1つのZIPファイルになる）
+    """
+    if output_format not in FORMAT_EXTENSIONS:
+        raise ValueError(f"未対応の出力形式です: {output_format}（{' / '.join(FORMAT_EXTENSIONS)}）")
+    compression = _FORMAT_COMPRESSION.get(output_format, zipfile.ZIP_DEFLATED)
+
+    writer = _ChunkWriter()
+    with zipfile.ZipFile(writer, mode="w", compression=compression) as archive:
+        for record in records:
+            info = zipfile.ZipInfo(
+                briefing_filename(record, output_format),
+                date_time=record.updated_at.timetuple()[:6],
+            )
+            info.compress_type = compression
+            archive.writestr(info, render_briefing(record, output_format))
+            chunk = writer.drain()
+            if chunk:
+                yield chunk
+    # セントラルディレクトリ（ZIPを閉じたときに書き込まれる）
+    chunk = writer.drain()
+    if chunk:
+        yield chunk
+
+
+def write_briefing_zip(records: Iterable[AnalysisRecord], output: BinaryIO,
+                       output_format: str = DEFAULT_FORMAT) -> int:
+    """
+    ブリーフィングのZIPをファイルに書き出す
+
+    Args:
+        records: 解析結果のイテレータ
+        output: 書き込み先（バイナリモードのファイルオブジェクト）
+        output_format: 出力形式（pdf / html / markdown / json）
+
+    Returns:
+        書き込んだブリーフィングの件数
+    """
+    count = 0
+
+    def counted():
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    for chunk in iter_briefing_zip(counted(), output_format):
+        output.write(chunk)
+    return count
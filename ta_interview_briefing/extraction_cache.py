@@ -0,0 +1,166 @@
+"""
+PDFテキスト抽出結果の永続キャッシュ
+(PDFの内容ハッシュ, 抽出バックエンド, 抽出バージョン) をキーに、ページごとのテキストを圧縮してSQLiteに保存する
+"""
+
+import os
+import json
+import time
+import zlib
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+# キャッシュのデフォルト設定（環境変数で上書き可能）
+DEFAULT_EXTRACTION_CACHE_PATH = ".cache/extraction_cache.sqlite3"
+DEFAULT_EXTRACTION_CACHE_MAX_ENTRIES = 5000
+DEFAULT_EXTRACTION_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# ファイルのハッシュ計算時の読み込み単位
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """ファイルの内容のSHA-256を、ファイル全体をメモリに載せずに計算する"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    ページごとの抽出テキストを保存するSQLiteキャッシュ
+
+    ページテキストはzlibで圧縮したJSONとして保存する。
+    件数または合計サイズの上限を超えると、最終アクセスが古いエントリから削除する
+    """
+
+    def __init__(self, path: str = DEFAULT_EXTRACTION_CACHE_PATH,
+                 max_entries: int = DEFAULT_EXTRACTION_CACHE_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_EXTRACTION_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS extraction_cache ("
+                " content_hash TEXT NOT NULL,"
+                " backend TEXT NOT NULL,"
+                " version TEXT NOT NULL,"
+                " pages BLOB NOT NULL,"
+                " complete INTEGER NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL,"
+                " PRIMARY KEY (content_hash, backend, version))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_access"
+                " ON extraction_cache (last_access)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, content_hash: str, backend: str, version: str) -> Optional[Tuple[List[str], bool]]:
+        """
+        キャッシュ済みの抽出結果を取得する
+
+        Returns:
+            (ページごとのテキスト, 全ページを抽出済みかどうか) のタプル（未登録の場合はNone）
+        """
+        key = (content_hash, backend, version)
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT pages, complete FROM extraction_cache"
+                " WHERE content_hash = ? AND backend = ? AND version = ?",
+                key
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE extraction_cache SET last_access = ?"
+                " WHERE content_hash = ? AND backend = ? AND version = ?",
+                (time.time(),) + key
+            )
+        pages = json.loads(zlib.decompress(row[0]).decode("utf-8"))
+        return pages, bool(row[1])
+
+    def put(self, content_hash: str, backend: str, version: str,
+            pages: List[str], complete: bool) -> None:
+        """
+        抽出結果を保存する
+
+        Args:
+            content_hash: PDFの内容のSHA-256
+            backend: 抽出バックエンド名
+            version: 抽出処理のバージョン
+            pages: 先頭から抽出したページごとのテキスト
+            complete: 全ページを抽出済みかどうか（Falseの場合は途中のページまで）
+        """
+        blob = zlib.compress(json.dumps(pages, ensure_ascii=False).encode("utf-8"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache"
+                " (content_hash, backend, version, pages, complete, size, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (content_hash, backend, version, blob, int(complete), len(blob), time.time())
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """件数・合計サイズの上限を超えた分を最終アクセスが古い順に削除する"""
+        rows = conn.execute(
+            "SELECT rowid, size FROM extraction_cache ORDER BY last_access DESC"
+        ).fetchall()
+        total_bytes = 0
+        expired = []
+        for index, (rowid, size) in enumerate(rows):
+            total_bytes += size
+            if index >= self.max_entries or total_bytes > self.max_bytes:
+                expired.append((rowid,))
+        if expired:
+            conn.executemany("DELETE FROM extraction_cache WHERE rowid = ?", expired)
+
+    def clear(self) -> None:
+        """すべてのエントリを削除する"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM extraction_cache")
+
+
+_extraction_cache: Optional[ExtractionCache] = None
+_extraction_cache_initialized = False
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """
+    プロセス全体で共有する抽出キャッシュを返す
+    TA_EXTRACTION_CACHE_ENABLED=0 の場合はNone
+    """
+    global _extraction_cache, _extraction_cache_initialized
+    with _extraction_cache_lock:
+        if not _extraction_cache_initialized:
+            enabled = os.getenv("TA_EXTRACTION_CACHE_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+            if enabled:
+                _extraction_cache = ExtractionCache(
+                    path=os.getenv("TA_EXTRACTION_CACHE_PATH", DEFAULT_EXTRACTION_CACHE_PATH),
+                    max_entries=int(os.getenv("TA_EXTRACTION_CACHE_MAX_ENTRIES", DEFAULT_EXTRACTION_CACHE_MAX_ENTRIES)),
+                    max_bytes=int(os.getenv("TA_EXTRACTION_CACHE_MAX_BYTES", DEFAULT_EXTRACTION_CACHE_MAX_BYTES)),
+                )
+            _extraction_cache_initialized = True
+        return _extraction_cache
+
+
+def reset_extraction_cache() -> None:
+    """抽出キャッシュを破棄し、次回利用時に環境変数から作り直す"""
+    global _extraction_cache, _extraction_cache_initialized
+    with _extraction_cache_lock:
+        _extraction_cache = None
+        _extraction_cache_initialized = False
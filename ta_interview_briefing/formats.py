@@ -0,0 +1,234 @@
+"""
+ブリーフィングの出力形式（HTML / Markdown / JSON）
+PDF（pdf_builder）と同じ見出し構成・エスケープで、ATSの画面などに埋め込む軽量な形式を生成する
+"""
+
+import json
+import html
+from string import Template
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# ブリーフィングのタイトルと見出し（PDFと共通）
+BRIEFING_TITLE = "Talent Analytics 面接ブリーフィング"
+CANDIDATE_LABEL = "候補者名"
+EMPTY_SECTION_TEXT = "（情報なし）"
+# (解析結果のキー, 見出し)。summary は段落、それ以外は箇条書き
+BRIEFING_SECTIONS: List[Tuple[str, str]] = [
+    ("summary", "【総合特徴】"),
+    ("risk_points", "【見定めポイント】"),
+    ("attract_points", "【アトラクトポイント】"),
+    ("notes_for_interviewer", "【面接の進め方メモ】"),
+]
+
+# 出力形式 -> Content-Type（text/* にはレスポンス側で charset=utf-8 が付く）
+FORMAT_MEDIA_TYPES: Dict[str, str] = {
+    "pdf": "application/pdf",
+    "html": "text/html",
+    "markdown": "text/markdown",
+    "json": "application/json",
+}
+DEFAULT_FORMAT = "pdf"
+
+# Acceptヘッダーのメディアタイプ -> 出力形式
+_ACCEPT_FORMATS: Dict[str, str] = {
+    "application/pdf": "pdf",
+    "text/html": "html",
+    "application/xhtml+xml": "html",
+    "text/*": "html",
+    "text/markdown": "markdown",
+    "text/x-markdown": "markdown",
+    "application/json": "json",
+}
+
+# 形式名の別名（format クエリパラメータ用）
+_FORMAT_ALIASES: Dict[str, str] = {"md": "markdown", "htm": "html"}
+
+# HTML / Markdown / JSON のテンプレートのバージョン（変更した場合は更新する。ETagが切り替わる）
+FORMATS_VERSION = "1"
+
+# Markdownで書式として解釈される記号をバックスラッシュでエスケープする変換表
+_MARKDOWN_ESCAPES = str.maketrans({char: "\\" + char for char in "\\`*_[]#|~"})
+
+
+def clean_item(text: Any) -> str:
+    """箇条書きの項目から改行と連続する空白を除く（PDFと同じ正規化）"""
+    return " ".join(str(text).strip().replace("\n", " ").replace("\r", " ").split())
+
+
+def iter_sections(analysis: Dict[str, Any]):
+    """
+    解析結果を見出しごとに取り出す
+
+    Yields:
+        (解析結果のキー, 見出し, 項目のリスト) のタプル。summary は正規化前の本文を1項目として返し、
+        項目がない場合は空のリスト
+    """
+    for key, heading in BRIEFING_SECTIONS:
+        if key == "summary":
+            summary = analysis.get("summary", "")
+            yield key, heading, [summary] if summary else []
+        else:
+            yield key, heading, [clean_item(item) for item in analysis.get(key, []) or []]
+
+
+_HTML_PAGE = Template("""<!DOCTYPE html>
+<html lang="ja">
+<head>
+<meta charset="utf-8">
+<title>$title - $candidate_name</title>
+<style>
+body{font-family:sans-serif;color:#333;max-width:48em;margin:2em auto;line-height:1.6}
+h1{color:#1a1a1a;font-size:1.6em}h2{color:#2c3e50;font-size:1.15em;margin-top:1.5em}
+</style>
+</head>
+<body>
+<article class="briefing">
+<h1>$title</h1>
+<p class="candidate">$candidate_label: $candidate_name</p>
+$sections
+</article>
+</body>
+</html>
+""")
+_HTML_SECTION = Template('<section class="$key">\n<h2>$heading</h2>\n$body\n</section>')
+_HTML_PARAGRAPH = Template("<p>$text</p>")
+_HTML_LIST = Template("<ul>\n$items\n</ul>")
+_HTML_LIST_ITEM = Template("<li>$text</li>")
+
+_MARKDOWN_PAGE = Template("# $title\n\n$candidate_label: $candidate_name\n\n$sections\n")
+_MARKDOWN_SECTION = Template("## $heading\n\n$body\n")
+_MARKDOWN_LIST_ITEM = Template("- $text")
+
+
+def render_html(candidate_name: str, analysis: Dict[str, Any]) -> str:
+    """
+    ブリーフィングをHTMLとして生成する（すべてのテキストをHTMLエスケープする）
+
+    Args:
+        candidate_name: 候補者名
+        analysis: 解析結果の辞書（summary, risk_points, attract_points, notes_for_interviewer）
+    """
+    sections = []
+    for key, heading, items in iter_sections(analysis):
+        if not items:
+            body = _HTML_PARAGRAPH.substitute(text=EMPTY_SECTION_TEXT)
+        elif key == "summary":
+            body = _HTML_PARAGRAPH.substitute(text=html.escape(items[0]))
+        else:
+            body = _HTML_LIST.substitute(
+                items="\n".join(_HTML_LIST_ITEM.substitute(text=html.escape(item)) for item in items)
+            )
+        sections.append(_HTML_SECTION.substitute(key=key, heading=heading, body=body))
+    return _HTML_PAGE.substitute(
+        title=BRIEFING_TITLE,
+        candidate_label=CANDIDATE_LABEL,
+        candidate_name=html.escape(candidate_name),
+        sections="\n".join(sections),
+    )
+
+
+def _escape_markdown(text: str) -> str:
+    """HTMLとして解釈される文字と、Markdownの書式記号をエスケープする"""
+    return html.escape(text, quote=False).translate(_MARKDOWN_ESCAPES)
+
+
+def render_markdown(candidate_name: str, analysis: Dict[str, Any]) -> str:
+    """
+    ブリーフィングをMarkdownとして生成する（HTMLとMarkdownの書式記号をエスケープする）
+
+    Args:
+        candidate_name: 候補者名
+        analysis: 解析結果の辞書（summary, risk_points, attract_points, notes_for_interviewer）
+    """
+    sections = []
+    for key, heading, items in iter_sections(analysis):
+        if not items:
+            body = EMPTY_SECTION_TEXT
+        elif key == "summary":
+            body = _escape_markdown(clean_item(items[0]))
+        else:
+            body = "\n".join(_MARKDOWN_LIST_ITEM.substitute(text=_escape_markdown(item)) for item in items)
+        sections.append(_MARKDOWN_SECTION.substitute(heading=heading, body=body))
+    return _MARKDOWN_PAGE.substitute(
+        title=BRIEFING_TITLE,
+        candidate_label=CANDIDATE_LABEL,
+        candidate_name=_escape_markdown(clean_item(candidate_name)),
+        sections="\n".join(sections).rstrip("\n"),
+    )
+
+
+def render_json(candidate_name: str, analysis: Dict[str, Any]) -> str:
+    """
+    ブリーフィングをJSONとして生成する（見出しと項目を構造化して返す）
+
+    Args:
+        candidate_name: 候補者名
+        analysis: 解析結果の辞書（summary, risk_points, attract_points, notes_for_interviewer）
+    """
+    return json.dumps({
+        "title": BRIEFING_TITLE,
+        "candidate_name": candidate_name,
+        "sections": [
+            {"key": key, "heading": heading, "items": items}
+            for key, heading, items in iter_sections(analysis)
+        ],
+    }, ensure_ascii=False)
+
+
+# 出力形式 -> 生成関数（PDFは pdf_builder.render_interview_pdf）
+TEXT_RENDERERS = {
+    "html": render_html,
+    "markdown": render_markdown,
+    "json": render_json,
+}
+
+
+def negotiate_format(accept: Optional[str] = None, requested: Optional[str] = None) -> str:
+    """
+    出力形式を決定する
+
+    format クエリパラメータ（requested）を優先し、指定がなければ Accept ヘッダーの q 値が
+    最も高い対応形式を選ぶ。どちらもない・対応形式がない場合はPDF
+
+    Args:
+        accept: Acceptヘッダー
+        requested: 明示的に指定された形式（pdf / html / markdown（md） / json）
+
+    Returns:
+        出力形式（pdf / html / markdown / json）
+
+    Raises:
+        ValueError: requested が未対応の形式の場合
+    """
+    if requested:
+        name = requested.strip().lower()
+        name = _FORMAT_ALIASES.get(name, name)
+        if name not in FORMAT_MEDIA_TYPES:
+            raise ValueError(
+                f"未対応の出力形式です: {requested}（{' / '.join(FORMAT_MEDIA_TYPES)}）"
+            )
+        return name
+    if not accept:
+        return DEFAULT_FORMAT
+
+    candidates = []
+    for index, entry in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in entry.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality <= 0:
+            continue
+        media_type = media_type.lower()
+        if media_type in ("*/*", "application/*"):
+            candidates.append((quality, -index, DEFAULT_FORMAT))
+        elif media_type in _ACCEPT_FORMATS:
+            candidates.append((quality, -index, _ACCEPT_FORMATS[media_type]))
+    if not candidates:
+        return DEFAULT_FORMAT
+    return max(candidates)[2]
@@ -4,18 +4,369 @@ CLI実行用のエントリーポイント
 
 import sys
 import argparse
+import contextlib
 from pathlib import Path
 
-from .azure_client import analyze_ta_pdf_with_azure
-from .pdf_builder import generate_interview_pdf_from_azure
+from ._lazy import load_lazy_attribute
+
+
+# 解析・PDF生成のモジュールは実際に処理するときにインポートする（--help などを速くするため）
+_LAZY_ATTRIBUTES = {
+    "analyze_ta_pdf_with_azure": (".azure_client", "analyze_ta_pdf_with_azure"),
+    "generate_interview_pdf_from_azure": (".pdf_builder", "generate_interview_pdf_from_azure"),
+}
+
+
+def __getattr__(name):
+    return load_lazy_attribute(globals(), name, _LAZY_ATTRIBUTES)
+
+
+def _print_estimate(pdf_paths):
+    """
+    PDFのトークン数・コスト・所要時間を見積もって表示する（Azure OpenAIは呼び出さない）
+    
+    Args:
+        pdf_paths: 見積もるPDFファイルのパス
+    """
+    from .estimator import estimate_pdfs, format_estimate_report
+    
+    report = estimate_pdfs(pdf_paths)
+    print("=" * 50)
+    print("見積もり結果（ドライラン）")
+    print("=" * 50)
+    print(format_estimate_report(report))
+    print("=" * 50)
+    if report["totals"]["errors"]:
+        sys.exit(1)
+
+
+def batch_main(argv):
+    """
+    batchサブコマンド: ディレクトリ内のPDFをまとめて処理する
+    
+    Args:
+        argv: サブコマンド以降のコマンドライン引数
+    """
+    from .batch import run_batch, STATUS_DONE, STATUS_FAILED, STATUS_SKIPPED
+    
+    parser = argparse.ArgumentParser(
+        prog="python -m ta_interview_briefing.main batch",
+        description="ディレクトリ内のTalent Analytics PDFをまとめて解析し、ブリーフィングPDFを生成"
+    )
+    parser.add_argument(
+        "input_dir",
+        type=str,
+        help="Talent Analytics PDFが置かれたディレクトリ"
+    )
+    parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        default=4,
+        help="同時に処理するファイル数（デフォルト: 4）"
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        default=None,
+        help="進捗マニフェストのパス（デフォルト: <input_dir>/.ta_batch_manifest.json）"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="生成済みのブリーフィングPDFや処理済みのファイルも処理し直す"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Azure OpenAIを呼び出さず、全ファイルのトークン数・コスト・所要時間を見積もる"
+    )
+    
+    args = parser.parse_args(argv)
+    
+    if args.dry_run:
+        from .batch import find_input_pdfs
+        input_dir = Path(args.input_dir)
+        if not input_dir.is_dir():
+            print(f"エラー: ディレクトリが見つかりません: {args.input_dir}")
+            sys.exit(1)
+        _print_estimate(find_input_pdfs(input_dir))
+        return
+    
+    try:
+        counts = run_batch(
+            args.input_dir,
+            concurrency=args.concurrency,
+            manifest_path=args.manifest,
+            force=args.force
+        )
+    except FileNotFoundError as e:
+        print(f"エラー: {e}")
+        sys.exit(1)
+    
+    print("=" * 50)
+    print(
+        f"バッチ処理が完了しました: 成功 {counts[STATUS_DONE]}件 / "
+        f"失敗 {counts[STATUS_FAILED]}件 / スキップ {counts[STATUS_SKIPPED]}件"
+    )
+    print("=" * 50)
+    if counts[STATUS_FAILED]:
+        sys.exit(1)
+
+
+def bulk_main(argv):
+    """
+    bulkサブコマンド: マニフェスト（CSV / JSONL）に記載されたPDFをまとめて処理し、結果をJSONLで出力する
+    
+    Args:
+        argv: サブコマンド以降のコマンドライン引数
+    """
+    from .batch import run_bulk
+    
+    parser = argparse.ArgumentParser(
+        prog="python -m ta_interview_briefing.main bulk",
+        description="マニフェスト（CSV / JSONL）に記載されたTalent Analytics PDFを解析し、1行ごとの結果をJSONLで出力"
+    )
+    parser.add_argument(
+        "manifest",
+        type=str,
+        help="candidate_id, candidate_name, pdf_path 列を持つCSVまたはJSONLファイル"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default=None,
+        help="結果のJSONLファイルのパス（指定しない場合は標準出力）"
+    )
+    parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        default=4,
+        help="同時に処理する行数（デフォルト: 4）"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default=None,
+        help="ブリーフィングPDFの出力先ディレクトリ（デフォルト: 入力PDFと同じディレクトリ）"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Azure OpenAIを呼び出さず、全行のトークン数・コスト・所要時間を見積もる"
+    )
+    
+    args = parser.parse_args(argv)
+    
+    if args.dry_run:
+        from .batch import iter_bulk_rows
+        try:
+            _print_estimate(row["pdf_path"] for row in iter_bulk_rows(args.manifest))
+        except FileNotFoundError as e:
+            print(f"エラー: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    
+    # 結果のJSONLと混ざらないように、処理中のログは標準エラー出力に出す
+    result_stream = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            counts = run_bulk(
+                args.manifest,
+                result_stream,
+                concurrency=args.concurrency,
+                output_dir=args.output_dir
+            )
+    except FileNotFoundError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if args.output:
+            result_stream.close()
+    
+    print(f"一括処理が完了しました: 成功 {counts['ok']}件 / 失敗 {counts['error']}件", file=sys.stderr)
+    if counts["error"]:
+        sys.exit(1)
+
+
+def watch_main(argv):
+    """
+    watchサブコマンド: フォルダを監視し、追加・更新されたPDFのブリーフィングPDFを生成し続ける
+    
+    Args:
+        argv: サブコマンド以降のコマンドライン引数
+    """
+    from .watcher import (
+        FolderWatcher,
+        DEFAULT_WATCH_WORKERS,
+        DEFAULT_DEBOUNCE_SECONDS,
+        DEFAULT_POLL_INTERVAL_SECONDS,
+        DEFAULT_MAX_ATTEMPTS,
+    )
+    
+    parser = argparse.ArgumentParser(
+        prog="python -m ta_interview_briefing.main watch",
+        description="フォルダを監視し、追加・更新されたTalent Analytics PDFのブリーフィングPDFを同じフォルダに生成"
+    )
+    parser.add_argument(
+        "input_dir",
+        type=str,
+        help="監視するディレクトリ"
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=DEFAULT_WATCH_WORKERS,
+        help=f"同時に処理するファイル数（デフォルト: {DEFAULT_WATCH_WORKERS}）"
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE_SECONDS,
+        help=f"サイズと更新時刻がこの秒数変わらなければ書き込み完了とみなす（デフォルト: {DEFAULT_DEBOUNCE_SECONDS}）"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL_SECONDS,
+        help=f"変更を確認する間隔（秒、デフォルト: {DEFAULT_POLL_INTERVAL_SECONDS}）"
+    )
+    parser.add_argument(
+        "--polling",
+        action="store_true",
+        help="OSの変更通知（watchdog）を使わず、常にポーリングで監視する（ネットワークドライブ向け）"
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=DEFAULT_MAX_ATTEMPTS,
+        help=f"同じ内容のファイルを処理する回数の上限（超えたファイルは更新されるまで処理しない、デフォルト: {DEFAULT_MAX_ATTEMPTS}）"
+    )
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        watcher = FolderWatcher(
+            args.input_dir,
+            workers=args.workers,
+            debounce_seconds=args.debounce,
+            poll_interval=args.poll_interval,
+            use_polling=args.polling,
+            max_attempts=args.max_attempts
+        )
+    except FileNotFoundError as e:
+        print(f"エラー: {e}")
+        sys.exit(1)
+    
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("フォルダの監視を終了しました")
+
+
+def export_main(argv):
+    """
+    exportサブコマンド: 求人IDの保存済みの解析結果から、ブリーフィングをまとめたZIP（またはブックレットPDF）を生成する
+    
+    Args:
+        argv: サブコマンド以降のコマンドライン引数
+    """
+    from .export import FORMAT_EXTENSIONS, write_briefing_zip
+    from .store import get_analysis_store
+    
+    parser = argparse.ArgumentParser(
+        prog="python -m ta_interview_briefing.main export",
+        description="求人IDの保存済みの解析結果（TA_ANALYSIS_STORE_PATH）からブリーフィングを1件ずつ生成し、ZIPに書き出す"
+    )
+    parser.add_argument(
+        "requisition_id",
+        type=str,
+        help="求人ID（/analyze・/generate_pdf の requisition_id）"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default=None,
+        help="出力ファイルのパス（デフォルト: <求人ID>_interview_briefings.zip、--booklet の場合は <求人ID>_interview_booklet.pdf、- で標準出力）"
+    )
+    parser.add_argument(
+        "--booklet",
+        action="store_true",
+        help="ZIPではなく、全候補者のブリーフィングを目次付きの1つのPDFにまとめる"
+    )
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=list(FORMAT_EXTENSIONS),
+        default="pdf",
+        help="ブリーフィングの形式（デフォルト: pdf）"
+    )
+    
+    args = parser.parse_args(argv)
+    
+    store = get_analysis_store()
+    if store is None:
+        print("エラー: 解析結果ストアが無効です（TA_ANALYSIS_STORE_ENABLED）", file=sys.stderr)
+        sys.exit(1)
+    if not store.has_requisition(args.requisition_id):
+        print(f"エラー: 求人IDの解析結果が見つかりません: {args.requisition_id}", file=sys.stderr)
+        sys.exit(1)
+    
+    records = store.iter_by_requisition(args.requisition_id)
+    
+    def write(output):
+        if args.booklet:
+            from .booklet import render_booklet
+            candidates = ((record.candidate_name or "候補者", record.result.model_dump()) for record in records)
+            return len(render_booklet(candidates, output))
+        return write_briefing_zip(records, output, args.output_format)
+    
+    if args.booklet:
+        output_kind = "ブックレットPDF"
+        output_path = args.output or f"{args.requisition_id}_interview_booklet.pdf"
+    else:
+        output_kind = "ZIP"
+        output_path = args.output or f"{args.requisition_id}_interview_briefings.zip"
+    
+    # 標準出力に書き出す場合に備え、処理中のメッセージ（フォントの登録など）は標準エラーに出す
+    stdout = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        if output_path == "-":
+            count = write(stdout.buffer)
+            stdout.buffer.flush()
+            output_path = "標準出力"
+        else:
+            with open(output_path, "wb") as output:
+                count = write(output)
+    print(f"ブリーフィング {count}件を{output_kind}に書き出しました: {output_path}", file=sys.stderr)
 
 
 def main():
     """
     コマンドラインから実行されるメイン関数
     """
+    # サブコマンドの振り分け（従来の「main.py <pdf_path>」形式はそのまま使える）
+    if sys.argv[1:2] == ["batch"]:
+        batch_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["bulk"]:
+        bulk_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["watch"]:
+        watch_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["export"]:
+        export_main(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(
-        description="Talent Analytics PDFを解析して面接官向けブリーフィングPDFを生成"
+        description="Talent Analytics PDFを解析して面接官向けブリーフィングPDFを生成",
+        epilog=(
+            "ディレクトリ内のPDFをまとめて処理する場合: python -m ta_interview_briefing.main batch <dir>\n"
+            "マニフェストのPDFを一括処理する場合: python -m ta_interview_briefing.main bulk <manifest.csv|jsonl>\n"
+            "フォルダを監視して自動処理する場合: python -m ta_interview_briefing.main watch <dir>\n"
+            "求人IDの保存済みの解析結果をZIPで書き出す場合: python -m ta_interview_briefing.main export <requisition_id>"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
     )
     parser.add_argument(
         "pdf_path",
@@ -34,6 +385,11 @@ def main():
         default="候補者",
         help="候補者名（デフォルト: 候補者）"
     )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Azure OpenAIを呼び出さず、トークン数・コスト・所要時間を見積もる"
+    )
     
     args = parser.parse_args()
     
@@ -43,6 +399,10 @@ def main():
         print(f"エラー: ファイルが見つかりません: {pdf_path}")
         sys.exit(1)
     
+    if args.dry_run:
+        _print_estimate([pdf_path])
+        return
+    
     # 出力ファイルパスの決定
     if args.output:
         output_path = Path(args.output)
@@ -56,13 +416,13 @@ def main():
         print("=" * 50)
         print("Talent Analytics PDF解析を開始します...")
         print("=" * 50)
-        analysis = analyze_ta_pdf_with_azure(str(pdf_path))
+        analysis = __getattr__("analyze_ta_pdf_with_azure")(str(pdf_path))
         
         # ブリーフィングPDFを生成
         print("=" * 50)
         print("ブリーフィングPDFを生成します...")
         print("=" * 50)
-        generate_interview_pdf_from_azure(
+        __getattr__("generate_interview_pdf_from_azure")(
             str(output_path),
             args.name,
             analysis
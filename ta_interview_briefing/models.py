@@ -2,7 +2,8 @@
 データモデル定義
 """
 
-from typing import List
+from datetime import datetime
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -36,3 +37,75 @@ class AnalysisResult(BaseModel):
             }
         }
 
+
+
+class ParsedTAReport(BaseModel):
+    """Talent Analytics レポートを構造化したデータモデル（プロンプト圧縮用）"""
+    
+    scores: Dict[str, Dict[str, str]] = Field(
+        default_factory=dict, description="見出しごとの、特性名とスコア（単位を含む元の表記）"
+    )
+    sections: Dict[str, str] = Field(default_factory=dict, description="見出しごとの本文")
+    dropped_lines: int = Field(0, description="定型文として除去した行数")
+    
+    @property
+    def is_recognized(self) -> bool:
+        """TAレポートのレイアウトとして認識できたかどうか"""
+        return bool(self.scores) or bool(self.sections)
+
+
+class FileEstimate(BaseModel):
+    """1ファイルを解析した場合のトークン数・コストの見積もり"""
+    
+    filename: str = Field(..., description="ファイル名")
+    prompt_tokens: int = Field(0, description="入力トークン数")
+    completion_tokens: int = Field(0, description="出力トークン数（想定）")
+    max_completion_tokens: int = Field(0, description="出力トークン数の上限（max_tokens）")
+    total_tokens: int = Field(0, description="合計トークン数")
+    cost: float = Field(0.0, description="コスト")
+    cached: bool = Field(False, description="LLMキャッシュにヒットし、API呼び出しが発生しないかどうか")
+    error: Optional[str] = Field(None, description="見積もりに失敗した場合のエラー")
+
+
+class EstimateTotals(BaseModel):
+    """複数ファイルの見積もりの合計"""
+    
+    files: int = Field(..., description="ファイル数")
+    requests: int = Field(..., description="Azure OpenAIの呼び出し件数")
+    cached: int = Field(..., description="キャッシュ済みの件数")
+    errors: int = Field(..., description="見積もりに失敗した件数")
+    prompt_tokens: int = Field(..., description="入力トークン数の合計")
+    completion_tokens: int = Field(..., description="出力トークン数（想定）の合計")
+    total_tokens: int = Field(..., description="合計トークン数")
+    cost: float = Field(..., description="コストの合計")
+    currency: str = Field(..., description="コストの通貨")
+    rate_limit_tokens: int = Field(..., description="レート制限で数えられるトークン数（入力 + max_tokens）")
+    tpm: int = Field(..., description="見積もりに使用したTPM")
+    rpm: int = Field(..., description="見積もりに使用したRPM")
+    expected_wall_seconds: int = Field(..., description="TPM / RPMの上限での所要時間の目安（秒）")
+    bottleneck: str = Field(..., description="所要時間を律速する上限（tpm / rpm）")
+
+
+class EstimateReport(BaseModel):
+    """トークン数・コストの見積もり結果"""
+    
+    files: List[FileEstimate] = Field(..., description="ファイルごとの見積もり")
+    totals: EstimateTotals = Field(..., description="合計")
+
+
+class AnalysisRecord(BaseModel):
+    """保存済みの解析結果（AnalysisStore のレコード）"""
+    
+    id: str = Field(..., description="解析結果のID")
+    candidate_id: Optional[str] = Field(None, description="候補者ID")
+    candidate_name: Optional[str] = Field(None, description="候補者名")
+    requisition_id: Optional[str] = Field(None, description="最後に紐づけた求人ID（解析結果は複数の求人に紐づけられる）")
+    content_hash: str = Field(..., description="解析したPDFの内容のSHA-256")
+    model: str = Field(..., description="解析に使用したデプロイメント（モデル）名")
+    prompt_version: str = Field(..., description="解析に使用したプロンプトのバージョン")
+    result: AnalysisResult = Field(..., description="解析結果")
+    prompt_tokens: int = Field(0, description="入力トークン数")
+    completion_tokens: int = Field(0, description="出力トークン数")
+    total_tokens: int = Field(0, description="合計トークン数")
+    created_at: datetime = Field(..., description="作成日時")
+    updated_at: datetime = Field(..., description="更新日時")
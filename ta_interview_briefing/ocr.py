@@ -0,0 +1,199 @@
+"""
+画像のみのページ向けのローカルOCRフォールバック
+テキストレイヤーのないページを画像化し、Tesseract（日本語モデル）で並列にOCRする
+"""
+
+import os
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional
+
+
+# OCRのデフォルト設定（環境変数で上書き可能）
+DEFAULT_OCR_LANG = "jpn"
+DEFAULT_OCR_DPI = 300
+DEFAULT_OCR_PAGE_TIMEOUT_SECONDS = 60
+DEFAULT_OCR_MAX_PAGES = 20
+DEFAULT_OCR_CACHE_MAX_ENTRIES = 256
+
+
+def _env_int(name: str, default: int) -> int:
+    """整数の環境変数を読み込む"""
+    return int(os.getenv(name, default))
+
+
+def ocr_workers() -> int:
+    """OCRを並列に実行するワーカー数（TA_OCR_WORKERS、デフォルトはCPU数と4の小さい方）"""
+    return max(1, _env_int("TA_OCR_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+def ocr_lang() -> str:
+    """Tesseractの言語モデル（TA_OCR_LANG）"""
+    return os.getenv("TA_OCR_LANG", DEFAULT_OCR_LANG)
+
+
+def ocr_dpi() -> int:
+    """ページを画像化する解像度（TA_OCR_DPI）"""
+    return _env_int("TA_OCR_DPI", DEFAULT_OCR_DPI)
+
+
+def ocr_max_pages() -> int:
+    """1つのPDFでOCRするページ数の上限（TA_OCR_MAX_PAGES）"""
+    return _env_int("TA_OCR_MAX_PAGES", DEFAULT_OCR_MAX_PAGES)
+
+
+def is_ocr_available() -> bool:
+    """
+    OCRフォールバックが利用可能かどうかを判定する
+
+    TA_OCR_ENABLED=0 で無効化でき、pytesseract・pdf2image と
+    tesseract・pdftoppm（poppler-utils）コマンドがすべて揃っている場合のみTrue
+    """
+    if os.getenv("TA_OCR_ENABLED", "1").lower() in ("0", "false", "no", "off"):
+        return False
+    try:
+        import pytesseract  # noqa: F401
+        import pdf2image  # noqa: F401
+    except ImportError:
+        return False
+    return shutil.which("tesseract") is not None and shutil.which("pdftoppm") is not None
+
+
+class _OcrResultCache:
+    """ページ画像のハッシュをキーにしたOCR結果のLRUキャッシュ"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_ocr_cache = _OcrResultCache(_env_int("TA_OCR_CACHE_MAX_ENTRIES", DEFAULT_OCR_CACHE_MAX_ENTRIES))
+
+# プロセス全体で共有するOCRのワーカープール（同時に動くTesseractの数を TA_OCR_WORKERS に抑える）
+_ocr_pool: Optional[ThreadPoolExecutor] = None
+_ocr_pool_lock = threading.Lock()
+
+
+def get_ocr_pool() -> ThreadPoolExecutor:
+    """OCRのワーカープールを返す（初回に作成し、同時に処理中のリクエストで共有する）"""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ThreadPoolExecutor(max_workers=ocr_workers(), thread_name_prefix="ta-ocr")
+        return _ocr_pool
+
+
+def reset_ocr_pool() -> None:
+    """OCRのワーカープールを停止して破棄し、次回利用時に環境変数から作り直す"""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        pool, _ocr_pool = _ocr_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def clear_ocr_cache() -> None:
+    """OCR結果のキャッシュを破棄する"""
+    _ocr_cache.clear()
+
+
+def _rasterize_page(pdf_path: str, page_index: int) -> Any:
+    """PDFの1ページを画像（PIL.Image）に変換する"""
+    from pdf2image import convert_from_path
+
+    images = convert_from_path(
+        pdf_path,
+        dpi=ocr_dpi(),
+        first_page=page_index + 1,
+        last_page=page_index + 1,
+        grayscale=True,
+    )
+    return images[0]
+
+
+def _run_tesseract(image: Any) -> str:
+    """画像をTesseractでOCRする"""
+    import pytesseract
+
+    return pytesseract.image_to_string(
+        image,
+        lang=ocr_lang(),
+        timeout=_env_int("TA_OCR_PAGE_TIMEOUT_SECONDS", DEFAULT_OCR_PAGE_TIMEOUT_SECONDS),
+    )
+
+
+def _page_hash(image: Any) -> str:
+    """
+    ページ画像の内容とOCRの設定からキャッシュキーを計算する（同じ見た目のページは同じハッシュ）
+    言語モデル・解像度を変えた場合に以前の設定の結果を返さないよう、両方をキーに含める
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{ocr_lang()}:{ocr_dpi()}:{image.mode}:{image.size}".encode("utf-8"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def ocr_page(pdf_path: str, page_index: int) -> str:
+    """
+    PDFの1ページをOCRする（同じ画像のページはキャッシュから返す）
+
+    Args:
+        pdf_path: PDFファイルのパス
+        page_index: ページ番号（0始まり）
+
+    Returns:
+        OCRで認識したテキスト（失敗した場合は空文字列）
+    """
+    try:
+        image = _rasterize_page(pdf_path, page_index)
+        key = _page_hash(image)
+        cached = _ocr_cache.get(key)
+        if cached is not None:
+            return cached
+        text = _run_tesseract(image)
+    except Exception as e:
+        # 1ページの失敗で文書全体を失敗させない（タイムアウトも含む）
+        print(f"⚠️  {page_index + 1}ページ目のOCRに失敗しました: {e}")
+        return ""
+    _ocr_cache.set(key, text)
+    return text
+
+
+def ocr_pages(pdf_path: str, page_indexes: List[int]) -> List[str]:
+    """
+    複数ページをワーカープールで並列にOCRする
+    プールはプロセス全体で共有するため、複数のリクエストが同時にOCRしても並列数は TA_OCR_WORKERS までになる
+
+    Args:
+        pdf_path: PDFファイルのパス
+        page_indexes: OCRするページ番号（0始まり）のリスト
+
+    Returns:
+        page_indexesと同じ順序のOCR結果のリスト
+    """
+    if not page_indexes:
+        return []
+    print(f"画像のみのページをOCRしています: {[index + 1 for index in page_indexes]}ページ目")
+    return list(get_ocr_pool().map(lambda index: ocr_page(pdf_path, index), page_indexes))
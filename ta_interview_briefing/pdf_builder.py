@@ -3,9 +3,13 @@ ReportLabを使用したPDF生成
 面接官向けブリーフィングPDFを生成する
 """
 
+import io
 import html
-from typing import Dict, Any
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+import threading
+from pathlib import Path
+from typing import Dict, Any, BinaryIO, List, Union
+from reportlab import Version as REPORTLAB_VERSION
+from reportlab.platypus import Flowable, SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
@@ -13,6 +17,20 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.cidfonts import UnicodeCIDFont
 from reportlab.lib import colors
 
+from .formats import BRIEFING_TITLE, CANDIDATE_LABEL, EMPTY_SECTION_TEXT, iter_sections
+from .render_cache import get_render_cache, make_render_cache_key
+
+
+# ブリーフィングPDFのテンプレート（レイアウト・スタイル）のバージョン
+# レイアウトを変更した場合は更新する（生成済みPDFのキャッシュとETagが切り替わる）
+TEMPLATE_VERSION = "1"
+
+# ReportLabのフォントのレジストリはグローバルで、複数スレッドからの同時変更に対応していないため、
+# フォントの登録とスタイルの作成はこのロックで直列化する（レイアウト自体はロックしない）
+_init_lock = threading.Lock()
+_shared_styles: Dict[str, Dict[str, ParagraphStyle]] = {}
+_renderer_ready = False
+
 
 def _register_japanese_font():
     """
@@ -26,12 +44,70 @@ def _register_japanese_font():
     if font_name in pdfmetrics.getRegisteredFontNames():
         return font_name
     
-    # CIDFontを登録（日本語フォントを内蔵）
-    pdfmetrics.registerFont(UnicodeCIDFont(font_name))
+    with _init_lock:
+        # ロックを待つ間に他のスレッドが登録した場合はスキップ
+        if font_name in pdfmetrics.getRegisteredFontNames():
+            return font_name
+        # CIDFontを登録（日本語フォントを内蔵）
+        pdfmetrics.registerFont(UnicodeCIDFont(font_name))
     print(f"✅ 日本語フォントを登録しました: {font_name}")
     return font_name
 
 
+def warm_up_renderer() -> None:
+    """
+    PDF生成の初期化（フォントの登録・スタイルの作成・ReportLabが初回の描画時に読み込むフォント情報）を済ませる
+    レンダリング用のスレッドプールの開始時に1回だけ呼び出し、並行してレンダリングする前にグローバルな状態を確定させる
+    """
+    global _renderer_ready
+    if _renderer_ready:
+        return
+    font_name = _register_japanese_font()
+    styles = _briefing_styles(font_name)
+    with _init_lock:
+        if _renderer_ready:
+            return
+        # 見本を1回描画し、遅延して登録される標準フォント（Helvetica）などを読み込ませる
+        sample = {"summary": "見本", "risk_points": ["見本"], "attract_points": [], "notes_for_interviewer": []}
+        _briefing_doc(io.BytesIO()).build(_briefing_flowables("見本", sample, styles))
+        _renderer_ready = True
+
+
+def briefing_cache_key(candidate_name: str, analysis: Dict[str, Any]) -> str:
+    """
+    ブリーフィングPDFのキャッシュキー（強いETagとしても使う）
+    テンプレートのバージョンとReportLabのバージョンが同じであれば、同じキーのPDFは同じバイト列になる
+    """
+    return make_render_cache_key(analysis, candidate_name, f"{TEMPLATE_VERSION}+reportlab-{REPORTLAB_VERSION}")
+
+
+def render_interview_pdf(candidate_name: str, analysis: Dict[str, Any]) -> bytes:
+    """
+    面接官向けブリーフィングPDFをバイト列として生成する
+    同じ解析結果・候補者名のPDFは生成済みPDFのキャッシュから返す
+    
+    Args:
+        candidate_name: 候補者名
+        analysis: 解析結果の辞書（summary, risk_points, attract_points, notes_for_interviewer）
+        
+    Returns:
+        PDFのバイト列
+    """
+    render_cache = get_render_cache()
+    key = briefing_cache_key(candidate_name, analysis)
+    if render_cache is not None:
+        cached = render_cache.get(key)
+        if cached is not None:
+            return cached
+    
+    buffer = io.BytesIO()
+    _build_briefing(buffer, candidate_name, analysis)
+    data = buffer.getvalue()
+    if render_cache is not None:
+        render_cache.set(key, data)
+    return data
+
+
 def generate_interview_pdf_from_azure(
     output_path: str,
     candidate_name: str,
@@ -48,135 +124,128 @@ def generate_interview_pdf_from_azure(
     Raises:
         Exception: PDF生成に失敗した場合
     """
-    # 日本語フォントを登録
-    japanese_font = _register_japanese_font()
-    
-    # PDFドキュメントの設定
-    doc = SimpleDocTemplate(
-        output_path,
-        pagesize=A4,
-        leftMargin=20*mm,
-        rightMargin=20*mm,
-        topMargin=20*mm,
-        bottomMargin=20*mm
-    )
-    
+    Path(output_path).write_bytes(render_interview_pdf(candidate_name, analysis))
+    print(f"PDFを生成しました: {output_path}")
+
+
+def _briefing_styles(font_name: str) -> Dict[str, ParagraphStyle]:
+    """
+    ブリーフィングの段落スタイル（タイトル・候補者名・見出し・本文・箇条書き）
+    フォントごとに1回だけ作成し、すべてのブリーフィング・ブックレットで共有する（描画時には変更されない）
+    """
+    styles = _shared_styles.get(font_name)
+    if styles is None:
+        with _init_lock:
+            styles = _shared_styles.get(font_name)
+            if styles is None:
+                styles = _shared_styles[font_name] = _create_briefing_styles(font_name)
+    return styles
+
+
+def _create_briefing_styles(font_name: str) -> Dict[str, ParagraphStyle]:
     # スタイルシートを取得
     styles = getSampleStyleSheet()
     
     # カスタムスタイルを定義
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontName=japanese_font,
-        fontSize=20,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=12,
-        alignment=0  # 左揃え
-    )
-    
-    candidate_style = ParagraphStyle(
-        'Candidate',
-        parent=styles['BodyText'],
-        fontName=japanese_font,
-        fontSize=12,
-        textColor=colors.HexColor('#333333'),
-        spaceAfter=10
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontName=japanese_font,
-        fontSize=14,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=8,
-        spaceBefore=12
-    )
-    
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['BodyText'],
-        fontName=japanese_font,
-        fontSize=11,
-        textColor=colors.HexColor('#333333'),
-        spaceAfter=8,
-        leading=16,
-        alignment=4  # 両端揃え
-    )
-    
-    bullet_style = ParagraphStyle(
-        'CustomBullet',
-        parent=styles['BodyText'],
-        fontName=japanese_font,
-        fontSize=11,
-        textColor=colors.HexColor('#333333'),
-        spaceAfter=6,
-        leading=14,
-        leftIndent=20,
-        firstLineIndent=-10,
-        alignment=0  # 左揃えを明示
-    )
-    
-    # ストーリー（PDFの内容）を構築
+    return {
+        "title": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontName=font_name,
+            fontSize=20,
+            textColor=colors.HexColor('#1a1a1a'),
+            spaceAfter=12,
+            alignment=0  # 左揃え
+        ),
+        "candidate": ParagraphStyle(
+            'Candidate',
+            parent=styles['BodyText'],
+            fontName=font_name,
+            fontSize=12,
+            textColor=colors.HexColor('#333333'),
+            spaceAfter=10
+        ),
+        "heading": ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontName=font_name,
+            fontSize=14,
+            textColor=colors.HexColor('#2c3e50'),
+            spaceAfter=8,
+            spaceBefore=12
+        ),
+        "body": ParagraphStyle(
+            'CustomBody',
+            parent=styles['BodyText'],
+            fontName=font_name,
+            fontSize=11,
+            textColor=colors.HexColor('#333333'),
+            spaceAfter=8,
+            leading=16,
+            alignment=4  # 両端揃え
+        ),
+        "bullet": ParagraphStyle(
+            'CustomBullet',
+            parent=styles['BodyText'],
+            fontName=font_name,
+            fontSize=11,
+            textColor=colors.HexColor('#333333'),
+            spaceAfter=6,
+            leading=14,
+            leftIndent=20,
+            firstLineIndent=-10,
+            alignment=0  # 左揃えを明示
+        ),
+    }
+
+
+def _briefing_flowables(candidate_name: str, analysis: Dict[str, Any],
+                        styles: Dict[str, ParagraphStyle]) -> List[Flowable]:
+    """1人分のブリーフィングの内容（タイトルから面接の進め方メモまで）"""
     elements = []
     
     # タイトル
-    elements.append(Paragraph("Talent Analytics 面接ブリーフィング", title_style))
+    elements.append(Paragraph(BRIEFING_TITLE, styles["title"]))
     elements.append(Spacer(1, 5*mm))
     
     # 候補者名
-    elements.append(Paragraph(f"候補者名: {candidate_name}", candidate_style))
+    elements.append(Paragraph(f"{CANDIDATE_LABEL}: {candidate_name}", styles["candidate"]))
     elements.append(Spacer(1, 8*mm))
     
-    # 【総合特徴】
-    elements.append(Paragraph("【総合特徴】", heading_style))
-    summary = analysis.get("summary", "")
-    if summary:
-        elements.append(Paragraph(summary, body_style))
-    else:
-        elements.append(Paragraph("（情報なし）", body_style))
-    elements.append(Spacer(1, 5*mm))
-    
-    # 【見定めポイント】
-    elements.append(Paragraph("【見定めポイント】", heading_style))
-    risk_points = analysis.get("risk_points", [])
-    if risk_points:
-        for point in risk_points:
-            # テキストをエスケープして、改行を削除
-            clean_point = html.escape(str(point).strip().replace('\n', ' ').replace('\r', ' '))
-            clean_point = ' '.join(clean_point.split())
-            elements.append(Paragraph(f"・ {clean_point}", bullet_style))
-    else:
-        elements.append(Paragraph("（情報なし）", body_style))
-    elements.append(Spacer(1, 5*mm))
-    
-    # 【アトラクトポイント】
-    elements.append(Paragraph("【アトラクトポイント】", heading_style))
-    attract_points = analysis.get("attract_points", [])
-    if attract_points:
-        for point in attract_points:
-            # テキストをエスケープして、改行を削除
-            clean_point = html.escape(str(point).strip().replace('\n', ' ').replace('\r', ' '))
-            clean_point = ' '.join(clean_point.split())
-            elements.append(Paragraph(f"・ {clean_point}", bullet_style))
-    else:
-        elements.append(Paragraph("（情報なし）", body_style))
-    elements.append(Spacer(1, 5*mm))
-    
-    # 【面接の進め方メモ】
-    elements.append(Paragraph("【面接の進め方メモ】", heading_style))
-    notes = analysis.get("notes_for_interviewer", [])
-    if notes:
-        for note in notes:
-            # テキストをエスケープして、改行を削除
-            clean_note = html.escape(str(note).strip().replace('\n', ' ').replace('\r', ' '))
-            # 複数の空白を1つに
-            clean_note = ' '.join(clean_note.split())
-            elements.append(Paragraph(f"・ {clean_note}", bullet_style))
-    else:
-        elements.append(Paragraph("（情報なし）", body_style))
+    # 【総合特徴】【見定めポイント】【アトラクトポイント】【面接の進め方メモ】（HTML / Markdownと共通の構成）
+    for index, (key, heading, items) in enumerate(iter_sections(analysis)):
+        if index > 0:
+            elements.append(Spacer(1, 5*mm))
+        elements.append(Paragraph(heading, styles["heading"]))
+        if not items:
+            elements.append(Paragraph(EMPTY_SECTION_TEXT, styles["body"]))
+        elif key == "summary":
+            elements.append(Paragraph(items[0], styles["body"]))
+        else:
+            for item in items:
+                # 改行と連続する空白を除いた項目をエスケープする
+                elements.append(Paragraph(f"・ {html.escape(item)}", styles["bullet"]))
+    return elements
+
+
+def _briefing_doc(output: Union[str, BinaryIO]) -> SimpleDocTemplate:
+    """ブリーフィングのページ設定（A4・余白20mm）"""
+    # invariant=1 で作成日時とドキュメントIDを固定し、同じ内容からは同じバイト列を生成する
+    return SimpleDocTemplate(
+        output,
+        invariant=1,
+        pagesize=A4,
+        leftMargin=20*mm,
+        rightMargin=20*mm,
+        topMargin=20*mm,
+        bottomMargin=20*mm
+    )
+
+
+def _build_briefing(output: Union[str, BinaryIO], candidate_name: str, analysis: Dict[str, Any]) -> None:
+    """ReportLabでブリーフィングPDFをレイアウトして出力する"""
+    # 日本語フォントを登録
+    japanese_font = _register_japanese_font()
     
-    # PDFを生成
-    doc.build(elements)
-    print(f"PDFを生成しました: {output_path}")
+    doc = _briefing_doc(output)
+    doc.build(_briefing_flowables(candidate_name, analysis, _briefing_styles(japanese_font)))
@@ -0,0 +1,189 @@
+"""
+生成済みブリーフィングPDFのキャッシュ
+(解析結果, 候補者名, テンプレートのバージョン) のハッシュをキーに、ReportLabで生成したPDFのバイト列を保持する
+（PDFはバイト単位で決定的に生成されるため、同じキーからは常に同じPDFが得られる）
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+# キャッシュのデフォルト設定（環境変数で上書き可能）
+DEFAULT_RENDER_CACHE_BACKEND = "memory"
+DEFAULT_RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_RENDER_CACHE_DIR = ".cache/render_cache"
+
+
+def make_render_cache_key(analysis: Dict[str, Any], candidate_name: str, template_version: str) -> str:
+    """
+    生成済みPDFのキャッシュキーを生成する
+
+    Args:
+        analysis: 解析結果の辞書
+        candidate_name: 候補者名
+        template_version: PDFのテンプレート（レイアウト・ReportLab）のバージョン
+
+    Returns:
+        キャッシュキー（SHA-256の16進文字列）。生成されるPDFの強いETagとしても使う
+    """
+    fingerprint = {
+        "analysis": analysis,
+        "candidate_name": candidate_name,
+        "template_version": template_version,
+    }
+    serialized = json.dumps(fingerprint, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """生成済みPDFのキャッシュの基底クラス"""
+
+    def get(self, key: str) -> Optional[bytes]:
+        """キーに対応するPDFを返す（存在しない場合はNone）"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes) -> None:
+        """キーにPDFを保存する"""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """すべてのエントリを削除する"""
+        raise NotImplementedError
+
+
+class MemoryRenderCache(RenderCache):
+    """プロセス内メモリのLRUキャッシュ（合計サイズの上限を超えると最終アクセスが古い順に削除）"""
+
+    def __init__(self, max_bytes: int = DEFAULT_RENDER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous)
+            self._entries[key] = value
+            self.total_bytes += len(value)
+            while self.total_bytes > self.max_bytes:
+                _, expired = self._entries.popitem(last=False)
+                self.total_bytes -= len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+
+class DiskRenderCache(RenderCache):
+    """
+    ディレクトリにPDFファイルとして保存する永続キャッシュ
+    最終アクセス日時（ファイルのmtime）で管理し、合計サイズの上限を超えると古い順に削除する
+    """
+
+    def __init__(self, directory: str = DEFAULT_RENDER_CACHE_DIR,
+                 max_bytes: int = DEFAULT_RENDER_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pdf"
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            value = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        # 書き込み途中のファイルを読まれないよう、一時ファイルに書いてから置き換える
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as tmp:
+            tmp.write(value)
+        os.replace(tmp.name, self._path(key))
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        """合計サイズの上限を超えた分を最終アクセスが古い順に削除する"""
+        entries = []
+        for path in self.directory.glob("*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total_bytes = 0
+        for _, size, path in sorted(entries, reverse=True):
+            total_bytes += size
+            if total_bytes > self.max_bytes:
+                path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in self.directory.glob("*.pdf"):
+                path.unlink(missing_ok=True)
+
+
+_render_cache: Optional[RenderCache] = None
+_render_cache_initialized = False
+_render_cache_lock = threading.Lock()
+
+
+def _create_render_cache_from_env() -> Optional[RenderCache]:
+    """環境変数 TA_RENDER_CACHE_BACKEND の設定に従ってキャッシュを作成する"""
+    backend = os.getenv("TA_RENDER_CACHE_BACKEND", DEFAULT_RENDER_CACHE_BACKEND).lower()
+    max_bytes = int(os.getenv("TA_RENDER_CACHE_MAX_BYTES", DEFAULT_RENDER_CACHE_MAX_BYTES))
+
+    if backend in ("none", "off", "disabled", ""):
+        return None
+    if backend == "memory":
+        return MemoryRenderCache(max_bytes=max_bytes)
+    if backend == "disk":
+        directory = os.getenv("TA_RENDER_CACHE_DIR", DEFAULT_RENDER_CACHE_DIR)
+        return DiskRenderCache(directory=directory, max_bytes=max_bytes)
+    raise ValueError(f"未対応のキャッシュバックエンドです: {backend}（memory / disk / none）")
+
+
+def get_render_cache() -> Optional[RenderCache]:
+    """
+    プロセス全体で共有する生成済みPDFのキャッシュを返す
+    初回呼び出し時に環境変数の設定から作成する（無効化されている場合はNone）
+    """
+    global _render_cache, _render_cache_initialized
+    with _render_cache_lock:
+        if not _render_cache_initialized:
+            _render_cache = _create_render_cache_from_env()
+            _render_cache_initialized = True
+        return _render_cache
+
+
+def reset_render_cache() -> None:
+    """生成済みPDFのキャッシュを破棄し、次回利用時に環境変数から作り直す"""
+    global _render_cache, _render_cache_initialized
+    with _render_cache_lock:
+        _render_cache = None
+        _render_cache_initialized = False
@@ -0,0 +1,130 @@
+"""
+ブリーフィングのレンダリング用スレッドプール
+ReportLabのフォント登録などのグローバルな初期化をプールの開始時に1回だけ済ませ、
+レイアウト（CPU処理）をイベントループの外のワーカースレッドで並行して行う
+"""
+
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from .pdf_builder import warm_up_renderer
+
+
+# ワーカー数のデフォルト（環境変数 TA_RENDER_WORKERS で上書き可能）
+DEFAULT_RENDER_WORKERS = min(4, os.cpu_count() or 1)
+
+T = TypeVar("T")
+
+
+class RenderPool:
+    """
+    レンダリング用のスレッドプール
+
+    開始時に warm_up_renderer でフォント・スタイルを初期化するため、ワーカーは初期化済みの
+    グローバルな状態を読むだけになる。キューの長さや処理件数を metrics で返す
+    """
+
+    def __init__(self, workers: int = DEFAULT_RENDER_WORKERS):
+        warm_up_renderer()
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ta-render")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_seconds = 0.0
+        self._render_seconds = 0.0
+
+    def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+        """レンダリング関数をキューに追加する"""
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        def task() -> T:
+            started_at = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._wait_seconds += started_at - submitted_at
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._render_seconds += time.perf_counter() - started_at
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+
+        try:
+            return self._executor.submit(task)
+        except Exception:
+            with self._lock:
+                self._queued -= 1
+            raise
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """レンダリング関数をワーカースレッドで実行し、完了を待つ（イベントループは塞がない）"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        プールの状態
+
+        Returns:
+            workers（ワーカー数）、queued（待機中）、active（実行中）、max_queued（待機数の最大）、
+            completed / failed（完了・失敗した件数）、avg_wait_ms / avg_render_ms（平均の待ち時間・処理時間）
+        """
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "workers": self.workers,
+                "queued": self._queued,
+                "active": self._active,
+                "max_queued": self._max_queued,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_ms": round(self._wait_seconds / finished * 1000, 3) if finished else 0.0,
+                "avg_render_ms": round(self._render_seconds / finished * 1000, 3) if finished else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """プールを停止する"""
+        self._executor.shutdown(wait=wait)
+
+
+_render_pool: Optional[RenderPool] = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> RenderPool:
+    """
+    プロセス全体で共有するレンダリング用のスレッドプールを返す
+    初回呼び出し時に環境変数 TA_RENDER_WORKERS のワーカー数で作成する
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = RenderPool(workers=int(os.getenv("TA_RENDER_WORKERS", DEFAULT_RENDER_WORKERS)))
+        return _render_pool
+
+
+def reset_render_pool() -> None:
+    """レンダリング用のスレッドプールを停止し、次回利用時に環境変数から作り直す"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False)
+        _render_pool = None
@@ -0,0 +1,555 @@
+"""
+Azure OpenAIの呼び出しの優先度スケジューラー
+面接官の対話的なリクエスト（interactive）と一括処理（bulk）を別のキューに分け、
+同時実行数とTPM（1分あたりのトークン数）の予算を重み付き公平キューイング（WFQ）で配分する。
+各クラスの中ではテナント（事業部など）ごとのキューを不足ラウンドロビン（DRR）で順に処理し、
+テナントごとの同時実行数・TPMの上限を守る
+"""
+
+import os
+import re
+import json
+import math
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .deadline import DISCONNECT_POLL_INTERVAL_SECONDS, Deadline
+from .text_normalizer import estimate_tokens
+
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+PRIORITY_CLASSES = (PRIORITY_INTERACTIVE, PRIORITY_BULK)
+
+# テナントを指定しないリクエスト（X-Tenant-Id ヘッダーなし、一括処理・フォルダ監視）のテナント
+DEFAULT_TENANT = "default"
+_TENANT_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+
+# スケジューラーのデフォルト設定（環境変数で上書き可能）
+DEFAULT_AZURE_CONCURRENCY = 8
+# 両方のクラスが待っている場合に、interactive に bulk の4倍のトークンを割り当てる
+DEFAULT_WEIGHTS = {PRIORITY_INTERACTIVE: 4.0, PRIORITY_BULK: 1.0}
+# 同時実行数・TPMのうち、各クラスのために空けておく割合（使っていない分は他のクラスが使える）
+DEFAULT_RESERVED_SHARES = {PRIORITY_INTERACTIVE: 0.25, PRIORITY_BULK: 0.125}
+
+# テナント間のDRRで1巡ごとに各テナントに加える推定トークン数（重み1あたり。解析1回分程度）
+DRR_QUANTUM_TOKENS = 4000
+
+# TPMを数える期間（秒）
+TPM_WINDOW_SECONDS = 60.0
+
+# 待ち時間のパーセンタイルの計算に使う直近の件数
+_RECENT_WAITS = 1000
+
+
+def validate_priority(priority: str) -> str:
+    """
+    優先度クラスの名前を検証する
+
+    Raises:
+        ValueError: interactive / bulk 以外の場合
+    """
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"未対応の優先度です: {priority}（{' / '.join(PRIORITY_CLASSES)}）")
+    return priority
+
+
+def validate_tenant(tenant: str) -> str:
+    """
+    テナントIDを検証する（英数字で始まる、英数字・「.」「_」「-」の64文字以内）
+
+    Raises:
+        ValueError: 形式が正しくない場合
+    """
+    if not _TENANT_PATTERN.match(tenant):
+        raise ValueError(f"テナントIDは英数字・「.」「_」「-」の64文字以内で指定してください: {tenant}")
+    return tenant
+
+
+def configured_tenants() -> Optional[Set[str]]:
+    """TA_TENANTS で登録されたテナントIDの集合（未設定の場合はNoneで、どのテナントIDも受け付ける）"""
+    value = os.getenv("TA_TENANTS", "")
+    tenants = {tenant.strip() for tenant in value.split(",") if tenant.strip()}
+    return tenants or None
+
+
+def estimate_request_tokens(api_params: Dict[str, Any]) -> int:
+    """
+    Azure OpenAIのレート制限で数えられるトークン数（入力 + max_tokens）を概算する
+    （呼び出しの前に毎回数えるため、tiktokenは使わず文字種から概算する）
+    """
+    tokens = sum(estimate_tokens(message["content"]) for message in api_params["messages"])
+    if "response_format" in api_params:
+        tokens += estimate_tokens(json.dumps(api_params["response_format"], ensure_ascii=False))
+    return tokens + int(api_params.get("max_tokens", 0) or 0)
+
+
+class _Ticket:
+    """順番待ち中・実行中の1回の呼び出し"""
+
+    __slots__ = ("priority", "tenant", "tokens", "enqueued_at", "admitted")
+
+    def __init__(self, priority: str, tenant: str, tokens: int, enqueued_at: float):
+        self.priority = priority
+        self.tenant = tenant
+        self.tokens = tokens
+        self.enqueued_at = enqueued_at
+        self.admitted = False
+
+
+class _TenantState:
+    """テナントごとの使用量と統計"""
+
+    __slots__ = ("in_flight", "tokens_in_window", "admitted", "tokens_admitted", "waits", "latencies")
+
+    def __init__(self):
+        self.in_flight = 0
+        self.tokens_in_window = 0
+        self.admitted = 0
+        self.tokens_admitted = 0
+        self.waits: Deque[float] = deque(maxlen=_RECENT_WAITS)
+        # 順番待ちの開始から呼び出しの完了までの時間
+        self.latencies: Deque[float] = deque(maxlen=_RECENT_WAITS)
+
+
+def _millisecond_stats(samples: Iterable[float]) -> Tuple[float, float]:
+    """直近の時間（秒）の平均と95パーセンタイル（ミリ秒）"""
+    values = sorted(samples)
+    if not values:
+        return 0.0, 0.0
+    average = sum(values) / len(values)
+    p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+    return round(average * 1000, 3), round(p95 * 1000, 3)
+
+
+class AzureScheduler:
+    """
+    Azure OpenAIの呼び出しを優先度クラスごとのキューで順番待ちさせるスケジューラー
+
+    - 同時実行数とTPMの予算を共有し、各クラスには予約分（reserved_shares）を空けておく。
+      予約分を使っていないクラスがあれば、他のクラスがその分まで使える（bulk は空いている容量を使い切れる）
+    - 両方のクラスが待っている場合は、自己クロック型の重み付き公平キューイング（SCFQ）で
+      「トークン数 / 重み」の仮想終了時刻が早い方から実行する
+    - クラスの中ではテナントごとのキューを不足ラウンドロビン（DRR）で巡回し、1巡ごとに
+      DRR_QUANTUM_TOKENS × テナントの重み のトークンを割り当てる（1つのテナントの大量投入が他のテナントを待たせない）
+    - テナントごとの上限（tenant_concurrency / tenant_tpm）に達したテナントは、空くまで飛ばす
+    - TPMは直近60秒に開始した呼び出しの推定トークン数で数える
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_AZURE_CONCURRENCY,
+        tpm: int = 30000,
+        weights: Optional[Dict[str, float]] = None,
+        reserved_shares: Optional[Dict[str, float]] = None,
+        tenant_concurrency: Optional[Dict[Optional[str], float]] = None,
+        tenant_tpm: Optional[Dict[Optional[str], float]] = None,
+        tenant_weights: Optional[Dict[Optional[str], float]] = None,
+    ):
+        """
+        Args:
+            concurrency: 全体の同時実行数
+            tpm: 全体のTPM
+            weights: 優先度クラスの重み
+            reserved_shares: 各クラスのために空けておく同時実行数・TPMの割合
+            tenant_concurrency: テナントごとの同時実行数の上限（キーNoneは全テナントのデフォルト、0は上限なし）
+            tenant_tpm: テナントごとのTPMの上限（キーNoneは全テナントのデフォルト、0は上限なし）
+            tenant_weights: テナントごとのDRRの重み（キーNoneは全テナントのデフォルト、省略時は1）
+        """
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        reserved_shares = {**DEFAULT_RESERVED_SHARES, **(reserved_shares or {})}
+        for priority in list(weights) + list(reserved_shares):
+            validate_priority(priority)
+        if any(weight <= 0 for weight in weights.values()):
+            raise ValueError("優先度クラスの重みは正の数を指定してください")
+        if any(not 0 <= share < 1 for share in reserved_shares.values()) or sum(reserved_shares.values()) >= 1:
+            raise ValueError("予約する割合は0以上で、合計が1未満になるように指定してください")
+        tenant_concurrency = dict(tenant_concurrency or {})
+        tenant_tpm = dict(tenant_tpm or {})
+        tenant_weights = {None: 1.0, **(tenant_weights or {})}
+        for tenant in list(tenant_concurrency) + list(tenant_tpm) + list(tenant_weights):
+            if tenant is not None:
+                validate_tenant(tenant)
+        if any(limit < 0 for limit in list(tenant_concurrency.values()) + list(tenant_tpm.values())):
+            raise ValueError("テナントの上限は0以上を指定してください（0は上限なし）")
+        if any(weight <= 0 for weight in tenant_weights.values()):
+            raise ValueError("テナントの重みは正の数を指定してください")
+
+        self.concurrency = max(1, concurrency)
+        self.tpm = max(1, tpm)
+        self.weights = weights
+        # 予約する同時実行数は切り上げ、最後の1つは予約しない（合計が同時実行数 - 1 を超える場合は bulk の予約分から減らす）。
+        # どのクラスも、他のクラスが実行していなければ必ず1つは使えるため、順番待ちが止まらない
+        self.reserved_slots = {
+            priority: math.ceil(self.concurrency * share) for priority, share in reserved_shares.items()
+        }
+        for priority in reversed(PRIORITY_CLASSES):
+            excess = sum(self.reserved_slots.values()) - (self.concurrency - 1)
+            if excess > 0:
+                self.reserved_slots[priority] -= min(excess, self.reserved_slots[priority])
+        self.reserved_tokens = {priority: int(self.tpm * share) for priority, share in reserved_shares.items()}
+        self.tenant_concurrency = {tenant: int(limit) for tenant, limit in tenant_concurrency.items()}
+        self.tenant_tpm = {tenant: int(limit) for tenant, limit in tenant_tpm.items()}
+        self.tenant_weights = tenant_weights
+
+        self._cond = threading.Condition()
+        # クラスごとのテナントのキュー・DRRで巡回する順番・各テナントの不足分（使えるトークン数）
+        self._queues: Dict[str, Dict[str, Deque[_Ticket]]] = {priority: {} for priority in PRIORITY_CLASSES}
+        self._rotation: Dict[str, Deque[str]] = {priority: deque() for priority in PRIORITY_CLASSES}
+        self._deficits: Dict[str, Dict[str, float]] = {priority: {} for priority in PRIORITY_CLASSES}
+        # クラスごとの待機中の呼び出しの仮想終了時刻（到着順に割り当て、開始した順に先頭から使う）
+        self._finish_tags: Dict[str, Deque[float]] = {priority: deque() for priority in PRIORITY_CLASSES}
+        self._in_flight = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._window: Deque[Tuple[float, str, str, int]] = deque()
+        self._window_tokens = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._virtual_time = 0.0
+        self._last_finish = {priority: 0.0 for priority in PRIORITY_CLASSES}
+        self._admitted = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._waits: Dict[str, Deque[float]] = {priority: deque(maxlen=_RECENT_WAITS) for priority in PRIORITY_CLASSES}
+        self._tenants: Dict[str, _TenantState] = {}
+
+    def _tenant_setting(self, settings: Dict[Optional[str], Any], tenant: str) -> Any:
+        return settings.get(tenant, settings.get(None, 0))
+
+    def _max_tokens(self, priority: str, tenant: str) -> int:
+        # 他のクラスの予約分とテナントの上限を除いた、1回の呼び出しで使えるトークン数の上限
+        others = sum(tokens for other, tokens in self.reserved_tokens.items() if other != priority)
+        limit = max(1, self.tpm - others)
+        tenant_limit = self._tenant_setting(self.tenant_tpm, tenant)
+        return min(limit, tenant_limit) if tenant_limit > 0 else limit
+
+    def _prune(self, now: float) -> None:
+        while self._window and self._window[0][0] <= now - TPM_WINDOW_SECONDS:
+            _, priority, tenant, tokens = self._window.popleft()
+            self._window_tokens[priority] -= tokens
+            self._tenants[tenant].tokens_in_window -= tokens
+
+    def _tenant_admissible(self, ticket: _Ticket) -> bool:
+        """テナントの同時実行数・TPMの上限の範囲内で実行できるか"""
+        state = self._tenants[ticket.tenant]
+        concurrency = self._tenant_setting(self.tenant_concurrency, ticket.tenant)
+        tpm = self._tenant_setting(self.tenant_tpm, ticket.tenant)
+        if concurrency > 0 and state.in_flight + 1 > concurrency:
+            return False
+        return not (tpm > 0 and state.tokens_in_window + ticket.tokens > tpm)
+
+    def _next_in_class(self, priority: str) -> Optional[_Ticket]:
+        """
+        クラスの中で次に実行する呼び出しをDRRで選ぶ（テナントの上限に達しているテナントは飛ばす）
+
+        テナントは巡回の先頭に来たとき（自分の番の始め）に不足分に DRR_QUANTUM_TOKENS × 重み を加えられ、
+        不足分が先頭の呼び出しのトークン数に足りる間は続けて選ばれる。足りなくなったら巡回の最後に回る
+        （残った不足分は次の番に持ち越す）
+        """
+        rotation = self._rotation[priority]
+        queues = self._queues[priority]
+        deficits = self._deficits[priority]
+        eligible = {tenant for tenant in rotation if self._tenant_admissible(queues[tenant][0])}
+        if not eligible:
+            return None
+        quanta = {
+            tenant: DRR_QUANTUM_TOKENS * self._tenant_setting(self.tenant_weights, tenant) for tenant in eligible
+        }
+        # 不足分が足りるまでに何巡もかかる場合は、最も早く足りるテナントの1巡前まで一度に進める
+        rounds = min(
+            math.ceil(max(0.0, queues[tenant][0].tokens - deficits[tenant]) / quanta[tenant]) for tenant in eligible
+        )
+        if rounds > 1:
+            for tenant in eligible:
+                deficits[tenant] += quanta[tenant] * (rounds - 1)
+        while True:
+            tenant = rotation[0]
+            if tenant in eligible and deficits[tenant] >= queues[tenant][0].tokens:
+                return queues[tenant][0]
+            rotation.rotate(-1)
+            if rotation[0] in eligible:
+                deficits[rotation[0]] += quanta[rotation[0]]
+
+    def _dequeue(self, ticket: _Ticket) -> None:
+        """待機中の呼び出しをテナントのキューから外す（キューが空になったテナントは巡回から外し、不足分を捨てる）"""
+        queue = self._queues[ticket.priority][ticket.tenant]
+        queue.remove(ticket)
+        if not queue:
+            del self._queues[ticket.priority][ticket.tenant]
+            self._rotation[ticket.priority].remove(ticket.tenant)
+            del self._deficits[ticket.priority][ticket.tenant]
+
+    def _admissible(self, ticket: _Ticket) -> bool:
+        """同時実行数とTPMの両方で、他のクラスの使っていない予約分を残したまま実行できるか"""
+        priority = ticket.priority
+        for used, reserved, total, cost in (
+            (self._in_flight, self.reserved_slots, self.concurrency, 1),
+            (self._window_tokens, self.reserved_tokens, self.tpm, ticket.tokens),
+        ):
+            total_used = sum(used.values())
+            if total_used + cost > total:
+                return False
+            if used[priority] + cost <= reserved[priority]:
+                continue
+            unused_by_others = sum(
+                max(0, reserved[other] - used[other]) for other in PRIORITY_CLASSES if other != priority
+            )
+            if total_used + cost > total - unused_by_others:
+                return False
+        return True
+
+    def _dispatch(self, now: float) -> None:
+        """各クラスでDRRが選んだ呼び出しのうち、実行できるものを仮想終了時刻が早い順に開始させる"""
+        self._prune(now)
+        admitted = False
+        while True:
+            heads = []
+            for priority in PRIORITY_CLASSES:
+                if not self._finish_tags[priority]:
+                    continue
+                head = self._next_in_class(priority)
+                if head is not None and self._admissible(head):
+                    heads.append((self._finish_tags[priority][0], head))
+            if not heads:
+                break
+            finish_tag, ticket = min(heads, key=lambda item: item[0])
+            self._finish_tags[ticket.priority].popleft()
+            self._deficits[ticket.priority][ticket.tenant] -= ticket.tokens
+            self._dequeue(ticket)
+            ticket.admitted = True
+            self._in_flight[ticket.priority] += 1
+            self._window.append((now, ticket.priority, ticket.tenant, ticket.tokens))
+            self._window_tokens[ticket.priority] += ticket.tokens
+            self._virtual_time = max(self._virtual_time, finish_tag)
+            self._admitted[ticket.priority] += 1
+            self._waits[ticket.priority].append(now - ticket.enqueued_at)
+            state = self._tenants[ticket.tenant]
+            state.in_flight += 1
+            state.tokens_in_window += ticket.tokens
+            state.admitted += 1
+            state.tokens_admitted += ticket.tokens
+            state.waits.append(now - ticket.enqueued_at)
+            admitted = True
+        if admitted:
+            self._cond.notify_all()
+
+    def _wait_timeout(self, now: float, deadline: Optional[Deadline]) -> Optional[float]:
+        # TPMの期間から最も古い呼び出しが外れる時刻か、期限・キャンセルを確認する時刻まで待つ
+        timeouts: List[float] = []
+        if self._window:
+            timeouts.append(max(0.0, self._window[0][0] + TPM_WINDOW_SECONDS - now))
+        if deadline is not None:
+            timeouts.append(DISCONNECT_POLL_INTERVAL_SECONDS)
+            remaining = deadline.remaining()
+            if remaining is not None:
+                timeouts.append(remaining)
+        return min(timeouts) if timeouts else None
+
+    def acquire(self, priority: str, tokens: int, deadline: Optional[Deadline] = None,
+                tenant: str = DEFAULT_TENANT) -> _Ticket:
+        """
+        順番が来るまで待つ（release で返却する）
+
+        Args:
+            priority: 優先度クラス（interactive / bulk）
+            tokens: 呼び出しの推定トークン数（estimate_request_tokens）
+            deadline: リクエストの期限（期限切れ・キャンセルの場合は順番待ちをやめる）
+            tenant: テナントID
+
+        Raises:
+            ValueError: 未対応の優先度、または形式が正しくないテナントIDの場合
+            RequestAborted: 順番待ちの間に期限を過ぎた、またはキャンセルされた場合
+        """
+        validate_priority(priority)
+        validate_tenant(tenant)
+        tokens = min(max(1, tokens), self._max_tokens(priority, tenant))
+        with self._cond:
+            now = time.monotonic()
+            finish_tag = max(self._virtual_time, self._last_finish[priority]) + tokens / self.weights[priority]
+            self._last_finish[priority] = finish_tag
+            self._finish_tags[priority].append(finish_tag)
+            ticket = _Ticket(priority, tenant, tokens, now)
+            self._tenants.setdefault(tenant, _TenantState())
+            if tenant not in self._queues[priority]:
+                # 巡回が空の場合はすぐにこのテナントの番になるため、1巡分の不足分を加えておく
+                first = not self._rotation[priority]
+                self._queues[priority][tenant] = deque()
+                self._rotation[priority].append(tenant)
+                self._deficits[priority][tenant] = (
+                    DRR_QUANTUM_TOKENS * self._tenant_setting(self.tenant_weights, tenant) if first else 0.0
+                )
+            self._queues[priority][tenant].append(ticket)
+            try:
+                self._dispatch(now)
+                while not ticket.admitted:
+                    if deadline is not None:
+                        deadline.check("Azure OpenAIの呼び出しの順番待ち")
+                    self._cond.wait(self._wait_timeout(time.monotonic(), deadline))
+                    self._dispatch(time.monotonic())
+            except BaseException:
+                if not ticket.admitted:
+                    self._dequeue(ticket)
+                    # 仮想終了時刻は到着順に割り当てているため、最後に割り当てた分を取り消す
+                    self._finish_tags[priority].pop()
+                    self._dispatch(time.monotonic())
+                else:
+                    self._release_locked(ticket)
+                raise
+        return ticket
+
+    def release(self, ticket: _Ticket) -> None:
+        """呼び出しの完了を記録し、待っている呼び出しを開始させる"""
+        with self._cond:
+            self._release_locked(ticket)
+
+    def _release_locked(self, ticket: _Ticket) -> None:
+        now = time.monotonic()
+        self._in_flight[ticket.priority] -= 1
+        state = self._tenants[ticket.tenant]
+        state.in_flight -= 1
+        state.latencies.append(now - ticket.enqueued_at)
+        self._dispatch(now)
+
+    @contextmanager
+    def slot(self, priority: str, tokens: int, deadline: Optional[Deadline] = None,
+             tenant: str = DEFAULT_TENANT) -> Iterator[None]:
+        """順番が来るまで待ち、ブロックを抜けたら返却するコンテキストマネージャー"""
+        ticket = self.acquire(priority, tokens, deadline, tenant)
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        スケジューラーの状態
+
+        Returns:
+            concurrency / tpm（全体の上限）と、クラスごとの weight（重み）、reserved_slots / reserved_tpm（予約分）、
+            queued（待機中）、in_flight（実行中）、tokens_in_window（直近60秒の推定トークン数）、
+            admitted（開始した件数）、avg_wait_ms / p95_wait_ms（直近の順番待ちの平均・95パーセンタイル）。
+            tenants にはこれまでに呼び出したテナントごとの weight・max_concurrency / max_tpm（上限、0は上限なし）、
+            queued・in_flight・tokens_in_window・admitted、tokens_admitted（開始した呼び出しの推定トークン数の累計）、
+            avg_wait_ms / p95_wait_ms、avg_latency_ms / p95_latency_ms（順番待ちを含む呼び出しの完了までの時間）
+        """
+        with self._cond:
+            self._prune(time.monotonic())
+            classes = {}
+            for priority in PRIORITY_CLASSES:
+                avg_wait, p95_wait = _millisecond_stats(self._waits[priority])
+                classes[priority] = {
+                    "weight": self.weights[priority],
+                    "reserved_slots": self.reserved_slots[priority],
+                    "reserved_tpm": self.reserved_tokens[priority],
+                    "queued": len(self._finish_tags[priority]),
+                    "in_flight": self._in_flight[priority],
+                    "tokens_in_window": self._window_tokens[priority],
+                    "admitted": self._admitted[priority],
+                    "avg_wait_ms": avg_wait,
+                    "p95_wait_ms": p95_wait,
+                }
+            tenants = {}
+            for tenant, state in sorted(self._tenants.items()):
+                avg_wait, p95_wait = _millisecond_stats(state.waits)
+                avg_latency, p95_latency = _millisecond_stats(state.latencies)
+                tenants[tenant] = {
+                    "weight": self._tenant_setting(self.tenant_weights, tenant),
+                    "max_concurrency": self._tenant_setting(self.tenant_concurrency, tenant),
+                    "max_tpm": self._tenant_setting(self.tenant_tpm, tenant),
+                    "queued": sum(len(queues.get(tenant, ())) for queues in self._queues.values()),
+                    "in_flight": state.in_flight,
+                    "tokens_in_window": state.tokens_in_window,
+                    "admitted": state.admitted,
+                    "tokens_admitted": state.tokens_admitted,
+                    "avg_wait_ms": avg_wait,
+                    "p95_wait_ms": p95_wait,
+                    "avg_latency_ms": avg_latency,
+                    "p95_latency_ms": p95_latency,
+                }
+            return {"concurrency": self.concurrency, "tpm": self.tpm, "classes": classes, "tenants": tenants}
+
+
+def _parse_class_values(value: Optional[str], name: str) -> Dict[str, float]:
+    """「interactive=4,bulk=1」形式の環境変数を読み込む"""
+    values: Dict[str, float] = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        priority, _, number = item.partition("=")
+        try:
+            values[validate_priority(priority.strip())] = float(number)
+        except ValueError as e:
+            raise ValueError(f"{name} の形式が正しくありません（例: interactive=4,bulk=1）: {value}") from e
+    return values
+
+
+def _parse_tenant_values(value: Optional[str], name: str) -> Dict[Optional[str], float]:
+    """
+    「4,sales=2,hr=8」形式の環境変数を読み込む
+    （テナントIDのない値は全テナントのデフォルトとしてキーNoneに入れる）
+    """
+    values: Dict[Optional[str], float] = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        tenant, separator, number = item.rpartition("=") if "=" in item else (None, "", item)
+        try:
+            key = validate_tenant(tenant.strip()) if separator else None
+            values[key] = float(number)
+        except ValueError as e:
+            raise ValueError(f"{name} の形式が正しくありません（例: 4,sales=2）: {value}") from e
+    return values
+
+
+def scheduler_processes() -> int:
+    """
+    同じデプロイメントの上限を分け合うプロセス数（環境変数 TA_SCHEDULER_PROCESSES、デフォルト: 1）
+    本番環境用のサーバー（server.py）がワーカー数を設定する
+    """
+    return max(1, int(os.getenv("TA_SCHEDULER_PROCESSES", "1")))
+
+
+def _per_process(limits: Dict[Optional[str], float], processes: int) -> Dict[Optional[str], float]:
+    """テナントごとの上限を1プロセスあたりの値にする（各プロセスに最低1は残す）"""
+    return {tenant: max(1.0, math.floor(limit / processes)) for tenant, limit in limits.items()}
+
+
+_scheduler: Optional[AzureScheduler] = None
+_scheduler_initialized = False
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Optional[AzureScheduler]:
+    """
+    プロセス全体で共有するスケジューラーを返す
+    TA_SCHEDULER_ENABLED=0 の場合はNone（Azure OpenAIの呼び出しを順番待ちさせない）
+    同時実行数・TPMの上限は、TA_SCHEDULER_PROCESSES のプロセス数で割った値にする
+    """
+    global _scheduler, _scheduler_initialized
+    with _scheduler_lock:
+        if not _scheduler_initialized:
+            enabled = os.getenv("TA_SCHEDULER_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+            if enabled:
+                from .estimator import DEFAULT_TPM
+                processes = scheduler_processes()
+                _scheduler = AzureScheduler(
+                    concurrency=max(1, int(os.getenv("TA_AZURE_CONCURRENCY", DEFAULT_AZURE_CONCURRENCY)) // processes),
+                    tpm=max(1, int(os.getenv("TA_AZURE_TPM", DEFAULT_TPM)) // processes),
+                    weights=_parse_class_values(os.getenv("TA_SCHEDULER_WEIGHTS"), "TA_SCHEDULER_WEIGHTS"),
+                    reserved_shares=_parse_class_values(os.getenv("TA_SCHEDULER_RESERVED"), "TA_SCHEDULER_RESERVED"),
+                    tenant_concurrency=_per_process(
+                        _parse_tenant_values(os.getenv("TA_TENANT_CONCURRENCY"), "TA_TENANT_CONCURRENCY"), processes
+                    ),
+                    tenant_tpm=_per_process(
+                        _parse_tenant_values(os.getenv("TA_TENANT_TPM"), "TA_TENANT_TPM"), processes
+                    ),
+                    tenant_weights=_parse_tenant_values(os.getenv("TA_TENANT_WEIGHTS"), "TA_TENANT_WEIGHTS"),
+                )
+            _scheduler_initialized = True
+        return _scheduler
+
+
+def reset_scheduler() -> None:
+    """スケジューラーを破棄し、次回利用時に環境変数から作り直す"""
+    global _scheduler, _scheduler_initialized
+    with _scheduler_lock:
+        _scheduler = None
+        _scheduler_initialized = False
@@ -0,0 +1,223 @@
+"""
+本番環境用のAPIサーバー起動
+gunicornのマスタープロセスでアプリとフォントを読み込んでから（preload）、CPU数に応じた数のuvicornワーカーをforkする。
+uvloop / httptools がインストールされていれば使用し、一定数のリクエストを処理したワーカーは入れ替える
+"""
+
+import os
+import math
+import importlib.util
+from typing import Any, Dict, Optional, Tuple
+
+
+APP_IMPORT_PATH = "ta_interview_briefing.api:app"
+WORKER_CLASS_PATH = "ta_interview_briefing.workers.BriefingWorker"
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8000
+
+# このリクエスト数を処理したワーカーを入れ替える（0で無効、ワーカーが同時に入れ替わらないようにジッターを加える）
+DEFAULT_MAX_REQUESTS = 1000
+DEFAULT_MAX_REQUESTS_JITTER = 100
+
+# 停止・入れ替えの際に、処理中のリクエストの完了を待つ秒数（過ぎたワーカーは強制終了する）
+DEFAULT_GRACEFUL_TIMEOUT = 30
+
+# イベントループがこの秒数応答しないワーカーを再起動する（解析・レンダリングはスレッドで行うため、ループは塞がない）
+DEFAULT_WORKER_TIMEOUT = 60
+
+# Keep-Aliveの接続を保持する秒数
+DEFAULT_KEEPALIVE = 5
+
+# uvicornの終了処理（lifespanのshutdown）を、gunicornが強制終了する前に済ませるための余裕（秒）
+SHUTDOWN_MARGIN_SECONDS = 2
+
+# コンテナのCPU制限（cgroup v2 / v1）
+_CGROUP_V2_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+_CGROUP_V1_CPU_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+_CGROUP_V1_CPU_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+
+def _read_first_line(path: str) -> Optional[str]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """cgroupのCPU制限（コア数）。制限がない・読み取れない場合はNone"""
+    cpu_max = _read_first_line(_CGROUP_V2_CPU_MAX)
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max":
+            try:
+                return int(quota) / int(period or 100000)
+            except (ValueError, ZeroDivisionError):
+                return None
+        return None
+    quota = _read_first_line(_CGROUP_V1_CPU_QUOTA)
+    period = _read_first_line(_CGROUP_V1_CPU_PERIOD)
+    try:
+        if quota and period and int(quota) > 0:
+            return int(quota) / int(period)
+    except (ValueError, ZeroDivisionError):
+        pass
+    return None
+
+
+def available_cpus() -> int:
+    """
+    このプロセスが使えるCPU数
+    CPUアフィニティと、コンテナ（Kubernetesのpodなど）のCPU制限の小さい方（制限の端数は切り上げ）
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def event_loop_settings() -> Tuple[str, str]:
+    """uvicornのイベントループとHTTPパーサー（uvloop / httptools がなければ asyncio / h11）"""
+    loop = "uvloop" if importlib.util.find_spec("uvloop") is not None else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") is not None else "h11"
+    return loop, http
+
+
+def _azure_concurrency() -> Optional[int]:
+    """スケジューラーの同時実行数の上限（スケジューラーが無効の場合はNone）"""
+    from .scheduler import DEFAULT_AZURE_CONCURRENCY
+
+    if os.getenv("TA_SCHEDULER_ENABLED", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    return max(1, int(os.getenv("TA_AZURE_CONCURRENCY", DEFAULT_AZURE_CONCURRENCY)))
+
+
+def _worker_count() -> int:
+    """
+    ワーカー数（TA_SERVER_WORKERS、デフォルト: 使えるCPU数）
+    スケジューラーの同時実行数はワーカーで分け合うため、デフォルトのワーカー数は同時実行数までに抑える
+
+    Raises:
+        ValueError: TA_SERVER_WORKERS が TA_AZURE_CONCURRENCY を超える場合
+                    （各ワーカーに最低1つ割り当てると、合計がデプロイメントの上限を超えるため）
+    """
+    concurrency = _azure_concurrency()
+    workers = os.getenv("TA_SERVER_WORKERS", "").strip()
+    if not workers:
+        cpus = available_cpus()
+        return cpus if concurrency is None else min(cpus, concurrency)
+    count = max(1, int(workers))
+    if concurrency is not None and count > concurrency:
+        raise ValueError(
+            f"TA_SERVER_WORKERS（{count}）が TA_AZURE_CONCURRENCY（{concurrency}）を超えています。"
+            "同時実行数はワーカーで分け合うため、ワーカー数を減らすか同時実行数の上限を上げてください"
+        )
+    return count
+
+
+def server_settings() -> Dict[str, Any]:
+    """
+    環境変数からサーバーの設定を作る（キーはgunicornの設定名）
+
+    Raises:
+        ValueError: 数値の環境変数が不正な場合、ワーカー数が同時実行数の上限を超える場合
+    """
+    host = os.getenv("TA_SERVER_HOST", DEFAULT_HOST)
+    port = int(os.getenv("TA_SERVER_PORT", DEFAULT_PORT))
+    return {
+        "bind": f"{host}:{port}",
+        "workers": _worker_count(),
+        "max_requests": max(0, int(os.getenv("TA_SERVER_MAX_REQUESTS", DEFAULT_MAX_REQUESTS))),
+        "max_requests_jitter": max(0, int(os.getenv("TA_SERVER_MAX_REQUESTS_JITTER", DEFAULT_MAX_REQUESTS_JITTER))),
+        "graceful_timeout": max(1, int(os.getenv("TA_SERVER_GRACEFUL_TIMEOUT", DEFAULT_GRACEFUL_TIMEOUT))),
+        "timeout": max(1, int(os.getenv("TA_SERVER_WORKER_TIMEOUT", DEFAULT_WORKER_TIMEOUT))),
+        "keepalive": max(1, int(os.getenv("TA_SERVER_KEEPALIVE", DEFAULT_KEEPALIVE))),
+        "preload_app": os.getenv("TA_SERVER_PRELOAD", "1").lower() not in ("0", "false", "no", "off"),
+    }
+
+
+def load_app() -> Any:
+    """
+    アプリを読み込み、フォント・スタイルの初期化を済ませる
+    preload の場合はマスタープロセスで1回だけ呼ばれ、ワーカーはforkで初期化済みの状態を引き継ぐ
+    （スレッドプールやトークンの更新などのスレッドは、各ワーカーの起動時（startup）に作る）
+    """
+    from .api import app
+    from .pdf_builder import warm_up_renderer
+
+    warm_up_renderer()
+    return app
+
+
+def gunicorn_application(settings: Dict[str, Any]) -> Any:
+    """設定を反映したgunicornのアプリケーション（gunicornが必要）"""
+    from gunicorn.app.base import BaseApplication
+
+    class BriefingApplication(BaseApplication):
+        def load_config(self) -> None:
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+            self.cfg.set("worker_class", WORKER_CLASS_PATH)
+
+        def load(self) -> Any:
+            return load_app()
+
+    return BriefingApplication()
+
+
+def _run_uvicorn(settings: Dict[str, Any]) -> None:
+    """
+    gunicornがない環境（Windowsなど）では、uvicornのマルチプロセスで起動する（preloadはなし）
+    uvicornのマルチプロセスは終了したワーカーを起動し直さないため、ワーカーの入れ替え（max_requests）は行わない
+    """
+    import uvicorn
+
+    loop, http = event_loop_settings()
+    host, _, port = settings["bind"].rpartition(":")
+    uvicorn.run(
+        APP_IMPORT_PATH,
+        host=host,
+        port=int(port),
+        workers=settings["workers"],
+        loop=loop,
+        http=http,
+        timeout_graceful_shutdown=settings["graceful_timeout"],
+        timeout_keep_alive=settings["keepalive"],
+    )
+
+
+def main() -> None:
+    """本番環境用の設定でAPIサーバーを起動する"""
+    try:
+        settings = server_settings()
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    # 各ワーカーのスケジューラーは、同時実行数・TPMの上限をワーカー数で割った値にする
+    os.environ["TA_SCHEDULER_PROCESSES"] = str(settings["workers"])
+    loop, http = event_loop_settings()
+    print(
+        f"🚀 APIサーバーを起動します: {settings['bind']}（ワーカー {settings['workers']}、"
+        f"イベントループ {loop}、HTTPパーサー {http}）"
+    )
+    try:
+        application = gunicorn_application(settings)
+    except ImportError:
+        print(
+            "⚠️  gunicornがインストールされていないため、uvicornのマルチプロセスで起動します"
+            "（アプリの事前読み込みとワーカーの入れ替えは行いません）"
+        )
+        _run_uvicorn(settings)
+        return
+    if settings["max_requests"]:
+        print(f"ワーカーは約{settings['max_requests']}リクエストごとに入れ替えます")
+    application.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+解析結果の永続ストア
+AnalysisResult を候補者・PDFの内容ハッシュ・モデル・プロンプトのバージョン・トークン使用量とともにSQLiteに保存し、
+同じPDFの再解析やブリーフィングの再生成をローカルの保存結果から行えるようにする
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .models import AnalysisRecord, AnalysisResult
+
+
+# ストアのデフォルト設定（環境変数で上書き可能）
+DEFAULT_ANALYSIS_STORE_PATH = ".cache/analyses.sqlite3"
+
+# 検索結果の件数のデフォルトと上限
+DEFAULT_QUERY_LIMIT = 50
+MAX_QUERY_LIMIT = 500
+
+# 求人単位で全件を読み出すときに1回のクエリで取得する件数
+ITER_PAGE_SIZE = 100
+
+_COLUMNS = (
+    "id, candidate_id, candidate_name, requisition_id, content_hash, model, prompt_version, result,"
+    " prompt_tokens, completion_tokens, total_tokens, created_at, updated_at"
+)
+
+# 求人との紐づけの読み出しに使う、別名 a を付けた列
+_JOINED_COLUMNS = ", ".join(f"a.{column.strip()}" for column in _COLUMNS.split(","))
+
+# 作成後に追加した列（既存のストアには ALTER TABLE で追加する）
+_MIGRATED_COLUMNS = {
+    "requisition_id": "TEXT",
+}
+
+
+class AnalysisStore:
+    """
+    解析結果を保存するSQLiteストア
+
+    (content_hash, model, prompt_version) ごとに1件を保持し、同じ組み合わせで保存した場合は
+    IDと作成日時を維持したまま内容を更新する。
+    同じ解析結果を複数の求人で使えるように、求人との紐づけは別のテーブル（requisition_analyses）に保存する
+    （analyses.requisition_id は最後に紐づけた求人ID）。
+    候補者ID・候補者名・内容ハッシュ・モデル・作成日時にインデックスを張る
+    """
+
+    def __init__(self, path: str = DEFAULT_ANALYSIS_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                " id TEXT PRIMARY KEY,"
+                " candidate_id TEXT,"
+                " candidate_name TEXT,"
+                " requisition_id TEXT,"
+                " content_hash TEXT NOT NULL,"
+                " model TEXT NOT NULL,"
+                " prompt_version TEXT NOT NULL,"
+                " result TEXT NOT NULL,"
+                " prompt_tokens INTEGER NOT NULL DEFAULT 0,"
+                " completion_tokens INTEGER NOT NULL DEFAULT 0,"
+                " total_tokens INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._migrate(conn)
+            conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_analyses_content"
+                " ON analyses (content_hash, model, prompt_version)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_candidate_id ON analyses (candidate_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_candidate_name ON analyses (candidate_name)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_model ON analyses (model)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_created_at ON analyses (created_at)")
+            # 求人ID -> 解析結果の紐づけ（求人に紐づけた順に読み出すため、紐づけた日時にもインデックスを張る）
+            conn.execute("DROP INDEX IF EXISTS idx_analyses_requisition")
+            created = not conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'requisition_analyses'"
+            ).fetchone()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS requisition_analyses ("
+                " requisition_id TEXT NOT NULL,"
+                " analysis_id TEXT NOT NULL,"
+                " added_at REAL NOT NULL,"
+                " PRIMARY KEY (requisition_id, analysis_id))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_requisition_analyses_order"
+                " ON requisition_analyses (requisition_id, added_at, analysis_id)"
+            )
+            if created:
+                # 紐づけのテーブルがない以前のストアは、analyses.requisition_id から紐づけを作る
+                conn.execute(
+                    "INSERT OR IGNORE INTO requisition_analyses (requisition_id, analysis_id, added_at)"
+                    " SELECT requisition_id, id, created_at FROM analyses WHERE requisition_id IS NOT NULL"
+                )
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """以前のバージョンで作成したストアに、後から追加した列を追加する"""
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(analyses)")}
+        for column, column_type in _MIGRATED_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE analyses ADD COLUMN {column} {column_type}")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def save(
+        self,
+        result: Dict[str, Any],
+        content_hash: str,
+        model: str,
+        prompt_version: str,
+        candidate_id: Optional[str] = None,
+        candidate_name: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        requisition_id: Optional[str] = None,
+    ) -> AnalysisRecord:
+        """
+        解析結果を保存する
+
+        Args:
+            result: 解析結果の辞書
+            content_hash: 解析したPDFの内容のSHA-256
+            model: 解析に使用したデプロイメント（モデル）名
+            prompt_version: 解析に使用したプロンプトのバージョン
+            candidate_id: 候補者ID
+            candidate_name: 候補者名
+            usage: トークン使用量（prompt_tokens, completion_tokens, total_tokens）
+            requisition_id: 求人ID（すでに別の求人に紐づいている場合も、その紐づけは残したまま追加する）
+
+        Returns:
+            保存したレコード
+        """
+        usage = usage or {}
+        body = json.dumps(AnalysisResult(**result).model_dump(), ensure_ascii=False)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO analyses ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (content_hash, model, prompt_version) DO UPDATE SET"
+                " candidate_id = COALESCE(excluded.candidate_id, candidate_id),"
+                " candidate_name = COALESCE(excluded.candidate_name, candidate_name),"
+                " requisition_id = COALESCE(excluded.requisition_id, requisition_id),"
+                " result = excluded.result,"
+                " prompt_tokens = excluded.prompt_tokens,"
+                " completion_tokens = excluded.completion_tokens,"
+                " total_tokens = excluded.total_tokens,"
+                " updated_at = excluded.updated_at",
+                (
+                    uuid.uuid4().hex, candidate_id, candidate_name, requisition_id,
+                    content_hash, model, prompt_version, body,
+                    int(usage.get("prompt_tokens", 0) or 0),
+                    int(usage.get("completion_tokens", 0) or 0),
+                    int(usage.get("total_tokens", 0) or 0),
+                    now, now,
+                )
+            )
+            row = conn.execute(
+                f"SELECT {_COLUMNS} FROM analyses"
+                " WHERE content_hash = ? AND model = ? AND prompt_version = ?",
+                (content_hash, model, prompt_version)
+            ).fetchone()
+            if requisition_id:
+                self._link(conn, requisition_id, row[0], now)
+        return _to_record(row)
+
+    @staticmethod
+    def _link(conn: sqlite3.Connection, requisition_id: str, analysis_id: str, now: float) -> None:
+        conn.execute(
+            "INSERT OR IGNORE INTO requisition_analyses (requisition_id, analysis_id, added_at) VALUES (?, ?, ?)",
+            (requisition_id, analysis_id, now)
+        )
+        conn.execute("UPDATE analyses SET requisition_id = ? WHERE id = ?", (requisition_id, analysis_id))
+
+    def link_requisition(self, analysis_id: str, requisition_id: str) -> Optional[AnalysisRecord]:
+        """
+        保存済みの解析結果を求人に紐づける（解析結果は変えず、他の求人との紐づけも残す）
+
+        Returns:
+            紐づけたレコード（未登録のIDの場合はNone）
+        """
+        with self._lock, self._connect() as conn:
+            if conn.execute("SELECT 1 FROM analyses WHERE id = ?", (analysis_id,)).fetchone() is None:
+                return None
+            self._link(conn, requisition_id, analysis_id, time.time())
+            row = conn.execute(f"SELECT {_COLUMNS} FROM analyses WHERE id = ?", (analysis_id,)).fetchone()
+        return _to_record(row)
+
+    def get(self, analysis_id: str) -> Optional[AnalysisRecord]:
+        """IDで解析結果を取得する（未登録の場合はNone）"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(f"SELECT {_COLUMNS} FROM analyses WHERE id = ?", (analysis_id,)).fetchone()
+        return _to_record(row) if row else None
+
+    def find_by_content(self, content_hash: str, model: str, prompt_version: str) -> Optional[AnalysisRecord]:
+        """同じPDF・モデル・プロンプトのバージョンの解析結果を取得する（未登録の場合はNone）"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {_COLUMNS} FROM analyses"
+                " WHERE content_hash = ? AND model = ? AND prompt_version = ?",
+                (content_hash, model, prompt_version)
+            ).fetchone()
+        return _to_record(row) if row else None
+
+    def find_by_candidate(self, candidate: str, limit: int = DEFAULT_QUERY_LIMIT) -> List[AnalysisRecord]:
+        """
+        候補者IDまたは候補者名が一致する解析結果を新しい順に取得する
+
+        Args:
+            candidate: 候補者IDまたは候補者名
+            limit: 取得する件数の上限
+        """
+        limit = max(1, min(limit, MAX_QUERY_LIMIT))
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_COLUMNS} FROM analyses WHERE candidate_id = ?"
+                f" UNION SELECT {_COLUMNS} FROM analyses WHERE candidate_name = ?"
+                " ORDER BY created_at DESC LIMIT ?",
+                (candidate, candidate, limit)
+            ).fetchall()
+        return [_to_record(row) for row in rows]
+
+    def has_requisition(self, requisition_id: str) -> bool:
+        """求人IDの解析結果が1件以上あるか"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM requisition_analyses WHERE requisition_id = ? LIMIT 1", (requisition_id,)
+            ).fetchone()
+        return row is not None
+
+    def iter_by_requisition(self, requisition_id: str, page_size: int = ITER_PAGE_SIZE) -> Iterator[AnalysisRecord]:
+        """
+        求人IDに紐づく解析結果を、求人に紐づけた順に1件ずつ返す
+
+        page_size 件ずつキー（紐づけた日時, ID）の続きから読み込むため、件数によらずメモリ使用量は一定
+
+        Args:
+            requisition_id: 求人ID
+            page_size: 1回のクエリで取得する件数
+        """
+        last_key = (-1.0, "")
+        while True:
+            with self._lock, self._connect() as conn:
+                rows = conn.execute(
+                    f"SELECT {_JOINED_COLUMNS}, m.added_at FROM requisition_analyses m"
+                    " JOIN analyses a ON a.id = m.analysis_id"
+                    " WHERE m.requisition_id = ? AND (m.added_at, m.analysis_id) > (?, ?)"
+                    " ORDER BY m.added_at, m.analysis_id LIMIT ?",
+                    (requisition_id, last_key[0], last_key[1], page_size)
+                ).fetchall()
+            for row in rows:
+                yield _to_record(row[:-1])
+            if len(rows) < page_size:
+                return
+            last_key = (rows[-1][-1], rows[-1][0])
+
+    def clear(self) -> None:
+        """すべてのレコードを削除する"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM requisition_analyses")
+            conn.execute("DELETE FROM analyses")
+
+
+def _to_record(row: tuple) -> AnalysisRecord:
+    (analysis_id, candidate_id, candidate_name, requisition_id, content_hash, model, prompt_version, result,
+     prompt_tokens, completion_tokens, total_tokens, created_at, updated_at) = row
+    return AnalysisRecord(
+        id=analysis_id,
+        candidate_id=candidate_id,
+        candidate_name=candidate_name,
+        requisition_id=requisition_id,
+        content_hash=content_hash,
+        model=model,
+        prompt_version=prompt_version,
+        result=AnalysisResult(**json.loads(result)),
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=total_tokens,
+        created_at=datetime.fromtimestamp(created_at, tz=timezone.utc),
+        updated_at=datetime.fromtimestamp(updated_at, tz=timezone.utc),
+    )
+
+
+_analysis_store: Optional[AnalysisStore] = None
+_analysis_store_initialized = False
+_analysis_store_lock = threading.Lock()
+
+
+def get_analysis_store() -> Optional[AnalysisStore]:
+    """
+    プロセス全体で共有する解析結果ストアを返す
+    TA_ANALYSIS_STORE_ENABLED=0 の場合はNone
+    """
+    global _analysis_store, _analysis_store_initialized
+    with _analysis_store_lock:
+        if not _analysis_store_initialized:
+            enabled = os.getenv("TA_ANALYSIS_STORE_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+            if enabled:
+                _analysis_store = AnalysisStore(
+                    path=os.getenv("TA_ANALYSIS_STORE_PATH", DEFAULT_ANALYSIS_STORE_PATH),
+                )
+            _analysis_store_initialized = True
+        return _analysis_store
+
+
+def reset_analysis_store() -> None:
+    """解析結果ストアを破棄し、次回利用時に環境変数から作り直す"""
+    global _analysis_store, _analysis_store_initialized
+    with _analysis_store_lock:
+        _analysis_store = None
+        _analysis_store_initialized = False
@@ -0,0 +1,244 @@
+"""
+Talent Analytics レポートのパーサー
+抽出済みテキストから特性スコアと所見を取り出し、定型文を除いたコンパクトな形式に変換する
+"""
+
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+from .models import ParsedTAReport
+
+
+# TAレポートに毎回印字される定型文（凡例・注意書き・著作権表記など）
+# _normalize_phrase() で正規化した形で保持し、行単位の完全一致または前方一致で除去する
+_BOILERPLATE_LINES = (
+    "Talent Analytics 受検結果レポート",
+    "本レポートの取り扱いには十分ご注意ください",
+    "本レポートの内容を受検者本人に開示しないでください",
+    "無断転載・複製を禁じます",
+    "All Rights Reserved",
+    "スコアの見方",
+    "凡例",
+    "社外秘",
+    "Confidential",
+)
+
+_BOILERPLATE_PREFIXES = (
+    "Copyright",
+    "©",
+    "(C)",
+    "※スコアは",
+    "※本レポートは",
+    "※この結果は",
+    "本レポートは受検者の回答",
+    "このレポートは受検者の回答",
+)
+
+# ページ番号だけの行（例: "- 3 -", "3 / 12", "P.3", "3ページ"）
+_PAGE_NUMBER_PATTERN = re.compile(
+    r"^(?:-\s*\d+\s*-|\d+\s*/\s*\d+|p\.?\s*\d+|page\s*\d+|\d+\s*ページ)$",
+    re.IGNORECASE,
+)
+
+# 見出し行（例: "【総合所見】", "■ 職務適性"）
+# 記号で始まる行は、箇条書きと区別するため、次の行が記号で始まらない（本文が続く）場合だけ見出しとみなす
+_BRACKET_HEADING_PATTERN = re.compile(r"^【(?P<name>[^】]{1,30})】$")
+_MARK_HEADING_PATTERN = re.compile(r"^[■◆●▼]\s*(?P<name>\S.{0,29})$")
+
+# 箇条書き・見出しに使われる行頭の記号
+_LINE_MARKERS = ("■", "◆", "●", "▼", "・")
+
+# スコア行（例: "ヴァイタリティ 7", "協調性：8.5点", "ストレス耐性 62%"）。単位を含めて元の表記のまま保持する
+_SCORE_PATTERN = re.compile(
+    r"^(?P<label>[^\d:：]{1,20}?)\s*[:：]?\s*(?P<score>\d{1,3}(?:\.\d+)?\s*(?:点|pt|%|/\s*10)?)$"
+)
+
+# この件数以上のスコア行が見つかった場合のみTAレポートのスコア欄とみなす
+MIN_SCORE_LINES = 3
+
+# 見出しより前の本文を格納するセクション名
+PREAMBLE_SECTION = "概要"
+
+
+def _normalize_phrase(text: str) -> str:
+    """全角・半角や空白の揺れを吸収した比較用の文字列に変換する"""
+    return "".join(unicodedata.normalize("NFKC", text).split()).lower()
+
+
+# 正規化済みの定型文インデックス（モジュール読み込み時に一度だけ構築）
+_BOILERPLATE_INDEX = frozenset(_normalize_phrase(phrase) for phrase in _BOILERPLATE_LINES)
+_BOILERPLATE_PREFIX_INDEX = tuple(_normalize_phrase(prefix) for prefix in _BOILERPLATE_PREFIXES)
+
+
+def is_boilerplate_line(line: str) -> bool:
+    """
+    定型文（ヘッダー・フッター・凡例など）の行かどうかを判定する
+
+    Args:
+        line: 判定する行
+
+    Returns:
+        定型文であればTrue
+    """
+    normalized = _normalize_phrase(line)
+    if not normalized:
+        return False
+    if normalized in _BOILERPLATE_INDEX:
+        return True
+    if normalized.startswith(_BOILERPLATE_PREFIX_INDEX):
+        return True
+    return bool(_PAGE_NUMBER_PATTERN.match(unicodedata.normalize("NFKC", line).strip()))
+
+
+def _is_cjk(char: str) -> bool:
+    """日本語（CJK）の文字かどうか"""
+    return unicodedata.east_asian_width(char) in ("W", "F")
+
+
+def _join_lines(lines: List[str]) -> str:
+    """
+    PDF抽出時に分断された行を1つの文章に結合する
+    日本語同士の境界では空白を入れずに結合し、箇条書きの項目は1行ずつ残す
+    """
+    joined = ""
+    for line in lines:
+        if not joined:
+            joined = line
+        elif line.startswith(_LINE_MARKERS):
+            joined += "\n" + line
+        elif _is_cjk(joined[-1]) and _is_cjk(line[0]):
+            joined += line
+        else:
+            joined += " " + line
+    return joined
+
+
+def _heading_name(line: str, next_line: Optional[str]) -> Optional[str]:
+    """見出し行であれば見出し名を返す（記号で始まる行が続く場合は箇条書きとみなす）"""
+    heading = _BRACKET_HEADING_PATTERN.match(line)
+    if heading:
+        return heading.group("name").strip()
+    heading = _MARK_HEADING_PATTERN.match(line)
+    if heading is None or next_line is None:
+        return None
+    if next_line.startswith(_LINE_MARKERS) or _BRACKET_HEADING_PATTERN.match(next_line):
+        return None
+    return heading.group("name").strip()
+
+
+def parse_ta_report(text: str) -> ParsedTAReport:
+    """
+    TAレポートのテキストを特性スコアと見出しごとの本文に分解する
+
+    Args:
+        text: extract_text_from_pdf() で抽出したテキスト
+
+    Returns:
+        ParsedTAReport: 構造化されたレポート（レイアウトを認識できない場合はscores/sectionsが空）
+        スコアは見出しごとに、単位を含む元の表記のまま保持する
+    """
+    scores: Dict[str, Dict[str, str]] = {}
+    section_lines: Dict[str, List[str]] = {}
+    current_section = PREAMBLE_SECTION
+    dropped_lines = 0
+    has_heading = False
+
+    content_lines = []
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        if is_boilerplate_line(line):
+            dropped_lines += 1
+            continue
+        content_lines.append(line)
+
+    for index, line in enumerate(content_lines):
+        next_line = content_lines[index + 1] if index + 1 < len(content_lines) else None
+        heading = _heading_name(line, next_line)
+        if heading:
+            current_section = heading
+            section_lines.setdefault(current_section, [])
+            has_heading = True
+            continue
+
+        score = _SCORE_PATTERN.match(unicodedata.normalize("NFKC", line))
+        if score:
+            section_scores = scores.setdefault(current_section, {})
+            label = score.group("label").strip()
+            # 同じ見出しの中で同じ特性名が繰り返された場合は、上書きせずに本文として残す
+            if label not in section_scores:
+                section_lines.setdefault(current_section, [])
+                section_scores[label] = "".join(score.group("score").split())
+                continue
+
+        section_lines.setdefault(current_section, []).append(line)
+
+    if sum(len(values) for values in scores.values()) < MIN_SCORE_LINES and not has_heading:
+        # TAレポートのレイアウトとして認識できない場合は構造化しない
+        return ParsedTAReport(dropped_lines=dropped_lines)
+
+    # スコアだけの見出しも、スコアを出力する位置を保つため本文なし（""）として残す
+    sections = {
+        name: _join_lines(lines)
+        for name, lines in section_lines.items()
+        if lines or name in scores
+    }
+    return ParsedTAReport(scores=scores, sections=sections, dropped_lines=dropped_lines)
+
+
+def format_ta_report(report: ParsedTAReport) -> str:
+    """
+    構造化されたレポートをプロンプト用のコンパクトなテキストに変換する
+
+    Args:
+        report: parse_ta_report() の結果
+
+    Returns:
+        プロンプトに埋め込むテキスト
+    """
+    parts = []
+    for name, body in report.sections.items():
+        lines = [f"{label}: {score}" for label, score in report.scores.get(name, {}).items()]
+        if body:
+            lines.append(body)
+        parts.append(f"■{name}\n" + "\n".join(lines))
+    return "\n\n".join(parts)
+
+
+def _compact_text(text: str) -> str:
+    """TAレポートのテキストを圧縮する（ログ出力なし）"""
+    report = parse_ta_report(text)
+    if report.is_recognized:
+        return format_ta_report(report)
+    return "\n".join(
+        line for line in text.splitlines()
+        if not is_boilerplate_line(line)
+    )
+
+
+def compact_text_length(text: str) -> int:
+    """
+    compact_ta_report_text() で圧縮した後の文字数を返す
+    PDFの抽出を予算内で打ち切る際の長さの判定に使用する
+    """
+    return len(_compact_text(text))
+
+
+def compact_ta_report_text(text: str) -> str:
+    """
+    TAレポートのテキストを、スコアと所見だけのコンパクトな形式に変換する
+
+    レイアウトを認識できない場合は、定型文の行だけを除いた元のテキストを返す
+
+    Args:
+        text: extract_text_from_pdf() で抽出したテキスト
+
+    Returns:
+        プロンプト用に圧縮したテキスト
+    """
+    compact_text = _compact_text(text)
+    if len(compact_text) < len(text):
+        print(f"TAレポートを圧縮しました: {len(text)}文字 → {len(compact_text)}文字")
+    return compact_text
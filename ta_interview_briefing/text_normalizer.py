@@ -0,0 +1,139 @@
+"""
+PDF抽出テキストの正規化
+全ページに繰り返し現れるヘッダー・フッター行を検出して除去し、余分な空白を詰める
+"""
+
+import hashlib
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+
+# 全ページ数に対してこの割合以上のページに現れる行を繰り返し行とみなす
+REPEATED_LINE_RATIO = 0.6
+
+# ページ数がこれ未満の場合は繰り返し行の検出を行わない（本文を誤って除去しないため）
+MIN_PAGES_FOR_DEDUP = 3
+
+# ページ先頭・末尾のこの行数をヘッダー・フッター領域とみなす（ページ番号の検出に使用）
+EDGE_LINES = 1
+
+_DIGITS_PATTERN = re.compile(r"\d+")
+_INLINE_SPACES_PATTERN = re.compile(r"[ \t　]+")
+_BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+
+def _line_fingerprint(line: str, mask_digits: bool = False) -> str:
+    """
+    行の指紋（ハッシュ）を計算する
+
+    Args:
+        line: 対象の行
+        mask_digits: Trueの場合、ページ番号などの数字の違いを同一行とみなすため数字を伏せてからハッシュ化する
+    """
+    normalized = "".join(unicodedata.normalize("NFKC", line).split())
+    if mask_digits:
+        normalized = "#" + _DIGITS_PATTERN.sub("#", normalized)
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _page_fingerprints(page: str) -> List[Set[str]]:
+    """
+    ページ内の各行の指紋を求める
+    数字を伏せた指紋はページ先頭・末尾の行（ヘッダー・フッター領域）だけで計算する
+    """
+    lines = page.splitlines()
+    content_indexes = [index for index, line in enumerate(lines) if line.strip()]
+    edge_indexes = set(content_indexes[:EDGE_LINES] + content_indexes[-EDGE_LINES:])
+
+    fingerprints: List[Set[str]] = []
+    for index, line in enumerate(lines):
+        if not line.strip():
+            fingerprints.append(set())
+            continue
+        line_fingerprints = {_line_fingerprint(line)}
+        if index in edge_indexes:
+            line_fingerprints.add(_line_fingerprint(line, mask_digits=True))
+        fingerprints.append(line_fingerprints)
+    return fingerprints
+
+
+def _collapse_whitespace(text: str) -> str:
+    """行内の連続する空白と、連続する空行を詰める"""
+    lines = [_INLINE_SPACES_PATTERN.sub(" ", line).strip() for line in text.splitlines()]
+    return _BLANK_LINES_PATTERN.sub("\n\n", "\n".join(lines)).strip()
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    テキストのトークン数を概算する
+    日本語（全角）文字は1文字あたり約1トークン、それ以外は約4文字で1トークンとして数える
+    """
+    wide_chars = sum(1 for char in text if unicodedata.east_asian_width(char) in ("W", "F"))
+    narrow_chars = len(text) - wide_chars
+    return wide_chars + math.ceil(narrow_chars / 4)
+
+
+def find_repeated_lines(pages: List[str]) -> Set[str]:
+    """
+    複数ページに繰り返し現れる行の指紋を求める
+
+    Args:
+        pages: ページごとのテキスト
+
+    Returns:
+        繰り返し行と判定された行の指紋の集合
+    """
+    if len(pages) < MIN_PAGES_FOR_DEDUP:
+        return set()
+
+    page_counts: Counter = Counter()
+    for page in pages:
+        # 同じページ内で何度現れても1回と数える
+        page_counts.update(set().union(*_page_fingerprints(page)))
+
+    threshold = max(2, math.ceil(len(pages) * REPEATED_LINE_RATIO))
+    return {fingerprint for fingerprint, count in page_counts.items() if count >= threshold}
+
+
+def normalize_pages(pages: List[str]) -> Tuple[List[str], Dict[str, int]]:
+    """
+    ページごとのテキストから繰り返し行（ヘッダー・フッター・ページ番号）と余分な空白を除去する
+
+    Args:
+        pages: ページごとのテキスト
+
+    Returns:
+        (正規化後のページごとのテキスト, 統計情報) のタプル
+        統計情報には before_chars / after_chars / before_tokens / after_tokens / removed_lines が含まれる
+    """
+    repeated = find_repeated_lines(pages)
+    normalized_pages = []
+    removed_lines = 0
+
+    for page in pages:
+        kept_lines = []
+        for line, fingerprints in zip(page.splitlines(), _page_fingerprints(page)):
+            if fingerprints & repeated:
+                removed_lines += 1
+                continue
+            kept_lines.append(line)
+        normalized_pages.append(_collapse_whitespace("\n".join(kept_lines)))
+
+    if not any(normalized_pages):
+        # 全ページが同一内容の場合などは、繰り返し行を除去せず空白の整理のみ行う
+        normalized_pages = [_collapse_whitespace(page) for page in pages]
+        removed_lines = 0
+
+    before_text = "\n\n".join(pages)
+    after_text = "\n\n".join(page for page in normalized_pages if page)
+    stats = {
+        "before_chars": len(before_text),
+        "after_chars": len(after_text),
+        "before_tokens": estimate_tokens(before_text),
+        "after_tokens": estimate_tokens(after_text),
+        "removed_lines": removed_lines,
+    }
+    return normalized_pages, stats
@@ -0,0 +1,176 @@
+"""
+アップロードされたPDFの受け取り
+アップロードを全体をメモリに載せずにチャンク単位で一時ファイルへ書き出し、
+サイズの上限を超えた時点で 413 で打ち切る。内容のSHA-256は書き出しと同時に計算する
+"""
+
+import os
+import hashlib
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.formparsers import MultiPartParser
+from starlette.responses import JSONResponse
+
+
+# アップロードのデフォルト設定（環境変数で上書き可能）
+DEFAULT_MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+DEFAULT_UPLOAD_SPOOL_MAX_MEMORY = 1024 * 1024
+# 複数ファイルを受け付けるエンドポイント（/estimate）で、1リクエストにアップロードできるファイル数の上限
+DEFAULT_MAX_UPLOAD_FILES = 20
+
+# アップロードを読み込む単位
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# multipart のバウンダリ・ヘッダーやフォームの他のフィールドの分として、
+# Content-Length の判定時にファイルサイズの上限に加える余裕
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# リクエストボディのサイズを制限するメソッド
+_LIMITED_METHODS = ("POST", "PUT", "PATCH")
+
+
+def max_upload_bytes() -> int:
+    """アップロード1ファイルあたりのサイズの上限（TA_MAX_UPLOAD_BYTES、0以下で無制限）"""
+    return int(os.getenv("TA_MAX_UPLOAD_BYTES", DEFAULT_MAX_UPLOAD_BYTES))
+
+
+def max_upload_files() -> int:
+    """1リクエストにアップロードできるファイル数の上限（TA_MAX_UPLOAD_FILES）"""
+    return max(1, int(os.getenv("TA_MAX_UPLOAD_FILES", DEFAULT_MAX_UPLOAD_FILES)))
+
+
+def configure_spooling() -> int:
+    """
+    multipart のパース時に、アップロードをメモリからディスクに切り替えるサイズを設定する
+    （TA_UPLOAD_SPOOL_MAX_MEMORY。これを超えたファイルはStarletteが一時ファイルに書き出す）
+
+    Starlette 0.27 はアプリごとに設定できないため、MultiPartParser のクラス属性を書き換える。
+    そのため、同じプロセスで動く他のStarletteアプリのmultipartのパースにも適用される
+
+    Returns:
+        設定したサイズ（バイト）
+    """
+    spool_max_memory = int(os.getenv("TA_UPLOAD_SPOOL_MAX_MEMORY", DEFAULT_UPLOAD_SPOOL_MAX_MEMORY))
+    MultiPartParser.max_file_size = spool_max_memory
+    return spool_max_memory
+
+
+class UploadTooLarge(HTTPException):
+    """アップロードがサイズの上限を超えた（413）"""
+
+    def __init__(self, limit: int):
+        super().__init__(
+            status_code=413,
+            detail=f"アップロードされたファイルが大きすぎます（上限: {limit}バイト）"
+        )
+
+
+class UploadSizeLimitMiddleware:
+    """
+    リクエストボディのサイズを制限するASGIミドルウェア
+
+    上限は「1ファイルあたりの上限 + multipartの余裕分」で、multi_file_paths のエンドポイントでは
+    これにファイル数の上限（TA_MAX_UPLOAD_FILES）を掛ける。1ファイルごとの上限は spool_upload で確認する。
+    Content-Length が上限を超えるリクエストはボディを読まずに 413 を返す。
+    Content-Length がない（chunked）リクエストは、受信したバイト数が上限を超えた時点で打ち切る
+    """
+
+    def __init__(self, app: Any, max_bytes: Optional[int] = None, multi_file_paths: Tuple[str, ...] = ()):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.multi_file_paths = frozenset(multi_file_paths)
+
+    def _limit(self, path: str = "") -> int:
+        max_bytes = self.max_bytes if self.max_bytes is not None else max_upload_bytes()
+        if max_bytes <= 0:
+            return 0
+        limit = max_bytes + MULTIPART_OVERHEAD_BYTES
+        if path in self.multi_file_paths:
+            limit *= max_upload_files()
+        return limit
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in _LIMITED_METHODS:
+            await self.app(scope, receive, send)
+            return
+        limit = self._limit(scope.get("path", ""))
+        if not limit:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    content_length = int(value)
+                except ValueError:
+                    content_length = 0
+                if content_length > limit:
+                    response = JSONResponse(status_code=413, content={"detail": UploadTooLarge(limit).detail})
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise UploadTooLarge(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+@dataclass
+class SpooledUpload:
+    """一時ファイルに書き出したアップロード"""
+
+    path: str
+    size: int
+    sha256: str
+
+
+async def spool_upload(file: Any, max_bytes: Optional[int] = None,
+                       chunk_size: int = UPLOAD_CHUNK_SIZE) -> SpooledUpload:
+    """
+    アップロードをチャンク単位で一時ファイルに書き出す
+
+    メモリに載るのは常に1チャンク分のみで、内容のSHA-256は書き出しと同時に計算する。
+    上限を超えた時点で書き出しを打ち切り、書きかけの一時ファイルを削除する
+
+    Args:
+        file: アップロードされたファイル（read(size) を持つUploadFile）
+        max_bytes: サイズの上限（Noneの場合は TA_MAX_UPLOAD_BYTES、0以下で無制限）
+        chunk_size: 1回に読み込むバイト数
+
+    Returns:
+        SpooledUpload: 一時ファイルのパス・サイズ・SHA-256（一時ファイルは呼び出し元で削除する）
+
+    Raises:
+        UploadTooLarge: サイズの上限を超えた場合
+    """
+    limit = max_upload_bytes() if max_bytes is None else max_bytes
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
+        try:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if limit > 0 and size > limit:
+                    raise UploadTooLarge(limit)
+                digest.update(chunk)
+                tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    return SpooledUpload(path=tmp.name, size=size, sha256=digest.hexdigest())
@@ -0,0 +1,277 @@
+"""
+フォルダ監視モード
+監視フォルダに追加・更新されたTalent Analytics PDFを検出し、ブリーフィングPDFを自動生成する
+"""
+
+import os
+import time
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, Optional, Tuple
+
+from .batch import BRIEFING_SUFFIX, briefing_output_path, _process_file
+from .pdf_builder import warm_up_renderer
+
+
+# デフォルト設定
+DEFAULT_WATCH_WORKERS = 2
+DEFAULT_DEBOUNCE_SECONDS = 2.0
+DEFAULT_POLL_INTERVAL_SECONDS = 1.0
+DEFAULT_RETRY_SECONDS = 30.0
+# 再試行の間隔の上限（失敗するたびに retry_seconds を2倍にする）と、同じ内容のファイルを処理する回数の上限
+DEFAULT_MAX_RETRY_SECONDS = 900.0
+DEFAULT_MAX_ATTEMPTS = 5
+
+# ファイルの状態（サイズ, 更新時刻）
+FileSignature = Tuple[int, int]
+
+
+def _signature(path: Path) -> Optional[FileSignature]:
+    """ファイルのサイズと更新時刻を返す（ファイルがない場合はNone）"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _is_input_pdf(path: Path) -> bool:
+    """監視対象の入力PDFかどうか（生成したブリーフィングPDFは対象外）"""
+    return path.suffix.lower() == ".pdf" and not path.name.endswith(BRIEFING_SUFFIX)
+
+
+class FolderWatcher:
+    """
+    監視フォルダのPDFを検出してワーカープールで処理する
+
+    - watchdogパッケージがあればinotifyなどのOSの通知で変更を検出し、なければ定期的なスキャンで検出する
+    - 書き込み途中のファイルを処理しないよう、サイズと更新時刻が debounce_seconds の間変わらなかったファイルだけを処理する
+    - 処理済みのファイルが更新された場合は再処理する
+    - 処理に失敗したファイルは retry_seconds 後に再処理する（失敗するたびに間隔を2倍にし、max_retry_seconds まで延ばす）
+    - 同じ内容（サイズと更新時刻）のまま max_attempts 回失敗したファイルは、更新されるまで処理しない
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        workers: int = DEFAULT_WATCH_WORKERS,
+        debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL_SECONDS,
+        use_polling: bool = False,
+        retry_seconds: float = DEFAULT_RETRY_SECONDS,
+        max_retry_seconds: float = DEFAULT_MAX_RETRY_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ):
+        self.directory = Path(directory)
+        if not self.directory.is_dir():
+            raise FileNotFoundError(f"ディレクトリが見つかりません: {directory}")
+        self.workers = max(1, workers)
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.use_polling = use_polling
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.max_attempts = max(1, max_attempts)
+
+        self._lock = threading.Lock()
+        # 変更を検出したファイル: パス -> (最後に観測した状態, 状態が変わった時刻)
+        self._pending: Dict[Path, Tuple[Optional[FileSignature], float]] = {}
+        # 処理済み（または処理中）のファイルの状態（失敗した場合は取り除く）
+        self._processed: Dict[Path, FileSignature] = {}
+        self._in_flight: Dict[Path, Future] = {}
+        # 失敗したファイル: パス -> (失敗した時点の状態, その状態で連続して失敗した回数)
+        self._failures: Dict[Path, Tuple[FileSignature, int]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stop_event = threading.Event()
+
+    # ------------------------------------------------------------------
+    # 変更の検出
+    # ------------------------------------------------------------------
+
+    def observe(self, path: Path) -> None:
+        """ファイルの追加・変更を記録する（OSの通知とスキャンの両方から呼ばれる）"""
+        path = Path(path)
+        if not _is_input_pdf(path):
+            return
+        signature = _signature(path)
+        now = time.monotonic()
+        with self._lock:
+            if signature is not None and self._processed.get(path) == signature:
+                return
+            previous = self._pending.get(path)
+            if previous is None or previous[0] != signature:
+                self._pending[path] = (signature, now)
+
+    def scan(self) -> None:
+        """フォルダ全体をスキャンして変更を記録する（ポーリング時、および起動時）"""
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                self.observe(Path(entry.path))
+
+    def mark_existing_briefings(self) -> None:
+        """起動時点でブリーフィングPDFが最新のファイルを処理済みとして扱う"""
+        for entry in os.scandir(self.directory):
+            path = Path(entry.path)
+            if not entry.is_file() or not _is_input_pdf(path):
+                continue
+            signature = _signature(path)
+            briefing = _signature(briefing_output_path(path))
+            if signature is not None and briefing is not None and briefing[1] >= signature[1]:
+                with self._lock:
+                    self._processed[path] = signature
+
+    # ------------------------------------------------------------------
+    # 処理の振り分け
+    # ------------------------------------------------------------------
+
+    def dispatch_ready(self) -> List[Path]:
+        """
+        書き込みが完了した（状態が一定時間変わらない）ファイルをワーカープールに投入する
+
+        Returns:
+            投入したファイルのリスト
+        """
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            for path, (observed, changed_at) in list(self._pending.items()):
+                if path in self._in_flight:
+                    continue
+                current = _signature(path)
+                if current is None:
+                    # 削除されたファイル
+                    del self._pending[path]
+                    continue
+                if current != observed:
+                    # まだ書き込み中
+                    self._pending[path] = (current, now)
+                    continue
+                if now - changed_at < self.debounce_seconds:
+                    continue
+                del self._pending[path]
+                self._processed[path] = current
+                ready.append(path)
+
+        for path in ready:
+            future = self._submit(path)
+            with self._lock:
+                self._in_flight[path] = future
+            future.add_done_callback(lambda done, done_path=path: self._finish(done_path, done))
+        return ready
+
+    def _submit(self, path: Path) -> Future:
+        """ワーカープールにファイルの処理を投入する"""
+        if self._executor is None:
+            warm_up_renderer()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ta-watch")
+        return self._executor.submit(self._process, path)
+
+    def _retry_delay(self, failures: int) -> float:
+        """failures 回目の失敗の後、再処理するまでの秒数（指数バックオフ）"""
+        return min(self.retry_seconds * 2 ** (failures - 1), self.max_retry_seconds)
+
+    def _finish(self, path: Path, future: Future) -> None:
+        """
+        処理の完了を記録する
+
+        失敗した場合は処理済みの記録を取り除き、バックオフの後に再処理されるよう待機中に戻す
+        （OS通知のモードではファイルが変わらない限り再スキャンされないため、ここで戻す）。
+        同じ状態のまま max_attempts 回失敗した場合は処理済みのまま残し、ファイルが更新されるまで処理しない
+        """
+        succeeded = not future.cancelled() and future.exception() is None and future.result()
+        with self._lock:
+            self._in_flight.pop(path, None)
+            if succeeded:
+                self._failures.pop(path, None)
+                return
+            signature = self._processed.get(path)
+            if signature is None:
+                return
+            previous = self._failures.get(path)
+            failures = previous[1] + 1 if previous is not None and previous[0] == signature else 1
+            self._failures[path] = (signature, failures)
+            if failures >= self.max_attempts:
+                print(f"⚠️  {path.name} は{failures}回失敗したため、ファイルが更新されるまで処理しません")
+                return
+            del self._processed[path]
+            delay = self._retry_delay(failures)
+            print(f"{path.name} を{delay:g}秒後に再処理します（{failures}/{self.max_attempts}回失敗）")
+            if path not in self._pending:
+                # debounce_seconds の経過後に処理されるため、その分を差し引いておく
+                retry_at = time.monotonic() + delay - self.debounce_seconds
+                self._pending[path] = (signature, retry_at)
+
+    def _process(self, path: Path) -> bool:
+        """1ファイルを処理する（失敗してもデーモンは止めない）"""
+        started = time.monotonic()
+        try:
+            output_path = _process_file(path)
+        except Exception as e:
+            print(f"❌ {path.name} の処理に失敗しました: {e}")
+            return False
+        print(f"✅ {path.name} → {output_path.name}（{time.monotonic() - started:.1f}秒）")
+        return True
+
+    # ------------------------------------------------------------------
+    # 実行
+    # ------------------------------------------------------------------
+
+    def _start_observer(self):
+        """watchdogによるOS通知の監視を開始する（利用できない場合はNone）"""
+        if self.use_polling:
+            return None
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return None
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_created(self, event):
+                if not event.is_directory:
+                    watcher.observe(Path(event.src_path))
+
+            def on_modified(self, event):
+                if not event.is_directory:
+                    watcher.observe(Path(event.src_path))
+
+            def on_moved(self, event):
+                if not event.is_directory:
+                    watcher.observe(Path(event.dest_path))
+
+        observer = Observer()
+        observer.schedule(_Handler(), str(self.directory), recursive=False)
+        observer.start()
+        return observer
+
+    def run(self) -> None:
+        """stop() が呼ばれるまでフォルダを監視して処理を続ける"""
+        self.mark_existing_briefings()
+        self.scan()
+        observer = self._start_observer()
+        mode = "OS通知（watchdog）" if observer else "ポーリング"
+        print(f"フォルダの監視を開始しました: {self.directory}（{mode}、ワーカー数 {self.workers}）")
+        try:
+            while not self._stop_event.is_set():
+                if observer is None:
+                    self.scan()
+                self.dispatch_ready()
+                self._stop_event.wait(self.poll_interval)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            self.shutdown()
+
+    def stop(self) -> None:
+        """監視を停止する"""
+        self._stop_event.set()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """ワーカープールを停止する（wait=Trueの場合は処理中のファイルの完了を待つ）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,23 @@
+"""
+本番環境用のgunicornのワーカー（ta_interview_briefing/server.py から使う、gunicornが必要）
+"""
+
+from typing import Any
+
+from uvicorn.workers import UvicornWorker
+
+from .server import SHUTDOWN_MARGIN_SECONDS, event_loop_settings
+
+
+_LOOP, _HTTP = event_loop_settings()
+
+
+class BriefingWorker(UvicornWorker):
+    """uvloop / httptools を使い、gunicornの graceful_timeout 内に終了処理を済ませるuvicornワーカー"""
+
+    CONFIG_KWARGS = {"loop": _LOOP, "http": _HTTP}
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # 処理中のリクエストを待ちきれない場合も、強制終了される前にlifespanのshutdownを済ませる
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - SHUTDOWN_MARGIN_SECONDS)
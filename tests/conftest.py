@@ -59,3 +59,62 @@ def reset_env():
     os.environ.clear()
     os.environ.update(original_env)
 
+
+
+@pytest.fixture(autouse=True)
+def reset_completion_cache():
+    """テストごとにLLMレスポンスキャッシュと共有クライアントを破棄（テスト間で共有されないように）"""
+    from ta_interview_briefing.azure_client import reset_completion_cache as _reset
+    from ta_interview_briefing.azure_client import reset_azure_clients
+    _reset()
+    reset_azure_clients()
+    yield
+    _reset()
+    reset_azure_clients()
+
+
+@pytest.fixture(autouse=True)
+def disable_extraction_cache():
+    """抽出キャッシュを無効化（テストではPdfReaderをモックするため、内容ハッシュが一致しても結果が異なる）"""
+    from ta_interview_briefing.extraction_cache import reset_extraction_cache
+    os.environ["TA_EXTRACTION_CACHE_ENABLED"] = "0"
+    reset_extraction_cache()
+    yield
+    reset_extraction_cache()
+
+
+@pytest.fixture(autouse=True)
+def isolated_analysis_store(tmp_path):
+    """解析結果ストアをテストごとの一時ディレクトリに作成（テスト間で保存結果が共有されないように）"""
+    from ta_interview_briefing.store import reset_analysis_store
+    os.environ["TA_ANALYSIS_STORE_PATH"] = str(tmp_path / "analyses.sqlite3")
+    reset_analysis_store()
+    yield
+    reset_analysis_store()
+
+
+@pytest.fixture(autouse=True)
+def reset_render_cache():
+    """生成済みPDFのキャッシュをテストごとに破棄（テスト間で共有されないように）"""
+    from ta_interview_briefing.render_cache import reset_render_cache as _reset
+    _reset()
+    yield
+    _reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_scheduler():
+    """Azure OpenAIの呼び出しのスケジューラーをテストごとに破棄（順番待ちの状態が共有されないように）"""
+    from ta_interview_briefing.scheduler import reset_scheduler as _reset
+    _reset()
+    yield
+    _reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_token_provider():
+    """Entra IDのトークンプロバイダーをテストごとに停止して破棄（更新スレッドが残らないように）"""
+    from ta_interview_briefing.azure_auth import reset_token_provider as _reset
+    _reset()
+    yield
+    _reset()
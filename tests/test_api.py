@@ -5,6 +5,8 @@ FastAPIアプリケーションのテスト
 import pytest
 import tempfile
 import os
+import time
+from pathlib import Path
 from unittest.mock import patch
 from fastapi.testclient import TestClient
 from ta_interview_briefing.api import app
@@ -30,6 +32,17 @@ class TestRootEndpoint:
         assert "endpoints" in data
 
 
+class TestRenderMetricsEndpoint:
+    """レンダリング用スレッドプールの状態（/metrics/render）のテスト"""
+    
+    def test_render_metrics(self, client):
+        """ワーカー数と待機数・処理件数を返す"""
+        response = client.get("/metrics/render")
+        
+        assert response.status_code == 200
+        assert {"workers", "queued", "active", "completed", "failed"} <= set(response.json())
+
+
 class TestHealthEndpoint:
     """ヘルスチェックエンドポイントのテスト"""
     
@@ -253,3 +266,460 @@ class TestGeneratePdfEndpoint:
             if os.path.exists(tmp_path):
                 os.unlink(tmp_path)
 
+
+
+class TestEstimateEndpoint:
+    """/estimateエンドポイントのテスト"""
+    
+    def test_estimate_with_invalid_file_type(self, client):
+        """PDF以外のファイルをアップロードした場合のエラー"""
+        response = client.post("/estimate", files=[("files", ("test.txt", b"not a pdf", "text/plain"))])
+        
+        assert response.status_code == 400
+    
+    @patch('ta_interview_briefing.api.estimate_pdfs')
+    def test_estimate_multiple_files(self, mock_estimate, client):
+        """複数ファイルの見積もりがファイル名付きで返されるテスト"""
+        item = {
+            "pdf_path": "/tmp/x.pdf", "prompt_tokens": 1000, "completion_tokens": 800,
+            "max_completion_tokens": 2000, "total_tokens": 1800, "cost": 0.0105, "cached": False
+        }
+        mock_estimate.return_value = {
+            "files": [item, {"pdf_path": "/tmp/y.pdf", "error": "読み込みに失敗しました"}],
+            "totals": {
+                "files": 2, "requests": 1, "cached": 0, "errors": 1,
+                "prompt_tokens": 1000, "completion_tokens": 800, "total_tokens": 1800,
+                "cost": 0.0105, "rate_limit_tokens": 3000, "expected_wall_seconds": 6, "bottleneck": "tpm"
+            },
+            "settings": {"currency": "USD", "tpm": 30000, "rpm": 180}
+        }
+        
+        response = client.post("/estimate", files=[
+            ("files", ("a.pdf", b"%PDF-1.4\n", "application/pdf")),
+            ("files", ("b.pdf", b"%PDF-1.4\n", "application/pdf")),
+        ])
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["filename"] for item in data["files"]] == ["a.pdf", "b.pdf"]
+        assert data["files"][1]["error"] == "読み込みに失敗しました"
+        assert data["totals"]["tpm"] == 30000
+        assert data["totals"]["expected_wall_seconds"] == 6
+        assert len(mock_estimate.call_args.args[0]) == 2
+    
+    @patch('ta_interview_briefing.api.estimate_pdfs')
+    def test_estimate_runs_outside_event_loop(self, mock_estimate, client):
+        """見積もりはイベントループの外のスレッドで行う"""
+        import asyncio
+        
+        def estimate(paths):
+            with pytest.raises(RuntimeError):
+                asyncio.get_running_loop()
+            return {
+                "files": [],
+                "totals": {
+                    "files": 0, "requests": 0, "cached": 0, "errors": 0,
+                    "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+                    "cost": 0.0, "rate_limit_tokens": 0, "expected_wall_seconds": 0, "bottleneck": "tpm"
+                },
+                "settings": {"currency": "USD", "tpm": 30000, "rpm": 180}
+            }
+        mock_estimate.side_effect = estimate
+        
+        response = client.post("/estimate", files=[("files", ("a.pdf", b"%PDF-1.4\n", "application/pdf"))])
+        
+        assert response.status_code == 200
+        mock_estimate.assert_called_once()
+
+
+class TestAnalysesEndpoints:
+    """保存済みの解析結果（/analyses）のエンドポイントのテスト"""
+    
+    @patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure')
+    def test_analyze_saves_and_reuses_result(self, mock_analyze, client, sample_analysis_data):
+        """解析結果が保存され、同じPDFの再解析では保存済みの結果を返す"""
+        mock_analyze.return_value = sample_analysis_data
+        files = {"file": ("test.pdf", b"%PDF-1.4\nsame", "application/pdf")}
+        
+        first = client.post("/analyze", files=files, data={"candidate_id": "C-001", "candidate_name": "山田太郎"})
+        second = client.post("/analyze", files=files)
+        
+        assert first.status_code == 200
+        assert second.json() == first.json()
+        assert second.headers["X-Analysis-Id"] == first.headers["X-Analysis-Id"]
+        mock_analyze.assert_called_once()
+    
+    @patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure')
+    def test_get_and_list_analyses(self, mock_analyze, client, sample_analysis_data):
+        """IDと候補者で保存済みの解析結果を取得できる"""
+        mock_analyze.return_value = sample_analysis_data
+        response = client.post(
+            "/analyze", files={"file": ("test.pdf", b"%PDF-1.4\n", "application/pdf")},
+            data={"candidate_id": "C-001", "candidate_name": "山田太郎"}
+        )
+        analysis_id = response.headers["X-Analysis-Id"]
+        
+        record = client.get(f"/analyses/{analysis_id}").json()
+        listed = client.get("/analyses", params={"candidate": "山田太郎"}).json()
+        
+        assert record["candidate_id"] == "C-001"
+        assert record["result"] == sample_analysis_data
+        assert [item["id"] for item in listed] == [analysis_id]
+        assert client.get("/analyses", params={"candidate": "C-999"}).json() == []
+    
+    def test_get_unknown_analysis(self, client):
+        """存在しないIDは404"""
+        assert client.get("/analyses/unknown").status_code == 404
+        assert client.get("/analyses/unknown/pdf").status_code == 404
+    
+    def test_store_disabled(self, client):
+        """ストアが無効な場合は503"""
+        from ta_interview_briefing.store import reset_analysis_store
+        os.environ["TA_ANALYSIS_STORE_ENABLED"] = "0"
+        reset_analysis_store()
+        
+        assert client.get("/analyses", params={"candidate": "C-001"}).status_code == 503
+    
+    @patch('ta_interview_briefing.api.render_interview_pdf', return_value=b"%PDF-1.4\n")
+    def test_render_pdf_from_store(self, mock_render, client, sample_analysis_data):
+        """保存済みの解析結果からAzure OpenAIを呼ばずにPDFを生成する"""
+        from ta_interview_briefing.store import get_analysis_store
+        record = get_analysis_store().save(sample_analysis_data, "hash1", "gpt-4o", "1", candidate_name="山田太郎")
+        
+        with patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure') as mock_analyze:
+            response = client.get(f"/analyses/{record.id}/pdf")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.content == b"%PDF-1.4\n"
+        mock_render.assert_called_once_with("山田太郎", sample_analysis_data)
+        mock_analyze.assert_not_called()
+
+
+class TestBriefingETag:
+    """ブリーフィングPDFのETagと304のテスト"""
+    
+    @patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure')
+    def test_generate_pdf_not_modified(self, mock_analyze, client, sample_analysis_data):
+        """同じ内容の再ダウンロードは If-None-Match で304を返す"""
+        mock_analyze.return_value = sample_analysis_data
+        files = {"file": ("test.pdf", b"%PDF-1.4\n", "application/pdf")}
+        data = {"candidate_name": "テスト候補者"}
+        
+        first = client.post("/generate_pdf", files=files, data=data)
+        etag = first.headers["ETag"]
+        second = client.post("/generate_pdf", files=files, data=data, headers={"If-None-Match": etag})
+        other = client.post(
+            "/generate_pdf", files=files, data={"candidate_name": "別の候補者"}, headers={"If-None-Match": etag}
+        )
+        
+        assert first.status_code == 200
+        assert etag.startswith('"') and not etag.startswith('W/')
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["ETag"] == etag
+        assert other.status_code == 200
+        assert other.headers["ETag"] != etag
+    
+    def test_stored_analysis_pdf_etag(self, client, sample_analysis_data):
+        """保存済みの解析結果のPDFは同じバイト列・同じETagで返し、一致すれば304"""
+        from ta_interview_briefing.store import get_analysis_store
+        record = get_analysis_store().save(sample_analysis_data, "hash1", "gpt-4o", "1", candidate_name="山田太郎")
+        
+        first = client.get(f"/analyses/{record.id}/pdf")
+        second = client.get(f"/analyses/{record.id}/pdf")
+        not_modified = client.get(
+            f"/analyses/{record.id}/pdf", headers={"If-None-Match": f'W/"other", {first.headers["ETag"]}'}
+        )
+        
+        assert first.status_code == 200
+        assert first.content.startswith(b"%PDF")
+        assert second.content == first.content
+        assert second.headers["ETag"] == first.headers["ETag"]
+        assert not_modified.status_code == 304
+
+
+class TestBriefingFormats:
+    """ブリーフィングの出力形式（HTML / Markdown / JSON）のテスト"""
+    
+    @patch('ta_interview_briefing.api.generate_interview_pdf_from_azure')
+    @patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure')
+    def test_generate_pdf_html_by_accept(self, mock_analyze, mock_generate, client, sample_analysis_data):
+        """Acceptヘッダーが text/html の場合はPDFを生成せずにHTMLを返す"""
+        mock_analyze.return_value = sample_analysis_data
+        
+        response = client.post(
+            "/generate_pdf",
+            files={"file": ("test.pdf", b"%PDF-1.4\n", "application/pdf")},
+            data={"candidate_name": "テスト候補者"},
+            headers={"Accept": "text/html"}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "text/html; charset=utf-8"
+        assert "候補者名: テスト候補者" in response.text
+        assert response.headers["Vary"] == "Accept"
+        mock_generate.assert_not_called()
+    
+    @patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure')
+    def test_generate_pdf_unknown_format(self, mock_analyze, client):
+        """未対応の format は400"""
+        response = client.post(
+            "/generate_pdf?format=docx",
+            files={"file": ("test.pdf", b"%PDF-1.4\n", "application/pdf")}
+        )
+        
+        assert response.status_code == 400
+        mock_analyze.assert_not_called()
+    
+    def test_stored_briefing_formats(self, client, sample_analysis_data):
+        """保存済みの解析結果を format で指定した形式で返し、形式ごとにETagが異なる"""
+        from ta_interview_briefing.store import get_analysis_store
+        record = get_analysis_store().save(sample_analysis_data, "hash1", "gpt-4o", "1", candidate_name="山田太郎")
+        
+        markdown = client.get(f"/analyses/{record.id}/briefing?format=markdown")
+        as_json = client.get(f"/analyses/{record.id}/briefing", headers={"Accept": "application/json"})
+        pdf = client.get(f"/analyses/{record.id}/briefing")
+        not_modified = client.get(
+            f"/analyses/{record.id}/briefing?format=markdown", headers={"If-None-Match": markdown.headers["ETag"]}
+        )
+        
+        assert markdown.headers["content-type"] == "text/markdown; charset=utf-8"
+        assert markdown.text.startswith("# Talent Analytics 面接ブリーフィング")
+        assert as_json.json()["candidate_name"] == "山田太郎"
+        assert pdf.headers["content-type"] == "application/pdf"
+        assert len({markdown.headers["ETag"], as_json.headers["ETag"], pdf.headers["ETag"]}) == 3
+        assert not_modified.status_code == 304
+
+
+class TestRequisitionExport:
+    """求人単位のZIPエクスポート（/requisitions/{id}/briefings.zip）のテスト"""
+    
+    @patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure')
+    def test_export_zip(self, mock_analyze, client, sample_analysis_data):
+        """求人IDを付けて解析したPDFのブリーフィングがZIPで返る"""
+        import io
+        import zipfile
+        mock_analyze.return_value = sample_analysis_data
+        for index in range(3):
+            client.post(
+                "/analyze", files={"file": (f"c{index}.pdf", f"%PDF-1.4\n{index}".encode(), "application/pdf")},
+                data={"candidate_id": f"C-00{index}", "requisition_id": "R-001"}
+            )
+        
+        response = client.get("/requisitions/R-001/briefings.zip", params={"format": "html"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        assert "R-001_interview_briefings.zip" in response.headers["content-disposition"]
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            names = archive.namelist()
+        assert len(names) == 3
+        assert names[0].startswith("C-000_") and names[0].endswith(".html")
+    
+    @patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure')
+    def test_reused_analysis_is_linked_to_requisition(self, mock_analyze, client, sample_analysis_data):
+        """保存済みの解析結果を再利用した場合も求人IDが記録される"""
+        mock_analyze.return_value = sample_analysis_data
+        files = {"file": ("test.pdf", b"%PDF-1.4\nsame", "application/pdf")}
+        client.post("/analyze", files=files)
+        
+        response = client.post("/analyze", files=files, data={"requisition_id": "R-002"})
+        
+        assert client.get(f"/analyses/{response.headers['X-Analysis-Id']}").json()["requisition_id"] == "R-002"
+        assert client.get("/requisitions/R-002/briefings.zip").status_code == 200
+        mock_analyze.assert_called_once()
+    
+    @patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure')
+    def test_same_pdf_in_two_requisitions(self, mock_analyze, client, sample_analysis_data):
+        """同じPDFを別の求人でアップロードしても、最初の求人のエクスポートから外れない"""
+        import io
+        import zipfile
+        mock_analyze.return_value = sample_analysis_data
+        files = {"file": ("test.pdf", b"%PDF-1.4\nsame", "application/pdf")}
+        client.post("/analyze", files=files, data={"requisition_id": "R-001", "candidate_id": "C-001"})
+        client.post("/analyze", files=files, data={"requisition_id": "R-002"})
+        
+        for requisition_id in ("R-001", "R-002"):
+            response = client.get(f"/requisitions/{requisition_id}/briefings.zip")
+            assert response.status_code == 200
+            with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+                assert len(archive.namelist()) == 1
+    
+    def test_unknown_requisition_and_format(self, client, sample_analysis_data):
+        """解析結果がない求人IDは404、未対応の形式は400"""
+        from ta_interview_briefing.store import get_analysis_store
+        get_analysis_store().save(sample_analysis_data, "hash1", "gpt-4o", "1", requisition_id="R-001")
+        
+        assert client.get("/requisitions/R-999/briefings.zip").status_code == 404
+        assert client.get("/requisitions/R-001/briefings.zip", params={"format": "docx"}).status_code == 400
+    
+    def test_booklet(self, client, sample_analysis_data):
+        """求人IDの全候補者のブリーフィングが1つのPDFで返り、一時ファイルは削除される"""
+        from ta_interview_briefing.api import _unlink_quietly
+        from ta_interview_briefing.store import get_analysis_store
+        store = get_analysis_store()
+        store.save(sample_analysis_data, "hash1", "gpt-4o", "1", candidate_name="山田太郎", requisition_id="R-001")
+        store.save(sample_analysis_data, "hash2", "gpt-4o", "1", candidate_name="佐藤花子", requisition_id="R-001")
+        
+        with patch('ta_interview_briefing.api._unlink_quietly', wraps=_unlink_quietly) as mock_unlink:
+            response = client.get("/requisitions/R-001/booklet.pdf")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+        assert "R-001_interview_booklet.pdf" in response.headers["content-disposition"]
+        assert response.content.startswith(b"%PDF")
+        mock_unlink.assert_called_once()
+        assert not os.path.exists(mock_unlink.call_args[0][0])
+        assert client.get("/requisitions/R-999/booklet.pdf").status_code == 404
+
+
+class TestRequestDeadline:
+    """リクエストの期限（X-Request-Timeout）とキャンセルのテスト"""
+    
+    def _post(self, client, path, headers=None):
+        return client.post(
+            path,
+            files={"file": ("report.pdf", b"%PDF-1.4\n", "application/pdf")},
+            data={"candidate_name": "テスト"},
+            headers=headers or {},
+        )
+    
+    def test_invalid_timeout_header(self, client):
+        """X-Request-Timeout が正の秒数でない場合は400"""
+        response = self._post(client, "/analyze", headers={"X-Request-Timeout": "abc"})
+        
+        assert response.status_code == 400
+        assert "X-Request-Timeout" in response.json()["detail"]
+    
+    @patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure')
+    def test_deadline_exceeded(self, mock_analyze, client):
+        """解析が期限を過ぎた場合は504で、期限が解析に引き渡される"""
+        from ta_interview_briefing.deadline import DeadlineExceeded
+        mock_analyze.side_effect = DeadlineExceeded("リクエストの期限（5秒）を過ぎました")
+        
+        response = self._post(client, "/analyze", headers={"X-Request-Timeout": "5"})
+        
+        assert response.status_code == 504
+        assert "期限" in response.json()["detail"]
+        assert mock_analyze.call_args.kwargs["deadline"].timeout_seconds == 5
+    
+    @patch('ta_interview_briefing.api.generate_interview_pdf_from_azure')
+    @patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure')
+    def test_client_disconnect(self, mock_analyze, mock_generate, client):
+        """クライアントが切断した場合は解析中のスレッドにキャンセルを伝え、PDFを生成しない"""
+        def analyze(*args, deadline=None, **kwargs):
+            for _ in range(100):
+                if deadline.cancelled:
+                    break
+                time.sleep(0.05)
+            deadline.check("Azure OpenAIの呼び出し")
+            return {}
+        
+        async def disconnected(self):
+            return True
+        
+        mock_analyze.side_effect = analyze
+        
+        with patch('starlette.requests.Request.is_disconnected', disconnected):
+            response = self._post(client, "/generate_pdf")
+        
+        assert response.status_code == 499
+        mock_generate.assert_not_called()
+
+    @patch('ta_interview_briefing.api.generate_interview_pdf_from_azure')
+    @patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure')
+    def test_disconnect_during_render_removes_output_after_render(self, mock_analyze, mock_generate, client):
+        """PDFの生成中に切断した場合、生成中の一時ファイルは生成が終わってから削除される"""
+        written = []
+        
+        def generate(output_path, *args, **kwargs):
+            time.sleep(0.7)
+            Path(output_path).write_bytes(b"%PDF-1.4\n")
+            written.append(output_path)
+        
+        async def disconnected(self):
+            return True
+        
+        mock_analyze.return_value = {}
+        mock_generate.side_effect = generate
+        
+        with patch('starlette.requests.Request.is_disconnected', disconnected):
+            response = self._post(client, "/generate_pdf")
+        
+        assert response.status_code == 499
+        for _ in range(100):
+            if written and not os.path.exists(written[0]):
+                break
+            time.sleep(0.02)
+        assert written
+        assert not os.path.exists(written[0])
+
+
+class TestPriority:
+    """優先度クラス（X-Priority）とスケジューラーの状態のテスト"""
+    
+    def test_invalid_priority(self, client):
+        """未対応の優先度は400"""
+        response = client.post(
+            "/analyze",
+            files={"file": ("report.pdf", b"%PDF-1.4\n", "application/pdf")},
+            headers={"X-Priority": "urgent"},
+        )
+        
+        assert response.status_code == 400
+        assert "優先度" in response.json()["detail"]
+    
+    @patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure')
+    def test_priority_is_passed_to_analysis(self, mock_analyze, client, sample_analysis_data):
+        """X-Priority の優先度クラスで解析し、省略時は interactive"""
+        mock_analyze.return_value = sample_analysis_data
+        files = {"file": ("report.pdf", b"%PDF-1.4\n", "application/pdf")}
+        
+        assert client.post("/analyze", files=files, headers={"X-Priority": "bulk"}).status_code == 200
+        assert mock_analyze.call_args.kwargs["priority"] == "bulk"
+    
+    def test_scheduler_metrics(self, client):
+        """優先度クラスごとの予約分・待機数を返す"""
+        response = client.get("/metrics/scheduler")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["enabled"] is True
+        assert set(data["classes"]) == {"interactive", "bulk"}
+
+
+class TestTenant:
+    """テナント（X-Tenant-Id）のテスト"""
+    
+    FILES = {"file": ("report.pdf", b"%PDF-1.4\n", "application/pdf")}
+    
+    @patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure')
+    def test_tenant_is_passed_to_analysis(self, mock_analyze, client, sample_analysis_data):
+        """X-Tenant-Id のテナントで解析し、省略時は default"""
+        mock_analyze.return_value = sample_analysis_data
+        
+        assert client.post("/analyze", files=self.FILES, headers={"X-Tenant-Id": "sales"}).status_code == 200
+        assert mock_analyze.call_args.kwargs["tenant"] == "sales"
+        other = {"file": ("other.pdf", b"%PDF-1.4\n%other\n", "application/pdf")}
+        assert client.post("/analyze", files=other).status_code == 200
+        assert mock_analyze.call_args.kwargs["tenant"] == "default"
+    
+    def test_invalid_tenant(self, client):
+        """形式が正しくないテナントIDは400"""
+        response = client.post("/analyze", files=self.FILES, headers={"X-Tenant-Id": "../sales"})
+        
+        assert response.status_code == 400
+        assert "テナントID" in response.json()["detail"]
+    
+    @patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure')
+    def test_unregistered_tenant(self, mock_analyze, client, sample_analysis_data):
+        """TA_TENANTS に登録されていないテナントは403"""
+        os.environ["TA_TENANTS"] = "sales, hr"
+        mock_analyze.return_value = sample_analysis_data
+        
+        response = client.post("/generate_pdf", files=self.FILES, headers={"X-Tenant-Id": "marketing"})
+        
+        assert response.status_code == 403
+        mock_analyze.assert_not_called()
+        assert client.post("/analyze", files=self.FILES, headers={"X-Tenant-Id": "hr"}).status_code == 200
@@ -0,0 +1,212 @@
+"""
+Azure OpenAIのEntra ID認証（ta_interview_briefing/azure_auth.py）のテスト
+"""
+
+import os
+import time
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ta_interview_briefing import azure_auth
+from ta_interview_briefing.azure_auth import (
+    AccessToken,
+    CachedTokenProvider,
+    LocalTokenCredential,
+    get_token_provider,
+)
+
+
+def _wait_until(condition, timeout=2.0):
+    started = time.monotonic()
+    while not condition():
+        assert time.monotonic() - started < timeout
+        time.sleep(0.005)
+
+
+class TestCachedTokenProvider:
+    """CachedTokenProviderのテスト"""
+
+    def test_returns_cached_token(self):
+        """トークンは1回だけ取得し、以降はキャッシュから返す"""
+        credential = LocalTokenCredential()
+        provider = CachedTokenProvider(credential)
+
+        tokens = {provider() for _ in range(100)}
+
+        assert tokens == {"local-development-token-1"}
+        assert credential.calls == 1
+
+    def test_refreshes_in_background_before_expiry(self, monkeypatch):
+        """有効期限の前にバックグラウンドで更新し、呼び出し側は新しいトークンを受け取る"""
+        monkeypatch.setattr(azure_auth, "_MIN_REFRESH_INTERVAL_SECONDS", 0.01)
+        monkeypatch.setattr(azure_auth, "_TOKEN_EXPIRY_SKEW_SECONDS", 0.0)
+        credential = MagicMock()
+        credential.get_token.side_effect = lambda scope: AccessToken(
+            f"token-{credential.get_token.call_count}", time.time() + 0.2
+        )
+        provider = CachedTokenProvider(credential).start()
+        try:
+            _wait_until(lambda: credential.get_token.call_count >= 3)
+            calls = credential.get_token.call_count
+            assert provider() != "token-1"
+            # 呼び出し側ではトークンを取得しない
+            assert credential.get_token.call_count - calls <= 1
+        finally:
+            provider.stop()
+
+    def test_call_does_not_wait_for_background_refresh(self):
+        """バックグラウンドで更新中でも、期限内のトークンを待たずに返す"""
+        release = threading.Event()
+        refreshing = threading.Event()
+        credential = MagicMock()
+
+        def get_token(scope):
+            if credential.get_token.call_count > 1:
+                refreshing.set()
+                release.wait(5)
+            return AccessToken(f"token-{credential.get_token.call_count}", int(time.time() + 3600))
+
+        credential.get_token.side_effect = get_token
+        provider = CachedTokenProvider(credential)
+        assert provider() == "token-1"
+
+        thread = threading.Thread(target=lambda: provider._refresh_locked(), daemon=True)
+        with provider._refresh_lock:
+            thread.start()
+            assert refreshing.wait(1)
+            started = time.perf_counter()
+            assert provider() == "token-1"
+            assert time.perf_counter() - started < 0.05
+            release.set()
+        thread.join(1)
+        assert provider() == "token-2"
+
+    def test_refresh_failure_keeps_valid_token(self, monkeypatch, capsys):
+        """更新に失敗しても期限内のトークンを使い続け、再試行する"""
+        monkeypatch.setattr(azure_auth, "_MIN_REFRESH_INTERVAL_SECONDS", 0.01)
+        monkeypatch.setattr(azure_auth, "TOKEN_RETRY_SECONDS", 0.01)
+        credential = MagicMock()
+        credential.get_token.side_effect = [
+            AccessToken("token-1", time.time() + 60.2),
+            RuntimeError("IMDS endpoint unavailable"),
+            AccessToken("token-2", time.time() + 3600),
+        ]
+        provider = CachedTokenProvider(credential, refresh_margin_seconds=60)
+        assert provider() == "token-1"
+
+        with patch.object(provider, "_next_refresh_in", return_value=0.01):
+            provider.start()
+            try:
+                _wait_until(lambda: provider.refreshes == 2)
+            finally:
+                provider.stop()
+
+        assert provider.failures == 1
+        assert provider() == "token-2"
+        assert "IMDS endpoint unavailable" in capsys.readouterr().out
+
+    def test_next_refresh_time(self):
+        """有効期限の refresh_margin_seconds 前に更新し、有効期間が短いトークンは残りの半分で更新する"""
+        provider = CachedTokenProvider(LocalTokenCredential(lifetime_seconds=3600), refresh_margin_seconds=300)
+        assert provider._next_refresh_in() == 0
+        provider()
+        assert 3290 < provider._next_refresh_in() <= 3300
+
+        provider = CachedTokenProvider(LocalTokenCredential(lifetime_seconds=120), refresh_margin_seconds=300)
+        provider()
+        assert 55 < provider._next_refresh_in() <= 60
+
+    def test_expired_token_is_fetched_on_call(self):
+        """期限切れのトークンしかない場合は、その場で取得する"""
+        credential = MagicMock()
+        credential.get_token.side_effect = [
+            AccessToken("expired", int(time.time() - 1)),
+            AccessToken("fresh", int(time.time() + 3600)),
+        ]
+        provider = CachedTokenProvider(credential, scope="api://custom/.default")
+        provider._refresh_locked()
+
+        assert provider() == "fresh"
+        credential.get_token.assert_called_with("api://custom/.default")
+
+
+class TestGetTokenProvider:
+    """get_token_provider関数のテスト"""
+
+    def test_key_auth_has_no_provider(self):
+        """AZURE_OPENAI_AUTH が未設定（key）の場合はNone"""
+        os.environ.pop("AZURE_OPENAI_AUTH", None)
+
+        assert get_token_provider() is None
+
+    def test_local_credential(self):
+        """AZURE_OPENAI_AUTH=local の場合はローカルの資格情報でトークンを発行し、プロセス内で共有する"""
+        os.environ["AZURE_OPENAI_AUTH"] = "local"
+
+        provider = get_token_provider()
+
+        assert isinstance(provider.credential, LocalTokenCredential)
+        assert get_token_provider() is provider
+        assert provider().startswith("local-development-token")
+
+    def test_entra_uses_default_azure_credential(self):
+        """AZURE_OPENAI_AUTH=entra の場合は azure-identity の DefaultAzureCredential を使う"""
+        pytest.importorskip("azure.identity")
+        os.environ["AZURE_OPENAI_AUTH"] = "entra"
+        os.environ["TA_AZURE_TOKEN_REFRESH_MARGIN_SECONDS"] = "600"
+        credential = LocalTokenCredential()
+
+        with patch("azure.identity.DefaultAzureCredential", return_value=credential):
+            provider = get_token_provider()
+
+        assert provider.credential is credential
+        assert provider.scope == "https://cognitiveservices.azure.com/.default"
+        assert provider.refresh_margin_seconds == 600
+
+    def test_invalid_mode(self):
+        """未対応の認証方式はValueError"""
+        os.environ["AZURE_OPENAI_AUTH"] = "password"
+
+        with pytest.raises(ValueError, match="AZURE_OPENAI_AUTH"):
+            get_token_provider()
+
+
+class TestAnalyzeWithTokenProvider:
+    """analyze_ta_pdf_with_azure のトークンによる認証のテスト"""
+
+    @patch('ta_interview_briefing.azure_client.prepare_report_text', return_value="本文")
+    @patch('ta_interview_briefing.azure_client.AzureOpenAI')
+    def test_uses_token_provider_instead_of_api_key(self, mock_azure_client, mock_prepare,
+                                                    sample_analysis_data, sample_pdf_path):
+        """APIキーがなくても、トークンプロバイダーを渡したクライアントで呼び出す"""
+        import json
+        from ta_interview_briefing.azure_client import analyze_ta_pdf_with_azure
+        os.environ["AZURE_OPENAI_ENDPOINT"] = "https://test.openai.azure.com/"
+        os.environ.pop("AZURE_OPENAI_API_KEY", None)
+        os.environ["AZURE_OPENAI_DEPLOYMENT_NAME"] = "gpt-4o"
+        os.environ["AZURE_OPENAI_AUTH"] = "local"
+        os.environ["TA_LLM_CACHE_BACKEND"] = "none"
+        mock_azure_client.return_value.chat.completions.create.return_value.choices = [
+            MagicMock(message=MagicMock(content=json.dumps(sample_analysis_data)))
+        ]
+
+        analyze_ta_pdf_with_azure(sample_pdf_path)
+        analyze_ta_pdf_with_azure(sample_pdf_path)
+
+        mock_azure_client.assert_called_once()
+        kwargs = mock_azure_client.call_args.kwargs
+        assert "api_key" not in kwargs
+        assert kwargs["azure_ad_token_provider"] is get_token_provider()
+        assert kwargs["azure_ad_token_provider"]().startswith("local-development-token")
+
+    def test_missing_api_key_mentions_entra(self, sample_pdf_path):
+        """APIキーもEntra ID認証も設定されていない場合はValueError"""
+        from ta_interview_briefing.azure_client import analyze_ta_pdf_with_azure
+        os.environ["AZURE_OPENAI_ENDPOINT"] = "https://test.openai.azure.com/"
+        os.environ.pop("AZURE_OPENAI_API_KEY", None)
+        os.environ.pop("AZURE_OPENAI_AUTH", None)
+
+        with pytest.raises(ValueError, match="AZURE_OPENAI_AUTH=entra"):
+            analyze_ta_pdf_with_azure(sample_pdf_path)
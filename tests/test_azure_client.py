@@ -6,7 +6,16 @@ import pytest
 import os
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
-from ta_interview_briefing.azure_client import extract_text_from_pdf, analyze_ta_pdf_with_azure
+from ta_interview_briefing.azure_client import (
+    extract_text_from_pdf,
+    analyze_ta_pdf_with_azure,
+    make_completion_cache_key,
+    MemoryCompletionCache,
+    SQLiteCompletionCache,
+    RedisCompletionCache,
+    get_completion_cache,
+    set_completion_cache,
+)
 
 
 class TestExtractTextFromPdf:
@@ -63,6 +72,203 @@ class TestExtractTextFromPdf:
                 os.unlink(tmp_path)
 
 
+    @patch('ta_interview_briefing.azure_client.PdfReader')
+    def test_extract_text_strips_repeated_headers(self, mock_pdf_reader):
+        """全ページに繰り返し現れるヘッダー・フッターが除去されるテスト"""
+        pages = []
+        for page_num in range(1, 4):
+            mock_page = MagicMock()
+            mock_page.extract_text.return_value = f"社外秘レポート\nページ{page_num}の本文\n- {page_num} -"
+            pages.append(mock_page)
+        
+        mock_reader = MagicMock()
+        mock_reader.pages = pages
+        mock_pdf_reader.return_value = mock_reader
+        
+        import tempfile
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+            tmp_path = tmp.name
+        
+        try:
+            result = extract_text_from_pdf(tmp_path)
+            assert result == "ページ1の本文\n\nページ2の本文\n\nページ3の本文"
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+    @patch('ta_interview_briefing.azure_client.PdfReader')
+    def test_extract_text_stops_at_budget(self, mock_pdf_reader):
+        """予算を満たした時点で残りのページは抽出しないテスト"""
+        pages = []
+        for page_num in range(1, 11):
+            mock_page = MagicMock()
+            mock_page.extract_text.return_value = f"ページ{page_num}の本文" + "あ" * 1000
+            pages.append(mock_page)
+        
+        mock_reader = MagicMock()
+        mock_reader.pages = pages
+        mock_pdf_reader.return_value = mock_reader
+        
+        import tempfile
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+            tmp_path = tmp.name
+        
+        try:
+            result = extract_text_from_pdf(tmp_path, max_chars=2500)
+            assert "ページ3の本文" in result
+            assert "ページ4の本文" not in result
+            # 4ページ目以降は抽出処理自体が呼ばれない
+            assert pages[2].extract_text.called
+            assert not pages[3].extract_text.called
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+    
+    @patch('ta_interview_briefing.azure_client.PdfReader')
+    def test_extract_text_budget_uses_measure(self, mock_pdf_reader):
+        """予算の判定にmeasure関数の結果が使われるテスト"""
+        pages = []
+        for page_num in range(1, 4):
+            mock_page = MagicMock()
+            mock_page.extract_text.return_value = f"ページ{page_num}の本文"
+            pages.append(mock_page)
+        
+        mock_reader = MagicMock()
+        mock_reader.pages = pages
+        mock_pdf_reader.return_value = mock_reader
+        
+        import tempfile
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+            tmp_path = tmp.name
+        
+        try:
+            extract_text_from_pdf(tmp_path, max_chars=10, measure=lambda text: 0)
+            # measureが常に0を返すため、全ページが読まれる
+            assert pages[2].extract_text.called
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+    def test_budget_check_does_not_renormalize_every_page(self):
+        """予算の判定のための正規化はページごとには行わず、予算に達する前に打ち切ることもない"""
+        from ta_interview_briefing.azure_client import _collect_pages_within_budget
+        from ta_interview_briefing import text_normalizer
+
+        pages = [f"ページ{page_num}の本文" + "あ" * 100 for page_num in range(1, 501)]
+        # 正規化後に半分の長さになるとみなす
+        measure = lambda text: len(text) // 2
+
+        with patch('ta_interview_briefing.azure_client.normalize_pages',
+                   wraps=text_normalizer.normalize_pages) as mock_normalize:
+            collected = _collect_pages_within_budget(iter(pages), 20000, measure)
+
+        # ページごとに判定した場合に打ち切るページ数
+        exact = next(count for count in range(1, len(pages) + 1)
+                     if measure("\n\n".join(pages[:count])) >= 20000)
+        assert exact <= len(collected) <= exact + 5
+        assert mock_normalize.call_count <= 5
+
+
+    @patch('ta_interview_briefing.azure_client.ocr.ocr_pages')
+    @patch('ta_interview_briefing.azure_client.ocr.is_ocr_available', return_value=True)
+    @patch('ta_interview_briefing.azure_client.PdfReader')
+    def test_extract_text_ocr_fallback(self, mock_pdf_reader, mock_available, mock_ocr_pages):
+        """テキストのないページだけがOCRで補完されるテスト"""
+        texts = ["ページ1のテキスト", "", "", "ページ4のテキスト"]
+        pages = []
+        for text in texts:
+            mock_page = MagicMock()
+            mock_page.extract_text.return_value = text
+            pages.append(mock_page)
+        
+        mock_reader = MagicMock()
+        mock_reader.pages = pages
+        mock_pdf_reader.return_value = mock_reader
+        mock_ocr_pages.side_effect = lambda path, indexes: [f"OCR{index + 1}" for index in indexes]
+        
+        import tempfile
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+            tmp_path = tmp.name
+        
+        try:
+            result = extract_text_from_pdf(tmp_path)
+            assert result == "ページ1のテキスト\n\nOCR2\n\nOCR3\n\nページ4のテキスト"
+            ocr_targets = [call.args[1] for call in mock_ocr_pages.call_args_list]
+            assert sum(ocr_targets, []) == [1, 2]
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+    @patch('ta_interview_briefing.azure_client.PdfReader')
+    def test_extract_text_uses_extraction_cache(self, mock_pdf_reader, tmp_path):
+        """同じPDFの2回目以降の抽出は抽出キャッシュから行われるテスト"""
+        from ta_interview_briefing.extraction_cache import reset_extraction_cache
+        os.environ["TA_EXTRACTION_CACHE_ENABLED"] = "1"
+        os.environ["TA_EXTRACTION_CACHE_PATH"] = str(tmp_path / "cache.sqlite3")
+        reset_extraction_cache()
+        
+        pages = []
+        for page_num in range(1, 5):
+            mock_page = MagicMock()
+            mock_page.extract_text.return_value = f"ページ{page_num}の本文" + "あ" * 1000
+            pages.append(mock_page)
+        mock_reader = MagicMock()
+        mock_reader.pages = pages
+        mock_pdf_reader.return_value = mock_reader
+        
+        pdf_path = tmp_path / "report.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4 dummy")
+        
+        # 予算付きの抽出では2ページ目までがキャッシュされる
+        extract_text_from_pdf(str(pdf_path), max_chars=1500)
+        assert not pages[2].extract_text.called
+        
+        # 同じ予算なら再解析しない
+        mock_pdf_reader.reset_mock()
+        extract_text_from_pdf(str(pdf_path), max_chars=1500)
+        assert not mock_pdf_reader.called
+        
+        # 全ページが必要な場合は、キャッシュ済みの続きのページだけを抽出する
+        result = extract_text_from_pdf(str(pdf_path))
+        assert "ページ4の本文" in result
+        assert pages[0].extract_text.call_count == 1
+        assert pages[3].extract_text.call_count == 1
+        
+        # 全ページがキャッシュされた後はPDFを開かない
+        mock_pdf_reader.reset_mock()
+        assert extract_text_from_pdf(str(pdf_path)) == result
+        assert not mock_pdf_reader.called
+
+    @patch('ta_interview_briefing.azure_client.PdfReader')
+    def test_extract_text_survives_extraction_cache_errors(self, mock_pdf_reader, tmp_path, capsys):
+        """抽出キャッシュの読み書きに失敗しても、警告を出してキャッシュなしで抽出を続けるテスト"""
+        mock_page = MagicMock()
+        mock_page.extract_text.return_value = "ページ1の本文"
+        mock_pdf_reader.return_value = MagicMock(pages=[mock_page])
+        pdf_path = tmp_path / "report.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4 dummy")
+        
+        broken_cache = MagicMock()
+        broken_cache.get.side_effect = OSError("disk I/O error")
+        with patch('ta_interview_briefing.azure_client.get_extraction_cache', return_value=broken_cache):
+            assert extract_text_from_pdf(str(pdf_path)) == "ページ1の本文"
+        assert "抽出キャッシュの読み込みに失敗しました" in capsys.readouterr().out
+        
+        broken_cache = MagicMock()
+        broken_cache.get.return_value = None
+        broken_cache.put.side_effect = OSError("database is locked")
+        with patch('ta_interview_briefing.azure_client.get_extraction_cache', return_value=broken_cache):
+            assert extract_text_from_pdf(str(pdf_path)) == "ページ1の本文"
+        assert "抽出キャッシュの書き込みに失敗しました" in capsys.readouterr().out
+        
+        with patch('ta_interview_briefing.azure_client.get_extraction_cache',
+                   side_effect=OSError("unable to open database file")):
+            assert extract_text_from_pdf(str(pdf_path)) == "ページ1の本文"
+
+
 class TestAnalyzeTaPdfWithAzure:
     """Azure OpenAIによるPDF解析のテスト"""
     
@@ -266,3 +472,159 @@ class TestAnalyzeTaPdfWithAzure:
             os.environ.pop("AZURE_OPENAI_API_KEY", None)
             os.environ.pop("AZURE_OPENAI_DEPLOYMENT_NAME", None)
 
+    
+    @patch('ta_interview_briefing.azure_client.extract_text_from_pdf')
+    @patch('ta_interview_briefing.azure_client.AzureOpenAI')
+    def test_analyze_pdf_compacts_ta_report(self, mock_azure_client, mock_extract_text):
+        """TAレポートのテキストが圧縮されてからプロンプトに埋め込まれるテスト"""
+        os.environ["AZURE_OPENAI_ENDPOINT"] = "https://test.openai.azure.com/"
+        os.environ["AZURE_OPENAI_API_KEY"] = "test-key"
+        os.environ["AZURE_OPENAI_DEPLOYMENT_NAME"] = "gpt-4o"
+        
+        mock_extract_text.return_value = (
+            "Talent Analytics 受検結果レポート\n"
+            "ヴァイタリティ 7\n人あたり 8\nチームワーク 6\n"
+            "【総合所見】\n行動力があります。\n- 1 -"
+        )
+        
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = '{"summary": "テスト", "risk_points": ["リスク1"], "attract_points": ["強み1"], "notes_for_interviewer": ["メモ1"]}'
+        
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = mock_response
+        mock_azure_client.return_value = mock_client
+        
+        import tempfile
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+            tmp_path = tmp.name
+        
+        try:
+            analyze_ta_pdf_with_azure(tmp_path)
+            call_args = mock_client.chat.completions.create.call_args
+            user_message = call_args[1]["messages"][1]["content"]
+            assert "■概要\nヴァイタリティ: 7" in user_message
+            assert "Talent Analytics 受検結果レポート" not in user_message
+            assert "- 1 -" not in user_message
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            os.environ.pop("AZURE_OPENAI_ENDPOINT", None)
+            os.environ.pop("AZURE_OPENAI_API_KEY", None)
+            os.environ.pop("AZURE_OPENAI_DEPLOYMENT_NAME", None)
+
+
+def _api_params(user_text, temperature=0.3):
+    """キャッシュキー生成用のリクエストパラメータ"""
+    return {
+        "model": "gpt-4o",
+        "messages": [
+            {"role": "system", "content": "システムプロンプト"},
+            {"role": "user", "content": user_text},
+        ],
+        "temperature": temperature,
+        "max_tokens": 2000,
+    }
+
+
+class TestCompletionCache:
+    """LLMレスポンスキャッシュのテスト"""
+    
+    def test_cache_key_ignores_whitespace_differences(self):
+        """空白・改行・全角半角の違いは同じキーになる"""
+        key1 = make_completion_cache_key(_api_params("レポート本文\n\nスコア 7"))
+        key2 = make_completion_cache_key(_api_params("レポート本文 スコア　７"))
+        
+        assert key1 == key2
+    
+    def test_cache_key_depends_on_parameters(self):
+        """本文やtemperatureが異なれば別のキーになる"""
+        base = make_completion_cache_key(_api_params("本文A"))
+        
+        assert base != make_completion_cache_key(_api_params("本文B"))
+        assert base != make_completion_cache_key(_api_params("本文A", temperature=0.7))
+    
+    def test_memory_cache_lru_eviction(self):
+        """件数上限を超えると最も古いエントリが削除される"""
+        cache = MemoryCompletionCache(max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")  # aを最近使用したことにする
+        cache.set("c", "3")
+        
+        assert cache.get("a") == "1"
+        assert cache.get("b") is None
+        assert cache.get("c") == "3"
+    
+    def test_memory_cache_ttl(self):
+        """TTLを過ぎたエントリは返さない"""
+        cache = MemoryCompletionCache(ttl_seconds=10)
+        with patch('ta_interview_briefing.azure_client.time.time', return_value=1000.0):
+            cache.set("a", "1")
+        with patch('ta_interview_briefing.azure_client.time.time', return_value=1005.0):
+            assert cache.get("a") == "1"
+        with patch('ta_interview_briefing.azure_client.time.time', return_value=1011.0):
+            assert cache.get("a") is None
+    
+    def test_sqlite_cache_persists_and_evicts(self, tmp_path):
+        """SQLiteキャッシュはインスタンスをまたいで保持され、件数上限で削除される"""
+        path = str(tmp_path / "cache.sqlite3")
+        cache = SQLiteCompletionCache(path=path, max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.set("c", "3")
+        
+        reopened = SQLiteCompletionCache(path=path, max_entries=2)
+        assert reopened.get("c") == "3"
+        assert reopened.get("a") is None
+        
+        reopened.clear()
+        assert reopened.get("c") is None
+    
+    def test_redis_cache_requires_package(self):
+        """redisパッケージがない場合はエラーになる"""
+        with patch.dict('sys.modules', {"redis": None}):
+            with pytest.raises(ValueError, match="redis"):
+                RedisCompletionCache()
+    
+    def test_backend_from_env(self, tmp_path):
+        """環境変数でバックエンドを選択できる"""
+        os.environ["TA_LLM_CACHE_BACKEND"] = "sqlite"
+        os.environ["TA_LLM_CACHE_PATH"] = str(tmp_path / "cache.sqlite3")
+        assert isinstance(get_completion_cache(), SQLiteCompletionCache)
+        
+        os.environ["TA_LLM_CACHE_BACKEND"] = "none"
+        set_completion_cache(None)
+        assert get_completion_cache() is None
+    
+    @patch('ta_interview_briefing.azure_client.extract_text_from_pdf')
+    @patch('ta_interview_briefing.azure_client.AzureOpenAI')
+    def test_analyze_uses_cache_for_same_text(self, mock_azure_client, mock_extract_text):
+        """同じテキストのPDFを2回解析してもAzure OpenAIは1回しか呼ばれない"""
+        os.environ["AZURE_OPENAI_ENDPOINT"] = "https://test.openai.azure.com/"
+        os.environ["AZURE_OPENAI_API_KEY"] = "test-key"
+        os.environ["AZURE_OPENAI_DEPLOYMENT_NAME"] = "gpt-4o"
+        
+        mock_extract_text.return_value = "サンプルPDFテキスト"
+        
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = '{"summary": "テスト", "risk_points": ["リスク1"], "attract_points": ["強み1"], "notes_for_interviewer": ["メモ1"]}'
+        
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = mock_response
+        mock_azure_client.return_value = mock_client
+        
+        import tempfile
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+            tmp_path = tmp.name
+        
+        try:
+            first = analyze_ta_pdf_with_azure(tmp_path)
+            second = analyze_ta_pdf_with_azure(tmp_path)
+            
+            assert first == second
+            assert mock_client.chat.completions.create.call_count == 1
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
@@ -0,0 +1,345 @@
+"""
+バッチ処理（batch.py）のテスト
+"""
+
+import json
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+from ta_interview_briefing.batch import (
+    run_batch,
+    run_bulk,
+    find_input_pdfs,
+    briefing_output_path,
+    DEFAULT_MANIFEST_NAME,
+)
+
+
+ANALYSIS = {
+    "summary": "テスト",
+    "risk_points": ["リスク1"],
+    "attract_points": ["強み1"],
+    "notes_for_interviewer": ["メモ1"]
+}
+
+
+def _write_pdf(directory, name):
+    """ダミーのPDFファイルを作成する"""
+    path = directory / name
+    path.write_bytes(b"%PDF-1.4\n")
+    return path
+
+
+def _fake_generate(output_path, candidate_name, analysis):
+    """PDF生成の代わりに空のファイルを作成する"""
+    Path(output_path).write_bytes(b"%PDF-1.4\n")
+
+
+@pytest.fixture
+def mock_pipeline():
+    """解析とPDF生成をモックする"""
+    with patch('ta_interview_briefing.batch.analyze_ta_pdf_with_azure', return_value=ANALYSIS) as mock_analyze, \
+         patch('ta_interview_briefing.batch.generate_interview_pdf_from_azure', side_effect=_fake_generate) as mock_generate:
+        yield mock_analyze, mock_generate
+
+
+class TestFindInputPdfs:
+    """入力PDFの列挙のテスト"""
+
+    def test_excludes_briefings_and_other_files(self, tmp_path):
+        """生成済みのブリーフィングPDFとPDF以外のファイルは除外される"""
+        _write_pdf(tmp_path, "b.pdf")
+        _write_pdf(tmp_path, "a.PDF")
+        _write_pdf(tmp_path, "a_interview_briefing.pdf")
+        (tmp_path / "memo.txt").write_text("memo")
+
+        assert [path.name for path in find_input_pdfs(tmp_path)] == ["a.PDF", "b.pdf"]
+
+
+class TestRunBatch:
+    """run_batchのテスト"""
+
+    def test_processes_all_files(self, tmp_path, mock_pipeline):
+        """すべてのPDFが処理され、マニフェストに記録される"""
+        mock_analyze, mock_generate = mock_pipeline
+        for index in range(5):
+            _write_pdf(tmp_path, f"candidate_{index}.pdf")
+
+        counts = run_batch(str(tmp_path), concurrency=3)
+
+        assert counts == {"done": 5, "failed": 0, "skipped": 0}
+        assert mock_analyze.call_count == 5
+        assert briefing_output_path(tmp_path / "candidate_0.pdf").exists()
+        # 候補者名にはファイル名が使われる
+        assert {call.args[1] for call in mock_generate.call_args_list} == {f"candidate_{index}" for index in range(5)}
+
+        manifest = json.loads((tmp_path / DEFAULT_MANIFEST_NAME).read_text(encoding="utf-8"))
+        assert manifest["files"]["candidate_3.pdf"]["status"] == "done"
+
+    def test_skips_existing_briefings(self, tmp_path, mock_pipeline):
+        """ブリーフィングPDFが生成済みのファイルはスキップされる"""
+        mock_analyze, _ = mock_pipeline
+        _write_pdf(tmp_path, "a.pdf")
+        _write_pdf(tmp_path, "b.pdf")
+        _write_pdf(tmp_path, "a_interview_briefing.pdf")
+
+        counts = run_batch(str(tmp_path))
+
+        assert counts == {"done": 1, "failed": 0, "skipped": 1}
+        assert mock_analyze.call_args[0][0].endswith("b.pdf")
+
+    def test_resume_after_failure(self, tmp_path, mock_pipeline):
+        """中断・失敗した実行を再開すると、失敗したファイルだけが再処理される"""
+        mock_analyze, _ = mock_pipeline
+        _write_pdf(tmp_path, "ok.pdf")
+        _write_pdf(tmp_path, "ng.pdf")
+
+        def analyze(path, priority=None):
+            if path.endswith("ng.pdf"):
+                raise Exception("解析エラー")
+            return ANALYSIS
+        mock_analyze.side_effect = analyze
+
+        first = run_batch(str(tmp_path))
+        assert first == {"done": 1, "failed": 1, "skipped": 0}
+
+        # 完了済みのブリーフィングを消しても、マニフェストで完了済みならスキップされる
+        briefing_output_path(tmp_path / "ok.pdf").unlink()
+        mock_analyze.side_effect = None
+        mock_analyze.return_value = ANALYSIS
+        mock_analyze.reset_mock()
+
+        second = run_batch(str(tmp_path))
+        assert second == {"done": 1, "failed": 0, "skipped": 1}
+        assert mock_analyze.call_count == 1
+        assert mock_analyze.call_args[0][0].endswith("ng.pdf")
+
+    def test_force_reprocesses(self, tmp_path, mock_pipeline):
+        """forceを指定すると生成済みのファイルも処理し直す"""
+        _write_pdf(tmp_path, "a.pdf")
+        _write_pdf(tmp_path, "a_interview_briefing.pdf")
+
+        counts = run_batch(str(tmp_path), force=True)
+
+        assert counts == {"done": 1, "failed": 0, "skipped": 0}
+
+    def test_custom_manifest_path(self, tmp_path, mock_pipeline):
+        """マニフェストのパスを指定できる"""
+        _write_pdf(tmp_path, "a.pdf")
+        manifest_path = tmp_path / "state" / "manifest.json"
+        manifest_path.parent.mkdir()
+
+        run_batch(str(tmp_path), manifest_path=str(manifest_path))
+
+        assert manifest_path.exists()
+        assert not (tmp_path / DEFAULT_MANIFEST_NAME).exists()
+
+    def test_directory_not_found(self, tmp_path):
+        """存在しないディレクトリの場合はエラー"""
+        with pytest.raises(FileNotFoundError):
+            run_batch(str(tmp_path / "missing"))
+
+
+class TestRunBulk:
+    """run_bulk（マニフェストによる一括処理）のテスト"""
+
+    @pytest.fixture
+    def mock_bulk_pipeline(self):
+        """解析とPDF生成をモックする（トークン使用量も書き込む）"""
+        def analyze(pdf_path, usage=None, priority=None):
+            if usage is not None:
+                usage.update({"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150, "cached": False})
+            if pdf_path.endswith("broken.pdf"):
+                raise ValueError("解析エラー")
+            return ANALYSIS
+
+        with patch('ta_interview_briefing.batch.analyze_ta_pdf_with_azure', side_effect=analyze) as mock_analyze, \
+             patch('ta_interview_briefing.batch.generate_interview_pdf_from_azure', side_effect=_fake_generate) as mock_generate:
+            yield mock_analyze, mock_generate
+
+    def test_csv_manifest(self, tmp_path, mock_bulk_pipeline):
+        """CSVマニフェストの各行が処理され、1行ずつJSONLで出力される"""
+        import io
+        _, mock_generate = mock_bulk_pipeline
+        for name in ("a.pdf", "b.pdf", "broken.pdf"):
+            _write_pdf(tmp_path, name)
+        manifest = tmp_path / "manifest.csv"
+        manifest.write_text(
+            "candidate_id,name,pdf_path\n"
+            "C001,山田 太郎,a.pdf\n"
+            "C002,佐藤 花子,b.pdf\n"
+            "C003,鈴木 一郎,broken.pdf\n"
+            "C004,田中 次郎,missing.pdf\n",
+            encoding="utf-8"
+        )
+        output = io.StringIO()
+
+        counts = run_bulk(str(manifest), output, concurrency=2, output_dir=str(tmp_path / "out"))
+
+        assert counts == {"ok": 2, "error": 2}
+        assert mock_bulk_pipeline[0].call_args.kwargs["priority"] == "bulk"
+        results = {line["candidate_id"]: line for line in map(json.loads, output.getvalue().splitlines())}
+        assert len(results) == 4
+
+        ok = results["C001"]
+        assert ok["status"] == "ok"
+        assert ok["analysis"] == ANALYSIS
+        assert ok["output_path"] == str(tmp_path / "out" / "C001_interview_briefing.pdf")
+        assert ok["usage"]["total_tokens"] == 150
+        assert set(ok["timings"]) == {"analyze_seconds", "render_seconds", "total_seconds"}
+        assert Path(ok["output_path"]).exists()
+
+        assert results["C003"]["status"] == "error"
+        assert "解析エラー" in results["C003"]["error"]
+        assert "ファイルが見つかりません" in results["C004"]["error"]
+
+        # 候補者名はマニフェストの値が使われる
+        assert "山田 太郎" in {call.args[1] for call in mock_generate.call_args_list}
+
+    def test_jsonl_manifest(self, tmp_path, mock_bulk_pipeline):
+        """JSONLマニフェストにも対応する"""
+        import io
+        pdf_path = _write_pdf(tmp_path, "a.pdf")
+        manifest = tmp_path / "manifest.jsonl"
+        manifest.write_text(
+            json.dumps({"candidate_id": "C001", "candidate_name": "山田", "pdf_path": str(pdf_path)}) + "\n\n",
+            encoding="utf-8"
+        )
+        output = io.StringIO()
+
+        counts = run_bulk(str(manifest), output)
+
+        assert counts == {"ok": 1, "error": 0}
+        assert json.loads(output.getvalue())["output_path"] == str(tmp_path / "C001_interview_briefing.pdf")
+
+    def test_malformed_jsonl_line(self, tmp_path, mock_bulk_pipeline):
+        """解析できない行はその行だけをエラーとして記録し、他の行は処理を続ける"""
+        import io
+        _write_pdf(tmp_path, "a.pdf")
+        _write_pdf(tmp_path, "b.pdf")
+        manifest = tmp_path / "manifest.jsonl"
+        manifest.write_text(
+            json.dumps({"candidate_id": "C001", "pdf_path": "a.pdf"}) + "\n"
+            + "{not json\n"
+            + "[1, 2]\n"
+            + json.dumps({"candidate_id": "C002", "pdf_path": "b.pdf"}) + "\n",
+            encoding="utf-8"
+        )
+        output = io.StringIO()
+
+        counts = run_bulk(str(manifest), output)
+
+        assert counts == {"ok": 2, "error": 2}
+        results = sorted(map(json.loads, output.getvalue().splitlines()), key=lambda line: line["row"])
+        assert [line["status"] for line in results] == ["ok", "error", "error", "ok"]
+        assert "マニフェストの行を解析できません" in results[1]["error"]
+
+    def test_results_written_when_reading_fails(self, tmp_path, mock_bulk_pipeline):
+        """マニフェストの読み込みが途中で失敗しても、処理を開始した行の結果は書き出す"""
+        import io
+        pdf_path = _write_pdf(tmp_path, "a.pdf")
+
+        def rows(manifest_path):
+            yield {"candidate_id": "C001", "candidate_name": "", "pdf_path": str(pdf_path)}
+            raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+
+        output = io.StringIO()
+        with patch('ta_interview_briefing.batch.iter_bulk_rows', side_effect=rows):
+            with pytest.raises(UnicodeDecodeError):
+                run_bulk(str(pdf_path), output)
+
+        assert json.loads(output.getvalue())["status"] == "ok"
+
+    def test_candidate_id_cannot_escape_output_dir(self, tmp_path, mock_bulk_pipeline):
+        """候補者IDのパス区切りは除き、出力先ディレクトリの外には書き出さない"""
+        import io
+        _write_pdf(tmp_path, "a.pdf")
+        manifest = tmp_path / "manifest.jsonl"
+        manifest.write_text(
+            json.dumps({"candidate_id": "../../x", "pdf_path": "a.pdf"}) + "\n"
+            + json.dumps({"candidate_id": "..", "pdf_path": "a.pdf"}) + "\n",
+            encoding="utf-8"
+        )
+        out_dir = tmp_path / "nested" / "out"
+        output = io.StringIO()
+
+        counts = run_bulk(str(manifest), output, output_dir=str(out_dir))
+
+        assert counts == {"ok": 2, "error": 0}
+        paths = {Path(line["output_path"]) for line in map(json.loads, output.getvalue().splitlines())}
+        assert paths == {out_dir / "x_interview_briefing.pdf", out_dir / "a_interview_briefing.pdf"}
+        assert not (tmp_path / "x_interview_briefing.pdf").exists()
+
+    def test_duplicate_candidate_id_is_error(self, tmp_path, mock_bulk_pipeline):
+        """候補者IDが重複する行は同じファイルに書き出さず、後の行をエラーにする"""
+        import io
+        mock_analyze, mock_generate = mock_bulk_pipeline
+        _write_pdf(tmp_path, "a.pdf")
+        _write_pdf(tmp_path, "b.pdf")
+        manifest = tmp_path / "manifest.csv"
+        manifest.write_text(
+            "candidate_id,name,pdf_path\n"
+            "C001,山田 太郎,a.pdf\n"
+            "C001,山田 太郎（再受検）,b.pdf\n",
+            encoding="utf-8"
+        )
+        output = io.StringIO()
+
+        counts = run_bulk(str(manifest), output, concurrency=2, output_dir=str(tmp_path / "out"))
+
+        assert counts == {"ok": 1, "error": 1}
+        results = sorted(map(json.loads, output.getvalue().splitlines()), key=lambda line: line["row"])
+        assert results[0]["status"] == "ok"
+        assert "1行目と重複しています" in results[1]["error"]
+        assert mock_analyze.call_count == 1
+        assert mock_generate.call_count == 1
+
+    def test_symlink_outside_output_dir_is_error(self, tmp_path, mock_bulk_pipeline):
+        """出力先がシンボリックリンクで出力先ディレクトリの外を指す場合は、その行をエラーにする"""
+        import io
+        _write_pdf(tmp_path, "a.pdf")
+        out_dir = tmp_path / "out"
+        out_dir.mkdir()
+        (out_dir / "C001_interview_briefing.pdf").symlink_to(tmp_path / "outside.pdf")
+        manifest = tmp_path / "manifest.jsonl"
+        manifest.write_text(json.dumps({"candidate_id": "C001", "pdf_path": "a.pdf"}) + "\n", encoding="utf-8")
+        output = io.StringIO()
+
+        counts = run_bulk(str(manifest), output, output_dir=str(out_dir))
+
+        assert counts == {"ok": 0, "error": 1}
+        assert "出力先ディレクトリの外" in json.loads(output.getvalue())["error"]
+        assert not (tmp_path / "outside.pdf").exists()
+
+    def test_bounded_prefetch(self, tmp_path, mock_bulk_pipeline):
+        """読み込み済みで結果が未出力の行数は、ワーカー数に比例した上限を超えない"""
+        import io
+        from ta_interview_briefing import batch
+        _write_pdf(tmp_path, "a.pdf")
+        manifest = tmp_path / "manifest.jsonl"
+        manifest.write_text(
+            "".join(json.dumps({"candidate_id": f"C{index}", "pdf_path": "a.pdf"}) + "\n" for index in range(50)),
+            encoding="utf-8"
+        )
+
+        output = io.StringIO()
+        in_flight = []
+        original_iter = batch.iter_bulk_rows
+
+        def tracking_iter(path):
+            for read_count, row in enumerate(original_iter(path), start=1):
+                in_flight.append(read_count - len(output.getvalue().splitlines()))
+                yield row
+
+        with patch('ta_interview_briefing.batch.iter_bulk_rows', side_effect=tracking_iter):
+            run_bulk(str(manifest), output, concurrency=2)
+
+        assert len(output.getvalue().splitlines()) == 50
+        # 先読み上限 + 空きを待っている読み込み直後の1行
+        assert max(in_flight) <= 2 * batch.BULK_PREFETCH_PER_WORKER + 1
+
+    def test_manifest_not_found(self, tmp_path):
+        """存在しないマニフェストの場合はエラー"""
+        import io
+        with pytest.raises(FileNotFoundError):
+            run_bulk(str(tmp_path / "missing.csv"), io.StringIO())
@@ -0,0 +1,58 @@
+"""
+ベンチマーク（benchmarks/run.py）の集計・比較のテスト
+"""
+
+import pytest
+from benchmarks.run import percentile, measure, compare_results
+
+
+def _report(**results):
+    return {"meta": {}, "results": results}
+
+
+class TestMeasure:
+    """計測と集計のテスト"""
+
+    def test_percentile_nearest_rank(self):
+        """最近順位法でパーセンタイルを求める"""
+        samples = [float(value) for value in range(1, 101)]
+
+        assert percentile(samples, 50) == 50.0
+        assert percentile(samples, 95) == 95.0
+        assert percentile(samples, 99) == 99.0
+        assert percentile([3.0], 99) == 3.0
+        assert percentile([], 50) == 0.0
+
+    def test_measure_counts_iterations(self):
+        """ウォームアップを除いた回数を計測する"""
+        calls = []
+
+        result = measure(lambda: calls.append(1), iterations=5, warmup=2, concurrency=2)
+
+        assert len(calls) == 7
+        assert result["iterations"] == 5
+        assert result["ops_per_sec"] > 0
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+
+
+class TestCompareResults:
+    """ベースラインとの比較のテスト"""
+
+    def test_flags_regressions_beyond_threshold(self):
+        """p50の増加・スループットの低下がしきい値を超えたら悪化とみなす"""
+        baseline = _report(
+            extract={"p50_ms": 10.0, "ops_per_sec": 100.0},
+            render={"p50_ms": 10.0, "ops_per_sec": 100.0},
+        )
+        current = _report(
+            extract={"p50_ms": 11.0, "ops_per_sec": 90.0},
+            render={"p50_ms": 15.0, "ops_per_sec": 60.0},
+            new_benchmark={"p50_ms": 1.0, "ops_per_sec": 1.0},
+        )
+
+        regressions = compare_results(current, baseline, threshold=0.2)
+
+        assert [(item["name"], item["metric"]) for item in regressions] == [
+            ("render", "p50_ms"), ("render", "ops_per_sec")
+        ]
+        assert regressions[0]["change"] == pytest.approx(0.5)
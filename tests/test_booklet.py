@@ -0,0 +1,106 @@
+"""
+ブックレットPDF（ta_interview_briefing/booklet.py）のテスト
+"""
+
+import io
+import warnings
+
+import pytest
+from PyPDF2 import PdfReader
+from reportlab.platypus import Spacer
+
+from ta_interview_briefing.booklet import BookletEntry, _Bookmark, _FlowableFeed, render_booklet
+from ta_interview_briefing.pdf_builder import render_interview_pdf
+
+
+def _read(data):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return PdfReader(io.BytesIO(data))
+
+
+class TestRenderBooklet:
+    """render_booklet関数のテスト"""
+
+    def test_pages_bookmarks_and_toc(self, sample_analysis_data):
+        """候補者ごとに改ページし、しおりと末尾の目次を付ける"""
+        long_analysis = {**sample_analysis_data, "risk_points": ["長いリスクポイント。" * 10] * 12}
+        candidates = [("山田太郎", sample_analysis_data), ("佐藤花子", long_analysis), ("鈴木一郎", sample_analysis_data)]
+        output = io.BytesIO()
+
+        entries = render_booklet(iter(candidates), output)
+
+        # 2人目は2ページにわたるため、3人目は4ページ目から始まる
+        assert entries == [BookletEntry("山田太郎", 1), BookletEntry("佐藤花子", 2), BookletEntry("鈴木一郎", 4)]
+        reader = _read(output.getvalue())
+        assert len(reader.pages) == 5
+        assert [item.title for item in reader.outline] == ["山田太郎", "佐藤花子", "鈴木一郎", "目次"]
+
+    def test_fonts_are_shared(self, sample_analysis_data):
+        """日本語フォントは候補者数によらず、1人分のPDFと同じく1回だけ定義される"""
+        output = io.BytesIO()
+
+        render_booklet(((f"候補者{i}", sample_analysis_data) for i in range(5)), output)
+
+        single = render_interview_pdf("候補者", sample_analysis_data)
+        assert output.getvalue().count(b"/BaseFont /HeiseiKakuGo-W5") == single.count(b"/BaseFont /HeiseiKakuGo-W5")
+
+    def test_candidates_are_consumed_lazily(self, sample_analysis_data, monkeypatch):
+        """次の候補者は、前の候補者を配置し終えてから読み込む"""
+        drawn = []
+        original_draw = _Bookmark.draw
+
+        def draw(self):
+            drawn.append(self.title)
+            original_draw(self)
+
+        monkeypatch.setattr(_Bookmark, "draw", draw)
+        drawn_when_pulled = []
+
+        def candidates():
+            for i in range(4):
+                drawn_when_pulled.append(len(drawn))
+                yield f"候補者{i}", sample_analysis_data
+
+        render_booklet(candidates(), io.BytesIO())
+
+        assert drawn_when_pulled == [0, 1, 2, 3]
+
+    def test_empty(self):
+        """候補者がいない場合は目次のみのPDFになる"""
+        output = io.BytesIO()
+
+        assert render_booklet(iter([]), output) == []
+        assert len(_read(output.getvalue()).pages) == 1
+
+
+class TestFlowableFeed:
+    """_FlowableFeedのテスト"""
+
+    def test_refills_only_when_empty(self):
+        """空になったときだけ次のチャンクを読み込む"""
+        pulled = []
+
+        def chunks():
+            for i in range(3):
+                pulled.append(i)
+                yield [Spacer(1, i), Spacer(1, i)]
+
+        feed = _FlowableFeed(chunks())
+
+        assert len(feed) == 2
+        assert pulled == [0]
+        del feed[0]
+        assert len(feed) == 1
+        assert pulled == [0]
+        del feed[0]
+        assert len(feed) == 2
+        assert pulled == [0, 1]
+
+    def test_skips_empty_chunks(self):
+        """空のチャンクは読み飛ばし、すべて読み終えたら0を返す"""
+        feed = _FlowableFeed(iter([[], [Spacer(1, 1)], []]))
+
+        assert len(feed) == 1
+        del feed[0]
+        assert len(feed) == 0
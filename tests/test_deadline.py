@@ -0,0 +1,270 @@
+"""
+リクエストの期限とキャンセル（ta_interview_briefing/deadline.py）のテスト
+"""
+
+import os
+import time
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ta_interview_briefing.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    RequestCancelled,
+    deadline_from_header,
+    run_with_deadline,
+)
+
+
+class TestDeadline:
+    """Deadlineのテスト"""
+
+    def test_no_timeout(self):
+        """期限がない場合はキャンセルされるまで打ち切らない"""
+        deadline = Deadline()
+
+        assert deadline.remaining() is None
+        deadline.check()
+        deadline.cancel()
+        with pytest.raises(RequestCancelled, match="クライアントが切断しました"):
+            deadline.check("レンダリング")
+
+    def test_expired(self):
+        """期限を過ぎた場合はDeadlineExceeded"""
+        deadline = Deadline(0.01)
+        assert 0 < deadline.remaining() <= 0.01
+
+        time.sleep(0.02)
+
+        assert deadline.remaining() == 0
+        with pytest.raises(DeadlineExceeded, match="Azure OpenAIの呼び出し"):
+            deadline.check("Azure OpenAIの呼び出し")
+
+
+class TestDeadlineFromHeader:
+    """deadline_from_header関数のテスト"""
+
+    def test_default_from_env(self):
+        """ヘッダーがない場合は TA_REQUEST_TIMEOUT_SECONDS"""
+        os.environ["TA_REQUEST_TIMEOUT_SECONDS"] = "30"
+
+        assert deadline_from_header(None).timeout_seconds == 30
+
+    def test_header_only_shortens(self):
+        """ヘッダーは設定より短い場合だけ有効"""
+        os.environ["TA_REQUEST_TIMEOUT_SECONDS"] = "30"
+
+        assert deadline_from_header("5").timeout_seconds == 5
+        assert deadline_from_header("60").timeout_seconds == 30
+
+    def test_disabled_by_env(self):
+        """設定が0の場合は無期限（ヘッダーの期限は有効）"""
+        os.environ["TA_REQUEST_TIMEOUT_SECONDS"] = "0"
+
+        assert deadline_from_header(None).timeout_seconds is None
+        assert deadline_from_header("10").timeout_seconds == 10
+
+    @pytest.mark.parametrize("value", ["abc", "0", "-1"])
+    def test_invalid_header(self, value):
+        """正の秒数でない場合はValueError"""
+        with pytest.raises(ValueError):
+            deadline_from_header(value)
+
+
+class TestRunWithDeadline:
+    """run_with_deadline関数のテスト"""
+
+    def test_returns_result(self):
+        """完了した処理の結果を返す"""
+        assert asyncio.run(run_with_deadline(Deadline(1), lambda: "done")) == "done"
+
+    def test_stops_waiting_on_disconnect(self):
+        """クライアントが切断した時点で待つのをやめ、処理中のスレッドにキャンセルを伝える"""
+        deadline = Deadline(10)
+        release = threading.Event()
+        seen_cancel = []
+
+        def work():
+            release.wait(5)
+            seen_cancel.append(deadline.cancelled)
+
+        async def is_disconnected():
+            return True
+
+        async def wait():
+            # asyncio.run はデフォルトのスレッドプールの終了を待つため、経過時間はループ内で計る
+            started = time.perf_counter()
+            try:
+                await run_with_deadline(deadline, work, is_disconnected=is_disconnected, poll_interval=0.01)
+            finally:
+                elapsed.append(time.perf_counter() - started)
+                release.set()
+
+        elapsed = []
+        with pytest.raises(RequestCancelled):
+            asyncio.run(wait())
+
+        assert elapsed[0] < 1
+        assert deadline.cancelled
+        time.sleep(0.05)
+        assert seen_cancel == [True]
+
+    def test_stops_waiting_at_deadline(self):
+        """期限を過ぎた時点で待つのをやめる"""
+        release = threading.Event()
+
+        async def wait():
+            try:
+                await run_with_deadline(Deadline(0.05), lambda: release.wait(5))
+            finally:
+                release.set()
+
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(wait())
+
+    def test_on_abandon_runs_after_work_finishes(self):
+        """待つのをやめた処理の後片付けは、処理が終わってから行う"""
+        release = threading.Event()
+        events = []
+
+        def work():
+            release.wait(5)
+            events.append("work")
+
+        async def wait():
+            with pytest.raises(DeadlineExceeded):
+                await run_with_deadline(Deadline(0.05), work, on_abandon=lambda: events.append("cleanup"))
+            assert events == []
+            release.set()
+            for _ in range(100):
+                if events == ["work", "cleanup"]:
+                    break
+                await asyncio.sleep(0.01)
+
+        asyncio.run(wait())
+        assert events == ["work", "cleanup"]
+
+    def test_does_not_start_after_cancel(self):
+        """キャンセル済みの場合は処理を開始しない"""
+        deadline = Deadline()
+        deadline.cancel()
+        work = MagicMock()
+
+        with pytest.raises(RequestCancelled):
+            asyncio.run(run_with_deadline(deadline, work))
+        work.assert_not_called()
+
+    def test_uses_submit(self):
+        """submit を指定した場合はそのスレッドプールで実行する"""
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="custom") as executor:
+            name = asyncio.run(run_with_deadline(
+                Deadline(1), lambda: threading.current_thread().name, submit=executor.submit
+            ))
+
+        assert name.startswith("custom")
+
+
+class TestDeadlinePropagation:
+    """抽出とAzure OpenAIの呼び出しへの期限の引き継ぎのテスト"""
+
+    @patch('ta_interview_briefing.azure_client.PdfReader')
+    def test_extraction_stops_when_cancelled(self, mock_pdf_reader, tmp_path):
+        """キャンセルされた時点で残りのページを読まず、読み込み済みのページは抽出キャッシュに保存する"""
+        from ta_interview_briefing.azure_client import _extraction_cache_key, extract_text_from_pdf
+        from ta_interview_briefing.extraction_cache import file_sha256, get_extraction_cache, reset_extraction_cache
+        os.environ["TA_EXTRACTION_CACHE_ENABLED"] = "1"
+        os.environ["TA_EXTRACTION_CACHE_PATH"] = str(tmp_path / "cache.sqlite3")
+        reset_extraction_cache()
+        deadline = Deadline()
+        pages = [MagicMock() for _ in range(4)]
+        for index, page in enumerate(pages):
+            page.extract_text.return_value = f"ページ{index + 1}"
+        # 2ページ目を読んだ後にクライアントが切断する
+        pages[1].extract_text.side_effect = lambda: deadline.cancel() or "ページ2"
+        mock_pdf_reader.return_value = MagicMock(pages=pages)
+        pdf_path = tmp_path / "report.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4 dummy")
+
+        with pytest.raises(RequestCancelled):
+            extract_text_from_pdf(str(pdf_path), deadline=deadline)
+
+        assert not pages[2].extract_text.called
+        cached = get_extraction_cache().get(file_sha256(str(pdf_path)), *_extraction_cache_key())
+        assert cached == (["ページ1", "ページ2"], False)
+        reset_extraction_cache()
+
+    def _set_env(self):
+        os.environ["AZURE_OPENAI_ENDPOINT"] = "https://test.openai.azure.com/"
+        os.environ["AZURE_OPENAI_API_KEY"] = "test-key"
+        os.environ["AZURE_OPENAI_DEPLOYMENT_NAME"] = "gpt-4o"
+        os.environ["TA_LLM_CACHE_BACKEND"] = "none"
+
+    @patch('ta_interview_briefing.azure_client.prepare_report_text', return_value="本文")
+    @patch('ta_interview_briefing.azure_client.AzureOpenAI')
+    def test_azure_call_uses_remaining_time(self, mock_azure_client, mock_prepare, sample_analysis_data, sample_pdf_path):
+        """Azure OpenAIの呼び出しは残り時間をタイムアウトにする"""
+        import json
+        from ta_interview_briefing.azure_client import analyze_ta_pdf_with_azure
+        self._set_env()
+        mock_client = mock_azure_client.return_value
+        request_client = mock_client.with_options.return_value
+        request_client.chat.completions.create.return_value.choices = [
+            MagicMock(message=MagicMock(content=json.dumps(sample_analysis_data)))
+        ]
+
+        result = analyze_ta_pdf_with_azure(sample_pdf_path, deadline=Deadline(30))
+
+        assert result == sample_analysis_data
+        options = mock_client.with_options.call_args.kwargs
+        assert 29 < options["timeout"] <= 30
+        # 自動リトライを含めても、呼び出しの合計時間が期限内に収まる
+        assert options["timeout"] * (options["max_retries"] + 1) <= 30
+        mock_prepare.assert_called_once()
+        assert mock_prepare.call_args.kwargs["deadline"].timeout_seconds == 30
+
+    def test_openai_client_within_deadline(self):
+        """openaiクライアントのタイムアウト × 試行回数が残り時間を超えない"""
+        from openai import AzureOpenAI
+        from ta_interview_briefing.azure_client import _client_within_deadline
+        client = AzureOpenAI(api_key="test-key", azure_endpoint="https://test.openai.azure.com/",
+                             api_version="2024-08-01-preview")
+        assert client.max_retries > 0
+
+        request_client = _client_within_deadline(client, Deadline(10))
+
+        assert request_client.timeout * (request_client.max_retries + 1) <= 10
+        assert _client_within_deadline(client, None) is client
+
+    @patch('ta_interview_briefing.azure_client.prepare_report_text', return_value="本文")
+    @patch('ta_interview_briefing.azure_client.AzureOpenAI')
+    def test_cancelled_before_azure_call(self, mock_azure_client, mock_prepare, sample_pdf_path):
+        """抽出後にキャンセルされた場合はAzure OpenAIを呼び出さない"""
+        from ta_interview_briefing.azure_client import analyze_ta_pdf_with_azure
+        self._set_env()
+        deadline = Deadline()
+        mock_prepare.side_effect = lambda *args, **kwargs: deadline.cancel() or "本文"
+
+        with pytest.raises(RequestCancelled):
+            analyze_ta_pdf_with_azure(sample_pdf_path, deadline=deadline)
+
+        mock_azure_client.return_value.chat.completions.create.assert_not_called()
+
+    @patch('ta_interview_briefing.azure_client.prepare_report_text', return_value="本文")
+    @patch('ta_interview_briefing.azure_client.AzureOpenAI')
+    def test_timeout_after_deadline(self, mock_azure_client, mock_prepare, sample_pdf_path):
+        """呼び出しが期限内に終わらなかった場合はDeadlineExceeded"""
+        from ta_interview_briefing.azure_client import analyze_ta_pdf_with_azure
+        self._set_env()
+
+        def timeout(**kwargs):
+            time.sleep(0.06)
+            raise TimeoutError("Request timed out.")
+
+        mock_azure_client.return_value.with_options.return_value.chat.completions.create.side_effect = timeout
+
+        with pytest.raises(DeadlineExceeded):
+            analyze_ta_pdf_with_azure(sample_pdf_path, deadline=Deadline(0.05))
@@ -0,0 +1,110 @@
+"""
+トークン数・コストの見積もり（estimator.py）のテスト
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+from ta_interview_briefing.azure_client import build_completion_params, get_completion_cache, make_completion_cache_key
+from ta_interview_briefing.estimator import (
+    count_prompt_tokens,
+    estimate_pdf,
+    estimate_pdfs,
+    format_estimate_report,
+)
+from ta_interview_briefing.text_normalizer import estimate_tokens
+
+
+REPORT_TEXT = "協調性 75\n外向性 60\n慎重性 40\n【総合所見】\nチームでの協働を好む傾向があります。"
+
+
+@pytest.fixture
+def estimate_env(monkeypatch):
+    """見積もりの設定（tiktokenは使わず概算でトークン数を数える）"""
+    monkeypatch.setenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
+    monkeypatch.setenv("AZURE_OPENAI_API_VERSION", "2024-08-01-preview")
+    monkeypatch.setenv("TA_PRICE_PROMPT_PER_1M", "2.5")
+    monkeypatch.setenv("TA_PRICE_COMPLETION_PER_1M", "10")
+    monkeypatch.setenv("TA_EXPECTED_COMPLETION_TOKENS", "500")
+    monkeypatch.setenv("TA_AZURE_TPM", "10000")
+    with patch('ta_interview_briefing.estimator._get_tokenizer', return_value=None), \
+         patch('ta_interview_briefing.azure_client.extract_text_from_pdf', return_value=REPORT_TEXT) as mock_extract:
+        yield mock_extract
+
+
+class TestCountPromptTokens:
+    """入力トークン数の計算のテスト"""
+
+    def test_counts_messages_and_schema(self):
+        """メッセージ本文とJSON Schemaの両方を数える"""
+        with patch('ta_interview_briefing.estimator._get_tokenizer', return_value=None):
+            without_schema = build_completion_params("本文", "gpt-4o", "2024-02-15-preview")
+            with_schema = build_completion_params("本文", "gpt-4o", "2024-08-01-preview")
+
+            expected = 3 + sum(
+                3 + estimate_tokens(message["role"]) + estimate_tokens(message["content"])
+                for message in without_schema["messages"]
+            )
+            assert count_prompt_tokens(without_schema) == expected
+            schema_tokens = estimate_tokens(json.dumps(with_schema["response_format"], ensure_ascii=False))
+            assert count_prompt_tokens(with_schema) > schema_tokens
+
+
+class TestEstimate:
+    """見積もりのテスト"""
+
+    def test_estimate_pdf_uses_same_prompt_as_analyze(self, estimate_env, sample_pdf_path):
+        """analyze_ta_pdf_with_azure と同じプロンプトでトークン数・コストを見積もる"""
+        result = estimate_pdf(sample_pdf_path)
+
+        with patch('ta_interview_briefing.estimator._get_tokenizer', return_value=None):
+            from ta_interview_briefing.azure_client import prepare_report_text
+            params = build_completion_params(prepare_report_text(sample_pdf_path), "gpt-4o", "2024-08-01-preview")
+            assert result["prompt_tokens"] == count_prompt_tokens(params)
+        assert result["completion_tokens"] == 500
+        assert result["max_completion_tokens"] == 2000
+        assert result["cost"] == pytest.approx((result["prompt_tokens"] * 2.5 + 500 * 10) / 1_000_000)
+        assert result["cached"] is False
+
+    def test_cached_request_costs_nothing(self, estimate_env, sample_pdf_path):
+        """LLMキャッシュにヒットするリクエストはコストと所要時間に含めない"""
+        from ta_interview_briefing.azure_client import prepare_report_text
+        params = build_completion_params(prepare_report_text(sample_pdf_path), "gpt-4o", "2024-08-01-preview")
+        get_completion_cache().set(make_completion_cache_key(params), '{"summary": "cached"}')
+
+        report = estimate_pdfs([sample_pdf_path])
+
+        assert report["files"][0]["cached"] is True
+        assert report["totals"]["requests"] == 0
+        assert report["totals"]["cost"] == 0
+        assert report["totals"]["expected_wall_seconds"] == 0
+
+    def test_totals_and_wall_time(self, estimate_env, sample_pdf_path):
+        """合計とTPMの上限での所要時間（入力 + max_tokens で数える）"""
+        def fake_extract(pdf_path, **kwargs):
+            if pdf_path == "/nonexistent.pdf":
+                raise FileNotFoundError(f"PDFファイルが見つかりません: {pdf_path}")
+            return REPORT_TEXT
+        estimate_env.side_effect = fake_extract
+
+        report = estimate_pdfs([sample_pdf_path, sample_pdf_path, "/nonexistent.pdf"])
+        totals = report["totals"]
+        item = report["files"][0]
+
+        assert totals["files"] == 3
+        assert totals["requests"] == 2
+        assert totals["errors"] == 1
+        assert "error" in report["files"][2]
+        assert totals["prompt_tokens"] == item["prompt_tokens"] * 2
+        assert totals["rate_limit_tokens"] == (item["prompt_tokens"] + 2000) * 2
+        # 10000 TPM（60 RPM）ではトークン数が律速になる
+        assert totals["bottleneck"] == "tpm"
+        assert totals["expected_wall_seconds"] == -(-totals["rate_limit_tokens"] * 60 // 10000)
+
+    def test_format_report(self, estimate_env, sample_pdf_path):
+        """表示用テキストに合計とコストが含まれる"""
+        text = format_estimate_report(estimate_pdfs([sample_pdf_path]))
+
+        assert "合計: 1件" in text
+        assert "USD" in text
+        assert "10,000 TPM" in text
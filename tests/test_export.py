@@ -0,0 +1,128 @@
+"""
+ブリーフィングのZIPエクスポート（ta_interview_briefing/export.py）のテスト
+"""
+
+import io
+import zipfile
+import tracemalloc
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from ta_interview_briefing.export import briefing_filename, iter_briefing_zip, write_briefing_zip
+from ta_interview_briefing.models import AnalysisRecord, AnalysisResult
+
+
+def _record(index, analysis, candidate_id="C-{index:04d}"):
+    now = datetime(2024, 4, 1, 9, 30, tzinfo=timezone.utc)
+    return AnalysisRecord(
+        id=f"{index:08x}" + "0" * 24,
+        candidate_id=candidate_id.format(index=index) if candidate_id else None,
+        candidate_name=f"候補者{index}",
+        requisition_id="R-001",
+        content_hash=f"hash{index}",
+        model="gpt-4o",
+        prompt_version="1",
+        result=AnalysisResult(**analysis),
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def _iter_records(count, analysis):
+    for index in range(count):
+        yield _record(index, analysis)
+
+
+class TestIterBriefingZip:
+    """iter_briefing_zip関数のテスト"""
+
+    def test_pdf_zip(self, sample_analysis_data):
+        """PDFのブリーフィングが再圧縮されずに格納された、有効なZIPになる"""
+        chunks = list(iter_briefing_zip(_iter_records(3, sample_analysis_data)))
+
+        # 1件ごとに送信し、最後にセントラルディレクトリを送る
+        assert len(chunks) == 4
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+            assert archive.testzip() is None
+            infos = archive.infolist()
+            assert [info.filename for info in infos] == [
+                briefing_filename(_record(i, sample_analysis_data)) for i in range(3)
+            ]
+            assert all(info.compress_type == zipfile.ZIP_STORED for info in infos)
+            assert infos[0].date_time == (2024, 4, 1, 9, 30, 0)
+            assert archive.read(infos[0]).startswith(b"%PDF")
+
+    def test_text_format_zip(self, sample_analysis_data):
+        """HTML / Markdown / JSON は圧縮して格納する"""
+        data = b"".join(iter_briefing_zip(_iter_records(2, sample_analysis_data), "markdown"))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            info = archive.infolist()[0]
+            assert info.filename.endswith(".md")
+            assert info.compress_type == zipfile.ZIP_DEFLATED
+            assert "リスクポイント1" in archive.read(info).decode("utf-8")
+
+    def test_empty_records(self):
+        """解析結果がない場合は空のZIPになる"""
+        data = b"".join(iter_briefing_zip(iter([])))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.namelist() == []
+
+    def test_unknown_format(self, sample_analysis_data):
+        """未対応の形式はValueError"""
+        with pytest.raises(ValueError):
+            list(iter_briefing_zip(_iter_records(1, sample_analysis_data), "docx"))
+
+    def test_memory_does_not_grow_with_count(self, sample_analysis_data):
+        """送信済みのチャンクを手放せば、件数が増えてもメモリのピークは変わらない"""
+        payload = b"%PDF-1.4\n" + b"x" * (256 * 1024)
+
+        def peak_for(count):
+            with patch("ta_interview_briefing.export.render_interview_pdf", side_effect=lambda *a: bytes(payload)):
+                tracemalloc.start()
+                try:
+                    total = 0
+                    for chunk in iter_briefing_zip(_iter_records(count, sample_analysis_data)):
+                        total += len(chunk)
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+            assert total > count * len(payload)
+            return peak
+
+        small = peak_for(10)
+        large = peak_for(100)
+
+        # 100件（25MB超）を書き出しても、ピークはブリーフィング数件分に収まる
+        assert large < 4 * len(payload)
+        assert large < small * 1.5
+
+
+class TestBriefingFilename:
+    """briefing_filename関数のテスト"""
+
+    def test_unsafe_characters(self, sample_analysis_data):
+        """パス区切りなどの文字は置き換える"""
+        record = _record(1, sample_analysis_data, candidate_id="../C/001")
+
+        assert briefing_filename(record, "json") == "C_001_00000001_interview_briefing.json"
+
+    def test_without_candidate(self, sample_analysis_data):
+        """候補者IDも候補者名もない場合は解析結果IDのみ"""
+        record = _record(1, sample_analysis_data, candidate_id=None).model_copy(update={"candidate_name": None})
+
+        assert briefing_filename(record) == "00000001_interview_briefing.pdf"
+
+
+def test_write_briefing_zip(sample_analysis_data):
+    """ファイルに書き出し、件数を返す"""
+    output = io.BytesIO()
+
+    count = write_briefing_zip(_iter_records(2, sample_analysis_data), output, "json")
+
+    assert count == 2
+    with zipfile.ZipFile(output) as archive:
+        assert len(archive.namelist()) == 2
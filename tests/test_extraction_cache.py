@@ -0,0 +1,96 @@
+"""
+抽出キャッシュのテスト
+"""
+
+import os
+import pytest
+from ta_interview_briefing.extraction_cache import (
+    ExtractionCache,
+    file_sha256,
+    get_extraction_cache,
+    reset_extraction_cache,
+)
+
+
+class TestFileSha256:
+    """ファイルハッシュ計算のテスト"""
+
+    def test_same_content_same_hash(self, tmp_path):
+        """内容が同じファイルは同じハッシュになる"""
+        path1 = tmp_path / "a.pdf"
+        path2 = tmp_path / "b.pdf"
+        path1.write_bytes(b"%PDF-1.4 same")
+        path2.write_bytes(b"%PDF-1.4 same")
+
+        assert file_sha256(str(path1)) == file_sha256(str(path2))
+
+
+class TestExtractionCache:
+    """ExtractionCacheのテスト"""
+
+    def test_put_and_get(self, tmp_path):
+        """保存したページテキストを取得できる"""
+        cache = ExtractionCache(path=str(tmp_path / "cache.sqlite3"))
+        cache.put("hash1", "pypdf2", "1", ["ページ1", "", "ページ3"], True)
+
+        assert cache.get("hash1", "pypdf2", "1") == (["ページ1", "", "ページ3"], True)
+
+    def test_key_includes_backend_and_version(self, tmp_path):
+        """バックエンドやバージョンが異なればキャッシュは使われない"""
+        cache = ExtractionCache(path=str(tmp_path / "cache.sqlite3"))
+        cache.put("hash1", "pypdf2", "1", ["ページ1"], True)
+
+        assert cache.get("hash1", "pypdf2", "2") is None
+        assert cache.get("hash1", "pypdf2+ocr", "1") is None
+
+    def test_pages_are_compressed(self, tmp_path):
+        """ページテキストは圧縮して保存される"""
+        path = str(tmp_path / "cache.sqlite3")
+        cache = ExtractionCache(path=path)
+        pages = ["繰り返しの多いテキスト" * 500]
+        cache.put("hash1", "pypdf2", "1", pages, True)
+
+        import sqlite3
+        with sqlite3.connect(path) as conn:
+            size = conn.execute("SELECT size FROM extraction_cache").fetchone()[0]
+        assert size < len(pages[0].encode("utf-8")) / 10
+
+    def test_evicts_by_entries(self, tmp_path):
+        """件数上限を超えると最終アクセスが古いエントリから削除される"""
+        cache = ExtractionCache(path=str(tmp_path / "cache.sqlite3"), max_entries=2)
+        cache.put("hash1", "pypdf2", "1", ["1"], True)
+        cache.put("hash2", "pypdf2", "1", ["2"], True)
+        cache.get("hash1", "pypdf2", "1")
+        cache.put("hash3", "pypdf2", "1", ["3"], True)
+
+        assert cache.get("hash1", "pypdf2", "1") is not None
+        assert cache.get("hash2", "pypdf2", "1") is None
+        assert cache.get("hash3", "pypdf2", "1") is not None
+
+    def test_evicts_by_bytes(self, tmp_path):
+        """合計サイズの上限を超えると古いエントリから削除される"""
+        cache = ExtractionCache(path=str(tmp_path / "cache.sqlite3"), max_bytes=1)
+        cache.put("hash1", "pypdf2", "1", ["1"], True)
+
+        assert cache.get("hash1", "pypdf2", "1") is None
+
+
+class TestGetExtractionCache:
+    """共有キャッシュの取得のテスト"""
+
+    def test_disabled_by_env(self):
+        """TA_EXTRACTION_CACHE_ENABLED=0 の場合はNone"""
+        os.environ["TA_EXTRACTION_CACHE_ENABLED"] = "0"
+        reset_extraction_cache()
+
+        assert get_extraction_cache() is None
+
+    def test_enabled_with_path(self, tmp_path):
+        """パスを指定して有効化できる"""
+        os.environ["TA_EXTRACTION_CACHE_ENABLED"] = "1"
+        os.environ["TA_EXTRACTION_CACHE_PATH"] = str(tmp_path / "cache.sqlite3")
+        reset_extraction_cache()
+
+        cache = get_extraction_cache()
+        assert isinstance(cache, ExtractionCache)
+        assert get_extraction_cache() is cache
@@ -0,0 +1,128 @@
+"""
+負荷試験用のフェイクAzure OpenAIサーバー（benchmarks/fake_azure_openai.py）とロードジェネレーターのテスト
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from benchmarks.fake_azure_openai import create_app, FakeServerConfig
+from benchmarks.loadgen import run_load
+from ta_interview_briefing.azure_client import build_completion_params
+from ta_interview_briefing.models import AnalysisResult
+
+
+CHAT_PATH = "/openai/deployments/gpt-4o/chat/completions?api-version=2024-08-01-preview"
+
+
+def _fake_client(**config):
+    return TestClient(create_app(FakeServerConfig(latency=0, stream_chunk_delay=0, seed=0, **config)))
+
+
+class TestFakeAzureOpenAI:
+    """フェイクサーバーのテスト"""
+
+    def test_json_schema_response(self):
+        """response_format の json_schema に適合する内容を返す"""
+        params = build_completion_params("本文", "gpt-4o", "2024-08-01-preview")
+
+        response = _fake_client().post(CHAT_PATH, json=params)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["object"] == "chat.completion"
+        AnalysisResult(**json.loads(body["choices"][0]["message"]["content"]))
+        assert body["usage"]["total_tokens"] > 0
+
+    def test_streaming(self):
+        """stream=true の場合はSSEでチャンクを返し、[DONE] で終わる"""
+        params = build_completion_params("本文", "gpt-4o", "2024-08-01-preview")
+        params["stream"] = True
+
+        response = _fake_client().post(CHAT_PATH, json=params)
+
+        events = [line[len("data: "):] for line in response.text.splitlines() if line.startswith("data: ")]
+        assert events[-1] == "[DONE]"
+        chunks = [json.loads(event) for event in events[:-1]]
+        content = "".join(chunk["choices"][0]["delta"].get("content", "") for chunk in chunks)
+        AnalysisResult(**json.loads(content))
+        assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+
+    def test_rate_limit_returns_retry_after(self):
+        """RPMの上限を超えると429とRetry-Afterを返す"""
+        client = _fake_client(rpm=1)
+        params = build_completion_params("本文", "gpt-4o", "2024-08-01-preview")
+
+        assert client.post(CHAT_PATH, json=params).status_code == 200
+        response = client.post(CHAT_PATH, json=params)
+
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert client.get("/stats").json()["rate_limited"] == 1
+
+    def test_injected_errors(self):
+        """エラー率を指定すると500を返す"""
+        response = _fake_client(error_rate_500=1.0).post(CHAT_PATH, json={"messages": []})
+
+        assert response.status_code == 500
+        assert response.json()["error"]["code"] == "InternalServerError"
+
+    def test_analyze_with_real_client(self, sample_pdf_path, monkeypatch):
+        """AzureOpenAIクライアントからフェイクサーバーを使って解析できる"""
+        from openai import AzureOpenAI
+        from ta_interview_briefing.azure_client import analyze_ta_pdf_with_azure
+
+        monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "http://testserver")
+        monkeypatch.setenv("AZURE_OPENAI_API_KEY", "fake")
+        monkeypatch.setenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
+        monkeypatch.setenv("AZURE_OPENAI_API_VERSION", "2024-08-01-preview")
+        client = AzureOpenAI(
+            api_key="fake", base_url="http://testserver", api_version="2024-08-01-preview",
+            http_client=_fake_client()
+        )
+
+        with patch('ta_interview_briefing.azure_client.get_azure_client', return_value=client), \
+             patch('ta_interview_briefing.azure_client.extract_text_from_pdf', return_value="協調性 75"):
+            result = analyze_ta_pdf_with_azure(sample_pdf_path)
+
+        assert set(result) == {"summary", "risk_points", "attract_points", "notes_for_interviewer"}
+
+
+class TestLoadgen:
+    """ロードジェネレーターのテスト"""
+
+    def test_run_load_summary(self):
+        """エンドポイントごとにリクエスト数・ステータス・パーセンタイルを集計する"""
+        statuses = iter([200, 500, 200, 200])
+
+        class FakeHttpClient:
+            def post(self, path, files=None, data=None, headers=None):
+                return SimpleNamespace(status_code=next(statuses))
+
+        summary = run_load(
+            "http://testserver", b"%PDF-1.4\n", ["analyze", "generate_pdf"],
+            rps=100, duration=0.04, max_in_flight=1, client=FakeHttpClient()
+        )
+
+        assert summary["overall"]["requests"] == 4
+        assert summary["overall"]["ok"] == 3
+        assert summary["overall"]["status_counts"] == {"200": 3, "500": 1}
+        assert summary["analyze"]["requests"] == 2
+        assert summary["overall"]["p50_ms"] <= summary["overall"]["p99_ms"]
+
+    def test_run_load_priority_header(self):
+        """優先度クラスを X-Priority ヘッダーで送る"""
+        sent_headers = []
+
+        class FakeHttpClient:
+            def post(self, path, files=None, data=None, headers=None):
+                sent_headers.append(headers)
+                return SimpleNamespace(status_code=200)
+
+        summary = run_load(
+            "http://testserver", b"%PDF-1.4\n", ["analyze"],
+            rps=100, duration=0.02, max_in_flight=1, client=FakeHttpClient(), priority="bulk"
+        )
+
+        assert sent_headers == [{"X-Priority": "bulk"}, {"X-Priority": "bulk"}]
+        assert summary["config"]["priority"] == "bulk"
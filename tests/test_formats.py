@@ -0,0 +1,86 @@
+"""
+ブリーフィングの出力形式（ta_interview_briefing/formats.py）のテスト
+"""
+
+import json
+import pytest
+from ta_interview_briefing.formats import (
+    BRIEFING_SECTIONS,
+    negotiate_format,
+    render_html,
+    render_json,
+    render_markdown,
+)
+
+
+class TestRenderers:
+    """HTML / Markdown / JSON の生成のテスト"""
+
+    def test_html_sections_and_escaping(self, sample_analysis_data):
+        """PDFと同じ見出しで生成し、テキストをHTMLエスケープする"""
+        analysis = {**sample_analysis_data, "risk_points": ["<script>alert(1)</script>", "改行\nを  含む"]}
+
+        output = render_html("山田 & 太郎", analysis)
+
+        for _, heading in BRIEFING_SECTIONS:
+            assert f"<h2>{heading}</h2>" in output
+        assert "<script>" not in output
+        assert "<li>&lt;script&gt;alert(1)&lt;/script&gt;</li>" in output
+        assert "<li>改行 を 含む</li>" in output
+        assert "候補者名: 山田 &amp; 太郎" in output
+
+    def test_empty_sections(self):
+        """項目がない見出しは（情報なし）"""
+        analysis = {"summary": "", "risk_points": [], "attract_points": [], "notes_for_interviewer": []}
+
+        assert render_html("候補者", analysis).count("<p>（情報なし）</p>") == 4
+        assert render_markdown("候補者", analysis).count("（情報なし）") == 4
+
+    def test_markdown_escaping(self, sample_analysis_data):
+        """Markdownの書式記号とHTMLをエスケープする"""
+        analysis = {**sample_analysis_data, "attract_points": ["**強調** と [リンク](x) と <b>"]}
+
+        output = render_markdown("山田_太郎", analysis)
+
+        assert output.startswith("# Talent Analytics 面接ブリーフィング\n\n候補者名: 山田\\_太郎\n")
+        assert "## 【アトラクトポイント】\n\n- \\*\\*強調\\*\\* と \\[リンク\\](x) と &lt;b&gt;\n" in output
+        assert "- リスクポイント1\n- リスクポイント2" in output
+
+    def test_json_structure(self, sample_analysis_data):
+        """見出しごとの項目を構造化したJSON"""
+        data = json.loads(render_json("山田太郎", sample_analysis_data))
+
+        assert data["candidate_name"] == "山田太郎"
+        assert [section["key"] for section in data["sections"]] == [key for key, _ in BRIEFING_SECTIONS]
+        assert data["sections"][0]["items"] == [sample_analysis_data["summary"]]
+        assert data["sections"][1]["items"] == sample_analysis_data["risk_points"]
+
+
+class TestNegotiateFormat:
+    """negotiate_format関数のテスト"""
+
+    @pytest.mark.parametrize("accept, expected", [
+        (None, "pdf"),
+        ("*/*", "pdf"),
+        ("application/pdf", "pdf"),
+        ("text/html", "html"),
+        ("text/markdown", "markdown"),
+        ("application/json", "json"),
+        ("text/html;q=0.5, application/json", "json"),
+        ("application/json;q=0, text/markdown;q=0.1", "markdown"),
+        ("text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8", "html"),
+        ("image/png", "pdf"),
+    ])
+    def test_accept_header(self, accept, expected):
+        """Acceptヘッダーのq値が最も高い対応形式を選ぶ（対応形式がなければPDF）"""
+        assert negotiate_format(accept) == expected
+
+    def test_query_parameter_wins(self):
+        """format の指定はAcceptヘッダーより優先される"""
+        assert negotiate_format("application/pdf", "md") == "markdown"
+        assert negotiate_format("application/pdf", "JSON") == "json"
+
+    def test_unknown_format(self):
+        """未対応の形式の指定はエラー"""
+        with pytest.raises(ValueError):
+            negotiate_format(None, "docx")
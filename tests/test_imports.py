@@ -0,0 +1,70 @@
+"""
+パッケージのインポート時間（遅延インポート）のテスト
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# インポートしただけでは読み込まれてはいけない重い依存パッケージ
+HEAVY_MODULES = ("openai", "httpx", "PyPDF2", "reportlab", "dotenv")
+
+
+def _loaded_heavy_modules(code):
+    """新しいPythonプロセスでコードを実行し、読み込まれた重い依存パッケージを返す"""
+    script = (
+        f"{code}\n"
+        "import sys, json\n"
+        f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestLazyImports:
+    """遅延インポートのテスト"""
+
+    @pytest.mark.parametrize("code", [
+        "import ta_interview_briefing",
+        "from ta_interview_briefing.models import AnalysisResult",
+        "import ta_interview_briefing.azure_client",
+        "import ta_interview_briefing.main",
+    ])
+    def test_import_does_not_load_heavy_dependencies(self, code):
+        """インポートしただけでは openai・PyPDF2・reportlab・dotenv を読み込まない"""
+        assert _loaded_heavy_modules(code) == []
+
+    def test_cli_help_does_not_load_heavy_dependencies(self):
+        """CLIの --help では重い依存パッケージを読み込まない"""
+        code = (
+            "import sys\n"
+            "from ta_interview_briefing.main import main\n"
+            "sys.argv = ['main.py', '--help']\n"
+            "try:\n"
+            "    main()\n"
+            "except SystemExit:\n"
+            "    pass\n"
+        )
+        assert _loaded_heavy_modules(code) == []
+
+    def test_public_api_is_loaded_on_first_access(self):
+        """パッケージの公開APIは初めて参照したときに読み込まれる"""
+        import ta_interview_briefing
+        from ta_interview_briefing.azure_client import analyze_ta_pdf_with_azure
+
+        assert ta_interview_briefing.analyze_ta_pdf_with_azure is analyze_ta_pdf_with_azure
+        assert "generate_interview_pdf_from_azure" in dir(ta_interview_briefing)
+        with pytest.raises(AttributeError):
+            ta_interview_briefing.missing_attribute
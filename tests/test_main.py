@@ -151,3 +151,158 @@ class TestMain:
             if os.path.exists(tmp_path):
                 os.unlink(tmp_path)
 
+
+
+class TestBatchCommand:
+    """batchサブコマンドのテスト"""
+    
+    @patch('ta_interview_briefing.batch.run_batch')
+    def test_batch_dispatch(self, mock_run_batch):
+        """batchサブコマンドで引数が渡されるテスト"""
+        mock_run_batch.return_value = {"done": 2, "failed": 0, "skipped": 1}
+        
+        with patch.object(sys, 'argv', ['main.py', 'batch', 'input_dir', '--concurrency', '8']):
+            main()
+        
+        mock_run_batch.assert_called_once_with(
+            'input_dir', concurrency=8, manifest_path=None, force=False
+        )
+    
+    @patch('ta_interview_briefing.batch.run_batch')
+    def test_batch_failures_exit_code(self, mock_run_batch):
+        """失敗したファイルがある場合は終了コード1"""
+        mock_run_batch.return_value = {"done": 1, "failed": 1, "skipped": 0}
+        
+        with patch.object(sys, 'argv', ['main.py', 'batch', 'input_dir']):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+            assert exc_info.value.code == 1
+    
+    def test_batch_directory_not_found(self, tmp_path):
+        """存在しないディレクトリの場合は終了コード1"""
+        with patch.object(sys, 'argv', ['main.py', 'batch', str(tmp_path / 'missing')]):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+            assert exc_info.value.code == 1
+
+
+class TestBulkCommand:
+    """bulkサブコマンドのテスト"""
+    
+    @patch('ta_interview_briefing.batch.run_bulk')
+    def test_bulk_writes_to_file(self, mock_run_bulk, tmp_path):
+        """結果の出力先ファイルが渡されるテスト"""
+        def fake_run_bulk(manifest, output, concurrency, output_dir):
+            output.write('{"row": 1}\n')
+            return {"ok": 1, "error": 0}
+        mock_run_bulk.side_effect = fake_run_bulk
+        output_path = tmp_path / "results.jsonl"
+        
+        with patch.object(sys, 'argv', ['main.py', 'bulk', 'manifest.csv', '-o', str(output_path), '-c', '3']):
+            main()
+        
+        assert output_path.read_text(encoding="utf-8") == '{"row": 1}\n'
+        assert mock_run_bulk.call_args.kwargs["concurrency"] == 3
+    
+    @patch('ta_interview_briefing.batch.run_bulk')
+    def test_bulk_errors_exit_code(self, mock_run_bulk):
+        """失敗した行がある場合は終了コード1"""
+        mock_run_bulk.return_value = {"ok": 1, "error": 1}
+        
+        with patch.object(sys, 'argv', ['main.py', 'bulk', 'manifest.csv']):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+            assert exc_info.value.code == 1
+
+
+class TestWatchCommand:
+    """watchサブコマンドのテスト"""
+    
+    @patch('ta_interview_briefing.watcher.FolderWatcher.run')
+    def test_watch_dispatch(self, mock_run, tmp_path):
+        """watchサブコマンドで監視が開始されるテスト"""
+        with patch.object(sys, 'argv', ['main.py', 'watch', str(tmp_path), '--workers', '3', '--polling']):
+            main()
+        
+        mock_run.assert_called_once()
+    
+    def test_watch_directory_not_found(self, tmp_path):
+        """存在しないディレクトリの場合は終了コード1"""
+        with patch.object(sys, 'argv', ['main.py', 'watch', str(tmp_path / 'missing')]):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+            assert exc_info.value.code == 1
+
+
+class TestExportCommand:
+    """exportサブコマンドのテスト"""
+    
+    def test_export_writes_zip(self, tmp_path, sample_analysis_data):
+        """求人IDの解析結果がZIPに書き出されるテスト"""
+        import zipfile
+        from ta_interview_briefing.store import get_analysis_store
+        store = get_analysis_store()
+        store.save(sample_analysis_data, "hash1", "gpt-4o", "1", candidate_id="C-001", requisition_id="R-001")
+        store.save(sample_analysis_data, "hash2", "gpt-4o", "1", candidate_id="C-002", requisition_id="R-001")
+        output_path = tmp_path / "briefings.zip"
+        
+        with patch.object(sys, 'argv', ['main.py', 'export', 'R-001', '-o', str(output_path), '--format', 'markdown']):
+            main()
+        
+        with zipfile.ZipFile(output_path) as archive:
+            names = archive.namelist()
+        assert len(names) == 2
+        assert all(name.endswith("_interview_briefing.md") for name in names)
+    
+    def test_export_booklet(self, tmp_path, sample_analysis_data):
+        """--booklet で全候補者のブリーフィングが1つのPDFに書き出されるテスト"""
+        from ta_interview_briefing.store import get_analysis_store
+        get_analysis_store().save(sample_analysis_data, "hash1", "gpt-4o", "1", candidate_name="山田太郎", requisition_id="R-001")
+        output_path = tmp_path / "booklet.pdf"
+        
+        with patch.object(sys, 'argv', ['main.py', 'export', 'R-001', '--booklet', '-o', str(output_path)]):
+            main()
+        
+        assert output_path.read_bytes().startswith(b"%PDF")
+    
+    def test_export_unknown_requisition(self):
+        """解析結果がない求人IDの場合は終了コード1"""
+        with patch.object(sys, 'argv', ['main.py', 'export', 'R-999']):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+            assert exc_info.value.code == 1
+
+
+class TestDryRun:
+    """--dry-run（見積もり）のテスト"""
+    
+    @patch('ta_interview_briefing.main.analyze_ta_pdf_with_azure')
+    @patch('ta_interview_briefing.estimator.estimate_pdfs')
+    def test_dry_run_does_not_call_azure(self, mock_estimate, mock_analyze, sample_pdf_path, capsys):
+        """--dry-runでは見積もりだけを表示し、解析は行わない"""
+        mock_estimate.return_value = {
+            "files": [],
+            "totals": {"errors": 0},
+            "settings": {}
+        }
+        
+        with patch('ta_interview_briefing.estimator.format_estimate_report', return_value="見積もり"), \
+             patch.object(sys, 'argv', ['main.py', sample_pdf_path, '--dry-run']):
+            main()
+        
+        mock_analyze.assert_not_called()
+        assert [str(path) for path in mock_estimate.call_args.args[0]] == [sample_pdf_path]
+        assert "見積もり" in capsys.readouterr().out
+    
+    @patch('ta_interview_briefing.estimator.estimate_pdfs')
+    def test_batch_dry_run(self, mock_estimate, tmp_path):
+        """batch --dry-runではディレクトリ内の入力PDFを見積もる"""
+        (tmp_path / "a.pdf").write_bytes(b"%PDF-1.4\n")
+        (tmp_path / "a_interview_briefing.pdf").write_bytes(b"%PDF-1.4\n")
+        mock_estimate.return_value = {"files": [], "totals": {"errors": 0}, "settings": {}}
+        
+        with patch('ta_interview_briefing.estimator.format_estimate_report', return_value=""), \
+             patch.object(sys, 'argv', ['main.py', 'batch', str(tmp_path), '--dry-run']):
+            main()
+        
+        assert [path.name for path in mock_estimate.call_args.args[0]] == ["a.pdf"]
@@ -0,0 +1,126 @@
+"""
+OCRフォールバックのテスト
+"""
+
+import os
+import time
+import threading
+import pytest
+from unittest.mock import patch
+from PIL import Image
+from ta_interview_briefing import ocr
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """テストごとにOCRキャッシュとワーカープールを破棄"""
+    ocr.clear_ocr_cache()
+    ocr.reset_ocr_pool()
+    yield
+    ocr.clear_ocr_cache()
+    ocr.reset_ocr_pool()
+
+
+def _fake_image(color):
+    """ページ画像の代わりになる単色の画像"""
+    return Image.new("L", (10, 10), color=color)
+
+
+class TestIsOcrAvailable:
+    """OCR利用可否判定のテスト"""
+
+    def test_disabled_by_env(self):
+        """TA_OCR_ENABLED=0 の場合は無効"""
+        os.environ["TA_OCR_ENABLED"] = "0"
+        assert not ocr.is_ocr_available()
+
+    @patch('ta_interview_briefing.ocr.shutil.which', return_value=None)
+    def test_requires_binaries(self, mock_which):
+        """tesseract・pdftoppmコマンドがない場合は無効"""
+        assert not ocr.is_ocr_available()
+
+
+class TestOcrPage:
+    """1ページのOCRのテスト"""
+
+    @patch('ta_interview_briefing.ocr._run_tesseract', return_value="認識したテキスト")
+    @patch('ta_interview_briefing.ocr._rasterize_page')
+    def test_cached_by_page_hash(self, mock_rasterize, mock_tesseract):
+        """同じ画像のページは2回目以降キャッシュから返す"""
+        mock_rasterize.return_value = _fake_image(128)
+
+        assert ocr.ocr_page("dummy.pdf", 0) == "認識したテキスト"
+        assert ocr.ocr_page("other.pdf", 3) == "認識したテキスト"
+        assert mock_tesseract.call_count == 1
+
+    @patch('ta_interview_briefing.ocr._run_tesseract', return_value="認識したテキスト")
+    @patch('ta_interview_briefing.ocr._rasterize_page')
+    def test_cache_key_includes_settings(self, mock_rasterize, mock_tesseract):
+        """言語モデル・解像度を変えた場合はキャッシュを使わずにOCRし直す"""
+        mock_rasterize.return_value = _fake_image(128)
+
+        ocr.ocr_page("dummy.pdf", 0)
+        os.environ["TA_OCR_LANG"] = "jpn+eng"
+        ocr.ocr_page("dummy.pdf", 0)
+        os.environ["TA_OCR_DPI"] = "200"
+        ocr.ocr_page("dummy.pdf", 0)
+
+        assert mock_tesseract.call_count == 3
+
+    @patch('ta_interview_briefing.ocr._run_tesseract', side_effect=RuntimeError("timeout"))
+    @patch('ta_interview_briefing.ocr._rasterize_page')
+    def test_failure_returns_empty(self, mock_rasterize, mock_tesseract):
+        """OCRに失敗したページは空文字列になる"""
+        mock_rasterize.return_value = _fake_image(0)
+
+        assert ocr.ocr_page("dummy.pdf", 0) == ""
+
+
+class TestOcrPages:
+    """複数ページの並列OCRのテスト"""
+
+    @patch('ta_interview_briefing.ocr._run_tesseract')
+    @patch('ta_interview_briefing.ocr._rasterize_page')
+    def test_preserves_page_order(self, mock_rasterize, mock_tesseract):
+        """並列に処理しても結果はページ順に並ぶ"""
+        os.environ["TA_OCR_WORKERS"] = "3"
+        mock_rasterize.side_effect = lambda path, index: _fake_image(index)
+        mock_tesseract.side_effect = lambda image: f"ページ{image.getpixel((0, 0)) + 1}"
+
+        assert ocr.ocr_pages("dummy.pdf", [0, 1, 2, 3]) == ["ページ1", "ページ2", "ページ3", "ページ4"]
+
+    @patch('ta_interview_briefing.ocr._run_tesseract')
+    @patch('ta_interview_briefing.ocr._rasterize_page')
+    def test_concurrency_is_shared_across_calls(self, mock_rasterize, mock_tesseract):
+        """同時に呼び出しても、プロセス全体で並列数は TA_OCR_WORKERS まで"""
+        os.environ["TA_OCR_WORKERS"] = "2"
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def tesseract(image):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return "text"
+
+        mock_rasterize.side_effect = lambda path, index: _fake_image(index)
+        mock_tesseract.side_effect = tesseract
+        threads = [
+            threading.Thread(target=ocr.ocr_pages, args=(f"{n}.pdf", [n * 4 + index for index in range(4)]))
+            for n in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert mock_tesseract.call_count == 16
+        assert peak[0] <= 2
+
+    def test_empty(self):
+        """対象ページがない場合は空のリスト"""
+        assert ocr.ocr_pages("dummy.pdf", []) == []
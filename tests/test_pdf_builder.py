@@ -4,6 +4,7 @@ PDF生成のテスト
 
 import pytest
 import os
+import time
 import tempfile
 from pathlib import Path
 from ta_interview_briefing.pdf_builder import generate_interview_pdf_from_azure
@@ -144,3 +145,33 @@ class TestGenerateInterviewPdfFromAzure:
             if os.path.exists(output_path):
                 os.unlink(output_path)
 
+
+
+class TestRenderInterviewPdf:
+    """render_interview_pdf関数（バイト列での生成とキャッシュ）のテスト"""
+    
+    def test_rendering_is_deterministic(self, sample_analysis_data):
+        """同じ入力からは、時刻によらず同じバイト列のPDFが生成される"""
+        from unittest.mock import patch
+        from ta_interview_briefing.pdf_builder import render_interview_pdf
+        os.environ["TA_RENDER_CACHE_BACKEND"] = "none"
+        
+        first = render_interview_pdf("テスト候補者", sample_analysis_data)
+        with patch("time.time", return_value=time.time() + 86400):
+            second = render_interview_pdf("テスト候補者", sample_analysis_data)
+        
+        assert first.startswith(b"%PDF")
+        assert first == second
+    
+    def test_cached_render_skips_layout(self, sample_analysis_data):
+        """2回目以降はキャッシュから返し、ReportLabのレイアウトを行わない"""
+        from unittest.mock import patch
+        from ta_interview_briefing import pdf_builder
+        
+        first = pdf_builder.render_interview_pdf("テスト候補者", sample_analysis_data)
+        with patch.object(pdf_builder, "_build_briefing") as mock_build:
+            second = pdf_builder.render_interview_pdf("テスト候補者", sample_analysis_data)
+            pdf_builder.render_interview_pdf("別の候補者", sample_analysis_data)
+        
+        assert second == first
+        mock_build.assert_called_once()
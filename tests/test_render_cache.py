@@ -0,0 +1,107 @@
+"""
+生成済みPDFのキャッシュ（ta_interview_briefing/render_cache.py）のテスト
+"""
+
+import os
+import time
+import pytest
+from ta_interview_briefing.render_cache import (
+    DiskRenderCache,
+    MemoryRenderCache,
+    get_render_cache,
+    make_render_cache_key,
+    reset_render_cache,
+)
+
+
+class TestMakeRenderCacheKey:
+    """キャッシュキーのテスト"""
+
+    def test_key_depends_on_all_inputs(self, sample_analysis_data):
+        """解析結果・候補者名・テンプレートのバージョンのいずれかが異なればキーも異なる"""
+        key = make_render_cache_key(sample_analysis_data, "山田太郎", "1")
+
+        assert key == make_render_cache_key(dict(reversed(sample_analysis_data.items())), "山田太郎", "1")
+        assert key != make_render_cache_key(sample_analysis_data, "佐藤花子", "1")
+        assert key != make_render_cache_key(sample_analysis_data, "山田太郎", "2")
+        assert key != make_render_cache_key({**sample_analysis_data, "summary": "別"}, "山田太郎", "1")
+
+
+class TestMemoryRenderCache:
+    """MemoryRenderCacheのテスト"""
+
+    def test_evicts_least_recently_used_by_size(self):
+        """合計サイズの上限を超えると最終アクセスが古いものから削除される"""
+        cache = MemoryRenderCache(max_bytes=250)
+        cache.set("a", b"a" * 100)
+        cache.set("b", b"b" * 100)
+        cache.get("a")
+        cache.set("c", b"c" * 100)
+
+        assert cache.get("a") == b"a" * 100
+        assert cache.get("b") is None
+        assert cache.get("c") == b"c" * 100
+        assert cache.total_bytes == 200
+
+    def test_skips_values_larger_than_limit(self):
+        """上限より大きいPDFはキャッシュしない"""
+        cache = MemoryRenderCache(max_bytes=10)
+        cache.set("a", b"a" * 11)
+
+        assert cache.get("a") is None
+        assert cache.total_bytes == 0
+
+
+class TestDiskRenderCache:
+    """DiskRenderCacheのテスト"""
+
+    def test_set_and_get(self, tmp_path):
+        """保存したPDFをファイルから取得できる"""
+        cache = DiskRenderCache(directory=str(tmp_path / "render"))
+        cache.set("key1", b"%PDF-1.4 cached")
+
+        assert cache.get("key1") == b"%PDF-1.4 cached"
+        assert cache.get("key2") is None
+        assert [path.name for path in (tmp_path / "render").iterdir()] == ["key1.pdf"]
+
+    def test_evicts_oldest_access(self, tmp_path):
+        """合計サイズの上限を超えると最終アクセスが古いファイルから削除される"""
+        cache = DiskRenderCache(directory=str(tmp_path), max_bytes=250)
+        cache.set("a", b"a" * 100)
+        cache.set("b", b"b" * 100)
+        past = time.time() - 60
+        os.utime(tmp_path / "a.pdf", (past, past))
+        os.utime(tmp_path / "b.pdf", (past - 60, past - 60))
+        cache.get("a")
+        cache.set("c", b"c" * 100)
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+
+class TestGetRenderCache:
+    """get_render_cache関数のテスト"""
+
+    def test_default_is_memory(self):
+        """デフォルトはメモリキャッシュ"""
+        assert isinstance(get_render_cache(), MemoryRenderCache)
+
+    def test_backend_from_env(self, tmp_path):
+        """TA_RENDER_CACHE_BACKEND でディスクキャッシュや無効化を選べる"""
+        os.environ["TA_RENDER_CACHE_BACKEND"] = "disk"
+        os.environ["TA_RENDER_CACHE_DIR"] = str(tmp_path / "render")
+        reset_render_cache()
+        assert isinstance(get_render_cache(), DiskRenderCache)
+
+        os.environ["TA_RENDER_CACHE_BACKEND"] = "none"
+        reset_render_cache()
+        assert get_render_cache() is None
+
+    def test_unknown_backend(self):
+        """未対応のバックエンドはエラー"""
+        os.environ["TA_RENDER_CACHE_BACKEND"] = "redis"
+        reset_render_cache()
+
+        with pytest.raises(ValueError):
+            get_render_cache()
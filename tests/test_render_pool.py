@@ -0,0 +1,136 @@
+"""
+レンダリング用スレッドプール（ta_interview_briefing/render_pool.py）のテスト
+"""
+
+import os
+import time
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ta_interview_briefing import pdf_builder
+from ta_interview_briefing.render_pool import RenderPool, get_render_pool, reset_render_pool
+
+
+@pytest.fixture
+def pool():
+    render_pool = RenderPool(workers=2)
+    yield render_pool
+    render_pool.shutdown()
+
+
+class TestFontInitialization:
+    """フォント登録の排他制御のテスト"""
+
+    def test_concurrent_registration_registers_once(self):
+        """複数スレッドから同時に呼び出しても、フォントは1回だけ登録される"""
+        registered = []
+
+        def register_font(font):
+            time.sleep(0.01)  # 登録中に他のスレッドが確認する状況を作る
+            registered.append(font)
+
+        fake_metrics = MagicMock()
+        fake_metrics.getRegisteredFontNames.side_effect = lambda: list(registered)
+        fake_metrics.registerFont.side_effect = register_font
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            pdf_builder._register_japanese_font()
+
+        with patch.object(pdf_builder, "pdfmetrics", fake_metrics), \
+                patch.object(pdf_builder, "UnicodeCIDFont", side_effect=lambda name: name):
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert registered == ["HeiseiKakuGo-W5"]
+
+    def test_styles_are_shared(self):
+        """スタイルはフォントごとに1回だけ作成される"""
+        font_name = pdf_builder._register_japanese_font()
+
+        assert pdf_builder._briefing_styles(font_name) is pdf_builder._briefing_styles(font_name)
+
+
+class TestRenderPool:
+    """RenderPoolのテスト"""
+
+    def test_concurrent_rendering_matches_sequential(self, pool, sample_analysis_data):
+        """並行してレンダリングしても、1件ずつ生成した場合と同じPDFになる"""
+        os.environ["TA_RENDER_CACHE_BACKEND"] = "none"
+        from ta_interview_briefing.render_cache import reset_render_cache
+        reset_render_cache()
+        names = [f"候補者{i}" for i in range(8)]
+
+        expected = [pdf_builder.render_interview_pdf(name, sample_analysis_data) for name in names]
+        futures = [pool.submit(pdf_builder.render_interview_pdf, name, sample_analysis_data) for name in names]
+
+        assert [future.result() for future in futures] == expected
+        assert pool.metrics()["completed"] == 8
+
+    def test_metrics(self):
+        """待機中・実行中・完了・失敗の件数を返す"""
+        render_pool = RenderPool(workers=1)
+        release = threading.Event()
+        try:
+            blocking = render_pool.submit(release.wait, 5)
+            queued = render_pool.submit(lambda: "done")
+            time.sleep(0.05)
+
+            metrics = render_pool.metrics()
+            assert metrics["workers"] == 1
+            assert metrics["active"] == 1
+            assert metrics["queued"] == 1
+
+            release.set()
+            assert blocking.result() is True
+            assert queued.result() == "done"
+            with pytest.raises(ZeroDivisionError):
+                render_pool.submit(lambda: 1 / 0).result()
+
+            metrics = render_pool.metrics()
+            assert (metrics["queued"], metrics["active"]) == (0, 0)
+            assert (metrics["completed"], metrics["failed"]) == (2, 1)
+            assert metrics["max_queued"] >= 1
+            assert metrics["avg_wait_ms"] > 0
+        finally:
+            release.set()
+            render_pool.shutdown()
+
+    def test_run_does_not_block_event_loop(self, pool):
+        """run はワーカースレッドで実行し、その間もイベントループは他の処理を進められる"""
+        async def scenario():
+            ticks = []
+
+            async def ticker():
+                for _ in range(5):
+                    ticks.append(time.perf_counter())
+                    await asyncio.sleep(0.01)
+
+            result, _ = await asyncio.gather(pool.run(time.sleep, 0.1), ticker())
+            return result, ticks
+
+        result, ticks = asyncio.run(scenario())
+
+        assert result is None
+        assert len(ticks) == 5
+
+
+class TestGetRenderPool:
+    """get_render_pool関数のテスト"""
+
+    def test_workers_from_env(self):
+        """TA_RENDER_WORKERS でワーカー数を指定できる"""
+        os.environ["TA_RENDER_WORKERS"] = "3"
+        reset_render_pool()
+        try:
+            assert get_render_pool().workers == 3
+            assert get_render_pool() is get_render_pool()
+        finally:
+            reset_render_pool()
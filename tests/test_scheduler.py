@@ -0,0 +1,424 @@
+"""
+Azure OpenAIの呼び出しの優先度スケジューラー（ta_interview_briefing/scheduler.py）のテスト
+"""
+
+import os
+import time
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ta_interview_briefing import scheduler as scheduler_module
+from ta_interview_briefing.deadline import Deadline, DeadlineExceeded
+from ta_interview_briefing.scheduler import (
+    DRR_QUANTUM_TOKENS,
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    AzureScheduler,
+    estimate_request_tokens,
+    get_scheduler,
+    reset_scheduler,
+)
+
+
+NO_RESERVE = {PRIORITY_INTERACTIVE: 0.0, PRIORITY_BULK: 0.0}
+
+
+def _wait_until(condition, timeout=2.0):
+    started = time.monotonic()
+    while not condition():
+        assert time.monotonic() - started < timeout
+        time.sleep(0.005)
+
+
+def _acquire_in_thread(scheduler, priority, tokens=1, deadline=None, tenant="default"):
+    """別スレッドで順番を待ち、開始した順番を記録する"""
+    admitted = threading.Event()
+    tickets = []
+
+    def run():
+        tickets.append(scheduler.acquire(priority, tokens, deadline, tenant))
+        admitted.set()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return admitted, tickets
+
+
+class TestReservation:
+    """予約分と空き容量のテスト"""
+
+    def test_bulk_leaves_interactive_reserve(self):
+        """bulk が同時実行数を使い切っても、interactive の予約分はすぐに使える"""
+        scheduler = AzureScheduler(concurrency=4, tpm=1_000_000,
+                                   reserved_shares={PRIORITY_INTERACTIVE: 0.25, PRIORITY_BULK: 0.0})
+        bulk = [scheduler.acquire(PRIORITY_BULK, 1) for _ in range(3)]
+        waiting, _ = _acquire_in_thread(scheduler, PRIORITY_BULK)
+
+        assert not waiting.wait(0.1)
+        started = time.perf_counter()
+        interactive = scheduler.acquire(PRIORITY_INTERACTIVE, 1)
+        assert time.perf_counter() - started < 0.05
+
+        scheduler.release(bulk[0])
+        assert waiting.wait(1)
+        scheduler.release(interactive)
+
+    def test_interactive_can_use_spare_capacity(self):
+        """予約分を超えても、bulk の使っていない予約分以外は interactive が使える"""
+        scheduler = AzureScheduler(concurrency=4, tpm=1_000_000,
+                                   reserved_shares={PRIORITY_INTERACTIVE: 0.25, PRIORITY_BULK: 0.25})
+        tickets = [scheduler.acquire(PRIORITY_INTERACTIVE, 1) for _ in range(3)]
+
+        assert scheduler.metrics()["classes"][PRIORITY_INTERACTIVE]["in_flight"] == 3
+        waiting, _ = _acquire_in_thread(scheduler, PRIORITY_INTERACTIVE)
+        assert not waiting.wait(0.1)
+        scheduler.acquire(PRIORITY_BULK, 1)
+
+        scheduler.release(tickets[0])
+        assert waiting.wait(1)
+
+    def test_tpm_window(self, monkeypatch):
+        """TPMの予算を使い切った場合は、期間から外れるまで待つ"""
+        monkeypatch.setattr(scheduler_module, "TPM_WINDOW_SECONDS", 0.2)
+        scheduler = AzureScheduler(concurrency=4, tpm=100, reserved_shares=NO_RESERVE)
+        scheduler.release(scheduler.acquire(PRIORITY_BULK, 60))
+
+        started = time.perf_counter()
+        scheduler.release(scheduler.acquire(PRIORITY_BULK, 60))
+
+        assert time.perf_counter() - started >= 0.15
+
+    def test_invalid_settings(self):
+        """予約分の合計が1を超える場合や、未対応の優先度はValueError"""
+        with pytest.raises(ValueError):
+            AzureScheduler(reserved_shares={PRIORITY_INTERACTIVE: 0.8, PRIORITY_BULK: 0.5})
+        with pytest.raises(ValueError):
+            AzureScheduler(reserved_shares={PRIORITY_INTERACTIVE: 1.0, PRIORITY_BULK: 0.0})
+        with pytest.raises(ValueError):
+            AzureScheduler(weights={"urgent": 2})
+        with pytest.raises(ValueError):
+            AzureScheduler().acquire("urgent", 1)
+
+    def test_reserved_slots_leave_last_slot_shared(self):
+        """最後の1つは予約せず、bulk の予約分から減らす"""
+        assert AzureScheduler(concurrency=1).reserved_slots == {PRIORITY_INTERACTIVE: 0, PRIORITY_BULK: 0}
+        assert AzureScheduler(concurrency=2).reserved_slots == {PRIORITY_INTERACTIVE: 1, PRIORITY_BULK: 0}
+        assert AzureScheduler(concurrency=8).reserved_slots == {PRIORITY_INTERACTIVE: 2, PRIORITY_BULK: 1}
+
+    @pytest.mark.parametrize("concurrency", [1, 2])
+    def test_bulk_progresses_with_small_concurrency(self, concurrency):
+        """同時実行数が少なくても、bulk だけのリクエストは順番待ちで止まらない"""
+        scheduler = AzureScheduler(concurrency=concurrency, tpm=30000)
+        admitted, _ = _acquire_in_thread(scheduler, PRIORITY_BULK, tokens=5000)
+
+        assert admitted.wait(1)
+
+
+class TestWeightedFairQueuing:
+    """重み付き公平キューイングのテスト"""
+
+    def test_admission_order_follows_weights(self):
+        """両方のクラスが待っている場合は、重みに比例して interactive を多く開始する"""
+        scheduler = AzureScheduler(concurrency=1, tpm=1_000_000, reserved_shares=NO_RESERVE,
+                                   weights={PRIORITY_INTERACTIVE: 3.0, PRIORITY_BULK: 1.0})
+        holder = scheduler.acquire(PRIORITY_BULK, 3)
+        order = []
+        order_lock = threading.Lock()
+        threads = []
+
+        def run(priority):
+            ticket = scheduler.acquire(priority, 3)
+            with order_lock:
+                order.append(priority[0].upper())
+            scheduler.release(ticket)
+
+        # bulk 4件の後に interactive 4件が順番待ちに入る
+        for index, priority in enumerate([PRIORITY_BULK] * 4 + [PRIORITY_INTERACTIVE] * 4):
+            thread = threading.Thread(target=run, args=(priority,), daemon=True)
+            thread.start()
+            threads.append(thread)
+            _wait_until(lambda: sum(item["queued"] for item in scheduler.metrics()["classes"].values()) == index + 1)
+
+        scheduler.release(holder)
+        for thread in threads:
+            thread.join(2)
+
+        assert "".join(order) == "IIIBIBBB"
+
+    def test_interactive_wait_stays_flat_under_bulk_load(self):
+        """bulk が容量を使い切っている間も、interactive は順番待ちしない"""
+        scheduler = AzureScheduler(concurrency=4, tpm=1_000_000)
+        stop = threading.Event()
+
+        def bulk_worker():
+            while not stop.is_set():
+                with scheduler.slot(PRIORITY_BULK, 1):
+                    time.sleep(0.02)
+
+        workers = [threading.Thread(target=bulk_worker, daemon=True) for _ in range(8)]
+        for worker in workers:
+            worker.start()
+        try:
+            for _ in range(10):
+                with scheduler.slot(PRIORITY_INTERACTIVE, 1):
+                    time.sleep(0.02)
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join(2)
+
+        classes = scheduler.metrics()["classes"]
+        assert classes[PRIORITY_INTERACTIVE]["admitted"] == 10
+        assert classes[PRIORITY_INTERACTIVE]["p95_wait_ms"] < 10
+        assert classes[PRIORITY_BULK]["p95_wait_ms"] > classes[PRIORITY_INTERACTIVE]["p95_wait_ms"]
+
+
+class TestTenantScheduling:
+    """テナント間のDRRとテナントごとの上限のテスト"""
+
+    def _admission_order(self, scheduler, tenants, tokens=DRR_QUANTUM_TOKENS):
+        """同時実行数1で tenants の順に順番待ちに入れ、開始したテナントの順番を返す"""
+        holder = scheduler.acquire(PRIORITY_BULK, 1, tenant="holder")
+        order = []
+        order_lock = threading.Lock()
+        threads = []
+
+        def run(tenant):
+            ticket = scheduler.acquire(PRIORITY_BULK, tokens, tenant=tenant)
+            with order_lock:
+                order.append(tenant)
+            scheduler.release(ticket)
+
+        for index, tenant in enumerate(tenants):
+            thread = threading.Thread(target=run, args=(tenant,), daemon=True)
+            thread.start()
+            threads.append(thread)
+            _wait_until(lambda: scheduler.metrics()["classes"][PRIORITY_BULK]["queued"] == index + 1)
+
+        scheduler.release(holder)
+        for thread in threads:
+            thread.join(2)
+        return "".join(order)
+
+    def test_round_robin_across_tenants(self):
+        """大量に投入したテナントがあっても、後から来たテナントは交互に開始する"""
+        scheduler = AzureScheduler(concurrency=1, tpm=1_000_000, reserved_shares=NO_RESERVE)
+
+        assert self._admission_order(scheduler, ["A"] * 6 + ["B"] * 2) == "ABABAAAA"
+
+    def test_tenant_weights(self):
+        """重み2のテナントは1巡で2回分のトークンを使える"""
+        scheduler = AzureScheduler(concurrency=1, tpm=1_000_000, reserved_shares=NO_RESERVE,
+                                   tenant_weights={"A": 2.0})
+
+        assert self._admission_order(scheduler, ["A"] * 4 + ["B"] * 4) == "AABAABBB"
+
+    def test_large_requests_do_not_starve(self):
+        """1巡の割り当てより大きい呼び出しも、不足分がたまれば開始する"""
+        scheduler = AzureScheduler(concurrency=1, tpm=1_000_000, reserved_shares=NO_RESERVE)
+
+        order = self._admission_order(scheduler, ["A"] * 3 + ["B"] * 3, tokens=DRR_QUANTUM_TOKENS * 5 // 2)
+        assert sorted(order) == sorted("AAABBB")
+        assert "AAA" not in order and "BBB" not in order
+
+    def test_tenant_concurrency_limit(self):
+        """同時実行数の上限に達したテナントは待ち、他のテナントは空いている容量を使える"""
+        scheduler = AzureScheduler(concurrency=4, tpm=1_000_000, reserved_shares=NO_RESERVE,
+                                   tenant_concurrency={None: 1, "hr": 2})
+        sales = scheduler.acquire(PRIORITY_INTERACTIVE, 1, tenant="sales")
+        waiting, _ = _acquire_in_thread(scheduler, PRIORITY_INTERACTIVE, tenant="sales")
+
+        assert not waiting.wait(0.1)
+        hr = [scheduler.acquire(PRIORITY_INTERACTIVE, 1, tenant="hr") for _ in range(2)]
+        assert scheduler.metrics()["tenants"]["sales"]["queued"] == 1
+
+        scheduler.release(sales)
+        assert waiting.wait(1)
+        for ticket in hr:
+            scheduler.release(ticket)
+
+    def test_tenant_tpm_limit(self, monkeypatch):
+        """TPMの上限に達したテナントは、直近60秒の使用量が減るまで待つ"""
+        now = [1000.0]
+        monkeypatch.setattr(scheduler_module.time, "monotonic", lambda: now[0])
+        scheduler = AzureScheduler(concurrency=4, tpm=1_000_000, reserved_shares=NO_RESERVE,
+                                   tenant_tpm={"sales": 100})
+        scheduler.release(scheduler.acquire(PRIORITY_BULK, 80, tenant="sales"))
+
+        assert scheduler._max_tokens(PRIORITY_BULK, "sales") == 100
+        waiting, _ = _acquire_in_thread(scheduler, PRIORITY_BULK, tokens=80, tenant="sales")
+        assert not waiting.wait(0.1)
+        scheduler.release(scheduler.acquire(PRIORITY_BULK, 80, tenant="hr"))
+
+        now[0] += scheduler_module.TPM_WINDOW_SECONDS
+        with scheduler._cond:
+            scheduler._dispatch(now[0])
+        assert waiting.wait(1)
+
+    def test_tenant_metrics(self):
+        """テナントごとの使用量・順番待ちの時間・所要時間を返す"""
+        scheduler = AzureScheduler(concurrency=2, tpm=1_000_000, tenant_concurrency={"sales": 3})
+        with scheduler.slot(PRIORITY_INTERACTIVE, 120, tenant="sales"):
+            time.sleep(0.01)
+        with scheduler.slot(PRIORITY_BULK, 30, tenant="sales"):
+            pass
+
+        sales = scheduler.metrics()["tenants"]["sales"]
+        assert sales["admitted"] == 2
+        assert sales["tokens_admitted"] == 150
+        assert sales["tokens_in_window"] == 150
+        assert sales["in_flight"] == 0
+        assert sales["max_concurrency"] == 3
+        assert sales["max_tpm"] == 0
+        assert sales["avg_latency_ms"] >= 5
+
+    def test_abandoned_wait_leaves_queue(self):
+        """期限切れで順番待ちをやめたテナントは巡回から外れる"""
+        scheduler = AzureScheduler(concurrency=1, tpm=1_000_000, reserved_shares=NO_RESERVE)
+        holder = scheduler.acquire(PRIORITY_BULK, 1, tenant="A")
+
+        with pytest.raises(DeadlineExceeded):
+            scheduler.acquire(PRIORITY_BULK, 1, Deadline(0.05), tenant="B")
+
+        assert "B" not in scheduler._rotation[PRIORITY_BULK]
+        assert scheduler.metrics()["tenants"]["B"]["queued"] == 0
+        scheduler.release(holder)
+        scheduler.release(scheduler.acquire(PRIORITY_BULK, 1, tenant="B"))
+
+    def test_invalid_tenant(self):
+        """形式が正しくないテナントIDはValueError"""
+        scheduler = AzureScheduler()
+
+        with pytest.raises(ValueError, match="テナントID"):
+            scheduler.acquire(PRIORITY_BULK, 1, tenant="a/b")
+        with pytest.raises(ValueError):
+            AzureScheduler(tenant_weights={"sales": 0})
+
+
+class TestDeadline:
+    """順番待ち中の期限切れのテスト"""
+
+    def test_gives_up_at_deadline(self):
+        """期限を過ぎた場合は順番待ちをやめ、キューから外れる"""
+        scheduler = AzureScheduler(concurrency=1, tpm=1_000_000, reserved_shares=NO_RESERVE)
+        holder = scheduler.acquire(PRIORITY_BULK, 1)
+
+        with pytest.raises(DeadlineExceeded):
+            scheduler.acquire(PRIORITY_INTERACTIVE, 1, Deadline(0.05))
+
+        assert scheduler.metrics()["classes"][PRIORITY_INTERACTIVE]["queued"] == 0
+        scheduler.release(holder)
+        scheduler.release(scheduler.acquire(PRIORITY_INTERACTIVE, 1))
+
+
+class TestGetScheduler:
+    """get_scheduler関数のテスト"""
+
+    def test_settings_from_env(self):
+        """同時実行数・TPM・重み・予約分を環境変数から読み込む"""
+        os.environ["TA_AZURE_CONCURRENCY"] = "6"
+        os.environ["TA_AZURE_TPM"] = "60000"
+        os.environ["TA_SCHEDULER_WEIGHTS"] = "interactive=2, bulk=1"
+        os.environ["TA_SCHEDULER_RESERVED"] = "interactive=0.5"
+        reset_scheduler()
+
+        metrics = get_scheduler().metrics()
+
+        assert metrics["concurrency"] == 6
+        assert metrics["tpm"] == 60000
+        assert metrics["classes"][PRIORITY_INTERACTIVE]["weight"] == 2
+        assert metrics["classes"][PRIORITY_INTERACTIVE]["reserved_slots"] == 3
+        assert metrics["classes"][PRIORITY_INTERACTIVE]["reserved_tpm"] == 30000
+
+    def test_tenant_settings_from_env(self):
+        """テナントごとの上限・重みを環境変数から読み込む（テナントIDのない値は全テナントのデフォルト）"""
+        os.environ["TA_TENANT_CONCURRENCY"] = "2,sales=4"
+        os.environ["TA_TENANT_TPM"] = "sales=20000"
+        os.environ["TA_TENANT_WEIGHTS"] = "sales=2"
+        reset_scheduler()
+        scheduler = get_scheduler()
+        scheduler.release(scheduler.acquire(PRIORITY_INTERACTIVE, 1, tenant="sales"))
+        scheduler.release(scheduler.acquire(PRIORITY_INTERACTIVE, 1, tenant="hr"))
+
+        tenants = scheduler.metrics()["tenants"]
+
+        assert (tenants["sales"]["max_concurrency"], tenants["sales"]["max_tpm"], tenants["sales"]["weight"]) == (4, 20000, 2)
+        assert (tenants["hr"]["max_concurrency"], tenants["hr"]["max_tpm"], tenants["hr"]["weight"]) == (2, 0, 1)
+
+    def test_limits_are_divided_by_processes(self):
+        """TA_SCHEDULER_PROCESSES のプロセス数で同時実行数・TPMの上限を分け合う（各プロセスに最低1）"""
+        os.environ["TA_SCHEDULER_PROCESSES"] = "4"
+        os.environ["TA_AZURE_CONCURRENCY"] = "8"
+        os.environ["TA_AZURE_TPM"] = "60000"
+        os.environ["TA_TENANT_CONCURRENCY"] = "2,sales=6"
+        os.environ["TA_TENANT_TPM"] = "sales=20000"
+        reset_scheduler()
+        scheduler = get_scheduler()
+        scheduler.release(scheduler.acquire(PRIORITY_INTERACTIVE, 1, tenant="sales"))
+        scheduler.release(scheduler.acquire(PRIORITY_INTERACTIVE, 1, tenant="hr"))
+
+        metrics = scheduler.metrics()
+
+        assert (metrics["concurrency"], metrics["tpm"]) == (2, 15000)
+        assert (metrics["tenants"]["sales"]["max_concurrency"], metrics["tenants"]["sales"]["max_tpm"]) == (1, 5000)
+        assert metrics["tenants"]["hr"]["max_concurrency"] == 1
+
+    def test_invalid_tenant_env(self):
+        """テナントの設定の形式が正しくない場合はValueError"""
+        os.environ["TA_TENANT_TPM"] = "sales=many"
+        reset_scheduler()
+
+        with pytest.raises(ValueError, match="TA_TENANT_TPM"):
+            get_scheduler()
+
+    def test_disabled(self):
+        """TA_SCHEDULER_ENABLED=0 の場合はNone"""
+        os.environ["TA_SCHEDULER_ENABLED"] = "0"
+        reset_scheduler()
+
+        assert get_scheduler() is None
+
+    def test_invalid_env(self):
+        """形式が正しくない場合はValueError"""
+        os.environ["TA_SCHEDULER_WEIGHTS"] = "urgent=2"
+        reset_scheduler()
+
+        with pytest.raises(ValueError, match="TA_SCHEDULER_WEIGHTS"):
+            get_scheduler()
+
+
+class TestAnalyzeUsesScheduler:
+    """analyze_ta_pdf_with_azure からのスケジューラーの利用のテスト"""
+
+    def test_estimate_request_tokens(self):
+        """入力の概算トークン数に max_tokens を加える"""
+        params = {"messages": [{"role": "user", "content": "a" * 40}], "max_tokens": 100}
+
+        assert estimate_request_tokens(params) == 110
+
+    @patch('ta_interview_briefing.azure_client.get_scheduler')
+    @patch('ta_interview_briefing.azure_client.prepare_report_text', return_value="本文")
+    @patch('ta_interview_briefing.azure_client.AzureOpenAI')
+    def test_waits_with_priority(self, mock_azure_client, mock_prepare, mock_get_scheduler,
+                                 sample_analysis_data, sample_pdf_path):
+        """Azure OpenAIの呼び出しは指定した優先度クラスで順番を待つ"""
+        import json
+        from ta_interview_briefing.azure_client import analyze_ta_pdf_with_azure
+        os.environ["AZURE_OPENAI_ENDPOINT"] = "https://test.openai.azure.com/"
+        os.environ["AZURE_OPENAI_API_KEY"] = "test-key"
+        os.environ["AZURE_OPENAI_DEPLOYMENT_NAME"] = "gpt-4o"
+        os.environ["TA_LLM_CACHE_BACKEND"] = "none"
+        mock_azure_client.return_value.chat.completions.create.return_value.choices = [
+            MagicMock(message=MagicMock(content=json.dumps(sample_analysis_data)))
+        ]
+        scheduler = AzureScheduler(concurrency=1, tpm=1_000_000)
+        mock_get_scheduler.return_value = scheduler
+
+        analyze_ta_pdf_with_azure(sample_pdf_path, priority=PRIORITY_BULK)
+
+        classes = scheduler.metrics()["classes"]
+        assert classes[PRIORITY_BULK]["admitted"] == 1
+        assert classes[PRIORITY_BULK]["in_flight"] == 0
+        assert classes[PRIORITY_BULK]["tokens_in_window"] > 0
@@ -0,0 +1,191 @@
+"""
+本番環境用のサーバー起動（ta_interview_briefing/server.py）のテスト
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from ta_interview_briefing import server
+from ta_interview_briefing.server import available_cpus, event_loop_settings, server_settings
+
+
+@pytest.fixture
+def cgroup(tmp_path, monkeypatch):
+    """cgroupのCPU制限のファイルを一時ディレクトリに差し替える"""
+    paths = {
+        "v2": tmp_path / "cpu.max",
+        "v1_quota": tmp_path / "cpu.cfs_quota_us",
+        "v1_period": tmp_path / "cpu.cfs_period_us",
+    }
+    monkeypatch.setattr(server, "_CGROUP_V2_CPU_MAX", str(paths["v2"]))
+    monkeypatch.setattr(server, "_CGROUP_V1_CPU_QUOTA", str(paths["v1_quota"]))
+    monkeypatch.setattr(server, "_CGROUP_V1_CPU_PERIOD", str(paths["v1_period"]))
+    monkeypatch.setattr(server.os, "sched_getaffinity", lambda pid: set(range(16)), raising=False)
+    return paths
+
+
+class TestAvailableCpus:
+    """available_cpus関数のテスト"""
+
+    def test_without_limit(self, cgroup):
+        """CPU制限がない場合はアフィニティのCPU数"""
+        assert available_cpus() == 16
+
+        cgroup["v2"].write_text("max 100000\n")
+        assert available_cpus() == 16
+
+    def test_cgroup_v2_limit(self, cgroup):
+        """cgroup v2 のCPU制限（端数は切り上げ）"""
+        cgroup["v2"].write_text("250000 100000\n")
+
+        assert available_cpus() == 3
+
+    def test_cgroup_v1_limit(self, cgroup):
+        """cgroup v1 のCPU制限（-1は制限なし）"""
+        cgroup["v1_quota"].write_text("200000\n")
+        cgroup["v1_period"].write_text("100000\n")
+        assert available_cpus() == 2
+
+        cgroup["v1_quota"].write_text("-1\n")
+        assert available_cpus() == 16
+
+    def test_at_least_one(self, cgroup):
+        """1コア未満の制限でも1"""
+        cgroup["v2"].write_text("50000 100000\n")
+
+        assert available_cpus() == 1
+
+
+class TestServerSettings:
+    """server_settings関数のテスト"""
+
+    def test_defaults(self, cgroup):
+        """デフォルトはCPU数のワーカー、事前読み込みあり"""
+        for name in list(os.environ):
+            if name.startswith("TA_SERVER_"):
+                del os.environ[name]
+        cgroup["v2"].write_text("400000 100000\n")
+
+        settings = server_settings()
+
+        assert settings == {
+            "bind": "0.0.0.0:8000",
+            "workers": 4,
+            "max_requests": server.DEFAULT_MAX_REQUESTS,
+            "max_requests_jitter": server.DEFAULT_MAX_REQUESTS_JITTER,
+            "graceful_timeout": server.DEFAULT_GRACEFUL_TIMEOUT,
+            "timeout": server.DEFAULT_WORKER_TIMEOUT,
+            "keepalive": server.DEFAULT_KEEPALIVE,
+            "preload_app": True,
+        }
+
+    def test_environment_variables(self):
+        """環境変数で上書きする（max_requests は0で無効）"""
+        os.environ.update({
+            "TA_SERVER_HOST": "127.0.0.1",
+            "TA_SERVER_PORT": "9000",
+            "TA_SERVER_WORKERS": "3",
+            "TA_SERVER_MAX_REQUESTS": "0",
+            "TA_SERVER_GRACEFUL_TIMEOUT": "10",
+            "TA_SERVER_PRELOAD": "false",
+        })
+
+        settings = server_settings()
+
+        assert settings["bind"] == "127.0.0.1:9000"
+        assert settings["workers"] == 3
+        assert settings["max_requests"] == 0
+        assert settings["graceful_timeout"] == 10
+        assert settings["preload_app"] is False
+
+    def test_default_workers_fit_azure_concurrency(self, cgroup):
+        """デフォルトのワーカー数は、スケジューラーの同時実行数までに抑える"""
+        os.environ.pop("TA_SERVER_WORKERS", None)
+        os.environ["TA_AZURE_CONCURRENCY"] = "3"
+        assert server_settings()["workers"] == 3
+
+        os.environ["TA_SCHEDULER_ENABLED"] = "0"
+        assert server_settings()["workers"] == 16
+
+    def test_workers_over_azure_concurrency(self):
+        """指定したワーカー数が同時実行数を超える場合はValueError"""
+        os.environ["TA_SERVER_WORKERS"] = "4"
+        os.environ["TA_AZURE_CONCURRENCY"] = "2"
+
+        with pytest.raises(ValueError, match="TA_AZURE_CONCURRENCY"):
+            server_settings()
+
+    def test_invalid_number(self):
+        """数値でない場合はValueError"""
+        os.environ["TA_SERVER_WORKERS"] = "many"
+
+        with pytest.raises(ValueError):
+            server_settings()
+
+
+class TestGunicornApplication:
+    """gunicorn_application関数のテスト"""
+
+    def test_applies_settings(self):
+        """設定とワーカーのクラスをgunicornに反映する"""
+        pytest.importorskip("gunicorn")
+        os.environ["TA_SERVER_WORKERS"] = "5"
+        os.environ["TA_SERVER_MAX_REQUESTS_JITTER"] = "7"
+
+        application = server.gunicorn_application(server_settings())
+
+        assert application.cfg.workers == 5
+        assert application.cfg.max_requests_jitter == 7
+        assert application.cfg.preload_app is True
+        from ta_interview_briefing.workers import BriefingWorker
+        assert application.cfg.worker_class is BriefingWorker
+        loop, http = event_loop_settings()
+        assert BriefingWorker.CONFIG_KWARGS == {"loop": loop, "http": http}
+
+    def test_load_preloads_app_and_fonts(self):
+        """アプリを読み込む際に、フォント・スタイルの初期化を済ませる"""
+        from reportlab.pdfbase import pdfmetrics
+        from ta_interview_briefing import pdf_builder
+        from ta_interview_briefing.api import app
+
+        assert server.load_app() is app
+        assert pdf_builder._renderer_ready
+        assert "HeiseiKakuGo-W5" in pdfmetrics.getRegisteredFontNames()
+
+
+class TestMain:
+    """main関数のテスト"""
+
+    def test_shares_scheduler_limits_with_workers(self):
+        """ワーカーのスケジューラーが上限を分け合うよう、ワーカー数を TA_SCHEDULER_PROCESSES に設定する"""
+        os.environ["TA_SERVER_WORKERS"] = "3"
+
+        with patch.object(server, "gunicorn_application") as application:
+            server.main()
+
+        application.return_value.run.assert_called_once()
+        assert os.environ["TA_SCHEDULER_PROCESSES"] == "3"
+
+    def test_uvicorn_fallback_does_not_recycle_workers(self):
+        """gunicornがない場合はuvicornで起動し、終了したワーカーが起動し直されないため入れ替えない"""
+        os.environ["TA_SERVER_WORKERS"] = "2"
+
+        with patch.object(server, "gunicorn_application", side_effect=ImportError), \
+                patch("uvicorn.run") as run:
+            server.main()
+
+        kwargs = run.call_args.kwargs
+        assert kwargs["workers"] == 2
+        assert "limit_max_requests" not in kwargs
+
+    def test_invalid_settings_exit(self):
+        """設定が正しくない場合は起動せずに終了する"""
+        os.environ["TA_SERVER_WORKERS"] = "9"
+        os.environ["TA_AZURE_CONCURRENCY"] = "8"
+
+        with patch.object(server, "gunicorn_application") as application, pytest.raises(SystemExit):
+            server.main()
+
+        application.assert_not_called()
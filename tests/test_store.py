@@ -0,0 +1,150 @@
+"""
+解析結果ストア（ta_interview_briefing/store.py）のテスト
+"""
+
+import os
+import sqlite3
+import pytest
+from ta_interview_briefing.store import AnalysisStore, get_analysis_store, reset_analysis_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AnalysisStore(path=str(tmp_path / "analyses.sqlite3"))
+
+
+class TestAnalysisStore:
+    """AnalysisStoreのテスト"""
+
+    def test_save_and_get(self, store, sample_analysis_data):
+        """保存した解析結果をIDで取得できる"""
+        usage = {"prompt_tokens": 1200, "completion_tokens": 300, "total_tokens": 1500, "cached": False}
+        saved = store.save(
+            sample_analysis_data, "hash1", "gpt-4o", "1",
+            candidate_id="C-001", candidate_name="山田太郎", usage=usage
+        )
+
+        record = store.get(saved.id)
+
+        assert record == saved
+        assert record.result.model_dump() == sample_analysis_data
+        assert record.candidate_id == "C-001"
+        assert record.total_tokens == 1500
+        assert store.get("unknown") is None
+
+    def test_same_content_updates_existing(self, store, sample_analysis_data):
+        """同じPDF・モデル・プロンプトのバージョンで保存した場合はIDを維持して更新する"""
+        first = store.save(sample_analysis_data, "hash1", "gpt-4o", "1", candidate_id="C-001")
+        updated_data = {**sample_analysis_data, "summary": "更新後の要約"}
+        second = store.save(updated_data, "hash1", "gpt-4o", "1")
+
+        assert second.id == first.id
+        assert second.created_at == first.created_at
+        assert second.updated_at >= first.updated_at
+        assert second.result.summary == "更新後の要約"
+        # 候補者IDを省略した場合は保存済みの値を維持する
+        assert second.candidate_id == "C-001"
+
+    def test_find_by_content_includes_model_and_prompt_version(self, store, sample_analysis_data):
+        """モデルやプロンプトのバージョンが異なる解析結果は別のレコードになる"""
+        saved = store.save(sample_analysis_data, "hash1", "gpt-4o", "1")
+
+        assert store.find_by_content("hash1", "gpt-4o", "1").id == saved.id
+        assert store.find_by_content("hash1", "gpt-4o", "2") is None
+        assert store.find_by_content("hash1", "gpt-4o-mini", "1") is None
+
+    def test_find_by_candidate(self, store, sample_analysis_data):
+        """候補者IDまたは候補者名で新しい順に検索できる"""
+        old = store.save(sample_analysis_data, "hash1", "gpt-4o", "1", candidate_id="C-001", candidate_name="山田太郎")
+        new = store.save(sample_analysis_data, "hash2", "gpt-4o", "1", candidate_name="山田太郎")
+        store.save(sample_analysis_data, "hash3", "gpt-4o", "1", candidate_id="C-002", candidate_name="佐藤花子")
+
+        assert [record.id for record in store.find_by_candidate("山田太郎")] == [new.id, old.id]
+        assert [record.id for record in store.find_by_candidate("C-001")] == [old.id]
+        assert len(store.find_by_candidate("山田太郎", limit=1)) == 1
+        assert store.find_by_candidate("不明") == []
+
+    def test_indexes(self, store):
+        """検索に使う列にインデックスが張られている"""
+        with sqlite3.connect(store.path) as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM analyses WHERE candidate_id = ?", ("C-001",)
+            ).fetchall()
+            indexes = {row[1] for row in conn.execute("PRAGMA index_list(analyses)")}
+
+        assert "idx_analyses_candidate_id" in str(plan)
+        assert {"idx_analyses_content", "idx_analyses_candidate_name", "idx_analyses_created_at"} <= indexes
+
+    def test_iter_by_requisition(self, store, sample_analysis_data):
+        """求人IDの解析結果を作成順にページ単位で読み出せる"""
+        saved = [
+            store.save(sample_analysis_data, f"hash{i}", "gpt-4o", "1", requisition_id="R-001")
+            for i in range(5)
+        ]
+        store.save(sample_analysis_data, "other", "gpt-4o", "1", requisition_id="R-002")
+
+        records = list(store.iter_by_requisition("R-001", page_size=2))
+
+        assert [record.id for record in records] == [record.id for record in saved]
+        assert store.has_requisition("R-001")
+        assert not store.has_requisition("R-999")
+        assert list(store.iter_by_requisition("R-999")) == []
+
+    def test_analysis_in_multiple_requisitions(self, store, sample_analysis_data):
+        """同じ解析結果を別の求人に紐づけても、元の求人からは外れない"""
+        saved = store.save(sample_analysis_data, "hash1", "gpt-4o", "1", requisition_id="R-001")
+        store.save(sample_analysis_data, "hash1", "gpt-4o", "1", requisition_id="R-002")
+        linked = store.link_requisition(saved.id, "R-003")
+
+        for requisition_id in ("R-001", "R-002", "R-003"):
+            assert [record.id for record in store.iter_by_requisition(requisition_id)] == [saved.id]
+        assert linked.requisition_id == "R-003"
+        assert store.link_requisition("missing", "R-001") is None
+
+    def test_migrates_requisition_links(self, tmp_path, sample_analysis_data):
+        """紐づけのテーブルがない以前のストアは、analyses.requisition_id から紐づけを作る"""
+        path = str(tmp_path / "old.sqlite3")
+        saved = AnalysisStore(path=path).save(sample_analysis_data, "hash1", "gpt-4o", "1", requisition_id="R-001")
+        with sqlite3.connect(path) as conn:
+            conn.execute("DROP TABLE requisition_analyses")
+
+        store = AnalysisStore(path=path)
+
+        assert [record.id for record in store.iter_by_requisition("R-001")] == [saved.id]
+
+    def test_migrates_store_without_requisition_column(self, tmp_path, sample_analysis_data):
+        """求人IDの列がない以前のストアには列を追加して開く"""
+        path = str(tmp_path / "old.sqlite3")
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                "CREATE TABLE analyses (id TEXT PRIMARY KEY, candidate_id TEXT, candidate_name TEXT,"
+                " content_hash TEXT NOT NULL, model TEXT NOT NULL, prompt_version TEXT NOT NULL,"
+                " result TEXT NOT NULL, prompt_tokens INTEGER NOT NULL DEFAULT 0,"
+                " completion_tokens INTEGER NOT NULL DEFAULT 0, total_tokens INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+        store = AnalysisStore(path=path)
+        saved = store.save(sample_analysis_data, "hash1", "gpt-4o", "1", requisition_id="R-001")
+
+        assert store.get(saved.id).requisition_id == "R-001"
+        assert store.has_requisition("R-001")
+
+
+class TestGetAnalysisStore:
+    """get_analysis_store関数のテスト"""
+
+    def test_disabled_by_env(self):
+        """TA_ANALYSIS_STORE_ENABLED=0 の場合はNone"""
+        os.environ["TA_ANALYSIS_STORE_ENABLED"] = "0"
+        reset_analysis_store()
+
+        assert get_analysis_store() is None
+
+    def test_path_from_env(self, tmp_path):
+        """TA_ANALYSIS_STORE_PATH のパスに作成される"""
+        os.environ["TA_ANALYSIS_STORE_PATH"] = str(tmp_path / "custom.sqlite3")
+        reset_analysis_store()
+
+        assert get_analysis_store().path == str(tmp_path / "custom.sqlite3")
+        assert (tmp_path / "custom.sqlite3").exists()
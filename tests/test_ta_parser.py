@@ -0,0 +1,148 @@
+"""
+TAレポートパーサーのテスト
+"""
+
+import pytest
+from ta_interview_briefing.ta_parser import (
+    is_boilerplate_line,
+    parse_ta_report,
+    format_ta_report,
+    compact_ta_report_text,
+)
+
+
+SAMPLE_TA_TEXT = """Talent Analytics 受検結果レポート
+【特性スコア】
+ヴァイタリティ 7
+人あたり：8点
+チームワーク 6
+自己信頼 9.5
+【総合所見】
+エネルギッシュで行動力があり、
+周囲を巻き込みながら物事を進める
+タイプです。
+※スコアは1〜10の10段階で表示しています
+- 1 -
+
+Talent Analytics 受検結果レポート
+【面接での確認事項】
+困難な状況での粘り強さを確認してください。
+Copyright (C) Example Inc. All Rights Reserved.
+- 2 -
+"""
+
+
+class TestIsBoilerplateLine:
+    """定型文判定のテスト"""
+
+    def test_exact_phrase(self):
+        """完全一致する定型文"""
+        assert is_boilerplate_line("Talent Analytics 受検結果レポート")
+        assert is_boilerplate_line("　スコアの見方　")
+
+    def test_prefix_phrase(self):
+        """前方一致する定型文"""
+        assert is_boilerplate_line("Copyright (C) Example Inc.")
+        assert is_boilerplate_line("※スコアは1〜10の10段階で表示しています")
+
+    def test_page_numbers(self):
+        """ページ番号だけの行"""
+        assert is_boilerplate_line("- 3 -")
+        assert is_boilerplate_line("3 / 12")
+        assert is_boilerplate_line("P.4")
+
+    def test_content_line(self):
+        """本文の行は除去しない"""
+        assert not is_boilerplate_line("エネルギッシュで行動力があります。")
+        assert not is_boilerplate_line("ヴァイタリティ 7")
+        assert not is_boilerplate_line("")
+
+
+class TestParseTaReport:
+    """TAレポート解析のテスト"""
+
+    def test_extracts_scores(self):
+        """スコア行が特性名ごとに抽出される"""
+        report = parse_ta_report(SAMPLE_TA_TEXT)
+
+        assert report.scores == {
+            "特性スコア": {
+                "ヴァイタリティ": "7",
+                "人あたり": "8点",
+                "チームワーク": "6",
+                "自己信頼": "9.5",
+            }
+        }
+
+    def test_keeps_score_units(self):
+        """スコアは単位を含む元の表記のまま保持される"""
+        report = parse_ta_report("【特性】\nストレス耐性 62%\n協調性：3/10\n自己信頼 8.5pt")
+
+        assert report.scores["特性"] == {"ストレス耐性": "62%", "協調性": "3/10", "自己信頼": "8.5pt"}
+
+    def test_scores_stay_in_their_sections(self):
+        """同じ特性名のスコアが別の見出しにある場合も、それぞれの見出しに残る"""
+        report = parse_ta_report("【今回】\n協調性 7\n【前回】\n協調性 5")
+
+        assert report.scores == {"今回": {"協調性": "7"}, "前回": {"協調性": "5"}}
+        assert format_ta_report(report) == "■今回\n協調性: 7\n\n■前回\n協調性: 5"
+
+    def test_bullet_items_are_body(self):
+        """記号で始まる行が続く場合は見出しではなく箇条書きの本文とみなす"""
+        report = parse_ta_report("【強み】\n● 協調性が高い\n● 責任感が強い\n■ 職務適性\n営業職に向いています。")
+
+        assert report.sections["強み"] == "● 協調性が高い\n● 責任感が強い"
+        assert report.sections["職務適性"] == "営業職に向いています。"
+
+    def test_extracts_sections(self):
+        """見出しごとに本文が結合される"""
+        report = parse_ta_report(SAMPLE_TA_TEXT)
+
+        assert report.sections["総合所見"] == "エネルギッシュで行動力があり、周囲を巻き込みながら物事を進めるタイプです。"
+        assert report.sections["面接での確認事項"] == "困難な状況での粘り強さを確認してください。"
+        # スコアだけの見出しは本文なしとして残る
+        assert report.sections["特性スコア"] == ""
+
+    def test_counts_dropped_boilerplate(self):
+        """定型文の行数が記録される"""
+        report = parse_ta_report(SAMPLE_TA_TEXT)
+
+        assert report.dropped_lines == 6
+        assert report.is_recognized
+
+    def test_unrecognized_layout(self):
+        """TAレポートのレイアウトでない場合は構造化しない"""
+        report = parse_ta_report("普通の文章です。\n見出しもスコアもありません。")
+
+        assert report.scores == {}
+        assert report.sections == {}
+        assert not report.is_recognized
+
+
+class TestCompactTaReportText:
+    """プロンプト用の圧縮テキストのテスト"""
+
+    def test_format_ta_report(self):
+        """スコアと所見がコンパクトな形式で出力される"""
+        text = format_ta_report(parse_ta_report(SAMPLE_TA_TEXT))
+
+        assert text.startswith("■特性スコア\nヴァイタリティ: 7\n人あたり: 8点\n")
+        assert "自己信頼: 9.5" in text
+        assert "■総合所見\n" in text
+
+    def test_compact_text_is_shorter(self):
+        """定型文が除去されて元のテキストより短くなる"""
+        compact_text = compact_ta_report_text(SAMPLE_TA_TEXT)
+
+        assert len(compact_text) < len(SAMPLE_TA_TEXT)
+        assert "受検結果レポート" not in compact_text
+        assert "Copyright" not in compact_text
+        assert "- 1 -" not in compact_text
+
+    def test_unrecognized_text_keeps_content(self):
+        """レイアウトを認識できない場合も本文は残り、定型文だけが除去される"""
+        text = "自由記述の本文です。\n無断転載・複製を禁じます\n続きの本文です。"
+
+        compact_text = compact_ta_report_text(text)
+
+        assert compact_text == "自由記述の本文です。\n続きの本文です。"
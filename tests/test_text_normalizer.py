@@ -0,0 +1,89 @@
+"""
+テキスト正規化のテスト
+"""
+
+import pytest
+from ta_interview_briefing.text_normalizer import (
+    estimate_tokens,
+    find_repeated_lines,
+    normalize_pages,
+)
+
+
+def _make_pages(count):
+    """ヘッダー・フッター付きのページを生成する"""
+    return [
+        f"株式会社サンプル 社外秘\n"
+        f"第{page_num}章\n"
+        f"本文{page_num}の内容です。\n"
+        f"  重要な   記述   {page_num}\n\n\n\n"
+        f"まとめ{page_num}\n"
+        f"Page {page_num} / {count}"
+        for page_num in range(1, count + 1)
+    ]
+
+
+class TestFindRepeatedLines:
+    """繰り返し行検出のテスト"""
+
+    def test_detects_header_and_footer(self):
+        """ヘッダーとページ番号付きフッターが検出される"""
+        pages = _make_pages(5)
+
+        repeated = find_repeated_lines(pages)
+
+        # ヘッダー（完全一致と数字を伏せた指紋）とページ番号付きフッター
+        assert len(repeated) == 3
+
+    def test_page_numbers_removed_but_numbered_body_kept(self):
+        """ページ番号は除去されるが、数字だけが異なる本文行は残る"""
+        normalized, _ = normalize_pages(_make_pages(5))
+
+        assert normalized[0] == "第1章\n本文1の内容です。\n重要な 記述 1\n\nまとめ1"
+        assert normalized[4] == "第5章\n本文5の内容です。\n重要な 記述 5\n\nまとめ5"
+
+    def test_skips_short_documents(self):
+        """ページ数が少ない場合は検出しない"""
+        assert find_repeated_lines(_make_pages(2)) == set()
+
+
+class TestNormalizePages:
+    """ページ正規化のテスト"""
+
+    def test_removes_repeated_lines(self):
+        """繰り返し行が除去され、本文は残る"""
+        pages = [
+            "ヘッダー\n1ページ目の本文\nフッター",
+            "ヘッダー\n2ページ目は別の内容\nフッター",
+            "ヘッダー\n最後のページ\nフッター",
+        ]
+
+        normalized, stats = normalize_pages(pages)
+
+        assert normalized == ["1ページ目の本文", "2ページ目は別の内容", "最後のページ"]
+        assert stats["removed_lines"] == 6
+        assert stats["after_chars"] < stats["before_chars"]
+        assert stats["after_tokens"] < stats["before_tokens"]
+
+    def test_collapses_whitespace(self):
+        """余分な空白と空行が詰められる"""
+        normalized, _ = normalize_pages(["A   B\t C\n\n\n\nD  "])
+
+        assert normalized == ["A B C\n\nD"]
+
+    def test_identical_pages_are_kept(self):
+        """全ページが同一内容の場合は内容を残す"""
+        normalized, stats = normalize_pages(["同じ内容"] * 3)
+
+        assert normalized == ["同じ内容"] * 3
+        assert stats["removed_lines"] == 0
+
+
+class TestEstimateTokens:
+    """トークン数概算のテスト"""
+
+    def test_japanese_and_ascii(self):
+        """全角は1文字1トークン、半角は4文字1トークンで数える"""
+        assert estimate_tokens("日本語") == 3
+        assert estimate_tokens("abcdefgh") == 2
+        assert estimate_tokens("") == 0
@@ -0,0 +1,187 @@
+"""
+アップロードの受け取り（ta_interview_briefing/uploads.py）のテスト
+"""
+
+import os
+import asyncio
+import hashlib
+import tempfile
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ta_interview_briefing.api import app
+from ta_interview_briefing.uploads import spool_upload, UploadTooLarge, MULTIPART_OVERHEAD_BYTES
+
+
+class _ChunkedReader:
+    """UploadFile.read(size) の代わりに、指定サイズ分のデータをその場で生成して返す"""
+
+    def __init__(self, total: int):
+        self.remaining = total
+        self.digest = hashlib.sha256()
+
+    async def read(self, size: int = -1) -> bytes:
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        self.remaining -= size
+        chunk = os.urandom(size)
+        self.digest.update(chunk)
+        return chunk
+
+
+@pytest.fixture
+def spool_dir(tmp_path, monkeypatch):
+    """一時ファイルの書き出し先をテスト用のディレクトリにする"""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+
+class TestSpoolUpload:
+    """spool_upload関数のテスト"""
+
+    def test_size_and_hash(self, spool_dir):
+        """書き出した内容のサイズとSHA-256を返す"""
+        reader = _ChunkedReader(3 * 1024 * 1024 + 123)
+
+        upload = asyncio.run(spool_upload(reader, max_bytes=0, chunk_size=1024 * 1024))
+
+        assert upload.size == 3 * 1024 * 1024 + 123
+        assert os.path.getsize(upload.path) == upload.size
+        assert upload.sha256 == reader.digest.hexdigest()
+        with open(upload.path, "rb") as f:
+            assert hashlib.sha256(f.read()).hexdigest() == upload.sha256
+
+    def test_peak_memory_is_bounded_by_chunk_size(self, spool_dir):
+        """30MBのアップロードでも、メモリのピークはチャンク数個分に収まる"""
+        chunk_size = 256 * 1024
+        reader = _ChunkedReader(30 * 1024 * 1024)
+
+        tracemalloc.start()
+        try:
+            upload = asyncio.run(spool_upload(reader, max_bytes=0, chunk_size=chunk_size))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert upload.size == 30 * 1024 * 1024
+        assert peak < 4 * chunk_size
+
+    def test_too_large_removes_partial_file(self, spool_dir):
+        """上限を超えた時点で打ち切り、書きかけの一時ファイルを削除する"""
+        reader = _ChunkedReader(10 * 1024)
+
+        with pytest.raises(UploadTooLarge) as exc_info:
+            asyncio.run(spool_upload(reader, max_bytes=4096, chunk_size=1024))
+
+        assert exc_info.value.status_code == 413
+        # 上限を超えたチャンクより後は読み込まない
+        assert reader.remaining == 10 * 1024 - 5 * 1024
+        assert list(spool_dir.iterdir()) == []
+
+    def test_limit_from_env(self, spool_dir, monkeypatch):
+        """上限を省略した場合は TA_MAX_UPLOAD_BYTES を使う"""
+        monkeypatch.setenv("TA_MAX_UPLOAD_BYTES", "100")
+
+        with pytest.raises(UploadTooLarge):
+            asyncio.run(spool_upload(_ChunkedReader(101)))
+
+
+class TestUploadLimitEndpoints:
+    """APIのアップロードサイズ制限のテスト"""
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    def test_content_length_over_limit(self, client, monkeypatch):
+        """Content-Length が上限を超える場合は、エンドポイントを呼ばずに413を返す"""
+        monkeypatch.setenv("TA_MAX_UPLOAD_BYTES", "1000")
+        content = b"%PDF-1.4\n" + b"0" * (MULTIPART_OVERHEAD_BYTES + 2000)
+
+        with patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure') as mock_analyze:
+            response = client.post("/analyze", files={"file": ("test.pdf", content, "application/pdf")})
+
+        assert response.status_code == 413
+        mock_analyze.assert_not_called()
+
+    def test_chunked_body_over_limit(self, client, monkeypatch):
+        """Content-Length のない（chunked）リクエストも、受信量が上限を超えた時点で413を返す"""
+        monkeypatch.setenv("TA_MAX_UPLOAD_BYTES", "1000")
+        boundary = "testboundary"
+
+        def body():
+            yield (
+                f"--{boundary}\r\n"
+                'Content-Disposition: form-data; name="file"; filename="test.pdf"\r\n'
+                "Content-Type: application/pdf\r\n\r\n"
+            ).encode()
+            for _ in range(100):
+                yield b"0" * 1024
+            yield f"\r\n--{boundary}--\r\n".encode()
+
+        with patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure') as mock_analyze:
+            response = client.post(
+                "/analyze", content=body(),
+                headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}
+            )
+
+        assert response.status_code == 413
+        mock_analyze.assert_not_called()
+
+    def test_file_over_limit(self, client, monkeypatch):
+        """ファイルが上限を超える場合は413を返す（multipartの余裕分の範囲内のリクエスト）"""
+        monkeypatch.setenv("TA_MAX_UPLOAD_BYTES", "1000")
+
+        with patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure') as mock_analyze:
+            response = client.post(
+                "/generate_pdf", files={"file": ("test.pdf", b"0" * 2000, "application/pdf")}
+            )
+
+        assert response.status_code == 413
+        mock_analyze.assert_not_called()
+
+    def test_multiple_files_are_limited_per_file(self, client, monkeypatch):
+        """/estimate はファイルごとに上限を確認し、上限内のファイルを複数アップロードできる"""
+        monkeypatch.setenv("TA_MAX_UPLOAD_BYTES", str(MULTIPART_OVERHEAD_BYTES))
+        content = b"%PDF-1.4\n" + b"0" * (MULTIPART_OVERHEAD_BYTES - 100)
+        item = {"pdf_path": "/tmp/x.pdf", "prompt_tokens": 1, "total_tokens": 1}
+        report = {
+            "files": [item] * 3,
+            "totals": {"files": 3, "requests": 3, "cached": 0, "errors": 0, "prompt_tokens": 3, "completion_tokens": 0,
+                       "total_tokens": 3, "cost": 0.0, "rate_limit_tokens": 3, "expected_wall_seconds": 1,
+                       "bottleneck": "tpm"},
+            "settings": {"currency": "USD", "tpm": 30000, "rpm": 180},
+        }
+
+        with patch('ta_interview_briefing.api.estimate_pdfs', return_value=report) as mock_estimate:
+            response = client.post("/estimate", files=[
+                ("files", (f"{index}.pdf", content, "application/pdf")) for index in range(3)
+            ])
+
+        assert response.status_code == 200
+        assert len(mock_estimate.call_args.args[0]) == 3
+
+    def test_too_many_files(self, client, monkeypatch):
+        """ファイル数が TA_MAX_UPLOAD_FILES を超える場合は413を返す"""
+        monkeypatch.setenv("TA_MAX_UPLOAD_FILES", "2")
+
+        with patch('ta_interview_briefing.api.estimate_pdfs') as mock_estimate:
+            response = client.post("/estimate", files=[
+                ("files", (f"{index}.pdf", b"%PDF-1.4\n", "application/pdf")) for index in range(3)
+            ])
+
+        assert response.status_code == 413
+        mock_estimate.assert_not_called()
+
+    def test_content_hash_passed_to_analysis(self, client, sample_analysis_data):
+        """アップロード時に計算したSHA-256を解析に渡す"""
+        content = b"%PDF-1.4\n" + b"0" * 5000
+
+        with patch('ta_interview_briefing.api.analyze_ta_pdf_with_azure',
+                   return_value=sample_analysis_data) as mock_analyze:
+            response = client.post("/analyze", files={"file": ("test.pdf", content, "application/pdf")})
+
+        assert response.status_code == 200
+        assert mock_analyze.call_args.kwargs["content_hash"] == hashlib.sha256(content).hexdigest()
@@ -0,0 +1,181 @@
+"""
+フォルダ監視モード（watcher.py）のテスト
+"""
+
+import os
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+from ta_interview_briefing.watcher import FolderWatcher
+
+
+def _write_pdf(directory, name, content=b"%PDF-1.4\n"):
+    """ダミーのPDFファイルを作成する"""
+    path = directory / name
+    path.write_bytes(content)
+    return path
+
+
+def _fake_process(pdf_path):
+    """解析とPDF生成の代わりにブリーフィングPDFを作成する"""
+    output_path = pdf_path.parent / f"{pdf_path.stem}_interview_briefing.pdf"
+    output_path.write_bytes(b"%PDF-1.4\n")
+    return output_path
+
+
+@pytest.fixture
+def mock_process():
+    """1ファイルの処理をモックする"""
+    with patch('ta_interview_briefing.watcher._process_file', side_effect=_fake_process) as mock, \
+         patch('ta_interview_briefing.watcher.warm_up_renderer'):
+        yield mock
+
+
+class TestFolderWatcher:
+    """FolderWatcherのテスト"""
+
+    def test_processes_new_pdf(self, tmp_path, mock_process):
+        """追加されたPDFが処理され、ブリーフィングPDFは処理対象にならない"""
+        watcher = FolderWatcher(str(tmp_path), debounce_seconds=0)
+        pdf_path = _write_pdf(tmp_path, "candidate_1.pdf")
+        (tmp_path / "memo.txt").write_text("memo")
+
+        watcher.scan()
+        assert watcher.dispatch_ready() == [pdf_path]
+        watcher.shutdown()
+
+        assert (tmp_path / "candidate_1_interview_briefing.pdf").exists()
+        watcher.scan()
+        assert watcher.dispatch_ready() == []
+        mock_process.assert_called_once_with(pdf_path)
+
+    def test_waits_until_file_is_stable(self, tmp_path, mock_process):
+        """書き込み途中（サイズが変わり続ける）のファイルはデバウンス時間が経つまで処理しない"""
+        watcher = FolderWatcher(str(tmp_path), debounce_seconds=60)
+        pdf_path = _write_pdf(tmp_path, "candidate_1.pdf")
+        watcher.scan()
+        assert watcher.dispatch_ready() == []
+
+        pdf_path.write_bytes(b"%PDF-1.4\n" + b"0" * 100)
+        with patch('ta_interview_briefing.watcher.time.monotonic', return_value=1e12):
+            # 前回の観測から状態が変わったので、経過時間によらず待ち直す
+            assert watcher.dispatch_ready() == []
+        with patch('ta_interview_briefing.watcher.time.monotonic', return_value=1e12 + 61):
+            assert watcher.dispatch_ready() == [pdf_path]
+        watcher.shutdown()
+        mock_process.assert_called_once_with(pdf_path)
+
+    def test_reprocesses_changed_pdf(self, tmp_path, mock_process):
+        """処理済みのPDFが更新されたら再処理する"""
+        watcher = FolderWatcher(str(tmp_path), debounce_seconds=0)
+        pdf_path = _write_pdf(tmp_path, "candidate_1.pdf")
+        watcher.scan()
+        watcher.dispatch_ready()
+        watcher.shutdown()
+
+        _write_pdf(tmp_path, "candidate_1.pdf", b"%PDF-1.4\nupdated\n")
+        watcher.scan()
+        assert watcher.dispatch_ready() == [pdf_path]
+        watcher.shutdown()
+        assert mock_process.call_count == 2
+
+    def test_skips_up_to_date_briefings_on_startup(self, tmp_path, mock_process):
+        """起動時にブリーフィングPDFが最新のファイルは処理しない"""
+        done = _write_pdf(tmp_path, "done.pdf")
+        briefing = _fake_process(done)
+        os.utime(done, ns=(1_000_000_000, 1_000_000_000))
+        os.utime(briefing, ns=(2_000_000_000, 2_000_000_000))
+        todo = _write_pdf(tmp_path, "todo.pdf")
+
+        watcher = FolderWatcher(str(tmp_path), debounce_seconds=0)
+        watcher.mark_existing_briefings()
+        watcher.scan()
+        assert watcher.dispatch_ready() == [todo]
+        watcher.shutdown()
+
+    def test_failure_does_not_stop_watcher(self, tmp_path, mock_process, capsys):
+        """処理に失敗してもエラーを表示して監視を続ける"""
+        mock_process.side_effect = RuntimeError("API error")
+        watcher = FolderWatcher(str(tmp_path), debounce_seconds=0)
+        _write_pdf(tmp_path, "candidate_1.pdf")
+        watcher.scan()
+        watcher.dispatch_ready()
+        watcher.shutdown()
+
+        assert "API error" in capsys.readouterr().out
+
+    def test_failed_file_is_retried(self, tmp_path, mock_process):
+        """一時的に失敗したファイルは内容が変わらなくても再処理される"""
+        pdf_path = _write_pdf(tmp_path, "candidate_1.pdf")
+        mock_process.side_effect = [RuntimeError("429 Too Many Requests"), _fake_process(pdf_path)]
+        watcher = FolderWatcher(str(tmp_path), debounce_seconds=0, retry_seconds=0)
+        watcher.scan()
+        assert watcher.dispatch_ready() == [pdf_path]
+        watcher.shutdown()
+
+        # 失敗したファイルは待機中に戻り、再スキャンしなくても再投入される
+        assert watcher.dispatch_ready() == [pdf_path]
+        watcher.shutdown()
+        assert mock_process.call_count == 2
+
+        # 成功した後は再処理しない
+        watcher.scan()
+        assert watcher.dispatch_ready() == []
+        watcher.shutdown()
+
+    def test_retry_waits_for_retry_seconds(self, tmp_path, mock_process):
+        """失敗したファイルは retry_seconds が経過するまで再投入しない"""
+        mock_process.side_effect = RuntimeError("API error")
+        watcher = FolderWatcher(str(tmp_path), debounce_seconds=0, retry_seconds=60)
+        _write_pdf(tmp_path, "candidate_1.pdf")
+        watcher.scan()
+        watcher.dispatch_ready()
+        watcher.shutdown()
+
+        watcher.scan()
+        assert watcher.dispatch_ready() == []
+        assert mock_process.call_count == 1
+
+    def test_retry_backs_off_exponentially(self, tmp_path, mock_process):
+        """失敗するたびに再処理までの間隔を2倍にし、上限で止める"""
+        watcher = FolderWatcher(str(tmp_path), retry_seconds=30, max_retry_seconds=100)
+
+        assert [watcher._retry_delay(failures) for failures in range(1, 5)] == [30, 60, 100, 100]
+
+    def test_gives_up_after_max_attempts(self, tmp_path, mock_process, capsys):
+        """同じ内容のまま max_attempts 回失敗したファイルは、更新されるまで処理しない"""
+        mock_process.side_effect = RuntimeError("invalid PDF")
+        watcher = FolderWatcher(str(tmp_path), debounce_seconds=0, retry_seconds=0, max_attempts=3)
+        pdf_path = _write_pdf(tmp_path, "candidate_1.pdf")
+        watcher.scan()
+        for _ in range(3):
+            assert watcher.dispatch_ready() == [pdf_path]
+            watcher.shutdown()
+
+        watcher.scan()
+        assert watcher.dispatch_ready() == []
+        assert mock_process.call_count == 3
+        assert "3回失敗したため" in capsys.readouterr().out
+
+        # ファイルが更新されたら再処理する
+        mock_process.side_effect = _fake_process
+        _write_pdf(tmp_path, "candidate_1.pdf", b"%PDF-1.4\nfixed\n")
+        watcher.scan()
+        assert watcher.dispatch_ready() == [pdf_path]
+        watcher.shutdown()
+        assert mock_process.call_count == 4
+
+    def test_run_until_stopped(self, tmp_path, mock_process):
+        """ポーリングモードでrunを実行し、stopで終了する"""
+        _write_pdf(tmp_path, "candidate_1.pdf")
+        watcher = FolderWatcher(str(tmp_path), debounce_seconds=0, poll_interval=0.01, use_polling=True)
+        mock_process.side_effect = lambda path: (watcher.stop(), _fake_process(path))[1]
+
+        watcher.run()
+
+        assert (tmp_path / "candidate_1_interview_briefing.pdf").exists()
+
+    def test_directory_not_found(self, tmp_path):
+        """存在しないディレクトリの場合はFileNotFoundError"""
+        with pytest.raises(FileNotFoundError):
+            FolderWatcher(str(tmp_path / "missing"))